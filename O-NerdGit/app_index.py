@@ -0,0 +1,189 @@
+"""
+O Nerd - Índice Aproximado de Aplicativos
+==========================================
+
+Resolve nomes de apps e sites mesmo quando o reconhecimento de voz
+troca algumas letras ("spotifai", "discorde", "calculadra").
+
+Os apelidos ficam em um índice invertido de trigramas, montado uma vez.
+A busca usa filtragem por prefixo: só as listas dos trigramas mais raros
+da consulta são percorridas, e o corte sobe conforme aparecem bons
+candidatos, o que mantém o custo abaixo de um milissegundo mesmo com
+dezenas de milhares de apelidos.
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import math
+from typing import Dict, FrozenSet, List, NamedTuple, Optional
+
+from config import (
+    SAFE_APPS, WINDOWS_APPS,
+    FUZZY_ASK_THRESHOLD,
+)
+from keywords import fold_accents
+
+KIND_APP = "app"
+KIND_SITE = "site"
+
+
+class AppMatch(NamedTuple):
+    """Resultado de uma busca no índice."""
+    alias: str
+    target: str
+    kind: str
+    score: float
+
+
+def normalize_alias(name: str) -> str:
+    """Normaliza um nome para comparação (minúsculas, sem acentos)."""
+    return " ".join(fold_accents(name.lower()).split())
+
+
+def _trigrams(text: str) -> FrozenSet[str]:
+    """Retorna o conjunto de trigramas do texto, com bordas marcadas."""
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class AppIndex:
+    """
+    Índice de trigramas sobre apelidos de apps e sites.
+
+    A similaridade é o coeficiente de Dice entre os conjuntos de
+    trigramas: 2 * comuns / (trigramas da consulta + do apelido).
+    """
+
+    def __init__(self, min_score: float = FUZZY_ASK_THRESHOLD):
+        """
+        Cria um índice vazio.
+
+        Args:
+            min_score: Menor pontuação devolvida por lookup()
+        """
+        self.min_score = min_score
+        self._aliases: List[str] = []
+        self._targets: List[str] = []
+        self._kinds: List[str] = []
+        self._grams: List[FrozenSet[str]] = []
+        self._postings: Dict[str, List[int]] = {}
+        self._exact: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+    def add(self, alias: str, target: str, kind: str = KIND_APP) -> None:
+        """
+        Adiciona um apelido ao índice. Apelidos repetidos são ignorados.
+
+        Args:
+            alias: Nome falado pelo usuário
+            target: Comando, caminho ou URL do app/site
+            kind: KIND_APP ou KIND_SITE
+        """
+        normalized = normalize_alias(alias)
+        if not normalized or normalized in self._exact:
+            return
+
+        alias_id = len(self._aliases)
+        grams = _trigrams(normalized)
+
+        self._exact[normalized] = alias_id
+        self._aliases.append(alias)
+        self._targets.append(target)
+        self._kinds.append(kind)
+        self._grams.append(grams)
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(alias_id)
+
+    def lookup(self, query: str, min_score: Optional[float] = None) -> Optional[AppMatch]:
+        """
+        Encontra o apelido mais parecido com a consulta.
+
+        Args:
+            query: Nome dito pelo usuário
+            min_score: Pontuação mínima (padrão: a do índice)
+
+        Returns:
+            Melhor resultado ou None se nada atingir a pontuação mínima
+        """
+        threshold = self.min_score if min_score is None else min_score
+        normalized = normalize_alias(query)
+        if not normalized:
+            return None
+
+        exact_id = self._exact.get(normalized)
+        if exact_id is not None:
+            return self._match(exact_id, 1.0)
+
+        query_grams = _trigrams(normalized)
+        total = len(query_grams)
+        rarest = sorted(query_grams, key=lambda gram: len(self._postings.get(gram, ())))
+
+        best_id, best_score = -1, 0.0
+        bound = threshold
+        seen = set()
+
+        for position, gram in enumerate(rarest):
+            # Dice >= t exige pelo menos t * m / (2 - t) trigramas em comum,
+            # então todo candidato contém um dos (m - mínimo + 1) mais raros.
+            # O limite sobe com o melhor resultado, encurtando a varredura.
+            min_common = max(1, math.ceil(bound * total / (2 - bound)))
+            if position > total - min_common:
+                break
+
+            for alias_id in self._postings.get(gram, ()):
+                if alias_id in seen:
+                    continue
+                seen.add(alias_id)
+
+                grams = self._grams[alias_id]
+                size = len(grams)
+                # Filtro de tamanho: apelidos muito maiores ou menores
+                # não alcançam o limite atual
+                if size * bound > total * (2 - bound) or total * bound > size * (2 - bound):
+                    continue
+
+                score = 2 * len(query_grams & grams) / (total + size)
+                if score > best_score or (score == best_score and alias_id < best_id):
+                    best_id, best_score = alias_id, score
+                    bound = max(bound, score)
+
+        if best_id < 0 or best_score < threshold:
+            return None
+        return self._match(best_id, best_score)
+
+    def _match(self, alias_id: int, score: float) -> AppMatch:
+        """Monta o resultado para um apelido."""
+        return AppMatch(
+            self._aliases[alias_id], self._targets[alias_id],
+            self._kinds[alias_id], score,
+        )
+
+
+def build_default_index() -> AppIndex:
+    """Monta o índice com os apps do Windows e os sites seguros."""
+    index = AppIndex()
+    # Apps do Windows têm prioridade sobre sites com o mesmo nome
+    for alias, target in WINDOWS_APPS.items():
+        index.add(alias, target, KIND_APP)
+    for alias, target in SAFE_APPS.items():
+        index.add(alias, target, KIND_SITE)
+    return index
+
+
+_index = build_default_index()
+
+
+def find_app(name: str) -> Optional[AppMatch]:
+    """
+    Procura um app ou site conhecido com nome parecido.
+
+    Args:
+        name: Nome dito pelo usuário
+
+    Returns:
+        Melhor resultado ou None
+    """
+    return _index.lookup(name)
@@ -0,0 +1,301 @@
+"""
+O Nerd - Captura Contínua do Microfone
+======================================
+
+Abrir e fechar o microfone a cada escuta custa a preparação do stream
+do PortAudio e perde o que é dito entre uma escuta e a seguinte. Aqui
+uma thread mantém um único stream aberto e grava os blocos em um buffer
+circular de tamanho fixo. Um detector de volume marca o início e o fim
+de cada fala, e quem consome (listen) é acordado quando uma fala
+termina, sem ficar consultando em laço.
+
+O limiar de volume parte do ruído medido no começo da gravação e
+acompanha o ruído ambiente enquanto ninguém fala, com os mesmos
+parâmetros do speech_recognition.
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import array
+import math
+import operator
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, NamedTuple, Optional, Tuple
+
+from config import (
+    CAPTURE_BUFFER_SECONDS, CAPTURE_PAUSE, CAPTURE_PRE_ROLL, CAPTURE_CALIBRATION,
+)
+
+# Como no speech_recognition: o limiar fica 1,5x acima do ruído e segue o
+# ruído ambiente com amortecimento por segundo
+ENERGY_RATIO = 1.5
+ENERGY_DAMPING = 0.15
+MIN_ENERGY = 50.0
+
+
+def rms(chunk: bytes) -> float:
+    """Volume (raiz da média dos quadrados) de um bloco PCM de 16 bits."""
+    samples = array.array("h", chunk)
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(map(operator.mul, samples, samples)) / len(samples))
+
+
+class RingBuffer:
+    """
+    Últimos N bytes de áudio em um bytearray de tamanho fixo.
+
+    As posições são absolutas (bytes gravados desde o início), então um
+    trecho marcado continua válido até ser sobrescrito. Não é seguro
+    entre threads sozinho: quem usa segura o próprio lock.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Args:
+            capacity: Tamanho do buffer em bytes
+        """
+        self.capacity = capacity
+        self.written = 0
+        self._data = bytearray(capacity)
+
+    @property
+    def oldest(self) -> int:
+        """Posição do byte mais antigo ainda guardado."""
+        return max(0, self.written - self.capacity)
+
+    def write(self, chunk: bytes) -> None:
+        """Acrescenta um bloco, sobrescrevendo o áudio mais antigo."""
+        size = len(chunk)
+        view = memoryview(chunk)[-self.capacity:]
+        position = (self.written + size - len(view)) % self.capacity
+        first = min(len(view), self.capacity - position)
+        self._data[position:position + first] = view[:first]
+        self._data[:len(view) - first] = view[first:]
+        self.written += size
+
+    def read(self, start: int, end: int) -> Optional[bytes]:
+        """
+        Copia o trecho [start, end) do áudio.
+
+        Returns:
+            Bytes do trecho, ou None se ele já foi sobrescrito
+        """
+        if start < self.oldest or end > self.written or start > end:
+            return None
+        length = end - start
+        position = start % self.capacity
+        first = min(length, self.capacity - position)
+        return bytes(self._data[position:position + first]) + bytes(self._data[:length - first])
+
+
+class Utterance(NamedTuple):
+    """Uma fala separada do áudio contínuo (PCM, como o AudioData)."""
+    data: bytes
+    sample_rate: int
+    sample_width: int
+    duration: float
+    ended: float  # time.perf_counter() em que o fim da fala foi detectado
+
+
+class MicrophoneCapture:
+    """
+    Thread que mantém o microfone aberto e separa as falas.
+
+    O microfone é um sr.Microphone (ou qualquer objeto que, no with,
+    entregue um source com stream.read, SAMPLE_RATE, SAMPLE_WIDTH e
+    CHUNK). Apenas um consumidor por vez.
+    """
+
+    def __init__(self, microphone: Any, phrase_limit: float = 10.0,
+                 buffer_seconds: float = CAPTURE_BUFFER_SECONDS,
+                 pause: float = CAPTURE_PAUSE, pre_roll: float = CAPTURE_PRE_ROLL,
+                 calibration: float = CAPTURE_CALIBRATION):
+        """
+        Args:
+            microphone: Microfone a manter aberto
+            phrase_limit: Duração máxima de uma fala (segundos)
+            buffer_seconds: Segundos de áudio guardados
+            pause: Silêncio que encerra uma fala (segundos)
+            pre_roll: Áudio de antes do início da fala incluído no trecho
+            calibration: Segundos iniciais usados para medir o ruído
+        """
+        self.microphone = microphone
+        self.phrase_limit = phrase_limit
+        self.buffer_seconds = buffer_seconds
+        self.pause = pause
+        self.pre_roll = pre_roll
+        self.calibration = calibration
+
+        self.sample_rate = 0
+        self.sample_width = 0
+        self.energy_threshold = MIN_ENERGY
+        self.calibration_seconds: Optional[float] = None
+        self.calibrated = threading.Event()
+        self.error: Optional[Exception] = None
+        self.chunks = 0
+        self.utterances = 0
+        self.overruns = 0
+        self.process_time = 0.0
+
+        self._buffer: Optional[RingBuffer] = None
+        self._bytes_per_second = 0
+        # Falas prontas: (início, fim, instante em que terminou)
+        self._ready: Deque[Tuple[int, int, float]] = deque()
+        self._changed = threading.Condition()
+        self._speech_start: Optional[int] = None
+        self._silence = 0.0
+        self._flushed_at = 0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Verifica se a thread de captura está gravando."""
+        return self._running
+
+    def start(self) -> None:
+        """Abre o microfone em uma thread e começa a gravar (calibra primeiro)."""
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="voice-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Para a gravação e fecha o microfone (acorda quem espera uma fala)."""
+        self._running = False
+        with self._changed:
+            self._changed.notify_all()
+
+    def flush(self) -> None:
+        """Descarta as falas já captadas e a que está em andamento (ex.: a própria voz)."""
+        with self._changed:
+            self._ready.clear()
+            self._speech_start = None
+            if self._buffer is not None:
+                self._flushed_at = self._buffer.written
+
+    def next_utterance(self, timeout: Optional[float] = None) -> Optional[Utterance]:
+        """
+        Espera a próxima fala completa.
+
+        Args:
+            timeout: Segundos para alguém começar a falar (padrão: sem
+                limite); uma fala já começada é esperada até o fim
+
+        Returns:
+            A fala, ou None (ninguém falou a tempo ou a captura parou)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while True:
+                while self._ready:
+                    start, end, ended = self._ready.popleft()
+                    data = self._buffer.read(start, end)
+                    if data is None:
+                        # Ficou tempo demais na fila e foi sobrescrita
+                        self.overruns += 1
+                        continue
+                    return Utterance(data, self.sample_rate, self.sample_width,
+                                     (end - start) / self._bytes_per_second, ended)
+                if not self._running:
+                    return None
+                if self._speech_start is not None:
+                    self._changed.wait()
+                    continue
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._changed.wait(remaining)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna blocos lidos, falas, falas perdidas e o custo por bloco.
+
+        Returns:
+            Dicionário com chunks, utterances, overruns, energy_threshold
+            e chunk_us (tempo médio de processamento de um bloco)
+        """
+        with self._changed:
+            return {
+                "chunks": self.chunks,
+                "utterances": self.utterances,
+                "overruns": self.overruns,
+                "energy_threshold": self.energy_threshold,
+                "chunk_us": self.process_time / self.chunks * 1e6 if self.chunks else 0.0,
+            }
+
+    def _run(self) -> None:
+        """Grava até stop() (roda na thread de captura)."""
+        start = time.perf_counter()
+        try:
+            with self.microphone as source:
+                self.sample_rate = source.SAMPLE_RATE
+                self.sample_width = source.SAMPLE_WIDTH
+                self._bytes_per_second = self.sample_rate * self.sample_width
+                self._buffer = RingBuffer(int(self.buffer_seconds * self.sample_rate) * self.sample_width)
+                self._calibrate(source)
+                self.calibration_seconds = time.perf_counter() - start
+                self.calibrated.set()
+
+                while self._running:
+                    self._process(source.stream.read(source.CHUNK))
+        except Exception as error:
+            self.error = error
+            print(f"[AVISO] Erro na captura do microfone: {error}")
+        finally:
+            self._running = False
+            self.calibrated.set()
+            with self._changed:
+                self._changed.notify_all()
+
+    def _calibrate(self, source: Any) -> None:
+        """Mede o ruído ambiente no começo da gravação e define o limiar."""
+        energies = []
+        seconds = 0.0
+        while seconds < self.calibration and self._running:
+            chunk = source.stream.read(source.CHUNK)
+            energies.append(rms(chunk))
+            seconds += len(chunk) / self._bytes_per_second
+            with self._changed:
+                self._buffer.write(chunk)
+        if energies:
+            self.energy_threshold = max(sum(energies) / len(energies) * ENERGY_RATIO, MIN_ENERGY)
+
+    def _process(self, chunk: bytes) -> None:
+        """Grava um bloco no buffer e acompanha o início e o fim da fala."""
+        started = time.perf_counter()
+        energy = rms(chunk)
+        seconds = len(chunk) / self._bytes_per_second
+        with self._changed:
+            self._buffer.write(chunk)
+            end = self._buffer.written
+            self.chunks += 1
+
+            if self._speech_start is None:
+                if energy > self.energy_threshold:
+                    pre_roll = int(self.pre_roll * self.sample_rate) * self.sample_width
+                    self._speech_start = max(end - len(chunk) - pre_roll,
+                                             self._buffer.oldest, self._flushed_at)
+                    self._silence = 0.0
+                    self._changed.notify_all()
+                else:
+                    # Ninguém falando: o limiar acompanha o ruído ambiente
+                    damping = ENERGY_DAMPING ** seconds
+                    target = energy * ENERGY_RATIO
+                    self.energy_threshold = max(
+                        self.energy_threshold * damping + target * (1 - damping), MIN_ENERGY,
+                    )
+            else:
+                self._silence = self._silence + seconds if energy <= self.energy_threshold else 0.0
+                length = (end - self._speech_start) / self._bytes_per_second
+                if self._silence >= self.pause or length >= self.phrase_limit:
+                    self._ready.append((self._speech_start, end, time.perf_counter()))
+                    self._speech_start = None
+                    self.utterances += 1
+                    self._changed.notify_all()
+        self.process_time += time.perf_counter() - started
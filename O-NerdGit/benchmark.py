@@ -0,0 +1,1652 @@
+#!/usr/bin/env python3
+"""
+O Nerd - Benchmarks
+===================
+
+Microbenchmarks dos caminhos quentes do assistente.
+Execute: python benchmark.py [nome]   (sem nome roda todos)
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(SCRIPT_DIR))
+
+
+# ============================================================================
+# CORPUS SINTÉTICO DE COMANDOS
+# ============================================================================
+
+COMMAND_TEMPLATES: List[str] = [
+    "abrir {app}",
+    "abre o {app}",
+    "abra o aplicativo {app}",
+    "abrir youtube e pesquisar {query}",
+    "abra o google e buscar {query}",
+    "pesquisar {query} no youtube",
+    "pesquisa {query} no google",
+    "pesquisar {query}",
+    "buscar {query} no youtube",
+    "procurar {query}",
+    "que horas são",
+    "que horas sao",
+    "que dia é hoje",
+    "qual a data de hoje",
+    "informações do sistema",
+    "informacoes do sistema",
+    "volume {number}",
+    "modo voz",
+    "modo texto",
+    "ajuda",
+    "conta uma piada nerd",
+    "qual a capital do brasil",
+    "me explica como funciona um processador",
+    "o que você pode fazer",
+]
+
+APPS: List[str] = [
+    "calculadora", "bloco de notas", "spotify", "discord", "steam",
+    "configurações", "vscode", "chrome", "youtube", "netflix", "blender",
+]
+
+QUERIES: List[str] = [
+    "receita de bolo", "células moleculares", "python asyncio",
+    "trailer do filme", "notícias de hoje", "música lo-fi",
+]
+
+
+def build_command_corpus(size: int = 5000, seed: int = 42) -> List[str]:
+    """Gera uma lista de comandos em português a partir dos modelos."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        template = rng.choice(COMMAND_TEMPLATES)
+        corpus.append(template.format(
+            app=rng.choice(APPS),
+            query=rng.choice(QUERIES),
+            number=rng.randint(0, 100),
+        ))
+    return corpus
+
+
+def time_per_call(func: Callable[[str], object], corpus: List[str],
+                  repeat: int = 5) -> float:
+    """Retorna o melhor tempo médio por chamada, em microssegundos."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(corpus) * 1e6
+
+
+# ============================================================================
+# DETECÇÃO DE INTENÇÕES
+# ============================================================================
+
+def _legacy_detect_command(user_input):
+    """Implementação anterior (laço de regex por chamada), para comparação."""
+    from config import WINDOWS_APPS, SAFE_APPS
+    text = user_input.lower().strip()
+
+    if any(word in text for word in ["sair", "exit", "quit", "tchau", "adeus", "fechar"]):
+        return ("exit", None)
+    if text in ["ajuda", "help", "comandos"]:
+        return ("help", None)
+    if "modo voz" in text:
+        return ("voice_mode", None)
+    if "modo texto" in text:
+        return ("text_mode", None)
+
+    abrir_match = re.match(r"(?:abrir|abre|abra)\s+(.+)", text)
+    if abrir_match:
+        app_name = abrir_match.group(1).strip()
+        if app_name.lower() in WINDOWS_APPS or app_name.lower() in SAFE_APPS:
+            return ("open", app_name)
+
+    patterns = [
+        (r"abr(?:ir|a)\s+(?:o\s+)?youtube\s+e\s+(?:pesquis|busc)([ae]r?\s+.+)", "youtube_search"),
+        (r"abr(?:ir|a)\s+(?:o\s+)?google\s+e\s+(?:pesquis|busc)([ae]r?\s+.+)", "google_search"),
+        (r"(?:abrir|abre|abra|open)\s+(?:o\s+)?(?:aplicativo\s+)?(.+)", "open"),
+        (r"pesquisar?\s+(.+?)\s+(?:no\s+)?youtube", "search_youtube"),
+        (r"pesquisar?\s+(.+?)\s+(?:no\s+)?google", "search_google"),
+        (r"pesquisar?\s+(.+)", "search_google"),
+        (r"(?:buscar?|procurar?)\s+(.+?)\s+(?:no\s+)?youtube", "search_youtube"),
+        (r"(?:buscar?|procurar?)\s+(.+)", "search_google"),
+        (r"(?:que\s+)?hora[s]?\s+(?:são|é|sao)", "time"),
+        (r"(?:que\s+)?dia\s+(?:é|e)\s+hoje", "date"),
+        (r"(?:data|hoje)", "date"),
+        (r"(?:info|informaç(?:ão|ões)|sistema)", "system_info"),
+        (r"volume\s+(\d+)", "volume"),
+    ]
+
+    for pattern, cmd_type in patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            arg = match.group(1) if match.lastindex else None
+            return (cmd_type, arg)
+
+    return (None, None)
+
+
+def bench_intents() -> None:
+    """Compara o motor de intenções pré-compilado com o laço antigo."""
+    from intents import detect_command
+
+    corpus = build_command_corpus()
+    legacy_us = time_per_call(_legacy_detect_command, corpus)
+    engine_us = time_per_call(detect_command, corpus)
+
+    differences = sum(
+        1 for text in corpus if detect_command(text) != _legacy_detect_command(text)
+    )
+
+    print(f"Detecção de intenções ({len(corpus)} comandos)")
+    print(f"  laço de regex antigo : {legacy_us:8.2f} µs/comando")
+    print(f"  motor pré-compilado  : {engine_us:8.2f} µs/comando")
+    print(f"  ganho                : {legacy_us / engine_us:8.2f}x")
+    print(f"  resultados diferentes: {differences} (acentos e limites de palavra)")
+
+
+# ============================================================================
+# PALAVRAS-CHAVE PERIGOSAS
+# ============================================================================
+
+LONG_MESSAGE_WORDS: List[str] = (
+    "o processador moderno tem vários núcleos e memória cache que acelera "
+    "o acesso aos dados quando o programa roda em paralelo com threads e "
+    "eu queria melhorar minha skill de programação para entender melhor"
+).split()
+
+
+def build_long_messages(count: int = 200, words: int = 300,
+                        seed: int = 7) -> List[str]:
+    """Gera mensagens longas, como as que seguem para a IA."""
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(LONG_MESSAGE_WORDS) for _ in range(words))
+        for _ in range(count)
+    ]
+
+
+def _legacy_is_dangerous(text: str, keywords: List[str]) -> bool:
+    """Implementação anterior (laço de substrings), para comparação."""
+    text_lower = text.lower()
+    for keyword in keywords:
+        if keyword in text_lower:
+            return True
+    return False
+
+
+def bench_keywords() -> None:
+    """Compara o laço antigo de substrings com o laço com limites e o autômato."""
+    from config import DANGEROUS_KEYWORDS
+    from commands import is_dangerous_command
+    from keywords import CATEGORY_DANGEROUS, KeywordAutomaton, BOUNDARY_PREFIX
+
+    messages = build_long_messages()
+    size = sum(len(message) for message in messages) // len(messages)
+    false_positives = sum(
+        1 for text in messages
+        if _legacy_is_dangerous(text, DANGEROUS_KEYWORDS) and not is_dangerous_command(text)
+    )
+    # Sem "skill" o laço antigo não para cedo: é o caso comum
+    rng = random.Random(7)
+    plain_words = [word for word in LONG_MESSAGE_WORDS if word != "skill"]
+    plain = [" ".join(rng.choice(plain_words) for _ in range(300)) for _ in range(200)]
+
+    def searches(keywords: List[str]):
+        """O mesmo conjunto de palavras com o laço e com o autômato."""
+        built = []
+        for loop_max in (len(keywords), 0):
+            automaton = KeywordAutomaton(loop_max=loop_max)
+            for keyword in keywords:
+                automaton.add(keyword, CATEGORY_DANGEROUS, BOUNDARY_PREFIX)
+            automaton.build()
+            built.append(automaton)
+        return built
+
+    rng = random.Random(3)
+    many_keywords = [
+        "".join(rng.choice("bcdfghjklmnpqrstvwxz") for _ in range(6))
+        for _ in range(1000)
+    ]
+
+    print(f"Palavras perigosas ({len(messages)} mensagens de ~{size} caracteres, sem palavra-chave)")
+    for keywords in (DANGEROUS_KEYWORDS, many_keywords):
+        loop, automaton = searches(keywords)
+        legacy_us = time_per_call(lambda text: _legacy_is_dangerous(text, keywords), plain)
+        loop_us = time_per_call(lambda text: loop.contains(text, CATEGORY_DANGEROUS), plain)
+        automaton_us = time_per_call(lambda text: automaton.contains(text, CATEGORY_DANGEROUS), plain)
+        print(f"  {len(keywords):>4} palavras: laço antigo {legacy_us:8.2f}, laço com limites "
+              f"{loop_us:8.2f}, autômato {automaton_us:8.2f} µs/mensagem")
+    print(f"  is_dangerous_command (até {KeywordAutomaton().loop_max} palavras usa o laço): "
+          f"{time_per_call(is_dangerous_command, plain):.2f} µs/mensagem")
+    print(f"  falsos positivos evitados : {false_positives} (\"kill\" em \"skill\")")
+
+
+# ============================================================================
+# ÍNDICE APROXIMADO DE APLICATIVOS
+# ============================================================================
+
+MANGLED_APP_NAMES: List[str] = [
+    "spotifai", "discorde", "calculadra", "bloco de nota", "netflics",
+    "youtub", "vs code", "obs studio", "whats app", "blendre", "abacaxi",
+]
+
+
+def build_synthetic_aliases(count: int = 30000, seed: int = 11) -> List[str]:
+    """Gera nomes de apps inventados, como os de uma varredura grande."""
+    rng = random.Random(seed)
+    syllables = ["ma", "ra", "to", "ko", "zen", "pix", "lo", "soft", "net",
+                 "play", "cloud", "studio", "x", "tron", "vi", "da", "go"]
+    aliases = set()
+    while len(aliases) < count:
+        words = [
+            "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+            for _ in range(rng.randint(1, 2))
+        ]
+        aliases.add(" ".join(words))
+    return sorted(aliases)
+
+
+def bench_apps() -> None:
+    """Mede a busca aproximada de apps em índices pequenos e grandes."""
+    from app_index import KIND_APP, build_default_index
+
+    queries = MANGLED_APP_NAMES * 100
+    index = build_default_index()
+    base_size = len(index)
+    small_us = time_per_call(index.lookup, queries)
+
+    start = time.perf_counter()
+    for alias in build_synthetic_aliases():
+        index.add(alias, alias, KIND_APP)
+    build_ms = (time.perf_counter() - start) * 1e3
+    large_us = time_per_call(index.lookup, queries)
+
+    print(f"Busca aproximada de apps ({len(MANGLED_APP_NAMES)} nomes mal reconhecidos)")
+    for name in MANGLED_APP_NAMES:
+        match = index.lookup(name)
+        found = f"{match.alias} ({match.score:.2f})" if match else "-"
+        print(f"  {name:15s} -> {found}")
+    print(f"  apps da configuração     : {small_us:8.2f} µs/busca")
+    print(f"  + {len(index) - base_size} apelidos sintéticos: {large_us:8.2f} µs/busca "
+          f"(índice montado em {build_ms:.0f} ms)")
+
+
+# ============================================================================
+# CLASSIFICADOR LOCAL
+# ============================================================================
+
+# Limiares do classificador local comparados na avaliação deixa-uma-de-fora
+CLASSIFIER_MIN_SCORES = (0.3, 0.35, 0.4, 0.45)
+CLASSIFIER_MIN_MARGINS = (0.05, 0.1, 0.15, 0.2)
+
+
+def bench_classifier() -> None:
+    """Avalia o classificador local (deixando uma frase de fora por vez)."""
+    from classifier import (
+        CHAT_LABEL, IntentClassifier, classify_local, load_corpus, resolve_intent,
+    )
+    from intents import detect_command
+
+    examples = load_corpus()
+    correct = accepted = accepted_wrong = 0
+    missed_by_rules = kept_local = 0
+    models = []
+
+    for position, (label, text) in enumerate(examples):
+        model = IntentClassifier()
+        model.train(examples[:position] + examples[position + 1:])
+        models.append(model)
+
+        if model.predict(text)[0] == label:
+            correct += 1
+
+        cmd_type, _ = resolve_intent(model, text)
+        if cmd_type:
+            accepted += 1
+            if cmd_type != label:
+                accepted_wrong += 1
+
+        if label != CHAT_LABEL and detect_command(text)[0] is None:
+            missed_by_rules += 1
+            if cmd_type == label:
+                kept_local += 1
+
+    texts = [text for _, text in examples]
+    inference_us = time_per_call(classify_local, texts)
+
+    print(f"Classificador local ({len(examples)} frases, deixa-uma-de-fora)")
+    print(f"  acurácia da intenção mais provável: {correct / len(examples):6.1%}")
+    print(f"  aceitas localmente                : {accepted} "
+          f"({accepted_wrong} com intenção errada)")
+    print(f"  comandos que as regras perdem     : {missed_by_rules}")
+    print(f"  resolvidos sem a IA               : {kept_local} "
+          f"({kept_local / max(missed_by_rules, 1):.1%})")
+    print(f"  inferência + extração            : {inference_us:8.2f} µs/frase")
+
+    print("  aceitas (erradas) por limiar de pontuação x margem:")
+    print("    pontuação " + "".join(f"{margin:>10.2f}" for margin in CLASSIFIER_MIN_MARGINS))
+    for min_score in CLASSIFIER_MIN_SCORES:
+        cells = []
+        for min_margin in CLASSIFIER_MIN_MARGINS:
+            results = [resolve_intent(model, text, min_score, min_margin)[0]
+                       for model, (_, text) in zip(models, examples)]
+            hits = [(cmd_type, label) for cmd_type, (label, _) in zip(results, examples)
+                    if cmd_type]
+            wrong = sum(cmd_type != label for cmd_type, label in hits)
+            cells.append(f"{len(hits):>5d} ({wrong})")
+        print(f"    {min_score:9.2f} " + "".join(f"{cell:>10s}" for cell in cells))
+
+
+# ============================================================================
+# CLIENTE DA IA
+# ============================================================================
+
+LLM_QUESTIONS: List[str] = [
+    "Responda só 'ok'.",
+    "Quanto é 2 + 2? Responda só o número.",
+    "Diga uma cor em uma palavra.",
+    "Diga um planeta em uma palavra.",
+    "Diga um animal em uma palavra.",
+]
+
+
+def _legacy_build_model():
+    """Como as interfaces montavam o modelo antes: um por mensagem."""
+    import google.generativeai as genai
+    from config import GEMINI_MODEL, GENERATION_CONFIG, SYSTEM_PROMPT
+
+    model = genai.GenerativeModel(model_name=GEMINI_MODEL, system_instruction=SYSTEM_PROMPT)
+    return model, genai.types.GenerationConfig(**GENERATION_CONFIG)
+
+
+def _llm_session(mode: str) -> Dict[str, object]:
+    """
+    Faz uma sequência de perguntas em um processo novo (conexão fria).
+
+    Args:
+        mode: "legacy" (modelo novo por mensagem, sem aquecimento),
+              "shared" (cliente compartilhado e aquecido) ou
+              "stream" (compartilhado, aquecido e em streaming)
+
+    Returns:
+        Tempos em ms da primeira resposta e das seguintes (até o
+        primeiro pedaço, no modo "stream"), ou o erro
+    """
+    from llm import REQUEST_OPTIONS, configure_api, get_llm_client
+
+    configure_api()
+    timings = []
+    warmup_ms = None
+    try:
+        if mode != "legacy":
+            client = get_llm_client()
+            start = time.perf_counter()
+            if client.warm_up() is not None:
+                warmup_ms = (time.perf_counter() - start) * 1000
+
+        for question in LLM_QUESTIONS:
+            contents = [{"role": "user", "parts": [question]}]
+            start = time.perf_counter()
+            if mode == "legacy":
+                model, generation_config = _legacy_build_model()
+                model.generate_content(contents=contents,
+                                       generation_config=generation_config,
+                                       request_options=REQUEST_OPTIONS).text
+            elif mode == "stream":
+                client.generate(contents, on_chunk=lambda _: None)
+                timings.append(client.get_stats()["last_first_chunk_seconds"] * 1000)
+                continue
+            else:
+                client.generate(contents)
+            timings.append((time.perf_counter() - start) * 1000)
+    except Exception as error:
+        return {"error": str(error).splitlines()[0][:120]}
+
+    return {"first": timings[0], "steady": timings[1:], "warmup": warmup_ms}
+
+
+def bench_llm() -> None:
+    """Compara a montagem do modelo por mensagem com o cliente compartilhado."""
+    import multiprocessing
+    from llm import get_llm_client
+
+    questions = ["oi"] * 200
+    legacy_us = time_per_call(lambda _: _legacy_build_model(), questions)
+    shared_us = time_per_call(lambda _: get_llm_client(), questions)
+
+    print("Cliente da IA")
+    print(f"  montagem por mensagem (antes) : {legacy_us:8.2f} µs")
+    print(f"  cliente compartilhado (agora) : {shared_us:8.2f} µs")
+
+    # Cada modo roda em um processo novo, para começar com a conexão fria
+    context = multiprocessing.get_context("spawn")
+    modes = (
+        ("legacy", "chamadas reais (antes)        "),
+        ("shared", "chamadas reais (agora)        "),
+        ("stream", "primeiro pedaço (streaming)   "),
+    )
+    for mode, title in modes:
+        with context.Pool(1) as pool:
+            result = pool.apply(_llm_session, (mode,))
+        if "error" in result:
+            print(f"  {title}: puladas ({result['error']})")
+            continue
+        steady = result["steady"]
+        warmup = f", aquecimento {result['warmup']:.0f} ms" if result["warmup"] else ""
+        print(f"  {title}: primeira {result['first']:.0f} ms, "
+              f"seguintes {sum(steady) / len(steady):.0f} ms{warmup}")
+
+
+# ============================================================================
+# FALA EM STREAMING
+# ============================================================================
+
+SAMPLE_REPLY = (
+    "Boa pergunta! Um processador executa instruções em ciclos: busca a "
+    "instrução na memória, decodifica e executa. Os núcleos permitem rodar "
+    "várias tarefas ao mesmo tempo, e o cache guarda dados usados com "
+    "frequência para evitar idas à memória principal, que é bem mais lenta. "
+    "Quer que eu explique a diferença entre núcleos e threads? "
+) * 3
+
+
+def bench_speech(chunk_chars: int = 12, chunk_ms: float = 15.0) -> None:
+    """
+    Simula uma resposta em streaming e mede quando a primeira frase
+    fica pronta para a voz, comparado com o fim da geração.
+    """
+    from voice import SentenceSplitter
+
+    splitter = SentenceSplitter()
+    chunks = [SAMPLE_REPLY[i:i + chunk_chars] for i in range(0, len(SAMPLE_REPLY), chunk_chars)]
+    first_sentence_ms = None
+    sentences = 0
+    for position, chunk in enumerate(chunks, 1):
+        ready = splitter.feed(chunk)
+        if ready and first_sentence_ms is None:
+            first_sentence_ms = position * chunk_ms
+        sentences += len(ready)
+    sentences += len(splitter.flush())
+    total_ms = len(chunks) * chunk_ms
+
+    feed_us = time_per_call(lambda chunk: SentenceSplitter().feed(chunk), chunks)
+
+    print(f"Fala em streaming ({len(chunks)} pedaços de {chunk_chars} caracteres "
+          f"a cada {chunk_ms:.0f} ms, {sentences} trechos)")
+    print(f"  fala começa (antes, fim da geração) : {total_ms:8.0f} ms")
+    print(f"  fala começa (agora, primeira frase) : {first_sentence_ms:8.0f} ms")
+    print(f"  divisão em frases                   : {feed_us:8.2f} µs/pedaço")
+
+
+# ============================================================================
+# CACHE DE RESPOSTAS
+# ============================================================================
+
+def bench_cache(entries: int = 2000) -> None:
+    """Mede consulta e gravação no cache de respostas em disco."""
+    import tempfile
+    from response_cache import ResponseCache
+
+    with tempfile.TemporaryDirectory() as folder:
+        cache = ResponseCache(Path(folder) / "cache.db", max_entries=entries)
+        prompts = [f"pergunta repetida número {i}" for i in range(entries)]
+        conversations = [[{"role": "user", "parts": [prompt]}] for prompt in prompts]
+
+        start = time.perf_counter()
+        for conversation in conversations:
+            cache.put(conversation, "bench", "resposta " * 40)
+        put_us = (time.perf_counter() - start) / entries * 1e6
+
+        hit_us = time_per_call(lambda prompt: cache.get([{"role": "user", "parts": [prompt]}], "bench"),
+                               prompts[:500])
+        miss_us = time_per_call(lambda prompt: cache.get([{"role": "user", "parts": [prompt + "?x"]}], "bench"),
+                                prompts[:500])
+        cache._connection.close()
+
+    print(f"Cache de respostas ({entries} entradas em SQLite)")
+    print(f"  gravação (com limites) : {put_us:8.2f} µs")
+    print(f"  acerto                 : {hit_us:8.2f} µs")
+    print(f"  falta                  : {miss_us:8.2f} µs")
+
+
+# ============================================================================
+# HISTÓRICO DA CONVERSA
+# ============================================================================
+
+def build_conversation(turns: int = 300, seed: int = 5) -> List[str]:
+    """Gera perguntas curtas e respostas de tamanho muito variado."""
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(turns):
+        messages.append("pergunta " * rng.randint(2, 15))
+        # Maioria de respostas curtas, algumas bem longas
+        words = rng.choice([10, 20, 40, 60, 400, 700])
+        messages.append("resposta " * words)
+    return messages
+
+
+def bench_history() -> None:
+    """Compara o corte por 20 mensagens com o orçamento de tokens."""
+    from history import ConversationHistory, estimate_tokens
+
+    messages = build_conversation()
+
+    legacy, legacy_sizes = [], []
+    history, budget_sizes = ConversationHistory(), []
+    for position, text in enumerate(messages):
+        role = "user" if position % 2 == 0 else "model"
+        legacy.append({"role": role, "parts": [text]})
+        if len(legacy) > 20:
+            legacy.pop(0)
+            legacy.pop(0)
+        history.add(role, text)
+        if role == "user":
+            legacy_sizes.append(sum(estimate_tokens(m["parts"][0]) for m in legacy))
+            budget_sizes.append(sum(estimate_tokens(m["parts"][0]) for m in history.messages()))
+
+    def describe(sizes: List[int]) -> str:
+        ordered = sorted(sizes)
+        return (f"média {sum(sizes) / len(sizes):6.0f}, p95 {ordered[int(len(ordered) * 0.95)]:6.0f}, "
+                f"máx {ordered[-1]:6.0f} tokens")
+
+    add_us = time_per_call(lambda text: history.add("user", text), messages)
+
+    print(f"Histórico da conversa ({len(messages) // 2} trocas, "
+          f"orçamento {history.token_budget} tokens)")
+    print(f"  20 mensagens (antes) : {describe(legacy_sizes)}")
+    print(f"  orçamento (agora)    : {describe(budget_sizes)}")
+    print(f"  add() com descarte   : {add_us:8.2f} µs")
+
+
+# ============================================================================
+# LIMITE DE REQUISIÇÕES
+# ============================================================================
+
+class FakeQuotaEndpoint:
+    """Endpoint falso com cota por janela fixa; o excesso recebe 429."""
+
+    def __init__(self, per_window: int, window: float):
+        import threading
+        self.per_window = per_window
+        self.window = window
+        self.calls = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._used = 0
+
+    def __call__(self) -> str:
+        from google.api_core import exceptions as api_exceptions
+
+        with self._lock:
+            self.calls += 1
+            now = time.monotonic()
+            if now - self._window_start >= self.window:
+                self._window_start, self._used = now, 0
+            if self._used >= self.per_window:
+                self.rejected += 1
+                wait = self.window - (now - self._window_start)
+                raise api_exceptions.ResourceExhausted(
+                    f"Quota exceeded. Please retry in {wait:.2f}s.")
+            self._used += 1
+        return "ok"
+
+
+def _run_burst(endpoint: FakeQuotaEndpoint, call: Callable[[], str],
+               threads: int, per_thread: int) -> Dict[str, float]:
+    """Dispara várias threads contra o endpoint e conta falhas."""
+    import threading
+
+    failures = []
+
+    def worker() -> None:
+        for _ in range(per_thread):
+            try:
+                call()
+            except Exception:
+                failures.append(1)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return {
+        "seconds": time.perf_counter() - start,
+        "failures": len(failures),
+        "calls": endpoint.calls,
+        "rejected": endpoint.rejected,
+    }
+
+
+def bench_ratelimit(threads: int = 4, per_thread: int = 5) -> None:
+    """Rajada de requisições contra uma cota de 10 por segundo."""
+    from rate_limit import RateLimiter, call_with_retry
+
+    total = threads * per_thread
+    print(f"Limite de requisições ({threads} threads x {per_thread} pedidos, "
+          f"cota falsa de 10/s)")
+
+    endpoint = FakeQuotaEndpoint(10, 1.0)
+    result = _run_burst(endpoint, endpoint, threads, per_thread)
+    print(f"  sem limite nem novas tentativas : {result['failures']:3d}/{total} falharam, "
+          f"{result['rejected']:3d} respostas 429, {result['seconds']:.2f} s")
+
+    endpoint = FakeQuotaEndpoint(10, 1.0)
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=10 ** 9)
+    result = _run_burst(endpoint, lambda: call_with_retry(endpoint, limiter), threads, per_thread)
+    print(f"  limite + novas tentativas       : {result['failures']:3d}/{total} falharam, "
+          f"{result['rejected']:3d} respostas 429, {result['seconds']:.2f} s")
+
+
+# ============================================================================
+# DISJUNTOR DA IA
+# ============================================================================
+
+class FakeDownModel:
+    """Modelo falso de uma API fora do ar: cada chamada falha após um atraso."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+
+    def generate_content(self, *args, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        raise ConnectionError("sem rede")
+
+
+def _outage_latencies(client, questions: List[str]) -> List[float]:
+    """Faz as perguntas ao cliente e mede o tempo de cada resposta ou erro."""
+    latencies = []
+    for question in questions:
+        start = time.perf_counter()
+        try:
+            client.generate([{"role": "user", "parts": [question]}])
+        except Exception:
+            pass
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def bench_breaker(questions: int = 10, delay: float = 0.5) -> None:
+    """Sequência de perguntas com a API fora do ar, com e sem o disjuntor."""
+    from circuit_breaker import CircuitBreaker
+    from config import GEMINI_MODEL
+    from llm import LLMClient
+
+    corpus = [f"pergunta {i} durante a queda" for i in range(questions)]
+    print(f"Disjuntor da IA ({questions} perguntas, cada chamada falha após "
+          f"{delay * 1000:.0f} ms)")
+
+    client = LLMClient(GEMINI_MODEL, "bench", {})
+    client.model = FakeDownModel(delay)
+    latencies = _outage_latencies(client, corpus)
+    print(f"  sem disjuntor : {sum(latencies) / len(latencies):8.1f} ms/pergunta, "
+          f"{client.model.calls} chamadas à API")
+
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60.0)
+    client = LLMClient(GEMINI_MODEL, "bench", {}, breaker=breaker)
+    client.model = FakeDownModel(delay)
+    latencies = _outage_latencies(client, corpus)
+    opened = latencies[breaker.failure_threshold:]
+    print(f"  com disjuntor : {sum(latencies) / len(latencies):8.1f} ms/pergunta, "
+          f"{client.model.calls} chamadas à API")
+    print(f"  depois de aberto (resposta local) : {sum(opened) / len(opened):8.3f} ms/pergunta")
+
+
+# ============================================================================
+# INTERRUPÇÃO (BARGE-IN)
+# ============================================================================
+
+def make_fake_speaker(seconds_per_char: float):
+    """
+    Assistente de voz com a fila e a thread da fala de verdade, mas com
+    um motor falso: fala na velocidade de uma voz real e pode ser
+    interrompido.
+    """
+    import threading
+    from voice import VoiceAssistant
+
+    class FakeSpeaker(VoiceAssistant):
+        def __init__(self):
+            super().__init__()
+            self._stopped = threading.Event()
+
+        def is_tts_available(self) -> bool:
+            return True
+
+        def _initialize_text_to_speech(self) -> None:
+            # Sem pyttsx3: o próprio falso faz o papel do motor
+            self.engine = self
+
+        def _say_now(self, text: str) -> None:
+            self._stopped.clear()
+            self._stopped.wait(len(text) * seconds_per_char)
+
+        def _stop_now(self) -> None:
+            self._stopped.set()
+
+    return FakeSpeaker()
+
+
+def _fake_stream(chunks: List[str], chunk_delay: float):
+    """Gerador falso de resposta em streaming que respeita o cancelamento."""
+    from llm import GenerationCancelled
+
+    def produce(on_chunk, cancel) -> str:
+        for chunk in chunks:
+            time.sleep(chunk_delay)
+            if cancel.is_set():
+                raise GenerationCancelled()
+            if on_chunk:
+                on_chunk(chunk)
+        return "".join(chunks).strip()
+    return produce
+
+
+def _bargein_session(chunks: List[str], chunk_delay: float, seconds_per_char: float,
+                     requests: List[tuple]) -> Dict[str, Dict[str, float]]:
+    """Roda o motor com pedidos programados e mede cada resposta."""
+    import asyncio
+    from conversation import ConversationEngine
+
+    speaker = make_fake_speaker(seconds_per_char)
+    pending = iter(requests)
+    results: Dict[str, Dict[str, float]] = {}
+
+    def listen():
+        try:
+            delay, text = next(pending)
+        except StopIteration:
+            time.sleep(60)
+            return None
+        time.sleep(delay)
+        results[text] = {"heard": time.perf_counter()}
+        return text
+
+    async def handle(turn) -> None:
+        results[turn.text]["started"] = turn.started
+        await engine.reply(turn, _fake_stream(chunks, chunk_delay))
+        results[turn.text]["first_audio"] = speaker.first_audio_times[-1]
+        results[turn.text]["finished"] = time.perf_counter()
+        if turn.text == requests[-1][1]:
+            engine.stop()
+
+    async def session() -> None:
+        await engine.start(speaker)
+        await engine.run(listen)
+
+    engine = ConversationEngine(handle)
+    asyncio.run(session())
+    return results
+
+
+def bench_bargein(interrupt_at: float = 0.5, chunk_delay: float = 0.03,
+                  seconds_per_char: float = 0.004) -> None:
+    """
+    Um segundo pedido chega enquanto a primeira resposta ainda é falada.
+    Mede o tempo até a primeira fala da nova resposta: no loop síncrono o
+    pedido só é ouvido ao fim da resposta anterior; no assíncrono ele
+    interrompe a geração e a fala.
+    """
+    chunks = [SAMPLE_REPLY[i:i + 12] for i in range(0, len(SAMPLE_REPLY), 12)]
+
+    # Resposta inteira sem interrupção, como no loop síncrono
+    single = _bargein_session(chunks, chunk_delay, seconds_per_char, [(0.0, "primeira")])
+    reply = single["primeira"]["finished"] - single["primeira"]["started"]
+    sync_latency = reply - interrupt_at + single["primeira"]["first_audio"]
+
+    both = _bargein_session(chunks, chunk_delay, seconds_per_char,
+                            [(0.0, "primeira"), (interrupt_at, "segunda")])
+    second = both["segunda"]
+    async_latency = second["started"] - second["heard"] + second["first_audio"]
+
+    print(f"Interrupção ({len(chunks)} pedaços a cada {chunk_delay * 1000:.0f} ms, "
+          f"resposta falada em {reply:.1f} s, novo pedido após {interrupt_at:.1f} s)")
+    print(f"  novo pedido até a fala (loop síncrono)   : {sync_latency * 1000:8.0f} ms")
+    print(f"  novo pedido até a fala (loop assíncrono) : {async_latency * 1000:8.0f} ms")
+    print(f"  cancelamento da resposta anterior        : "
+          f"{(second['started'] - second['heard']) * 1000:8.2f} ms")
+
+
+def bench_tts(sentences: int = 6, seconds_per_char: float = 0.002) -> None:
+    """
+    Fila da fala com motor falso: quanto speak() trava quem fala, quanto
+    uma confirmação espera atrás de uma resposta longa e quanto leva o
+    barge-in para calar a fila.
+    """
+    from voice import PRIORITY_CONFIRMATION, SentenceSplitter
+
+    splitter = SentenceSplitter()
+    answer = splitter.feed(SAMPLE_REPLY)[:sentences]
+    confirmation = "Abrindo o YouTube."
+    spoken_ms = sum(len(sentence) for sentence in answer) * seconds_per_char * 1000
+
+    speaker = make_fake_speaker(seconds_per_char)
+    speaker.warm_up_speech()
+    speaker.speak("ok", echo=False).result()
+
+    # speak() só enfileira: o loop segue enquanto a resposta é falada
+    start = time.perf_counter()
+    for sentence in answer:
+        speaker.speak(sentence, echo=False)
+    enqueue_ms = (time.perf_counter() - start) * 1000
+    speaker.wait_idle()
+
+    # Confirmação pedida logo depois da resposta: na frente ou no fim da fila
+    def confirmation_wait(priority: int) -> float:
+        started = {}
+        for sentence in answer:
+            speaker.speak(sentence, echo=False)
+        # A primeira frase já está sendo falada
+        time.sleep(0.05)
+        asked = time.perf_counter()
+        speaker.speak(confirmation, echo=False, priority=priority,
+                      on_start=lambda: started.setdefault("at", time.perf_counter()))
+        speaker.wait_idle()
+        return (started["at"] - asked) * 1000
+
+    fifo_ms = confirmation_wait(10 ** 6)
+    priority_ms = confirmation_wait(PRIORITY_CONFIRMATION)
+
+    # Barge-in: stop() descarta a fila e corta a frase atual
+    for sentence in answer:
+        speaker.speak(sentence, echo=False)
+    time.sleep(0.05)
+    start = time.perf_counter()
+    speaker.stop()
+    speaker.wait_idle()
+    stop_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Fila da fala ({len(answer)} frases, {spoken_ms:.0f} ms de fala, motor falso)")
+    print(f"  loop travado por speak (antes, síncrono)   : {spoken_ms:8.1f} ms")
+    print(f"  loop travado por speak (agora, fila)       : {enqueue_ms:8.3f} ms")
+    print(f"  confirmação até falar (ordem de chegada)   : {fifo_ms:8.1f} ms")
+    print(f"  confirmação até falar (com prioridade)     : {priority_ms:8.1f} ms (fim da frase atual)")
+    print(f"  barge-in até a fila calar                  : {stop_ms:8.2f} ms")
+
+
+class FakeRenderer:
+    """Motor falso do pyttsx3 para save_to_file: grava silêncio do tamanho da frase."""
+
+    def __init__(self):
+        self._pending = []
+
+    def save_to_file(self, text: str, filename: str) -> None:
+        self._pending.append((text, filename))
+
+    def runAndWait(self) -> None:
+        import wave
+        for text, filename in self._pending:
+            with wave.open(filename, "wb") as output:
+                output.setnchannels(1)
+                output.setsampwidth(2)
+                output.setframerate(22050)
+                # ~60 ms de fala por caractere
+                output.writeframes(b"\0\0" * int(22050 * 0.06 * len(text)))
+        self._pending = []
+
+
+def bench_phrases(phrases: int = 400, max_files: int = 100) -> None:
+    """
+    Cache de frases com motor falso: custo de consulta, gravação e
+    despejo LRU. Tocar o WAV (winsound) só existe no Windows.
+    """
+    import tempfile
+    from config import PHRASE_CACHE_WARMUP, SAFE_APPS
+    from phrase_cache import PhraseCache, is_cacheable_phrase
+
+    samples = PHRASE_CACHE_WARMUP + [f"Abrindo {name}..." for name in SAFE_APPS]
+    samples += [f"Abrindo o app {chr(97 + i % 26)}{chr(97 + i // 26 % 26)}..." for i in range(phrases)]
+    samples = [text for text in samples if is_cacheable_phrase(text)]
+    renderer = FakeRenderer()
+
+    with tempfile.TemporaryDirectory() as folder:
+        cache = PhraseCache(Path(folder), max_files=max_files, enabled=True)
+        start = time.perf_counter()
+        for text in samples:
+            cache.render(renderer, text, "voz")
+        render_ms = (time.perf_counter() - start) / len(samples) * 1000
+
+        kept = [text for text in samples if cache.contains(text, "voz")]
+        hit_us = time_per_call(lambda text: cache.lookup(text, "voz"), kept)
+        miss_us = time_per_call(lambda text: cache.lookup(text + "?", "voz"), kept)
+        files = list(Path(folder).glob("*.wav"))
+
+        # Reabrir a pasta (novo processo) lê o índice do disco
+        start = time.perf_counter()
+        reopened = PhraseCache(Path(folder), max_files=max_files, enabled=True)
+        reopened.contains(samples[0], "voz")
+        index_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Cache de frases ({len(samples)} frases gravadas, limite de {max_files} arquivos)")
+    print(f"  gravação + despejo (motor falso) : {render_ms:8.2f} ms/frase")
+    print(f"  acerto (marca o uso)             : {hit_us:8.2f} µs")
+    print(f"  falta                            : {miss_us:8.2f} µs")
+    print(f"  arquivos mantidos na pasta       : {len(files):8d} (os {len(kept)} mais recentes)")
+    print(f"  leitura da pasta ao iniciar      : {index_ms:8.2f} ms")
+
+
+class FakeMicrophone:
+    """
+    Microfone falso no formato do sr.Microphone: ruído baixo com falas
+    (tom alto) de tempos em tempos, entregue mais rápido que o real.
+    """
+
+    SAMPLE_RATE = 16000
+    SAMPLE_WIDTH = 2
+    CHUNK = 1024
+
+    def __init__(self, speech: float, silence: float, speedup: float, seed: int = 3):
+        import array
+        import math
+        rng = random.Random(seed)
+        noise = [rng.randint(-40, 40) for _ in range(self.SAMPLE_RATE)]
+        cycle = array.array("h")
+        for i in range(int(silence * self.SAMPLE_RATE)):
+            cycle.append(noise[i % len(noise)])
+        for i in range(int(speech * self.SAMPLE_RATE)):
+            cycle.append(int(3000 * math.sin(2 * math.pi * 220 * i / self.SAMPLE_RATE)))
+        data = cycle.tobytes()
+        size = self.CHUNK * self.SAMPLE_WIDTH
+        self.cycle = [data[i:i + size] for i in range(0, len(data) - size + 1, size)]
+        self.delay = self.CHUNK / self.SAMPLE_RATE / speedup
+        self.reads = 0
+        self.stream = self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def read(self, size: int) -> bytes:
+        time.sleep(self.delay)
+        chunk = self.cycle[self.reads % len(self.cycle)]
+        self.reads += 1
+        return chunk
+
+
+def bench_capture(utterances: int = 20, speech: float = 1.5, silence: float = 1.5,
+                  speedup: float = 20.0) -> None:
+    """
+    Captura contínua com microfone falso: falas separadas do áudio,
+    custo por bloco e atraso até quem espera a fala ser acordado.
+    """
+    from audio_capture import MicrophoneCapture
+
+    microphone = FakeMicrophone(speech, silence, speedup)
+    capture = MicrophoneCapture(microphone, calibration=0.5)
+    capture.start()
+    capture.calibrated.wait()
+
+    wake_ms = []
+    durations = []
+    while len(durations) < utterances:
+        utterance = capture.next_utterance(timeout=10)
+        if utterance is None:
+            break
+        wake_ms.append((time.perf_counter() - utterance.ended) * 1000)
+        durations.append(utterance.duration)
+    capture.stop()
+    stats = capture.get_stats()
+
+    audio_seconds = microphone.reads * microphone.CHUNK / microphone.SAMPLE_RATE
+    cpu = stats["chunk_us"] * stats["chunks"] / 1e6
+    print(f"Captura contínua ({audio_seconds:.0f} s de áudio falso a {speedup:.0f}x, "
+          f"falas de {speech:.1f} s a cada {speech + silence:.1f} s)")
+    print(f"  falas separadas            : {len(durations):8d} de {utterances} "
+          f"(duração média {sum(durations) / max(len(durations), 1):.2f} s com pausa e pré-rolagem)")
+    print(f"  processamento por bloco    : {stats['chunk_us']:8.1f} µs "
+          f"({cpu / audio_seconds * 100:.2f}% de um núcleo)")
+    print(f"  fala pronta até acordar    : {sum(wake_ms) / len(wake_ms):8.3f} ms (média), "
+          f"{max(wake_ms):.3f} ms (pior)")
+    print(f"  falas perdidas (buffer)    : {stats['overruns']:8d}")
+
+
+def _synthetic_word(rng: random.Random, tones: List[float], stretch: float, rate: int):
+    """Sequência de tons com ruído: faz as vezes de uma palavra (não é voz)."""
+    import numpy as np
+    parts = []
+    for frequency in tones:
+        length = int(rate * 0.12 * stretch * rng.uniform(0.9, 1.1))
+        t = np.arange(length) / rate
+        parts.append(0.3 * np.sin(2 * np.pi * frequency * t) + 0.15 * np.sin(2 * np.pi * 2.7 * frequency * t))
+    word = np.concatenate(parts)
+    return (word + np.random.default_rng(rng.randrange(10 ** 6)).normal(0, 0.02, len(word))).astype(np.float32)
+
+
+def bench_wakeword(clips: int = 40, rate: int = 16000) -> None:
+    """
+    Detector local da palavra de ativação: custo de CPU por segundo de
+    áudio e o caminho completo (MFCC + DTW + limiar) com sinais
+    sintéticos. As taxas de erro reais vêm de python wake_word.py avaliar
+    com gravações no corpus.
+    """
+    from wake_word import (CORPUS_DIR, NUMPY_AVAILABLE, WakeWordDetector,
+                           evaluate, template_from_samples)
+    if not NUMPY_AVAILABLE:
+        print("Palavra de ativação: numpy não instalado")
+        return
+    import numpy as np
+
+    rng = random.Random(11)
+    wake = [300.0, 650.0, 1100.0, 500.0]
+    silence = np.zeros(int(rate * 0.3), dtype=np.float32)
+
+    def clip(tones: List[float]):
+        command = [rng.choice([250.0, 400.0, 800.0, 1500.0, 2000.0]) for _ in range(8)]
+        return np.concatenate([silence, _synthetic_word(rng, tones, rng.uniform(0.85, 1.15), rate),
+                               _synthetic_word(rng, command, 1.0, rate), silence])
+
+    detector = WakeWordDetector(folder=Path("/nonexistent"), enabled=True)
+    templates = [template_from_samples(_synthetic_word(rng, wake, stretch, rate), rate)
+                 for stretch in (0.9, 1.0, 1.1)]
+    positives = [clip(wake) for _ in range(clips)]
+    negatives = [clip([rng.choice([250.0, 400.0, 800.0, 1500.0, 2000.0]) for _ in wake])
+                 for _ in range(clips)]
+
+    positive_scores = [detector.score(samples, rate, templates)[0] for samples in positives]
+    negative_scores = [detector.score(samples, rate, templates)[0] for samples in negatives]
+    stats = detector.get_stats()
+    threshold = detector.threshold
+    far = sum(score <= threshold for score in negative_scores) / len(negative_scores)
+    frr = sum(score > threshold for score in positive_scores) / len(positive_scores)
+    seconds = sum(len(samples) for samples in positives + negatives) / rate
+
+    print(f"Palavra de ativação ({len(templates)} referências, {2 * clips} falas sintéticas "
+          f"de {seconds / (2 * clips):.1f} s, janela de {detector.window:.1f} s)")
+    print(f"  CPU (MFCC + DTW)                : {stats['cpu_ms_per_second']:8.2f} ms por segundo de áudio")
+    print(f"  distância média (com / sem)     : {np.mean(positive_scores):8.3f} / {np.mean(negative_scores):.3f}")
+    print(f"  sintético: FAR {far * 100:.1f}%, FRR {frr * 100:.1f}% com limiar {threshold:.2f} "
+          f"(tons, não voz: mostra o caminho, não a precisão)")
+    print(f"  fala descartada sem ir à nuvem  : {stats['cpu_ms_per_second'] * detector.window:8.2f} ms "
+          f"(antes: uma chamada ao reconhecimento do Google)")
+
+    result = evaluate(CORPUS_DIR)
+    if result["positives"] and result["negatives"] and result["templates"]:
+        print(f"  corpus: FAR {result['far'] * 100:.1f}%, FRR {result['frr'] * 100:.1f}% "
+              f"({result['positives']} positivas, {result['negatives']} negativas), "
+              f"limiar FAR = FRR {result['eer_threshold']:.3f}")
+    else:
+        print(f"  corpus ({CORPUS_DIR.name}): sem gravações ainda, veja o LEIA_ME.md da pasta")
+
+
+# ============================================================================
+# ROTEAMENTO DE MODELOS
+# ============================================================================
+
+class FakeTierClient:
+    """Cliente falso de um nível: responde na hora ou recusa (resposta vazia)."""
+
+    def __init__(self, model: str, refuse: bool):
+        self.model = model
+        self.refuse = refuse
+
+    def estimate_request_tokens(self, contents) -> int:
+        return 10
+
+    def generate(self, contents, on_chunk=None, cancel=None) -> str:
+        return "" if self.refuse else f"resposta do {self.model}"
+
+
+def bench_router() -> None:
+    """Distribui as frases de conversa do corpus entre os níveis de modelo."""
+    from collections import Counter
+    from classifier import CHAT_LABEL, load_corpus
+    from config import GENERATION_CONFIG
+    from model_router import ModelRouter
+
+    prompts = [text for label, text in load_corpus() if label == CHAT_LABEL]
+    router = ModelRouter(log=False)
+
+    print(f"Roteamento de modelos ({len(prompts)} frases de conversa do corpus)")
+    for mode in ("text", "voice"):
+        routes = [router.route(prompt, mode) for prompt in prompts]
+        tiers = Counter(route.tier for route in routes)
+        tokens = sum(route.max_output_tokens for route in routes) / len(routes)
+        spread = ", ".join(f"{tier} {tiers[tier]}" for tier in router.order if tiers[tier])
+        print(f"  {mode:5s}: {spread}; limite médio de {tokens:.0f} tokens de saída "
+              f"(antes: {GENERATION_CONFIG['max_output_tokens']} em todos)")
+
+    route_us = time_per_call(router.route, prompts)
+    print(f"  escolha do nível               : {route_us:8.2f} µs/pedido")
+
+    # O nível rápido recusa: o pedido sobe para o seguinte
+    fallback = ModelRouter(log=False, client_factory=lambda model, config, prompt: FakeTierClient(
+        model, refuse=model == router.tiers[router.order[0]]["model"]))
+    reply = fallback.generate([{"role": "user", "parts": ["bom dia"]}])
+    escalated = fallback.get_stats()[router.order[0]]["escalations"]
+    print(f"  recusa no nível rápido         : {escalated} subida, \"{reply}\"")
+
+
+# ============================================================================
+# CARGA CONTRA O SERVIDOR FALSO DO GEMINI
+# ============================================================================
+
+def _free_port() -> int:
+    """Porta local livre para o servidor falso."""
+    import socket
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _fake_load(threads: int, per_thread: int, error_429: float,
+               error_500: float) -> Dict[str, object]:
+    """
+    Roda em um processo novo: sobe o servidor falso, aponta o cliente para
+    ele e dispara perguntas em streaming de várias threads.
+    """
+    import os
+    import threading
+
+    # Antes de importar config, que lê o endpoint na importação
+    port = _free_port()
+    os.environ["ONERD_GEMINI_ENDPOINT"] = f"http://127.0.0.1:{port}"
+
+    from fake_gemini import FakeGemini
+    fake = FakeGemini(port=port, latency_ms=200, latency_sigma=0.4, chunk_ms=20,
+                      error_429=error_429, error_500=error_500, seed=7).start()
+
+    from config import GEMINI_MODEL, GENERATION_CONFIG, SYSTEM_PROMPT
+    from intents import _percentile
+    from llm import LLMClient
+    from rate_limit import RateLimiter
+
+    client = LLMClient(GEMINI_MODEL, SYSTEM_PROMPT, GENERATION_CONFIG,
+                       limiter=RateLimiter(6000, 10 ** 9))
+    client.warm_up()
+    totals: List[float] = []
+    failures: List[str] = []
+
+    def worker(worker_id: int) -> None:
+        for number in range(per_thread):
+            contents = [{"role": "user", "parts": [f"pergunta {worker_id}-{number}"]}]
+            start = time.perf_counter()
+            try:
+                client.generate(contents, on_chunk=lambda _: None)
+                totals.append((time.perf_counter() - start) * 1000)
+            except Exception as error:
+                failures.append(type(error).__name__)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    fake.stop()
+
+    totals.sort()
+    stats = client.get_stats()
+    return {
+        "seconds": elapsed, "failures": len(failures), "server": fake.format_stats(),
+        "p50": _percentile(totals, 0.50), "p95": _percentile(totals, 0.95),
+        "first_chunk": (stats["first_chunk_avg_seconds"] or 0) * 1000,
+    }
+
+
+def bench_fake(threads: int = 4, per_thread: int = 10) -> None:
+    """Carga em streaming contra o servidor falso, com e sem erros injetados."""
+    import multiprocessing
+
+    total = threads * per_thread
+    print(f"Servidor falso do Gemini ({threads} threads x {per_thread} perguntas em streaming, "
+          f"latência mediana de 200 ms)")
+    context = multiprocessing.get_context("spawn")
+    for error_429, error_500 in ((0.0, 0.0), (0.10, 0.05)):
+        with context.Pool(1) as pool:
+            result = pool.apply(_fake_load, (threads, per_thread, error_429, error_500))
+        print(f"  erros {error_429:.0%} 429 / {error_500:.0%} 500 : "
+              f"{result['failures']}/{total} falharam, primeiro pedaço {result['first_chunk']:.0f} ms, "
+              f"resposta p50 {result['p50']:.0f} ms / p95 {result['p95']:.0f} ms, "
+              f"{result['seconds']:.1f} s no total")
+        print(f"    servidor: {result['server']}")
+
+
+def _prompt_tokens(questions: int) -> List[Dict[str, object]]:
+    """
+    Roda em um processo novo: envia as mesmas perguntas ao servidor falso
+    com cada prompt de sistema e lê os tokens de entrada de usage_metadata.
+    """
+    import os
+
+    port = _free_port()
+    os.environ["ONERD_GEMINI_ENDPOINT"] = f"http://127.0.0.1:{port}"
+
+    from fake_gemini import FakeGemini
+    fake = FakeGemini(port=port, latency_ms=5, latency_sigma=0, chunk_ms=0, seed=7).start()
+
+    from config import GEMINI_MODEL, GENERATION_CONFIG, SYSTEM_PROMPT
+    from llm import LLMClient
+    from prompts import get_system_prompt
+
+    scenarios = (
+        ("original (texto)", SYSTEM_PROMPT),
+        ("compacto (texto)", get_system_prompt("text")),
+        ("voz", get_system_prompt("voice")),
+    )
+    results = []
+    for label, prompt in scenarios:
+        client = LLMClient(GEMINI_MODEL, prompt, GENERATION_CONFIG)
+        client.warm_up()
+        for number in range(questions):
+            client.generate([{"role": "user", "parts": [f"me explica o item {number}"]}])
+        stats = client.get_stats()
+        results.append({
+            "label": label, "chars": len(prompt), "system": stats["system_tokens"],
+            "input": stats["input_tokens_avg"],
+        })
+    fake.stop()
+    return results
+
+
+def bench_prompt(questions: int = 5) -> None:
+    """Tokens de entrada por pedido com o prompt original, o compacto e o de voz."""
+    import multiprocessing
+
+    from prompts import format_prompt_stats
+
+    print(f"Prompt de sistema ({questions} perguntas curtas por cenário, servidor falso)")
+    print(f"  {format_prompt_stats()}")
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        results = pool.apply(_prompt_tokens, (questions,))
+    for result in results:
+        print(f"  {result['label']:<16}: {result['chars']:>5} caracteres, "
+              f"{result['system']:>4} tokens de sistema, {result['input']:.0f} tokens de entrada por pedido")
+
+
+def _repeat_load(pairs: int, gap: float) -> List[Dict[str, object]]:
+    """
+    Roda em um processo novo: cada pergunta é repetida gap segundos depois,
+    interrompendo a primeira (como no loop de voz do daemon), com e sem
+    o agrupamento de pedidos idênticos.
+    """
+    import os
+    import threading
+
+    port = _free_port()
+    os.environ["ONERD_GEMINI_ENDPOINT"] = f"http://127.0.0.1:{port}"
+
+    from fake_gemini import FakeGemini
+    fake = FakeGemini(port=port, latency_ms=400, latency_sigma=0, chunk_ms=40, seed=7).start()
+
+    from config import GEMINI_MODEL, GENERATION_CONFIG
+    from llm import GenerationCancelled, LLMClient
+
+    results = []
+    for coalesce in (False, True):
+        client = LLMClient(GEMINI_MODEL, "bench", GENERATION_CONFIG, coalesce=coalesce)
+        client.warm_up()
+        served = fake.stats["requests"]
+        latencies = []
+        for number in range(pairs):
+            first = [{"role": "user", "parts": [f"qual a pergunta {number}"]}]
+            cancel = threading.Event()
+
+            def interrupted() -> None:
+                try:
+                    client.generate(first, on_chunk=lambda _: None, cancel=cancel)
+                except GenerationCancelled:
+                    pass
+
+            thread = threading.Thread(target=interrupted)
+            thread.start()
+            time.sleep(gap)
+            cancel.set()
+            # O pedido interrompido não fica no histórico: a repetição é idêntica
+            start = time.perf_counter()
+            client.generate(first, on_chunk=lambda _: None)
+            latencies.append((time.perf_counter() - start) * 1000)
+            thread.join()
+        results.append({
+            "coalesce": coalesce, "calls": fake.stats["requests"] - served,
+            "saved": client.get_stats()["coalesced"],
+            "latency": sum(latencies) / len(latencies),
+        })
+    fake.stop()
+    return results
+
+
+def bench_coalesce(pairs: int = 10, gap: float = 0.15) -> None:
+    """Perguntas repetidas em sequência, com e sem o agrupamento de chamadas."""
+    import multiprocessing
+
+    print(f"Pedidos repetidos ({pairs} perguntas repetidas {gap * 1000:.0f} ms depois, "
+          f"servidor falso com 400 ms até o primeiro pedaço)")
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        results = pool.apply(_repeat_load, (pairs, gap))
+    for result in results:
+        label = "com agrupamento" if result["coalesce"] else "sem agrupamento"
+        print(f"  {label} : {result['calls']:>2} chamadas à API, {result['saved']} poupadas, "
+              f"repetição respondida em {result['latency']:.0f} ms (média)")
+
+
+def bench_store(sessions: int = 500, per_session: int = 200, messages: int = 2000) -> None:
+    """Gravação e retomada das conversas salvas, em um banco temporário."""
+    import sqlite3
+    import tempfile
+
+    from conversation_store import ConversationStore
+    from history import ConversationHistory
+
+    text = "uma mensagem de tamanho típico na conversa com o assistente " * 3
+    print(f"Conversas salvas ({sessions} sessões x {per_session} mensagens no banco)")
+    with tempfile.TemporaryDirectory() as folder:
+        store = ConversationStore(Path(folder) / "conversations.db", max_messages=per_session)
+        for number in range(sessions):
+            session = store.new_session("bench")
+            for turn in range(per_session):
+                store.append(session, "user" if turn % 2 == 0 else "model", text)
+        store.flush()
+
+        # Gravação direta, como seria sem a thread: uma transação por mensagem
+        direct = sqlite3.connect(str(Path(folder) / "direct.db"))
+        direct.execute("PRAGMA journal_mode=WAL")
+        direct.execute("PRAGMA synchronous=NORMAL")
+        direct.execute("CREATE TABLE messages (session TEXT, time REAL, role TEXT, text TEXT)")
+        direct_us = []
+        for _ in range(messages):
+            start = time.perf_counter()
+            with direct:
+                direct.execute("INSERT INTO messages VALUES (?, ?, ?, ?)", ("s", time.time(), "user", text))
+            direct_us.append((time.perf_counter() - start) * 1e6)
+        direct.close()
+
+        history = ConversationHistory(channel="bench", store=store)
+        batches = store.get_stats()["batches"]
+        queued_us = []
+        for _ in range(messages):
+            start = time.perf_counter()
+            history.add("user", text)
+            queued_us.append((time.perf_counter() - start) * 1e6)
+        store.flush()
+        batches = store.get_stats()["batches"] - batches
+        for label, timings in (("salvar, gravação direta", direct_us),
+                               ("salvar, fila + thread", queued_us)):
+            timings.sort()
+            print(f"  {label:<26}: média {sum(timings) / len(timings):7.1f} µs, "
+                  f"p99 {timings[int(len(timings) * 0.99)]:7.1f} µs, máx {timings[-1]:8.1f} µs")
+        print(f"  {messages} mensagens da fila gravadas em {batches} transações")
+
+        start = time.perf_counter()
+        resumed = ConversationHistory(channel="bench", store=store)
+        count = resumed.resume()
+        print(f"  {f'retomar {count} mensagens':<26}: {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+        start = time.perf_counter()
+        store.compact()
+        store.flush()
+        print(f"  {'compactar':<26}: {(time.perf_counter() - start) * 1000:8.2f} ms "
+              f"(limite de {per_session} mensagens por sessão)")
+        store.close()
+
+
+def _engine_load(questions: int) -> Dict[str, object]:
+    """
+    Roda em um processo novo: mede a importação e a inicialização do motor
+    compartilhado e o custo dele por pedido, contra o servidor falso.
+    """
+    import os
+    import tempfile
+
+    port = _free_port()
+    os.environ["ONERD_GEMINI_ENDPOINT"] = f"http://127.0.0.1:{port}"
+
+    from fake_gemini import FakeGemini
+    fake = FakeGemini(port=port, latency_ms=20, latency_sigma=0, chunk_ms=0, seed=7).start()
+
+    start = time.perf_counter()
+    import engine
+    import_ms = (time.perf_counter() - start) * 1000
+
+    from conversation_store import ConversationStore
+    from history import ConversationHistory
+    from llm import LLMClient
+    from model_router import ModelRouter
+    from rate_limit import RateLimiter
+
+    # Sem cache de respostas nem limite de requisições: só o custo do caminho
+    limiter = RateLimiter(6000, 10 ** 9)
+    router = ModelRouter(log=False, client_factory=lambda model, config, prompt: LLMClient(
+        model, prompt, config, limiter=limiter))
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = ConversationStore(Path(folder) / "conversations.db")
+        assistant = engine.AssistantEngine(ConversationHistory(channel="bench", store=store),
+                                           router=router)
+        engine._engine = assistant
+
+        start = time.perf_counter()
+        assistant.start()
+        start_ms = (time.perf_counter() - start) * 1000
+
+        # As outras interfaces do processo pegam o mesmo motor, já aquecido
+        start = time.perf_counter()
+        again = engine.get_engine()
+        again.start()
+        second_us = (time.perf_counter() - start) * 1e6
+
+        for number in range(questions):
+            cmd_type, arg = assistant.route("que horas são")
+            assistant.run_command(cmd_type, arg)
+            assistant.route(f"me explica o assunto {number}")
+            assistant.chat(f"me explica o assunto {number}")
+
+        # A mesma chamada à IA sem o motor, para isolar o custo dele
+        router = assistant.router
+        direct_ms = []
+        for number in range(questions):
+            contents = [{"role": "user", "parts": [f"me explica o outro assunto {number}"]}]
+            start = time.perf_counter()
+            router.generate(contents)
+            direct_ms.append((time.perf_counter() - start) * 1000)
+        store.close()
+
+    fake.stop()
+    stats = assistant.get_stats()
+    return {
+        "import": import_ms, "start": start_ms, "second": second_us,
+        "shared": again is assistant, "summary": engine.format_engine_stats(assistant),
+        "route": stats["route_avg_seconds"] * 1e6,
+        "command": stats["command_avg_seconds"] * 1000,
+        "chat": stats["chat_avg_seconds"] * 1000,
+        "direct": sum(direct_ms) / len(direct_ms),
+    }
+
+
+def bench_engine(questions: int = 20) -> None:
+    """Inicialização do motor compartilhado e o custo dele por pedido."""
+    import multiprocessing
+
+    print(f"Motor compartilhado ({questions} comandos + {questions} perguntas, "
+          f"servidor falso com 20 ms por resposta)")
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        result = pool.apply(_engine_load, (questions,))
+    print(f"  importar engine            : {result['import']:8.1f} ms")
+    print(f"  start() (aquecer + retomar): {result['start']:8.1f} ms")
+    print(f"  segunda interface          : {result['second']:8.1f} µs "
+          f"({'mesmo motor' if result['shared'] else 'outro motor'})")
+    print(f"  decidir comando ou IA      : {result['route']:8.1f} µs por pedido")
+    print(f"  executar comando           : {result['command']:8.2f} ms por comando")
+    print(f"  conversa pelo motor        : {result['chat']:8.2f} ms por pergunta "
+          f"(chamada direta {result['direct']:.2f} ms, "
+          f"motor {result['chat'] - result['direct']:+.2f} ms)")
+    print(f"  {result['summary']}")
+
+
+def bench_telemetry(turns: int = 2000) -> None:
+    """Custo da telemetria por pedido e do resumo com p50/p95/p99, em arquivos temporários."""
+    import random
+    import tempfile
+
+    from telemetry import Telemetry
+
+    rng = random.Random(3)
+    print(f"Telemetria ({turns} pedidos simulados, arquivo de 64 KB com 3 cópias antigas)")
+    with tempfile.TemporaryDirectory() as folder:
+        for label, prometheus in (("JSONL", None), ("JSONL + Prometheus", Path(folder) / "t.prom")):
+            telemetry = Telemetry(Path(folder) / f"{len(label)}.jsonl", enabled=True,
+                                  max_bytes=64 * 1024, backups=3, prometheus_path=prometheus)
+            per_turn = []
+            for _ in range(turns):
+                start = time.perf_counter()
+                telemetry.begin("bench", "voice", listen=rng.lognormvariate(0.5, 0.4),
+                                recognize=rng.lognormvariate(-0.5, 0.3))
+                telemetry.record("detect", rng.uniform(0.0001, 0.0005))
+                telemetry.record("llm_ttft", rng.lognormvariate(-0.9, 0.4))
+                telemetry.record("llm_total", rng.lognormvariate(0.2, 0.4))
+                telemetry.record("speak", rng.lognormvariate(1.0, 0.3))
+                telemetry.count("input_tokens", rng.randint(150, 900))
+                telemetry.count("output_tokens", rng.randint(20, 200))
+                telemetry.end()
+                per_turn.append((time.perf_counter() - start) * 1e6)
+            per_turn.sort()
+            print(f"  {label:<20}: {sum(per_turn) / len(per_turn):7.1f} µs por pedido "
+                  f"(p99 {per_turn[int(len(per_turn) * 0.99)]:7.1f} µs), "
+                  f"{len(telemetry.files())} arquivos")
+
+        start = time.perf_counter()
+        summary = telemetry.format_summary()
+        print(f"  resumo de {len(telemetry.load())} pedidos guardados em "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms:")
+        for line in summary.splitlines():
+            print(f"    {line}")
+
+
+def _time_to_prompt(command: List[str], prompt: str, env: Dict[str, str],
+                    timeout: float = 60.0) -> float:
+    """
+    Inicia uma interface em um processo novo e mede o tempo até ela pedir
+    a primeira entrada; depois responde "sair".
+
+    Returns:
+        Segundos até o prompt aparecer na saída
+    """
+    import subprocess
+
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, env=env, cwd=str(Path(__file__).parent))
+    output = b""
+    marker = prompt.encode("utf-8")
+    try:
+        while marker not in output:
+            byte = process.stdout.read(1)
+            if not byte:
+                raise RuntimeError(f"{' '.join(command)} encerrou antes do prompt")
+            output += byte
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError(f"{' '.join(command)} não mostrou o prompt")
+        elapsed = time.perf_counter() - start
+        process.stdin.write(b"sair\n")
+        process.stdin.flush()
+        process.wait(timeout)
+    finally:
+        if process.poll() is None:
+            process.kill()
+    return elapsed
+
+
+def bench_coldstart(runs: int = 3) -> None:
+    """Tempo até o primeiro prompt de o_nerd.py e daemon.py --text, em processos novos."""
+    import os
+    import sys
+    import tempfile
+
+    from fake_gemini import FakeGemini
+
+    port = _free_port()
+    fake = FakeGemini(port=port, latency_ms=5, latency_sigma=0, chunk_ms=0, seed=7).start()
+    commands = (
+        ("o_nerd.main", [sys.executable, "o_nerd.py"], "Voce:"),
+        ("daemon.py --text", [sys.executable, "daemon.py", "--text"], "Você:"),
+    )
+    print(f"Inicialização a frio (melhor de {runs}, servidor falso, dados em pasta vazia)")
+    with tempfile.TemporaryDirectory() as folder:
+        env = dict(os.environ, ONERD_GEMINI_ENDPOINT=f"http://127.0.0.1:{port}",
+                   ONERD_DATA_DIR=folder, GOOGLE_API_KEY="fake", PYTHONIOENCODING="utf-8")
+        for label, command, prompt in commands:
+            times = [_time_to_prompt(command, prompt, env) for _ in range(runs)]
+            print(f"  {label:<18}: {min(times) * 1000:7.0f} ms até o prompt "
+                  f"(média {sum(times) / len(times) * 1000:.0f} ms)")
+    fake.stop()
+
+    # O áudio só abre no primeiro uso: criar o assistente de voz não toca no microfone nem no TTS
+    from voice import VoiceAssistant
+    start = time.perf_counter()
+    assistant = VoiceAssistant()
+    print(f"  {'assistente de voz':<18}: {(time.perf_counter() - start) * 1e6:7.0f} µs para criar "
+          f"(microfone {'aberto' if assistant.microphone else 'fechado'}, "
+          f"TTS {'iniciado' if assistant.engine else 'não iniciado'})")
+
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {
+    "intents": bench_intents,
+    "keywords": bench_keywords,
+    "apps": bench_apps,
+    "classifier": bench_classifier,
+    "llm": bench_llm,
+    "speech": bench_speech,
+    "cache": bench_cache,
+    "history": bench_history,
+    "ratelimit": bench_ratelimit,
+    "breaker": bench_breaker,
+    "bargein": bench_bargein,
+    "tts": bench_tts,
+    "phrases": bench_phrases,
+    "capture": bench_capture,
+    "wakeword": bench_wakeword,
+    "router": bench_router,
+    "fake": bench_fake,
+    "prompt": bench_prompt,
+    "coalesce": bench_coalesce,
+    "store": bench_store,
+    "engine": bench_engine,
+    "telemetry": bench_telemetry,
+    "coldstart": bench_coldstart,
+}
+
+
+def main() -> None:
+    """Função principal."""
+    parser = argparse.ArgumentParser(description="O Nerd - Benchmarks")
+    parser.add_argument("names", nargs="*", choices=[[]] + list(BENCHMARKS),
+                        help="Benchmarks a executar (padrão: todos)")
+    parser.add_argument("--fake", action="store_true",
+                        help="Chamadas à IA vão para o servidor falso (fake_gemini.py)")
+    args = parser.parse_args()
+
+    if args.fake:
+        import os
+        # Antes de importar config; vale também para os processos novos
+        port = _free_port()
+        os.environ["ONERD_GEMINI_ENDPOINT"] = f"http://127.0.0.1:{port}"
+        from fake_gemini import FakeGemini
+        FakeGemini(port=port).start()
+
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name]()
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -12,11 +12,15 @@ Versão: 2.0
 
 import os
 import sys
-from typing import List, Dict, Any
+from typing import Callable, Optional
 
 try:
-    import google.generativeai as genai
-except ImportError:
+    from engine import get_engine
+    from llm import TerminalPrinter
+except ImportError as error:
+    # Só a falta do SDK do Gemini vira aviso; outros erros de import aparecem inteiros
+    if not (error.name or "").startswith("google"):
+        raise
     print("[ERRO] google-generativeai não instalado. Execute: pip install google-generativeai")
     sys.exit(1)
 
@@ -31,30 +35,25 @@ except ImportError:
     class Style:
         BRIGHT = RESET_ALL = ""
 
-from config import GOOGLE_API_KEY, ASSISTANT_NAME, SYSTEM_PROMPT
+from config import GOOGLE_API_KEY, ASSISTANT_NAME, LLM_STREAMING
 
 
 class TextChatInterface:
     """
     Interface de chat em modo texto.
     
-    Gerencia a conversa entre usuário e IA através de entrada de texto,
-    mantendo histórico de conversa e limitando tamanho para otimizar API.
+    A conversa (histórico, segurança e chamadas à IA) fica com o motor
+    compartilhado; a interface só lê a entrada e mostra a resposta.
     """
     
-    MAX_HISTORY_SIZE = 20
-    MAX_OUTPUT_TOKENS = 1000
-    DEFAULT_TEMPERATURE = 0.9
-    
     def __init__(self):
         """Inicializa a interface de chat."""
-        self.conversation_history: List[Dict[str, Any]] = []
-        self.model = None
+        self.engine = get_engine(channel="chat")
         self._initialize_api()
     
     def _initialize_api(self) -> None:
         """
-        Inicializa a API do Google Generative AI.
+        Prepara o motor e aquece a conexão com a IA.
         
         Raises:
             SystemExit: Se a chave API não estiver configurada.
@@ -64,11 +63,7 @@ class TextChatInterface:
             print("Configure a variável GOOGLE_API_KEY no arquivo config.py")
             sys.exit(1)
         
-        genai.configure(api_key=GOOGLE_API_KEY)
-        self.model = genai.GenerativeModel(
-            model_name="gemini-1.5-flash",
-            system_instruction=SYSTEM_PROMPT
-        )
+        self.engine.start()
     
     def _display_banner(self) -> None:
         """Exibe o banner de boas-vindas."""
@@ -91,70 +86,33 @@ class TextChatInterface:
 {Fore.YELLOW}📝 Como usar:{Style.RESET_ALL}
   • Digite sua mensagem e pressione ENTER
   • Digite '{Fore.GREEN}sair{Style.RESET_ALL}', '{Fore.GREEN}exit{Style.RESET_ALL}' ou '{Fore.GREEN}quit{Style.RESET_ALL}' para sair
+  • Digite '{Fore.GREEN}estatísticas{Style.RESET_ALL}' para ver o tempo de cada etapa dos pedidos
   • O histórico é mantido para conversas mais naturais
 
 {Fore.CYAN}💡 Dica: Você pode fazer perguntas, contar histórias ou pedir ajuda!{Style.RESET_ALL}
 """
         print(instructions)
     
-    def _add_to_history(self, role: str, message: str) -> None:
-        """
-        Adiciona uma mensagem ao histórico.
-        
-        Args:
-            role: "user" ou "model"
-            message: Conteúdo da mensagem
-        """
-        self.conversation_history.append({
-            "role": role,
-            "parts": [message]
-        })
-        
-        # Mantém apenas as mensagens mais recentes
-        if len(self.conversation_history) > self.MAX_HISTORY_SIZE:
-            self.conversation_history.pop(0)
-            self.conversation_history.pop(0)
-    
-    def _generate_response(self, user_input: str) -> str:
+    def _generate_response(self, user_input: str,
+                           on_chunk: Optional[Callable[[str], None]] = None) -> str:
         """
         Gera resposta da IA.
         
         Args:
             user_input: Mensagem do usuário
+            on_chunk: Recebe os pedaços da resposta em streaming (opcional)
             
         Returns:
             Resposta da IA ou mensagem de erro
         """
-        try:
-            self._add_to_history("user", user_input)
-            
-            response = self.model.generate_content(
-                contents=self.conversation_history,
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=self.MAX_OUTPUT_TOKENS,
-                    temperature=self.DEFAULT_TEMPERATURE,
-                    top_p=0.95,
-                    top_k=64
-                )
-            )
-            
-            assistant_message = response.text.strip()
-            self._add_to_history("model", assistant_message)
-            
-            return assistant_message
-        
-        except Exception as error:
-            error_message = str(error).lower()
-            
-            if "quota" in error_message or "429" in error_message:
-                return f"{Fore.RED}[ERRO] Quota da API excedida. Aguarde alguns minutos.{Style.RESET_ALL}"
-            else:
-                return f"{Fore.RED}[ERRO] Não consegui gerar resposta: {str(error)}{Style.RESET_ALL}"
+        return self.engine.chat(user_input, on_chunk)
     
     def run(self) -> None:
         """Executa o loop principal da interface de chat."""
         self._display_banner()
         self._display_instructions()
+        for line in self.engine.startup_lines():
+            print(f"{Fore.CYAN}{line}{Style.RESET_ALL}")
         
         while True:
             try:
@@ -167,11 +125,25 @@ class TextChatInterface:
                 # Verifica comandos de saída
                 if user_input.lower() in ["sair", "exit", "quit"]:
                     print(f"\n{Fore.CYAN}Até logo! 👋{Style.RESET_ALL}\n")
+                    for line in self.engine.stats_lines():
+                        print(f"{Fore.CYAN}{line}{Style.RESET_ALL}")
                     break
                 
-                # Gera e exibe resposta
-                response = self._generate_response(user_input)
-                print(f"{Fore.CYAN}{ASSISTANT_NAME}: {Style.RESET_ALL}{response}\n")
+                # Tempo de cada etapa dos pedidos guardados
+                if user_input.lower() in ["stats", "estatisticas", "estatísticas"]:
+                    print(f"{Fore.CYAN}{self.engine.telemetry.format_summary()}{Style.RESET_ALL}\n")
+                    continue
+                
+                # Gera e exibe resposta (em pedaços, se houver streaming)
+                printer = None
+                if LLM_STREAMING:
+                    printer = TerminalPrinter(f"{Fore.CYAN}{ASSISTANT_NAME}: {Style.RESET_ALL}")
+                response = self._generate_response(user_input, printer)
+                if printer:
+                    printer.finish()
+                if not (printer and printer.shown(response)):
+                    print(f"{Fore.CYAN}{ASSISTANT_NAME}: {Style.RESET_ALL}{response}\n")
+                self.engine.end_turn()
             
             except KeyboardInterrupt:
                 print(f"\n\n{Fore.CYAN}Interrompido. Até mais! 👋{Style.RESET_ALL}\n")
@@ -6,10 +6,11 @@ O Nerd em modo texto simples, sem voz
 
 import os
 import sys
-import google.generativeai as genai
 from colorama import init, Fore, Style
 
-from config import GOOGLE_API_KEY, ASSISTANT_NAME, SYSTEM_PROMPT
+from config import GOOGLE_API_KEY, ASSISTANT_NAME, LLM_STREAMING
+from engine import get_engine
+from llm import TerminalPrinter
 
 init()
 
@@ -22,7 +23,8 @@ def show_banner():
     print(f"{Style.RESET_ALL}\n")
     print(f"{Fore.GREEN}✓ Pronto para conversar!{Style.RESET_ALL}")
     print(f"{Fore.YELLOW}💬 Digite sua mensagem e pressione ENTER{Style.RESET_ALL}")
-    print(f"{Fore.RED}❌ Digite 'sair' para encerrar{Style.RESET_ALL}\n")
+    print(f"{Fore.RED}❌ Digite 'sair' para encerrar{Style.RESET_ALL}")
+    print(f"{Fore.CYAN}📊 Digite 'estatísticas' para ver o tempo de cada etapa{Style.RESET_ALL}\n")
 
 def main():
     show_banner()
@@ -31,13 +33,14 @@ def main():
         print(f"{Fore.RED}[ERRO] Chave API não configurada!{Style.RESET_ALL}")
         return
     
+    engine = get_engine(channel="chat_modo_texto")
     try:
-        genai.configure(api_key=GOOGLE_API_KEY)
+        engine.start()
     except Exception as e:
         print(f"{Fore.RED}[ERRO] Falha ao configurar API: {e}{Style.RESET_ALL}")
         return
-    
-    conversation_history = []
+    for line in engine.startup_lines():
+        print(f"{Fore.CYAN}{line}{Style.RESET_ALL}")
     
     while True:
         try:
@@ -52,58 +55,31 @@ def main():
             # Verifica se é comando de sair
             if user_input.lower() in ["sair", "exit", "quit", "tchau", "adeus"]:
                 print(f"\n{Fore.CYAN}👋 Até mais! Foi um prazer conversar com você!{Style.RESET_ALL}\n")
+                for line in engine.stats_lines():
+                    print(f"{Fore.CYAN}{line}{Style.RESET_ALL}")
                 break
             
-            # Adiciona ao histórico
-            conversation_history.append({
-                "role": "user",
-                "parts": [user_input]
-            })
+            # Tempo de cada etapa dos pedidos guardados
+            if user_input.lower() in ["stats", "estatisticas", "estatísticas"]:
+                print(f"{Fore.CYAN}{engine.telemetry.format_summary()}{Style.RESET_ALL}\n")
+                continue
             
-            # Limita histórico
-            if len(conversation_history) > 20:
-                conversation_history.pop(0)
-                conversation_history.pop(0)
+            # Chama a IA (erros da API voltam como mensagem)
+            print(f"{Fore.CYAN}⏳ Pensando...{Style.RESET_ALL}")
             
+            printer = None
+            if LLM_STREAMING:
+                printer = TerminalPrinter(f"\n{Fore.CYAN}{ASSISTANT_NAME}:{Style.RESET_ALL} ")
             try:
-                # Chama a IA
-                print(f"{Fore.CYAN}⏳ Pensando...{Style.RESET_ALL}")
-                
-                model = genai.GenerativeModel(
-                    model_name="gemini-2.5-flash",
-                    system_instruction=SYSTEM_PROMPT
-                )
-                
-                response = model.generate_content(
-                    contents=conversation_history,
-                    generation_config=genai.types.GenerationConfig(
-                        max_output_tokens=1000,
-                        temperature=0.9,
-                        top_p=0.95,
-                        top_k=64
-                    )
-                )
-                
-                assistant_response = response.text.strip()
-                
-                # Adiciona resposta ao histórico
-                conversation_history.append({
-                    "role": "model",
-                    "parts": [assistant_response]
-                })
-                
-                # Mostra resposta
+                assistant_response = engine.chat(user_input, printer)
+            finally:
+                if printer:
+                    printer.finish()
+            
+            # Mostra resposta (se não apareceu em streaming)
+            if not (printer and printer.shown(assistant_response)):
                 print(f"\n{Fore.CYAN}{ASSISTANT_NAME}:{Style.RESET_ALL} {assistant_response}\n")
-                
-            except Exception as api_error:
-                error_msg = str(api_error)
-                
-                if "quota" in error_msg.lower() or "429" in error_msg:
-                    print(f"\n{Fore.RED}⚠️  Limite de API excedido. Aguarde alguns minutos!{Style.RESET_ALL}\n")
-                elif "api_key" in error_msg.lower():
-                    print(f"\n{Fore.RED}⚠️  Erro na chave API. Verifique a configuração!{Style.RESET_ALL}\n")
-                else:
-                    print(f"\n{Fore.RED}⚠️  Erro: {error_msg}{Style.RESET_ALL}\n")
+            engine.end_turn()
         
         except KeyboardInterrupt:
             print(f"\n\n{Fore.CYAN}👋 Interrompido. Até mais!{Style.RESET_ALL}\n")
@@ -0,0 +1,145 @@
+"""
+O Nerd - Disjuntor da IA
+========================
+
+Evita esperar por uma API que está falhando.
+
+Depois de várias falhas seguidas (chave inválida, cota esgotada, sem
+rede), o disjuntor abre e as perguntas são respondidas na hora por uma
+resposta local, sem chamar a API. Passado o tempo de espera, uma sonda
+em segundo plano pede uma resposta curta à API (meio aberto); se ela
+gerar, o disjuntor fecha e tudo volta ao normal.
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from config import LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN
+
+STATE_CLOSED = "fechado"        # chamadas normais
+STATE_OPEN = "aberto"           # respostas locais, sem chamar a API
+STATE_HALF_OPEN = "meio aberto" # sonda em andamento
+
+
+class CircuitBreaker:
+    """
+    Disjuntor de três estados, seguro entre threads.
+
+    Enquanto aberto, allow() retorna False imediatamente. A sonda roda em
+    uma thread própria, então nenhuma pergunta do usuário fica esperando
+    pelo teste da API.
+    """
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES,
+                 cooldown: float = LLM_BREAKER_COOLDOWN,
+                 probe: Optional[Callable[[], bool]] = None):
+        """
+        Args:
+            failure_threshold: Falhas seguidas que abrem o disjuntor
+            cooldown: Segundos aberto antes de testar a API de novo
+            probe: Teste leve da API (True se respondeu). Sem sonda, a
+                próxima pergunta após o tempo de espera serve de teste
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.probe = probe
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+        self.trips = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        """Estado atual (STATE_CLOSED, STATE_OPEN ou STATE_HALF_OPEN)."""
+        return self._state
+
+    def allow(self) -> bool:
+        """
+        Verifica se uma chamada à API pode ser feita agora.
+
+        Returns:
+            True se a chamada deve seguir; False para usar a resposta local
+        """
+        with self._lock:
+            if self._state == STATE_CLOSED:
+                return True
+
+            if self._state == STATE_OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self._state = STATE_HALF_OPEN
+                if self.probe is None:
+                    # Esta chamada é o teste
+                    return True
+                threading.Thread(target=self._run_probe, name="llm-probe", daemon=True).start()
+
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        """Registra uma chamada bem-sucedida (fecha o disjuntor)."""
+        with self._lock:
+            self._failures = 0
+            self._state = STATE_CLOSED
+
+    def record_failure(self, error: Optional[BaseException] = None) -> None:
+        """
+        Registra uma chamada que falhou.
+
+        Args:
+            error: Erro da chamada, guardado para diagnóstico
+        """
+        with self._lock:
+            if error is not None:
+                self._remember(error)
+            self._failures += 1
+            if self._state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+                self._trip()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna o estado e os contadores do disjuntor.
+
+        Returns:
+            Dicionário com state, failures, trips, rejected e last_error
+        """
+        with self._lock:
+            return {
+                "state": self._state,
+                "failures": self._failures,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "last_error": self.last_error,
+            }
+
+    def _trip(self) -> None:
+        """Abre o disjuntor (chamar com o lock)."""
+        if self._state != STATE_OPEN:
+            self.trips += 1
+        self._state = STATE_OPEN
+        self._opened_at = time.monotonic()
+
+    def _remember(self, error: BaseException) -> None:
+        """Guarda a primeira linha do erro para diagnóstico (chamar com o lock)."""
+        text = str(error)
+        self.last_error = text.splitlines()[0][:200] if text else type(error).__name__
+
+    def _run_probe(self) -> None:
+        """Testa a API em segundo plano e fecha ou reabre o disjuntor."""
+        try:
+            healthy = self.probe()
+        except Exception as error:
+            healthy = False
+            with self._lock:
+                self._remember(error)
+
+        if healthy:
+            self.record_success()
+        else:
+            with self._lock:
+                self._trip()
@@ -0,0 +1,394 @@
+"""
+O Nerd - Classificador Local de Intenções
+==========================================
+
+Segunda camada de detecção de comandos, entre as regras de intents.py
+e a IA. Frases que as regras não pegam, como "me recomenda um vídeo de
+matemática" ou "me mostra as horas", são classificadas aqui sem ida à
+rede. Abrir e pesquisar exigem um verbo de ação ("fecha o spotify" e
+"o spotify é bom?" seguem para a IA).
+
+O modelo é linear e pequeno: vetores TF-IDF de n-gramas de caracteres
+e palavras, comparados por cosseno com o centróide de cada intenção.
+É treinado na importação a partir de intent_corpus.tsv, em poucos
+milissegundos, e classifica uma frase em dezenas de microssegundos.
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import (
+    FUZZY_LAUNCH_THRESHOLD,
+    LOCAL_INTENT_MIN_SCORE, LOCAL_INTENT_MIN_MARGIN,
+)
+from keywords import fold_accents
+from app_index import find_app
+
+CORPUS_FILE = Path(__file__).parent / "intent_corpus.tsv"
+
+# Classe das frases que devem seguir para a IA
+CHAT_LABEL = "chat"
+
+CHAR_NGRAM_SIZES = (3, 4)
+
+# Palavras de comando e de ligação removidas ao extrair o termo de busca
+SEARCH_FILLER_WORDS = {
+    "me", "mostra", "mostrar", "quero", "ver", "assistir", "acha", "achar",
+    "procura", "procurar", "pesquisa", "pesquisar", "busca", "buscar",
+    "googla", "googlar", "joga", "consulta", "olha", "da", "uma", "um",
+    "olhada", "toca", "coloca", "tem", "video", "videos", "clipes", "clipe",
+    "aula", "no", "na", "em", "youtube", "google", "internet", "web",
+    "site", "pra", "mim", "sobre", "ve", "de", "do", "dos", "das",
+    "uns", "umas", "recomenda", "recomendar", "indica", "indicar", "sugere",
+    "sugerir", "manda", "mandar", "passa", "bota", "encontra", "encontrar",
+    "abre", "abrir", "queria", "gostaria",
+}
+
+# Verbos de ação exigidos para abrir e pesquisar localmente: sem um
+# deles, "o spotify é bom?" ou "vídeos do google" seguem para a IA
+OPEN_WORDS = {
+    "abre", "abrir", "abra", "inicia", "iniciar", "inicie", "inicializa",
+    "executa", "executar", "execute", "roda", "rodar", "liga", "ligar",
+    "bota", "coloca", "carrega", "acessa", "entra", "vai", "leva", "ativa",
+    "mostra", "usar", "jogar", "ver", "conversar",
+}
+SEARCH_WORDS = {
+    "procura", "procurar", "pesquisa", "pesquisar", "busca", "buscar",
+    "googla", "googlar", "acha", "achar", "encontra", "encontrar", "mostra",
+    "mostrar", "ver", "ve", "assistir", "toca", "coloca", "bota", "joga",
+    "olha", "olhada", "consulta", "recomenda", "indica", "sugere", "manda",
+    "passa", "abre", "abrir",
+    # "dá um google": sem o acento, "da" é só a preposição
+    "dá",
+}
+ACTION_WORDS = {
+    "open": OPEN_WORDS,
+    "search_google": SEARCH_WORDS,
+    "search_youtube": SEARCH_WORDS,
+}
+# Fechar ou negar anula o verbo de ação ("não abre o discord")
+CANCEL_WORDS = {
+    "fecha", "fechar", "feche", "desliga", "desligar", "encerra", "encerrar",
+    "finaliza", "finalizar", "sai", "sair", "nao", "nem", "nunca",
+}
+# Começos de pergunta sobre o app, não pedido ("como abre o paint")
+QUESTION_STARTS = {
+    "como", "qual", "quais", "quando", "onde", "quem", "quanto", "quanta",
+    "quantos", "quantas", "sera", "porque", "por que", "o que",
+}
+
+# Artigos, ligações e pedidos de cortesia: ficam no meio do termo
+# ("clipes da taylor swift"), mas saem das pontas
+EDGE_WORDS = {
+    "de", "do", "da", "dos", "das", "sobre", "o", "a", "os", "as",
+    "um", "uma", "uns", "umas", "pode", "poderia", "voce", "por", "favor",
+}
+
+
+def _normalize(text: str) -> str:
+    """Minúsculas, sem acentos e com espaços simples."""
+    return " ".join(fold_accents(text.lower()).split())
+
+
+def _features(text: str) -> Counter:
+    """Extrai n-gramas de caracteres e palavras de um texto normalizado."""
+    features = Counter()
+    padded = f" {text} "
+    for size in CHAR_NGRAM_SIZES:
+        for i in range(len(padded) - size + 1):
+            features[padded[i:i + size]] += 1
+    for word in text.split():
+        features["w:" + word] += 1
+    return features
+
+
+class IntentClassifier:
+    """
+    Classificador linear por centróides (Rocchio) sobre TF-IDF.
+
+    Cada intenção é representada pelo centróide normalizado dos vetores
+    das frases de treino; a pontuação de uma frase é o cosseno com cada
+    centróide, calculado por um índice invertido de pesos.
+    """
+
+    def __init__(self):
+        """Cria um classificador vazio. Use train() antes de predict()."""
+        self.labels: List[str] = []
+        self._idf: Dict[str, float] = {}
+        # Característica -> lista de (índice da intenção, peso no centróide)
+        self._weights: Dict[str, List[Tuple[int, float]]] = {}
+
+    def train(self, examples: Iterable[Tuple[str, str]]) -> None:
+        """
+        Treina o modelo.
+
+        Args:
+            examples: Pares (intenção, frase)
+        """
+        examples = [(label, _features(_normalize(text))) for label, text in examples]
+        self.labels = sorted({label for label, _ in examples})
+
+        document_frequency = Counter()
+        for _, features in examples:
+            document_frequency.update(features.keys())
+        total = len(examples)
+        self._idf = {
+            feature: math.log((1 + total) / (1 + count)) + 1
+            for feature, count in document_frequency.items()
+        }
+
+        centroids = [Counter() for _ in self.labels]
+        for label, features in examples:
+            vector = self._vectorize(features)
+            centroids[self.labels.index(label)].update(vector)
+
+        self._weights = {}
+        for label_index, centroid in enumerate(centroids):
+            norm = math.sqrt(sum(value * value for value in centroid.values())) or 1.0
+            for feature, value in centroid.items():
+                self._weights.setdefault(feature, []).append((label_index, value / norm))
+
+    def predict(self, text: str) -> Tuple[str, float, float]:
+        """
+        Classifica uma frase.
+
+        Args:
+            text: Frase do usuário
+
+        Returns:
+            Tupla (intenção, pontuação, margem para a segunda colocada)
+        """
+        vector = self._vectorize(_features(_normalize(text)))
+        scores = [0.0] * len(self.labels)
+        for feature, value in vector.items():
+            for label_index, weight in self._weights.get(feature, ()):
+                scores[label_index] += value * weight
+
+        ranking = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+        best, second = ranking[0], ranking[1] if len(ranking) > 1 else ranking[0]
+        return self.labels[best], scores[best], scores[best] - scores[second]
+
+    def _vectorize(self, features: Counter) -> Dict[str, float]:
+        """Converte contagens em um vetor TF-IDF normalizado."""
+        vector = {
+            feature: (1 + math.log(count)) * self._idf[feature]
+            for feature, count in features.items()
+            if feature in self._idf
+        }
+        norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+        return {feature: value / norm for feature, value in vector.items()}
+
+
+def _read_corpus(path: Path) -> List[List[str]]:
+    """Lê as linhas do corpus, já divididas nas colunas."""
+    rows = []
+    with open(path, encoding="utf-8") as corpus:
+        for line in corpus:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            rows.append(line.split("\t"))
+    return rows
+
+
+def load_corpus(path: Path = CORPUS_FILE) -> List[Tuple[str, str]]:
+    """
+    Lê o corpus de frases rotuladas.
+
+    Args:
+        path: Arquivo TSV com linhas "intenção<TAB>frase[<TAB>argumento]"
+
+    Returns:
+        Lista de pares (intenção, frase)
+    """
+    return [(row[0], row[1]) for row in _read_corpus(path)]
+
+
+def load_slot_examples(path: Path = CORPUS_FILE) -> List[Tuple[str, str, str]]:
+    """
+    Lê as frases do corpus que trazem o argumento esperado (3ª coluna).
+
+    Args:
+        path: Arquivo TSV do corpus
+
+    Returns:
+        Lista de (intenção, frase, argumento esperado)
+    """
+    return [(row[0], row[1], row[2]) for row in _read_corpus(path) if len(row) > 2]
+
+
+def has_action(label: str, text: str) -> bool:
+    """
+    Confere se a frase pede a ação da intenção, e não só fala do app.
+
+    Abrir e pesquisar exigem um verbo de ação e nenhuma palavra de fechar
+    ou negar, e a frase não pode começar como pergunta. As outras
+    intenções não têm essa exigência.
+
+    Args:
+        label: Intenção escolhida pelo modelo
+        text: Frase do usuário
+
+    Returns:
+        True se a frase pode ser resolvida localmente
+    """
+    required = ACTION_WORDS.get(label)
+    if required is None:
+        return True
+
+    words = re.findall(r"\w+", text.lower())
+    folded = [fold_accents(word) for word in words]
+    if not words or CANCEL_WORDS.intersection(folded):
+        return False
+    if folded[0] in QUESTION_STARTS or " ".join(folded[:2]) in QUESTION_STARTS:
+        return False
+    # Compara com e sem acento: "vê" vale como "ve", mas "da" não vale como "dá"
+    return any(word in required or plain in required
+               for word, plain in zip(words, folded))
+
+
+def extract_app(text: str) -> Optional[str]:
+    """
+    Procura um app ou site conhecido entre as palavras da frase.
+
+    Args:
+        text: Frase do usuário
+
+    Returns:
+        Nome do app/site ou None
+    """
+    words = _normalize(text).split()
+    best_alias, best_score = None, 0.0
+    for size in (3, 2, 1):
+        for start in range(len(words) - size + 1):
+            match = find_app(" ".join(words[start:start + size]))
+            if match and match.score >= FUZZY_LAUNCH_THRESHOLD and match.score > best_score:
+                best_alias, best_score = match.alias, match.score
+    return best_alias
+
+
+def extract_search_query(text: str) -> Optional[str]:
+    """
+    Extrai o termo de busca de uma frase, sem as palavras de comando.
+
+    Args:
+        text: Frase do usuário
+
+    Returns:
+        Termo de busca ou None se não sobrar nada
+    """
+    words = text.lower().split()
+    kept = [word for word in words if fold_accents(word) not in SEARCH_FILLER_WORDS
+            or fold_accents(word) in EDGE_WORDS]
+
+    # Remove palavras de ligação que sobraram nas pontas
+    while kept and fold_accents(kept[0]) in EDGE_WORDS:
+        kept.pop(0)
+    while kept and fold_accents(kept[-1]) in EDGE_WORDS:
+        kept.pop()
+
+    return " ".join(kept) or None
+
+
+def extract_volume(text: str) -> Optional[str]:
+    """Extrai o nível de volume (0-100) de uma frase."""
+    match = re.search(r"\d+", text)
+    if not match:
+        return None
+    return str(min(int(match.group()), 100))
+
+
+# Intenção -> extrator do argumento (None quando não há argumento)
+SLOT_EXTRACTORS = {
+    "open": extract_app,
+    "search_google": extract_search_query,
+    "search_youtube": extract_search_query,
+    "volume": extract_volume,
+    "time": None,
+    "date": None,
+    "system_info": None,
+}
+
+_classifier = IntentClassifier()
+_classifier.train(load_corpus())
+
+_stats = {"queries": 0, "local": 0}
+
+
+def resolve_intent(classifier: IntentClassifier, user_input: str,
+                   min_score: float = LOCAL_INTENT_MIN_SCORE,
+                   min_margin: float = LOCAL_INTENT_MIN_MARGIN,
+                   ) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Classifica uma frase e extrai o argumento, se a confiança bastar.
+
+    Args:
+        classifier: Modelo treinado
+        user_input: Texto do usuário
+        min_score: Similaridade mínima com a intenção escolhida
+        min_margin: Diferença mínima para a segunda intenção
+
+    Returns:
+        Tupla (tipo do comando, argumento) ou (None, None) para seguir à IA
+    """
+    label, score, margin = classifier.predict(user_input)
+    if label == CHAT_LABEL or label not in SLOT_EXTRACTORS:
+        return (None, None)
+    if score < min_score or margin < min_margin:
+        return (None, None)
+    if not has_action(label, user_input):
+        return (None, None)
+
+    extractor = SLOT_EXTRACTORS[label]
+    arg = None
+    if extractor:
+        arg = extractor(user_input)
+        if arg is None:
+            return (None, None)
+
+    return (label, arg)
+
+
+def classify_local(user_input: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Tenta resolver localmente uma frase que as regras não reconheceram.
+
+    Args:
+        user_input: Texto do usuário
+
+    Returns:
+        Tupla (tipo do comando, argumento) ou (None, None) para seguir à IA
+    """
+    _stats["queries"] += 1
+    result = resolve_intent(_classifier, user_input)
+    if result[0]:
+        _stats["local"] += 1
+    return result
+
+
+def get_local_stats() -> Dict[str, float]:
+    """
+    Retorna quantas frases sem regra foram resolvidas localmente.
+
+    Returns:
+        Dicionário com consultas, resolvidas localmente e a fração local
+    """
+    queries = _stats["queries"]
+    return {
+        "queries": queries,
+        "local": _stats["local"],
+        "local_ratio": _stats["local"] / queries if queries else 0.0,
+    }
+
+
+def format_local_stats() -> str:
+    """Resumo legível de get_local_stats(), para exibir ao encerrar."""
+    stats = get_local_stats()
+    return (f"{stats['local']}/{stats['queries']} pedidos sem regra resolvidos "
+            f"localmente ({stats['local_ratio']:.0%}), sem chamar a IA")
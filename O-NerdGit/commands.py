@@ -15,24 +15,25 @@ import platform
 import datetime
 import os
 from typing import Optional
-from config import SAFE_APPS, WINDOWS_APPS, DANGEROUS_KEYWORDS
+from config import SAFE_APPS, WINDOWS_APPS, FUZZY_LAUNCH_THRESHOLD
+from keywords import CATEGORY_DANGEROUS, contains_keyword
+from app_index import KIND_APP, find_app
 
 
 def is_dangerous_command(text: str) -> bool:
     """
     Verifica se um comando contém palavras-chave perigosas.
     
+    Usa a busca de keywords.py: sem diferenciar acentos e respeitando o
+    início das palavras.
+    
     Args:
         text: Texto do comando a verificar
         
     Returns:
         True se o comando é perigoso, False caso contrário
     """
-    text_lower = text.lower()
-    for keyword in DANGEROUS_KEYWORDS:
-        if keyword in text_lower:
-            return True
-    return False
+    return contains_keyword(text, CATEGORY_DANGEROUS)
 
 
 def open_website(site_name: str) -> str:
@@ -95,6 +96,37 @@ def open_app(app_name: str) -> str:
         return f"Não encontrei o aplicativo '{app_name}'. Verifique se está instalado."
 
 
+def open_app_or_site(name: str) -> str:
+    """
+    Abre um app ou site pelo nome, tolerando erros de reconhecimento.
+    
+    Nomes parecidos com um app/site conhecido são abertos direto; nomes
+    só razoavelmente parecidos geram uma pergunta, sem abrir nada. O
+    resto segue o caminho antigo (comando direto e depois site .com).
+    
+    Args:
+        name: Nome dito pelo usuário
+        
+    Returns:
+        Mensagem de status, pergunta de confirmação ou erro
+    """
+    match = find_app(name)
+    
+    if match and match.score >= FUZZY_LAUNCH_THRESHOLD:
+        if match.kind == KIND_APP:
+            return open_app(match.alias)
+        return open_website(match.alias)
+    
+    if match:
+        return f"Não encontrei '{name}'. Você quis dizer '{match.alias}'? Diga \"abrir {match.alias}\"."
+    
+    result = open_app(name)
+    # Se falhar como app, tenta como site
+    if "Não encontrei" in result or "Erro" in result:
+        result = open_website(name)
+    return result
+
+
 def search_google(query: str) -> str:
     """
     Realiza busca no Google.
@@ -225,6 +257,7 @@ def execute_command(command_type: str, args: Optional[str] = None) -> Optional[s
     commands = {
         "open_website": lambda: open_website(args),
         "open_app": lambda: open_app(args),
+        "open": lambda: open_app_or_site(args),
         "search_google": lambda: search_google(args),
         "search_youtube": lambda: search_youtube(args),
         "get_time": lambda: get_time(),
@@ -11,7 +11,8 @@ Este arquivo contém:
 """
 
 import os
-from typing import Dict, List
+from pathlib import Path
+from typing import Any, Dict, List
 
 # ============================================================================
 # INFORMAÇÕES DO ASSISTENTE
@@ -32,6 +33,180 @@ GOOGLE_API_KEY: str = os.environ.get("GOOGLE_API_KEY", "")
 if not GOOGLE_API_KEY:
     GOOGLE_API_KEY = "Coloque sua API Key ou use o Test API"
 
+# ============================================================================
+# MODELO DE IA - Compartilhado por todas as interfaces
+# ============================================================================
+
+GEMINI_MODEL: str = "gemini-2.5-flash"
+
+# Endpoint alternativo da API, como o servidor falso local (fake_gemini.py):
+# ONERD_GEMINI_ENDPOINT=http://127.0.0.1:8765. Vazio usa a API real
+GEMINI_API_ENDPOINT: str = os.environ.get("ONERD_GEMINI_ENDPOINT", "")
+
+GENERATION_CONFIG: Dict[str, Any] = {
+    "max_output_tokens": 1000,
+    "temperature": 0.9,
+    "top_p": 0.95,
+    "top_k": 64,
+}
+
+# Faz uma chamada leve ao iniciar, para a primeira pergunta não pagar
+# a abertura da conexão
+LLM_WARMUP: bool = True
+
+# Mostra a resposta da IA conforme ela é gerada
+LLM_STREAMING: bool = True
+
+# Tempo máximo (segundos) de espera por uma resposta da API
+LLM_REQUEST_TIMEOUT: float = 30.0
+
+# Limites da chave (plano gratuito do gemini-2.5-flash); ajuste ao seu plano
+GEMINI_RPM: int = 10
+GEMINI_TPM: int = 250000
+
+# Novas tentativas em erros temporários (429, 500, 503), com espera
+# exponencial a partir de LLM_RETRY_BASE_DELAY e no máximo LLM_RETRY_MAX_DELAY
+LLM_MAX_RETRIES: int = 3
+LLM_RETRY_BASE_DELAY: float = 1.0
+LLM_RETRY_MAX_DELAY: float = 30.0
+
+# Disjuntor: após LLM_BREAKER_FAILURES falhas seguidas, responde localmente
+# por LLM_BREAKER_COOLDOWN segundos antes de testar a API de novo
+LLM_BREAKER_FAILURES: int = 3
+LLM_BREAKER_COOLDOWN: float = 30.0
+
+# Pedidos idênticos (mesma pergunta e mesmo contexto) que chegam enquanto
+# a resposta ainda está sendo gerada aproveitam a mesma chamada à API
+LLM_COALESCE: bool = True
+
+# ============================================================================
+# ROTEAMENTO DE MODELOS - Modelo mais barato que dá conta de cada pedido
+# ============================================================================
+
+MODEL_ROUTER_ENABLED: bool = True
+
+# Níveis do mais rápido ao mais capaz. Se um nível falhar ou recusar o
+# pedido, ele sobe para o nível seguinte
+MODEL_TIERS: Dict[str, Dict[str, Any]] = {
+    "rapido": {"model": "gemini-2.5-flash-lite", "max_output_tokens": 300},
+    "padrao": {"model": GEMINI_MODEL, "max_output_tokens": 1000},
+    "avancado": {"model": "gemini-2.5-pro", "max_output_tokens": 2000},
+}
+
+# Regras avaliadas em ordem; a primeira que casa escolhe o nível.
+# Critérios (todos opcionais): min_words, max_words, keywords (sem
+# acentos, qualquer uma no pedido) e modes ("text"/"voice").
+# max_output_tokens na regra substitui o padrão do nível
+MODEL_ROUTING_POLICY: List[Dict[str, Any]] = [
+    {"tier": "avancado", "min_words": 60},
+    {"tier": "padrao", "keywords": [
+        "codigo", "programa", "python", "explica", "explique", "compare",
+        "diferenca", "passo a passo", "resolva", "calcule", "por que", "porque",
+    ]},
+    {"tier": "rapido", "max_words": 8},
+    # Respostas faladas devem ser curtas
+    {"tier": "padrao", "modes": ["voice"], "max_output_tokens": 400},
+    {"tier": "padrao"},
+]
+
+# Quantas vezes um pedido pode subir de nível após falha ou recusa
+MODEL_ROUTER_MAX_ESCALATIONS: int = 1
+
+# Registra cada pedido (nível, tempo, tokens) em DATA_DIR/model_router.jsonl
+MODEL_ROUTER_LOG: bool = True
+
+# ============================================================================
+# SERVIDOR FALSO DO GEMINI - Testes e benchmarks sem chave nem rede
+# ============================================================================
+
+FAKE_GEMINI_PORT: int = 8765
+
+# Tempo até o primeiro pedaço: distribuição log-normal com esta mediana
+# (ms) e este desvio (sigma do logaritmo; 0 = sempre a mediana)
+FAKE_GEMINI_LATENCY_MS: float = 400.0
+FAKE_GEMINI_LATENCY_SIGMA: float = 0.4
+
+# Streaming: caracteres por pedaço e intervalo entre pedaços (ms)
+FAKE_GEMINI_CHUNK_CHARS: int = 40
+FAKE_GEMINI_CHUNK_MS: float = 60.0
+
+# Probabilidade de cada requisição receber 429 ou 500
+FAKE_GEMINI_ERROR_429: float = 0.0
+FAKE_GEMINI_ERROR_500: float = 0.0
+
+# Respostas gravadas (JSONL com "prompt" e "response"); sem correspondência,
+# o servidor gera um texto padrão
+FAKE_GEMINI_FIXTURES: Path = Path(__file__).parent / "fake_gemini_fixtures.jsonl"
+
+# ============================================================================
+# DADOS LOCAIS - Caches e arquivos gerados pelo assistente
+# ============================================================================
+
+DATA_DIR: Path = Path(os.environ.get("ONERD_DATA_DIR", Path.home() / ".onerd"))
+
+# ============================================================================
+# CACHE DE RESPOSTAS - Perguntas repetidas sem nova chamada à IA
+# ============================================================================
+
+RESPONSE_CACHE_ENABLED: bool = True
+
+# Validade de uma resposta guardada (segundos)
+RESPONSE_CACHE_TTL: float = 7 * 24 * 3600
+
+# Limites do cache; acima deles saem as respostas usadas há mais tempo
+RESPONSE_CACHE_MAX_ENTRIES: int = 2000
+RESPONSE_CACHE_MAX_BYTES: int = 5 * 1024 * 1024
+
+# Mensagens anteriores da conversa que entram na chave do cache
+RESPONSE_CACHE_HISTORY_MESSAGES: int = 2
+
+# ============================================================================
+# HISTÓRICO DA CONVERSA - Limitado por tokens, não por mensagens
+# ============================================================================
+
+# Tokens estimados do histórico enviado a cada pergunta
+HISTORY_TOKEN_BUDGET: int = 4000
+
+# Resume as perguntas antigas que saem do histórico
+HISTORY_SUMMARY: bool = True
+HISTORY_SUMMARY_TOKENS: int = 200
+
+# ============================================================================
+# CONVERSAS SALVAS - Histórico em disco, retomado ao reiniciar
+# ============================================================================
+
+# Grava as conversas em DATA_DIR/conversations.db
+CONVERSATION_STORE_ENABLED: bool = True
+
+# Ao iniciar, continua a última conversa da interface se ela teve
+# atividade há menos de CONVERSATION_RESUME_MAX_AGE segundos, carregando
+# só as últimas CONVERSATION_RESUME_MESSAGES mensagens
+CONVERSATION_RESUME: bool = True
+CONVERSATION_RESUME_MAX_AGE: float = 12 * 3600
+CONVERSATION_RESUME_MESSAGES: int = 20
+
+# Compactação: conversas paradas há mais dias que isso são apagadas, e
+# cada conversa guarda no máximo CONVERSATION_MAX_MESSAGES mensagens
+CONVERSATION_RETENTION_DAYS: int = 90
+CONVERSATION_MAX_MESSAGES: int = 2000
+
+# ============================================================================
+# TELEMETRIA - Tempo de cada etapa dos pedidos, gravado localmente
+# ============================================================================
+
+# Grava uma linha por pedido (etapas, tokens, cache, erros) em
+# DATA_DIR/telemetry.jsonl; nada sai do computador
+TELEMETRY_ENABLED: bool = True
+
+# Acima disso o arquivo vira telemetry.jsonl.1 (o .1 vira .2, e assim
+# por diante, até TELEMETRY_BACKUPS arquivos antigos)
+TELEMETRY_MAX_BYTES: int = 1024 * 1024
+TELEMETRY_BACKUPS: int = 3
+
+# Também mantém DATA_DIR/telemetry.prom no formato texto do Prometheus
+# (para o textfile collector do node_exporter), atualizado a cada pedido
+TELEMETRY_PROMETHEUS: bool = False
+
 # ============================================================================
 # CONFIGURAÇÕES DE VOZ
 # ============================================================================
@@ -40,6 +215,70 @@ LANGUAGE: str = "pt-BR"
 VOICE_RATE: int = 150
 VOICE_VOLUME: float = 1.0
 
+# Em modo voz, o microfone fica aberto: uma thread grava em um buffer
+# circular e separa cada fala pelo volume, sem perder o áudio entre uma
+# escuta e a seguinte. False volta a abrir o microfone a cada escuta
+CAPTURE_CONTINUOUS: bool = True
+
+# Segundos de áudio guardados no buffer circular
+CAPTURE_BUFFER_SECONDS: float = 30.0
+
+# Silêncio (segundos) que encerra uma fala, e áudio de antes do início
+# da fala que entra no trecho (o começo da primeira sílaba)
+CAPTURE_PAUSE: float = 0.8
+CAPTURE_PRE_ROLL: float = 0.3
+
+# Segundos do início da gravação usados para medir o ruído ambiente
+CAPTURE_CALIBRATION: float = 0.5
+
+# Palavra de ativação reconhecida no próprio computador: o começo de cada
+# fala é comparado com gravações de "O Nerd"/"Oi Nerd" (MFCC + DTW, precisa
+# do numpy) e só o que vem depois dela vai para o reconhecimento na nuvem;
+# conversas em volta nem saem do computador. Experimental e desligado:
+# o limiar ainda não foi medido com gravações reais. Para usar, grave as
+# referências (python wake_word.py gravar), meça o corpus (python
+# wake_word.py avaliar) e ligue aqui
+WAKE_WORD_LOCAL: bool = False
+WAKE_WORD_DIR: Path = DATA_DIR / "wake_word"
+
+# Distância máxima (0 = idêntica) para aceitar a palavra de ativação;
+# python wake_word.py avaliar mostra as taxas de erro e sugere um valor
+WAKE_WORD_THRESHOLD: float = 0.35
+
+# Segundos do começo da fala onde a palavra de ativação é procurada
+WAKE_WORD_WINDOW: float = 1.5
+
+# Fala a resposta da IA frase por frase, enquanto ela ainda é gerada
+SPEECH_STREAMING: bool = True
+
+# Tamanho mínimo (caracteres) de um trecho enviado à voz; trechos menores
+# esperam a próxima frase
+SPEECH_MIN_CHARS: int = 20
+
+# Frases mais longas que isso são divididas também em vírgulas e ponto e vírgula
+SPEECH_MAX_CHARS: int = 150
+
+# Confirmações curtas ("Sim? Como posso ajudar?", "Abrindo Discord...") são
+# gravadas em WAV em DATA_DIR/phrases na primeira vez e depois só tocadas,
+# sem sintetizar de novo. Tocar o WAV usa o winsound (só Windows)
+PHRASE_CACHE_ENABLED: bool = True
+PHRASE_CACHE_MAX_FILES: int = 300
+PHRASE_CACHE_MAX_BYTES: int = 50 * 1024 * 1024
+
+# Frases mais longas que isso (ou com números, como horas) não são gravadas
+PHRASE_CACHE_MAX_CHARS: int = 80
+
+# Gravadas em segundo plano assim que o TTS inicia, quando a fala está livre
+PHRASE_CACHE_WARMUP: List[str] = [
+    "Sim? Como posso ajudar?",
+    "Modo de voz ativado! Agora estou ouvindo voce.",
+    "Modo texto ativado.",
+    "Ate mais! Foi um prazer ajudar voce.",
+    "Até mais! Encerrando...",
+    "Até mais! Desligando...",
+    "Desculpe, tive um erro ao processar seu comando.",
+]
+
 # ============================================================================
 # SYSTEM PROMPT - Comportamento do assistente
 # ============================================================================
@@ -68,6 +307,12 @@ DANGEROUS_KEYWORDS: List[str] = [
     "kill", "matar processo",
 ]
 
+# ============================================================================
+# PALAVRAS DE SAÍDA - Encerram o assistente
+# ============================================================================
+
+EXIT_KEYWORDS: List[str] = ["sair", "exit", "quit", "tchau", "adeus", "fechar"]
+
 # ============================================================================
 # APLICATIVOS SEGUROS - URLs de sites confiáveis
 # ============================================================================
@@ -165,7 +410,6 @@ WINDOWS_APPS: Dict[str, str] = {
     "7zip": "C:\\Program Files\\7-Zip\\7zFM.exe",
     "notion": "C:\\Users\\Anatalia\\AppData\\Local\\Programs\\Notion\\Notion.exe",
     "obsidian": "C:\\Users\\Anatalia\\AppData\\Local\\Obsidian\\Obsidian.exe",
-}
     "spotify": "C:\\Users\\Anatalia\\AppData\\Roaming\\Spotify\\spotify.exe",
     "chrome": "C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe",
     "google chrome": "C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe",
@@ -189,6 +433,31 @@ WINDOWS_APPS: Dict[str, str] = {
     "canva": "C:\\Users\\Anatalia\\AppData\\Local\\Canva\\Canva\\Canva.exe",
 }
 
+# ============================================================================
+# BUSCA APROXIMADA DE APLICATIVOS - "abrir [app]" com nome mal reconhecido
+# ============================================================================
+
+# Pontuação (0 a 1) a partir da qual o app é aberto direto
+FUZZY_LAUNCH_THRESHOLD: float = 0.7
+
+# Pontuação a partir da qual O Nerd pergunta "Você quis dizer...?"
+FUZZY_ASK_THRESHOLD: float = 0.45
+
+# ============================================================================
+# CLASSIFICADOR LOCAL - Resolve comandos sem chamar a IA
+# ============================================================================
+
+# Limiares medidos com "python benchmark.py classifier" (deixa-uma-de-fora):
+# com 0.4 e 0.2, nenhuma frase de fora é aceita com a intenção errada, e
+# cada erro aceito com limiares menores ("quantas horas dura um filme",
+# "que horas começa a copa") fica abaixo dos dois
+
+# Similaridade mínima (0 a 1) com a intenção escolhida
+LOCAL_INTENT_MIN_SCORE: float = 0.4
+
+# Diferença mínima para a segunda intenção mais provável
+LOCAL_INTENT_MIN_MARGIN: float = 0.2
+
 SYSTEM_PROMPT = f"""Você é {ASSISTANT_NAME}, um assistente virtual COMPLETO e poderoso para Windows 11.
 Você é inteligente, prestativo e pode fazer TUDO que o usuário pedir: responder perguntas, executar ações no computador, automaticar tarefas, e muito mais!
 
@@ -248,3 +517,17 @@ ESTILO DE RESPOSTA:
 🚀 RESUMO:
 Você NÃO é um assistente limitado. Você é um assistente COMPLETO que pode fazer praticamente tudo que o usuário pedir. Responda com confiança, entusiasmo e criatividade. O usuário pode pedir perguntas, conversas, ações, automações - TUDO! Você está aqui para ajudar de TODAS as formas possíveis."""
 
+# ============================================================================
+# PROMPT DE SISTEMA COMPACTO - Menos tokens em cada pedido
+# ============================================================================
+
+# Versão curta para o modo de voz: a resposta é falada, então nada de
+# emojis, listas ou markdown
+SYSTEM_PROMPT_VOICE: str = f"""Você é {ASSISTANT_NAME}, assistente de voz para Windows 11, com jeito nerd, educado e descontraído.
+Responda sempre em português brasileiro, com frases curtas e naturais para serem faladas, sem emojis, listas, símbolos ou markdown.
+Você conversa sobre qualquer assunto e ajuda a abrir apps e sites, pesquisar e automatizar tarefas seguras.
+Nunca apague ou formate arquivos, acesse senhas ou execute comandos que danifiquem o sistema; recuse com educação o que for perigoso.
+Se não souber, admita e sugira uma alternativa."""
+
+# Remove do prompt de texto as linhas e os símbolos decorativos (═, ✓, emojis)
+PROMPT_COMPACT: bool = True
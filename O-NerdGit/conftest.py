@@ -0,0 +1,53 @@
+"""
+Configuração comum dos testes (pytest).
+
+Os testes nunca chamam a API real: antes de qualquer import do config,
+ONERD_GEMINI_ENDPOINT aponta para o servidor falso (fake_gemini.py), que
+a fixture fake_gemini sobe uma vez por sessão.
+
+Execute: python -m pytest
+"""
+
+import os
+import socket
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(SCRIPT_DIR))
+
+# Scripts de diagnóstico para rodar direto (python test_gemini.py), não pelo pytest
+collect_ignore = ["test.py", "test_gemini.py", "test_ai_response.py"]
+
+
+def _free_port() -> int:
+    """Porta local livre para o servidor falso."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Antes de importar config, que lê o endpoint na importação
+FAKE_PORT = _free_port()
+os.environ["ONERD_GEMINI_ENDPOINT"] = f"http://127.0.0.1:{FAKE_PORT}"
+
+
+@pytest.fixture(scope="session")
+def fake_gemini_server():
+    """Servidor falso do Gemini, rápido e sem respostas gravadas."""
+    from fake_gemini import FakeGemini
+
+    fake = FakeGemini(port=FAKE_PORT, latency_ms=1, latency_sigma=0, chunk_ms=0,
+                      error_429=0.0, error_500=0.0, fixtures=None, seed=7).start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def fake_gemini(fake_gemini_server):
+    """O servidor falso, com as taxas de erro zeradas ao fim de cada teste."""
+    yield fake_gemini_server
+    fake_gemini_server.error_429 = 0.0
+    fake_gemini_server.error_500 = 0.0
@@ -0,0 +1,321 @@
+"""
+O Nerd - Motor de Conversa Assíncrono
+=====================================
+
+Núcleo asyncio do loop de conversa. Ouvir, gerar a resposta e falar
+rodam como tarefas: enquanto o O Nerd responde, o próximo pedido já
+está sendo ouvido. Um novo pedido ("O Nerd, ...") cancela a geração e
+a fala em andamento (barge-in) e é atendido na hora.
+
+As chamadas bloqueantes ficam fora do loop de eventos:
+- microfone, teclado e SDK do Gemini rodam em threads daemon, que não
+  seguram o encerramento do programa enquanto esperam;
+- a fala vai para a fila da thread do TTS do assistente de voz, onde
+  o pyttsx3 é criado e usado, como o motor de voz exige; o loop só
+  espera o Future de cada fala.
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+from config import SPEECH_STREAMING
+from llm import GenerationCancelled
+from voice import PRIORITY_ANSWER, SentenceSplitter, VoiceAssistant, get_voice_assistant
+
+# Gera a resposta: recebe a função de pedaços (None sem streaming) e o
+# evento de cancelamento, e retorna o texto final (ex.: chat_with_ai)
+Producer = Callable[[Optional[Callable[[str], None]], threading.Event], str]
+
+
+class Turn:
+    """Um pedido do usuário sendo atendido."""
+
+    def __init__(self, text: str):
+        """
+        Args:
+            text: Pedido, já sem a palavra de ativação
+        """
+        self.text = text
+        # threading.Event: também é consultado pelas threads da IA
+        self.cancel = threading.Event()
+        self.started = time.perf_counter()
+
+    @property
+    def cancelled(self) -> bool:
+        """Verifica se o pedido foi interrompido por outro."""
+        return self.cancel.is_set()
+
+
+def _resolve(future: asyncio.Future, result: Any = None,
+             error: Optional[BaseException] = None) -> None:
+    """Entrega o resultado de uma thread ao future, se ainda for esperado."""
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class ConversationEngine:
+    """
+    Loop de conversa com cancelamento.
+
+    A interface fornece o tratamento de cada pedido (handle), que usa
+    say() e reply() para responder; o motor cuida de ouvir, interromper
+    e manter a voz e a IA fora do loop de eventos.
+    """
+
+    def __init__(self, handle: Callable[[Turn], Awaitable[None]]):
+        """
+        Args:
+            handle: Corrotina que atende um pedido
+        """
+        self.handle = handle
+        self.voice_assistant: Optional[VoiceAssistant] = None
+        self.is_running = False
+        self.interruptions = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._turn: Optional[Turn] = None
+        self._task: Optional[asyncio.Task] = None
+        self._listening: Optional[asyncio.Future] = None
+
+    @property
+    def busy(self) -> bool:
+        """Verifica se há um pedido sendo atendido."""
+        return self._task is not None and not self._task.done()
+
+    async def start(self, voice_assistant: Optional[VoiceAssistant] = None) -> VoiceAssistant:
+        """
+        Liga o motor e inicializa o TTS na thread da fala, em segundo plano.
+
+        Args:
+            voice_assistant: Assistente de voz (padrão: o compartilhado)
+
+        Returns:
+            O assistente de voz usado pelo motor
+        """
+        self._loop = asyncio.get_running_loop()
+        if voice_assistant is None:
+            voice_assistant = get_voice_assistant()
+        # O TTS é inicializado na thread da fala; a primeira fala espera na fila
+        voice_assistant.warm_up_speech()
+        self.voice_assistant = voice_assistant
+        self.is_running = True
+        return self.voice_assistant
+
+    def stop(self) -> None:
+        """Encerra o loop depois do pedido atual (pode ser chamado dentro dele)."""
+        self.is_running = False
+        if self._listening is not None:
+            self._listening.cancel()
+
+    def run_blocking(self, func: Callable[..., Any], *args: Any) -> asyncio.Future:
+        """
+        Roda uma chamada bloqueante em uma thread daemon.
+
+        Args:
+            func: Chamada (ex.: listen, input, chat_with_ai)
+            *args: Argumentos de func
+
+        Returns:
+            Future com o resultado; cancelá-lo não interrompe a thread
+        """
+        loop = self._loop
+        future = loop.create_future()
+
+        def target() -> None:
+            try:
+                result = func(*args)
+            except BaseException as error:
+                outcome = (None, error)
+            else:
+                outcome = (result, None)
+            try:
+                loop.call_soon_threadsafe(_resolve, future, *outcome)
+            except RuntimeError:
+                # Loop já encerrado: ninguém espera mais o resultado
+                pass
+
+        threading.Thread(target=target, name="onerd-blocking", daemon=True).start()
+        return future
+
+    async def run(self, listen: Callable[[], Optional[str]],
+                  extract: Optional[Callable[[str], Optional[str]]] = None,
+                  on_ready: Optional[Callable[[], None]] = None,
+                  on_interrupt: Optional[Callable[[Turn], None]] = None) -> None:
+        """
+        Ouve continuamente e atende cada pedido em uma tarefa.
+
+        Args:
+            listen: Chamada bloqueante que retorna a próxima fala ou linha
+            extract: Retorna o pedido contido no texto, ou None para
+                ignorá-lo (ex.: sem a palavra de ativação)
+            on_ready: Chamada quando o motor fica livre (ex.: mostrar o prompt)
+            on_interrupt: Chamada com o pedido que foi interrompido
+        """
+        if on_ready:
+            on_ready()
+
+        while self.is_running:
+            self._listening = self.run_blocking(listen)
+            try:
+                text = await self._listening
+            except asyncio.CancelledError:
+                if self.is_running:
+                    raise
+                break
+            except EOFError:
+                # Entrada fechada (ex.: fim do arquivo em stdin)
+                self.is_running = False
+                break
+            finally:
+                self._listening = None
+
+            if not self.is_running:
+                break
+            if not text:
+                if on_ready and not self.busy:
+                    on_ready()
+                continue
+            request = extract(text) if extract else text
+            if request is None:
+                continue
+
+            interrupted = self._turn
+            if await self.interrupt() and on_interrupt:
+                on_interrupt(interrupted)
+            self._start_turn(request, on_ready)
+
+        # Deixa terminar o pedido que encerrou o loop (ex.: "Até mais!")
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def interrupt(self) -> bool:
+        """
+        Cancela o pedido em andamento: a geração e a fala.
+
+        Returns:
+            True se havia um pedido em andamento
+        """
+        if not self.busy:
+            return False
+
+        self._turn.cancel.set()
+        self.voice_assistant.stop()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self.interruptions += 1
+        return True
+
+    async def say(self, text: str, echo: bool = True, priority: int = PRIORITY_ANSWER) -> None:
+        """
+        Fala um texto na thread da voz e espera terminar.
+
+        Args:
+            text: Texto a ser falado
+            echo: Exibe o texto no console antes de falar
+            priority: Prioridade na fila da fala (ex.: PRIORITY_CONFIRMATION)
+        """
+        await asyncio.wrap_future(self.voice_assistant.speak(text, echo, priority))
+
+    async def reply(self, turn: Turn, produce: Producer,
+                    on_chunk: Optional[Callable[[str], None]] = None,
+                    stream: bool = True) -> str:
+        """
+        Gera a resposta e fala cada frase assim que ela fica pronta.
+
+        A geração e a fala são tarefas separadas ligadas por uma fila:
+        a voz começa na primeira frase, sem esperar o fim da geração.
+
+        Args:
+            turn: Pedido sendo atendido
+            produce: Gera a resposta (roda em uma thread)
+            on_chunk: Também recebe cada pedaço (ex.: TerminalPrinter)
+            stream: Pede a resposta em streaming
+
+        Returns:
+            Texto final retornado por produce
+
+        Raises:
+            GenerationCancelled: O pedido foi interrompido durante a geração
+        """
+        sentences: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        splitter = SentenceSplitter()
+        speak_chunks = SPEECH_STREAMING and self.voice_assistant.is_tts_available()
+        streamed: List[str] = []
+        loop = self._loop
+
+        def feed(chunk: str) -> None:
+            # Roda na thread da geração
+            streamed.append(chunk)
+            if on_chunk:
+                on_chunk(chunk)
+            if speak_chunks:
+                for sentence in splitter.feed(chunk):
+                    loop.call_soon_threadsafe(sentences.put_nowait, sentence)
+
+        speech = asyncio.create_task(self._speak_sentences(sentences, turn))
+        try:
+            # As frases agendadas por feed chegam antes do resultado
+            text = await self.run_blocking(produce, feed if stream else None, turn.cancel)
+            for sentence in splitter.flush():
+                sentences.put_nowait(sentence)
+            # Respostas que não vieram em pedaços (erro, recusa) são faladas inteiras
+            if not speak_chunks or "".join(streamed).strip() != text:
+                sentences.put_nowait(text)
+            sentences.put_nowait(None)
+            await speech
+        finally:
+            speech.cancel()
+        return text
+
+    def _start_turn(self, text: str, on_ready: Optional[Callable[[], None]]) -> None:
+        """Atende um pedido em uma nova tarefa."""
+        self._turn = Turn(text)
+        self._task = asyncio.create_task(self._run_turn(self._turn))
+        if on_ready:
+            self._task.add_done_callback(
+                lambda task: on_ready() if self.is_running and not task.cancelled() else None
+            )
+
+    async def _run_turn(self, turn: Turn) -> None:
+        """Roda o tratamento de um pedido, sinalizando as threads se for cancelado."""
+        try:
+            await self.handle(turn)
+        except asyncio.CancelledError:
+            turn.cancel.set()
+            raise
+        except GenerationCancelled:
+            pass
+        except Exception as error:
+            print(f"[ERRO] {error}")
+
+    async def _speak_sentences(self, sentences: "asyncio.Queue[Optional[str]]",
+                               turn: Turn) -> None:
+        """
+        Passa as frases para a fila da fala até receber None e espera a última.
+
+        Cada frase entra na fila assim que chega, sem esperar a anterior
+        terminar: a voz emenda uma frase na outra.
+        """
+        first_audio: List[float] = []
+
+        def mark_first_audio() -> None:
+            # Roda na thread da fala
+            if not first_audio:
+                first_audio.append(time.perf_counter() - turn.started)
+                self.voice_assistant.first_audio_times.append(first_audio[0])
+
+        last = None
+        sentence = await sentences.get()
+        while sentence is not None:
+            last = self.voice_assistant.speak(sentence, echo=False, on_start=mark_first_audio)
+            sentence = await sentences.get()
+        if last is not None:
+            await asyncio.wrap_future(last)
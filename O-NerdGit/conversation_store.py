@@ -0,0 +1,351 @@
+"""
+O Nerd - Conversas Salvas
+=========================
+
+Guarda em disco (SQLite em modo WAL) cada mensagem das conversas,
+separadas por sessão, para que reiniciar o O Nerd não apague o contexto
+e as conversas antigas possam ser consultadas sem ficar na memória.
+
+As mensagens só são acrescentadas, nunca reescritas. A gravação fica com
+uma thread própria: salvar uma mensagem é só colocá-la em uma fila, sem
+nenhum acesso a disco no caminho da resposta. A thread grava o que
+estiver na fila em uma única transação.
+
+Ao retomar, só as últimas mensagens da sessão são lidas, pelo índice
+(sessão, id). A compactação apaga as sessões paradas há muito tempo e o
+excesso de mensagens das sessões muito longas.
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import (
+    DATA_DIR,
+    CONVERSATION_STORE_ENABLED, CONVERSATION_RESUME_MAX_AGE,
+    CONVERSATION_RETENTION_DAYS, CONVERSATION_MAX_MESSAGES,
+)
+
+STORE_FILE = DATA_DIR / "conversations.db"
+
+# Tempo máximo de espera pela gravação do que falta ao encerrar (segundos)
+CLOSE_TIMEOUT = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    channel TEXT NOT NULL,
+    started REAL NOT NULL,
+    last_active REAL NOT NULL,
+    messages INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session TEXT NOT NULL,
+    time REAL NOT NULL,
+    role TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_session ON messages (session, id);
+CREATE INDEX IF NOT EXISTS sessions_channel ON sessions (channel, last_active);
+"""
+
+
+class ConversationStore:
+    """
+    Conversas em disco, com gravação em segundo plano.
+
+    Seguro entre threads: as escritas passam pela fila da thread de
+    gravação e as leituras usam uma conexão própria, protegida por lock
+    (no modo WAL, ler não espera a gravação).
+    """
+
+    def __init__(self, path: Path = STORE_FILE, enabled: bool = CONVERSATION_STORE_ENABLED,
+                 retention_days: float = CONVERSATION_RETENTION_DAYS,
+                 max_messages: int = CONVERSATION_MAX_MESSAGES):
+        """
+        Args:
+            path: Arquivo SQLite
+            enabled: False não grava nem lê nada
+            retention_days: Sessões paradas há mais dias que isso são apagadas
+            max_messages: Mensagens guardadas por sessão (as mais antigas saem)
+        """
+        self.path = Path(path)
+        self.enabled = enabled
+        self.retention_days = retention_days
+        self.max_messages = max_messages
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self._queue: "queue.Queue[Optional[Tuple[str, Tuple[Any, ...]]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._reader: Optional[sqlite3.Connection] = None
+
+    # ------------------------------------------------------------------
+    # Escrita (só enfileira)
+    # ------------------------------------------------------------------
+
+    def new_session(self, channel: str) -> str:
+        """
+        Abre uma sessão nova.
+
+        Args:
+            channel: Interface dona da sessão (ex.: "o_nerd", "start")
+
+        Returns:
+            Identificador da sessão
+        """
+        session = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self._submit("session", session, channel, time.time())
+        return session
+
+    def append(self, session: str, role: str, text: str) -> None:
+        """
+        Acrescenta uma mensagem à sessão, sem esperar a gravação.
+
+        Args:
+            session: Identificador da sessão
+            role: "user" ou "model"
+            text: Conteúdo da mensagem
+        """
+        self._submit("message", session, role, text, time.time())
+
+    def compact(self) -> None:
+        """Agenda a compactação (sessões vencidas e sessões longas demais)."""
+        self._submit("compact")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a gravação de tudo o que já foi enfileirado.
+
+        Args:
+            timeout: Espera máxima em segundos (None: sem limite)
+
+        Returns:
+            True se a fila esvaziou a tempo
+        """
+        if self._writer is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self) -> None:
+        """Grava o que falta e encerra a thread de gravação."""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join(CLOSE_TIMEOUT)
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def recent_session(self, channel: str,
+                       max_age: float = CONVERSATION_RESUME_MAX_AGE) -> Optional[str]:
+        """
+        Procura a última sessão de uma interface que ainda pode ser retomada.
+
+        Args:
+            channel: Interface dona da sessão
+            max_age: Segundos desde a última mensagem
+
+        Returns:
+            Identificador da sessão, ou None
+        """
+        row = self._read(
+            "SELECT id FROM sessions WHERE channel = ? AND last_active >= ? AND messages > 0 "
+            "ORDER BY last_active DESC LIMIT 1",
+            (channel, time.time() - max_age),
+        )
+        return row[0][0] if row else None
+
+    def load_messages(self, session: str, limit: int) -> List[Tuple[str, str]]:
+        """
+        Lê as últimas mensagens de uma sessão, da mais antiga para a mais nova.
+
+        Args:
+            session: Identificador da sessão
+            limit: Número máximo de mensagens
+
+        Returns:
+            Pares (role, texto)
+        """
+        rows = self._read(
+            "SELECT role, text FROM messages WHERE session = ? ORDER BY id DESC LIMIT ?",
+            (session, limit),
+        )
+        rows.reverse()
+        # O histórico começa por uma pergunta
+        while rows and rows[0][0] != "user":
+            rows.pop(0)
+        return rows
+
+    def list_sessions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Lista as sessões mais recentes, sem carregar as mensagens.
+
+        Args:
+            limit: Número máximo de sessões
+
+        Returns:
+            Dicionários com id, channel, started, last_active e messages
+        """
+        rows = self._read(
+            "SELECT id, channel, started, last_active, messages FROM sessions "
+            "ORDER BY last_active DESC LIMIT ?",
+            (limit,),
+        )
+        keys = ("id", "channel", "started", "last_active", "messages")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Retorna os contadores da gravação.
+
+        Returns:
+            Dicionário com written (mensagens), batches (transações),
+            errors e pending (ainda na fila)
+        """
+        return {"written": self.written, "batches": self.batches,
+                "errors": self.errors, "pending": self._queue.qsize()}
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _submit(self, operation: str, *args: Any) -> None:
+        """Coloca uma operação na fila, iniciando a thread de gravação se preciso."""
+        if not self.enabled:
+            return
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop,
+                                                    name="onerd-store", daemon=True)
+                    self._writer.start()
+                    atexit.register(self.close)
+        self._queue.put((operation, args))
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre uma conexão com o banco, criando as tabelas se preciso."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        # WAL: leituras não esperam a gravação; sem fsync a cada commit,
+        # uma queda de energia perde no máximo as últimas mensagens
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _read(self, sql: str, params: Tuple[Any, ...]) -> List[Tuple[Any, ...]]:
+        """Executa uma consulta na conexão de leitura."""
+        if not self.enabled:
+            return []
+        with self._read_lock:
+            try:
+                if self._reader is None:
+                    self._reader = self._connect()
+                return self._reader.execute(sql, params).fetchall()
+            except sqlite3.Error:
+                # Banco ilegível não impede a conversa: começa do zero
+                return []
+
+    def _write_loop(self) -> None:
+        """Thread de gravação: grava a fila em lotes, uma transação por lote."""
+        try:
+            connection = self._connect()
+        except sqlite3.Error:
+            self.enabled = False
+            connection = None
+
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            # Junta o que mais chegou enquanto a última transação gravava
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            operations = [item for item in batch if item is not None]
+            running = len(operations) == len(batch)
+            if connection is not None and operations:
+                try:
+                    with connection:
+                        for operation, args in operations:
+                            self._apply(connection, operation, args)
+                    self.batches += 1
+                except sqlite3.Error:
+                    self.errors += 1
+            for _ in batch:
+                self._queue.task_done()
+
+        if connection is not None:
+            connection.close()
+
+    def _apply(self, connection: sqlite3.Connection, operation: str,
+               args: Tuple[Any, ...]) -> None:
+        """Aplica uma operação da fila (dentro da transação do lote)."""
+        if operation == "session":
+            session, channel, now = args
+            connection.execute("INSERT OR IGNORE INTO sessions VALUES (?, ?, ?, ?, 0)",
+                               (session, channel, now, now))
+        elif operation == "message":
+            session, role, text, now = args
+            connection.execute("INSERT INTO messages (session, time, role, text) VALUES (?, ?, ?, ?)",
+                               (session, now, role, text))
+            connection.execute("UPDATE sessions SET last_active = ?, messages = messages + 1 "
+                               "WHERE id = ?", (now, session))
+            self.written += 1
+        elif operation == "compact":
+            self._compact(connection)
+
+    def _compact(self, connection: sqlite3.Connection) -> None:
+        """Apaga sessões vencidas e o excesso de mensagens das sessões longas."""
+        cutoff = time.time() - self.retention_days * 86400
+        stale = connection.execute("SELECT id FROM sessions WHERE last_active < ?",
+                                   (cutoff,)).fetchall()
+        connection.executemany("DELETE FROM messages WHERE session = ?", stale)
+        connection.executemany("DELETE FROM sessions WHERE id = ?", stale)
+
+        long_sessions = connection.execute("SELECT id FROM sessions WHERE messages > ?",
+                                           (self.max_messages,)).fetchall()
+        for (session,) in long_sessions:
+            # id da mensagem mais antiga que ainda fica
+            oldest = connection.execute(
+                "SELECT id FROM messages WHERE session = ? ORDER BY id DESC LIMIT 1 OFFSET ?",
+                (session, self.max_messages - 1),
+            ).fetchone()
+            if oldest is None:
+                continue
+            connection.execute("DELETE FROM messages WHERE session = ? AND id < ?",
+                               (session, oldest[0]))
+            connection.execute("UPDATE sessions SET messages = ? WHERE id = ?",
+                               (self.max_messages, session))
+
+
+# O banco só é aberto na primeira gravação ou leitura
+_store = ConversationStore()
+
+
+def get_conversation_store() -> ConversationStore:
+    """Retorna o armazenamento de conversas compartilhado do processo."""
+    return _store
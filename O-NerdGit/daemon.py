@@ -2,11 +2,15 @@
 """
 O Nerd - Sistema de Gerenciamento de Serviço
 Roda o O Nerd como um daemon que fica sempre ouvindo (voz ou texto)
+Continua ouvindo enquanto gera a resposta: um novo pedido interrompe a atual.
+Enquanto fala, o que o microfone capta é descartado (é a própria voz do O Nerd)
 """
 
 import os
+import re
 import sys
 import time
+import asyncio
 import argparse
 from pathlib import Path
 
@@ -23,8 +27,14 @@ except:
 SCRIPT_DIR = Path(__file__).parent.resolve()
 sys.path.insert(0, str(SCRIPT_DIR))
 
-from config import GOOGLE_API_KEY, ASSISTANT_NAME
-from voice import get_voice_assistant
+from config import GOOGLE_API_KEY, ASSISTANT_NAME, LLM_STREAMING, WAKE_WORD
+from llm import GenerationCancelled, TerminalPrinter
+from conversation import ConversationEngine
+from engine import get_engine
+from voice import PRIORITY_CONFIRMATION
+
+# Chamado pelo nome só no começo da fala: "O Nerd, ...", "Oi Nerd ..."
+WAKE_PHRASE = re.compile(r"^\s*(?:(?:o|ó|ô|oi|ei|olá|ola)\s+)?" + re.escape(WAKE_WORD) + r"\b[\s,.!?]*")
 
 def print_banner():
     banner = f"""
@@ -50,7 +60,12 @@ class OnerdDaemon:
     def __init__(self, text_mode=False):
         self.is_running = False
         self.voice_assistant = None
+        self.engine = None
+        # O daemon usa a conversa do o_nerd.py (canal padrão do motor)
+        self.assistant = get_engine()
         self.text_mode = text_mode
+        # Falas do O Nerd já descartadas da captura do microfone
+        self._speeches_heard = 0
         
     def start(self):
         """Inicia o daemon"""
@@ -66,116 +81,165 @@ class OnerdDaemon:
         else:
             print(f"{Fore.CYAN}[🎤] Iniciando {ASSISTANT_NAME} em MODO VOZ...{Style.RESET_ALL}\n")
         
-        self.voice_assistant = get_voice_assistant()
+        # Abre a conexão com a IA enquanto o áudio inicializa
+        self.assistant.start(mode="text" if self.text_mode else "voice")
+        for line in self.assistant.startup_lines():
+            print(f"{Fore.CYAN}{line}{Style.RESET_ALL}")
+        asyncio.run(self._run())
+        self.stop()
+    
+    async def _run(self):
+        """Roda o loop de conversa assíncrono (ouvir, gerar e falar em paralelo)"""
+        self.engine = ConversationEngine(self._handle_turn)
+        self.voice_assistant = await self.engine.start()
+        if not self.text_mode:
+            # Calibra o microfone enquanto o resto inicializa; a primeira escuta espera
+            self.voice_assistant.calibrate_in_background()
         
         print(f"{Fore.GREEN}[OK] {ASSISTANT_NAME} está pronto!{Style.RESET_ALL}")
         
         if self.text_mode:
             print(f"{Fore.YELLOW}[💬] Digite seus comandos abaixo (ou 'sair' para encerrar){Style.RESET_ALL}\n")
-            self._listen_loop_text()
+            await self.engine.run(input, self._extract_text, on_ready=self._show_prompt,
+                                  on_interrupt=self._show_interrupted)
         else:
             print(f"{Fore.YELLOW}[🎤] Diga 'O Nerd' ou 'Oi Nerd' para me chamar{Style.RESET_ALL}\n")
-            self._listen_loop_voice()
+            await self.engine.run(self._listen_voice, self._extract_wake_word,
+                                  on_interrupt=self._show_interrupted)
     
-    def _listen_loop_text(self):
-        """Loop de entrada por texto"""
-        while self.is_running:
-            try:
-                user_input = input(f"{Fore.GREEN}Você: {Style.RESET_ALL}").strip()
-                
-                if not user_input:
-                    continue
-                
-                if user_input.lower() in ["sair", "exit", "quit"]:
-                    self.voice_assistant.speak("Até mais! Encerrando...")
-                    self.stop()
-                    return
-                
-                print(f"{Fore.CYAN}[📝] Processando comando...{Style.RESET_ALL}")
-                self._process_command(user_input)
-                
-            except KeyboardInterrupt:
-                self.stop()
-            except Exception as e:
-                print(f"{Fore.YELLOW}[AVISO] Erro: {e}{Style.RESET_ALL}")
-                time.sleep(1)
+    def _show_prompt(self):
+        """Mostra o prompt quando o O Nerd termina de responder"""
+        print(f"{Fore.GREEN}Você: {Style.RESET_ALL}", end="", flush=True)
     
-    def _listen_loop_voice(self):
-        """Loop de entrada por voz"""
-        while self.is_running:
-            try:
-                if self.voice_assistant.is_voice_available():
-                    try:
-                        print(f"{Fore.CYAN}[🎤] Ouvindo...{Style.RESET_ALL}", end="\r")
-                        user_input = self.voice_assistant.listen(timeout=3)
-                    except:
-                        continue
-                    
-                    if not user_input:
-                        continue
-                    
-                    text_lower = user_input.lower()
-                    print(f"{Fore.MAGENTA}[VOZ] Você disse: {user_input}{Style.RESET_ALL}            ")
-                    
-                    # Verifica se foi chamado pelo nome
-                    if "nerd" in text_lower:
-                        command = text_lower.replace("o nerd", "").replace("ó nerd", "").replace("nerd", "").strip()
-                        
-                        if not command:
-                            self.voice_assistant.speak(f"Sim? Como posso ajudar?")
-                            continue
-                        
-                        print(f"{Fore.GREEN}[✓] ATIVADO - Processando comando...{Style.RESET_ALL}")
-                        self._process_command(command)
-                else:
-                    print(f"{Fore.YELLOW}[Aviso] Microfone não disponível. Use modo texto: python daemon.py --text{Style.RESET_ALL}")
-                    time.sleep(5)
-                        
-            except KeyboardInterrupt:
-                self.stop()
-            except Exception as e:
-                print(f"{Fore.YELLOW}[AVISO] Erro: {e}{Style.RESET_ALL}")
-                time.sleep(1)
+    def _show_interrupted(self, turn):
+        """Avisa que a resposta anterior foi abandonada"""
+        print(f"\n{Fore.YELLOW}[✋] Interrompido: {turn.text}{Style.RESET_ALL}")
     
-    def _process_command(self, user_input):
-        """Processa um comando recebido"""
+    def _extract_text(self, text):
+        """Pedido digitado (linhas vazias são ignoradas)"""
+        return text.strip() or None
+    
+    def _listen_voice(self):
+        """Ouve uma fala (roda fora do loop de eventos)"""
+        if not self.voice_assistant.is_voice_available():
+            print(f"{Fore.YELLOW}[Aviso] Microfone não disponível. Use modo texto: python daemon.py --text{Style.RESET_ALL}")
+            time.sleep(5)
+            return None
+        
+        voice = self.voice_assistant
+        # O microfone também capta a voz do O Nerd: só ouve com a fala parada
+        # e descarta o que foi captado enquanto ele falava
+        voice.wait_idle()
+        spoken = voice.speeches
+        flush = spoken != self._speeches_heard
+        self._speeches_heard = spoken
+        
+        print(f"{Fore.CYAN}[🎤] Ouvindo...{Style.RESET_ALL}", end="\r")
         try:
-            from o_nerd import detect_command, handle_command, chat_with_ai
-            
-            cmd_type, arg = detect_command(user_input)
+            text = voice.listen(flush=flush)
+        except Exception as e:
+            print(f"{Fore.YELLOW}[AVISO] Erro: {e}{Style.RESET_ALL}")
+            time.sleep(1)
+            return None
+        
+        if voice.speeches != spoken:
+            # Começou a falar durante a escuta: a fala pode ter vindo do alto-falante
+            return None
+        return text
+    
+    def _extract_wake_word(self, user_input):
+        """Pedido que vem depois de 'O Nerd', ou None se não foi chamado"""
+        text_lower = user_input.lower()
+        print(f"{Fore.MAGENTA}[VOZ] Você disse: {user_input}{Style.RESET_ALL}            ")
+        
+        # Verifica se foi chamado pelo nome, no começo da fala
+        match = WAKE_PHRASE.match(text_lower)
+        if match is None:
+            return None
+        return text_lower[match.end():].strip()
+    
+    async def _handle_turn(self, turn):
+        """Atende um pedido; é cancelado se outro pedido chegar antes do fim"""
+        engine = self.engine
+        user_input = turn.text
+        
+        if self.text_mode:
+            if user_input.lower() in ["sair", "exit", "quit"]:
+                await engine.say("Até mais! Encerrando...", priority=PRIORITY_CONFIRMATION)
+                engine.stop()
+                return
+            print(f"{Fore.CYAN}[📝] Processando comando...{Style.RESET_ALL}")
+        else:
+            if not user_input:
+                await engine.say("Sim? Como posso ajudar?", priority=PRIORITY_CONFIRMATION)
+                return
+            print(f"{Fore.GREEN}[✓] ATIVADO - Processando comando...{Style.RESET_ALL}")
+        
+        assistant = self.assistant
+        if self.text_mode:
+            assistant.begin_turn("text")
+        else:
+            assistant.begin_turn("voice", **self.voice_assistant.last_listen)
+        cancelled = False
+        try:
+            cmd_type, arg = assistant.route(user_input)
             
             if cmd_type == "exit":
-                self.voice_assistant.speak("Até mais! Desligando...")
-                self.stop()
+                await engine.say("Até mais! Desligando...", priority=PRIORITY_CONFIRMATION)
+                engine.stop()
+                return
+            
+            if cmd_type == "stats":
+                print(f"{Fore.CYAN}{assistant.telemetry.format_summary()}{Style.RESET_ALL}")
                 return
             
             # Processa comando
             if cmd_type:
-                result = handle_command(cmd_type, arg)
+                result = await engine.run_blocking(assistant.run_command, cmd_type, arg)
                 if result:
                     print(f"{Fore.CYAN}[O Nerd] {result}{Style.RESET_ALL}")
-                    self.voice_assistant.speak(result)
-                    time.sleep(0.5)
+                    await engine.say(result, priority=PRIORITY_CONFIRMATION)
                 return
             
-            # Se não é comando, responde com IA
+            # Se não é comando, responde com IA: a geração e a fala rodam em
+            # paralelo, e cada frase é falada assim que fica pronta
             print(f"{Fore.CYAN}[IA] Consultando Gemini...{Style.RESET_ALL}")
-            response = chat_with_ai(user_input)
-            print(f"{Fore.CYAN}[O Nerd] {response}{Style.RESET_ALL}")
-            self.voice_assistant.speak(response)
-            time.sleep(0.5)
+            printer = TerminalPrinter(f"{Fore.CYAN}[O Nerd] {Style.RESET_ALL}") if LLM_STREAMING else None
+            try:
+                response = await engine.reply(
+                    turn,
+                    lambda on_chunk, cancel: assistant.chat(user_input, on_chunk=on_chunk, cancel=cancel,
+                                                            mode="text" if self.text_mode else "voice"),
+                    on_chunk=printer, stream=LLM_STREAMING,
+                )
+            finally:
+                if printer:
+                    printer.finish()
+            if not (printer and printer.shown(response)):
+                print(f"{Fore.CYAN}[O Nerd] {response}{Style.RESET_ALL}")
             
+        except (asyncio.CancelledError, GenerationCancelled):
+            cancelled = True
+            raise
         except Exception as e:
+            assistant.telemetry.error(type(e).__name__)
             print(f"{Fore.RED}[ERRO] {e}{Style.RESET_ALL}")
             try:
-                self.voice_assistant.speak("Desculpe, tive um erro ao processar seu comando.")
-            except:
+                await engine.say("Desculpe, tive um erro ao processar seu comando.",
+                                 priority=PRIORITY_CONFIRMATION)
+            except Exception:
                 pass
+        finally:
+            assistant.end_turn(cancelled)
     
     def stop(self):
         """Para o daemon"""
         self.is_running = False
         print(f"\n{Fore.YELLOW}[🛑] {ASSISTANT_NAME} desligando...{Style.RESET_ALL}")
+        for line in self.assistant.stats_lines():
+            print(f"{Fore.CYAN}{line}{Style.RESET_ALL}")
+        if self.voice_assistant:
+            print(f"{Fore.CYAN}[Stats] {self.voice_assistant.format_speech_stats()}{Style.RESET_ALL}")
         time.sleep(1)
         sys.exit(0)
 
@@ -183,9 +247,14 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="O Nerd - Assistente Virtual")
     parser.add_argument("--text", "-t", action="store_true", help="Ativa modo texto (teclado em vez de voz)")
     parser.add_argument("--voice", "-v", action="store_true", help="Ativa modo voz (padrão)")
+    parser.add_argument("--no-cache", action="store_true", help="Não usa o cache de respostas nesta sessão")
     
     args = parser.parse_args()
     
+    if args.no_cache:
+        from response_cache import get_response_cache
+        get_response_cache().enabled = False
+    
     # Se nenhum modo foi especificado, tenta voz primeiro
     text_mode = args.text
     
@@ -0,0 +1,395 @@
+"""
+O Nerd - Motor do Assistente
+============================
+
+O núcleo compartilhado por todas as interfaces (o_nerd.py, start.py,
+chat.py, chat_modo_texto.py e daemon.py). Um único motor por processo
+cuida de:
+- aquecer a conexão com a IA e retomar a conversa salva;
+- decidir se um pedido é comando (regras e classificador local) ou
+  conversa com a IA;
+- executar os comandos;
+- recusar pedidos perigosos;
+- manter o histórico e chamar a IA pelo roteador de modelos.
+
+As interfaces só leem a entrada, mostram a resposta e cuidam da voz.
+Os tempos de inicialização, de decisão e de resposta de cada pedido
+ficam em get_stats(), no mesmo lugar para todas. Cada pedido também é
+registrado na telemetria (telemetry.py): route(), run_command() e chat()
+abrem o pedido se preciso, e a interface chama end_turn() depois de
+entregar a resposta.
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from classifier import classify_local, format_local_stats
+from commands import execute_command, get_date, get_time, is_dangerous_command
+from history import ConversationHistory
+from intents import detect_command
+from llm import GenerationCancelled, format_llm_stats, warm_up
+from model_router import ModelRouter, format_router_stats, get_model_router
+from prompts import format_prompt_stats
+from telemetry import Telemetry, TurnTrace, get_telemetry
+
+try:
+    import automation
+    AUTOMATION_AVAILABLE = True
+except ImportError:
+    AUTOMATION_AVAILABLE = False
+
+# Canal padrão da conversa salva (o do o_nerd.py, que o daemon também usa)
+CHANNEL = "o_nerd"
+
+# Comandos que mudam a interface; quem trata é a própria interface
+CONTROL_COMMANDS = ("exit", "help", "voice_mode", "text_mode", "stats")
+
+# Palavras que pedem o contexto de hora e data junto da pergunta
+TIME_WORDS = ("hora", "hoje", "data", "dia")
+
+# Prefixos removidos do termo de uma pesquisa automatizada
+SEARCH_PREFIXES = ("pesquisar ", "pesquisa ", "buscar ", "busca ")
+
+DANGEROUS_REPLY = ("Desculpe, nao posso ajudar com esse tipo de solicitacao por questoes "
+                   "de seguranca. Posso ajudar com outra coisa?")
+
+
+def _search_term(arg: str) -> str:
+    """Termo de uma pesquisa, sem o verbo do pedido."""
+    for prefix in SEARCH_PREFIXES:
+        arg = arg.replace(prefix, "")
+    return arg.strip()
+
+
+def error_reply(error: Exception) -> str:
+    """
+    Mensagem amigável para um erro da IA.
+
+    Args:
+        error: Erro repassado pelo roteador
+
+    Returns:
+        Texto para mostrar (e falar) no lugar da resposta
+    """
+    message = str(error)
+    lowered = message.lower()
+    if "api_key" in lowered or "authentication" in lowered:
+        return "[Erro] Erro de autenticacao com a API. Verifique sua chave GOOGLE_API_KEY."
+    if "quota" in lowered or "429" in message:
+        return ("[Erro] Limite de uso da API Gemini excedido. Aguarde alguns minutos ou "
+                "verifique seu plano de uso em https://ai.google.dev/dashboard")
+    if "rate" in lowered:
+        return "[Erro] Muitas requisicoes. Aguarde um pouco antes de fazer outra pergunta."
+    print(f"[DEBUG] Erro na IA: {message}")
+    return "Ops, tive um problema para processar sua mensagem. Tente novamente!"
+
+
+class AssistantEngine:
+    """
+    Motor do assistente: roteamento, comandos, segurança e conversa.
+
+    Seguro entre threads para as chamadas de um pedido por vez, como as
+    interfaces fazem (o daemon cancela o pedido anterior antes do próximo).
+    """
+
+    def __init__(self, history: Optional[ConversationHistory] = None, channel: str = CHANNEL,
+                 router: Optional[ModelRouter] = None, telemetry: Optional[Telemetry] = None):
+        """
+        Args:
+            history: Histórico da conversa (padrão: um novo, salvo em channel)
+            channel: Canal da conversa salva
+            router: Roteador de modelos (padrão: o compartilhado do processo)
+            telemetry: Registro dos pedidos (padrão: o compartilhado do processo)
+        """
+        self.history = history if history is not None else ConversationHistory(channel=channel)
+        self.router = router if router is not None else get_model_router()
+        self.telemetry = telemetry if telemetry is not None else get_telemetry()
+        self.started = False
+        self.resumed = 0
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "startup_seconds": None,
+            "messages": 0,
+            "route_seconds": 0.0,
+            "commands": 0,
+            "command_seconds": 0.0,
+            "chats": 0,
+            "chat_seconds": 0.0,
+            "refused": 0,
+        }
+
+    def start(self, mode: str = "text") -> int:
+        """
+        Prepara o motor uma única vez por processo: aquece a IA e retoma a conversa.
+
+        Args:
+            mode: "text" ou "voice" (prompt usado no aquecimento)
+
+        Returns:
+            Mensagens retomadas da última conversa (0 nas chamadas seguintes)
+        """
+        with self._start_lock:
+            if self.started:
+                return 0
+            start = time.perf_counter()
+            # Abre a conexão com a IA enquanto o resto inicializa
+            warm_up(mode=mode)
+            self.resumed = self.history.resume()
+            self.started = True
+            with self._stats_lock:
+                self._stats["startup_seconds"] = time.perf_counter() - start
+            return self.resumed
+
+    def begin_turn(self, mode: str = "text", **stages: float) -> Optional[TurnTrace]:
+        """
+        Abre um pedido na telemetria.
+
+        Só é preciso chamar quando há etapas medidas antes dele (ex.: a
+        fala ouvida); senão route() ou chat() abrem o pedido sozinhos.
+
+        Args:
+            mode: "text" ou "voice"
+            **stages: Etapas já medidas, em segundos (ex.: listen=1.2)
+
+        Returns:
+            O pedido aberto, ou None com a telemetria desligada
+        """
+        return self.telemetry.begin(self.history.channel, mode, **stages)
+
+    def end_turn(self, cancelled: bool = False, after: Optional[Future] = None) -> None:
+        """
+        Fecha o pedido ativo e grava a sua linha na telemetria.
+
+        Args:
+            cancelled: O pedido foi interrompido por outro
+            after: Só fecha quando este Future terminar (ex.: a fala da
+                resposta, que continua na thread do TTS)
+        """
+        trace = self.telemetry.active()
+        if trace is None:
+            return
+        if after is None or after.done():
+            self.telemetry.end(trace, cancelled)
+        else:
+            after.add_done_callback(lambda _future: self.telemetry.end(trace, cancelled))
+
+    def route(self, text: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Decide o que fazer com um pedido, sem chamar a IA.
+
+        Args:
+            text: Pedido do usuário
+
+        Returns:
+            (tipo de comando, argumento), ou (None, None) para conversar com a IA
+        """
+        trace = self._turn("detect")
+        start = time.perf_counter()
+        cmd_type, arg = detect_command(text)
+        if not cmd_type:
+            # Classificador local antes de recorrer à IA
+            cmd_type, arg = classify_local(text)
+        elapsed = time.perf_counter() - start
+        if trace is not None:
+            self.telemetry.record("detect", elapsed)
+            trace.command = cmd_type
+        with self._stats_lock:
+            self._stats["messages"] += 1
+            self._stats["route_seconds"] += elapsed
+        return cmd_type, arg
+
+    def run_command(self, cmd_type: str, arg: Optional[str]) -> Optional[str]:
+        """
+        Executa um comando reconhecido.
+
+        Args:
+            cmd_type: Tipo retornado por route()
+            arg: Argumento do comando
+
+        Returns:
+            Texto do resultado, ou None se o comando não é executável aqui
+            (nesse caso o pedido vai para a IA)
+        """
+        trace = self._turn("command")
+        if trace is not None:
+            trace.kind, trace.command = "command", cmd_type
+        start = time.perf_counter()
+        try:
+            return self._execute(cmd_type, arg)
+        except Exception as error:
+            self.telemetry.error(type(error).__name__)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.telemetry.record("command", elapsed)
+            with self._stats_lock:
+                self._stats["commands"] += 1
+                self._stats["command_seconds"] += elapsed
+
+    def chat(self, text: str, on_chunk: Optional[Callable[[str], None]] = None,
+             cancel: Optional[threading.Event] = None, mode: str = "text") -> str:
+        """
+        Conversa com a IA, mantendo o histórico.
+
+        O modelo é escolhido pelo roteador conforme o pedido e o modo.
+        Erros da API viram uma mensagem amigável.
+
+        Args:
+            text: Pedido do usuário
+            on_chunk: Recebe os pedaços da resposta em streaming
+            cancel: Abandona a resposta quando sinalizado
+            mode: "text" ou "voice"
+
+        Returns:
+            Resposta da IA (ou a recusa / a mensagem de erro)
+
+        Raises:
+            GenerationCancelled: cancel foi sinalizado
+        """
+        trace = self._turn("llm_total")
+        if trace is not None:
+            trace.mode = mode
+            trace.kind = "chat"
+        if is_dangerous_command(text):
+            if trace is not None:
+                trace.kind = "refused"
+            with self._stats_lock:
+                self._stats["refused"] += 1
+            return DANGEROUS_REPLY
+
+        # Adiciona contexto de hora/dia se a pergunta é sobre isso
+        message = text
+        if any(word in text.lower() for word in TIME_WORDS):
+            message = f"{text} [Agora: {get_time()} - {get_date()}]"
+
+        # A pergunta só entra no histórico (e no disco) junto com a resposta:
+        # cancelada ou com erro, não sobra uma pergunta sem resposta
+        contents = self.history.messages()
+        contents.append({"role": "user", "parts": [message]})
+
+        start = time.perf_counter()
+        try:
+            response = self.router.generate(contents, on_chunk, cancel, mode)
+        except GenerationCancelled:
+            raise
+        except Exception as error:
+            self.telemetry.error(type(error).__name__)
+            return error_reply(error)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.telemetry.record("llm_total", elapsed)
+            with self._stats_lock:
+                self._stats["chats"] += 1
+                self._stats["chat_seconds"] += elapsed
+        self.history.add("user", message)
+        self.history.add("model", response)
+        return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna os tempos do motor.
+
+        Returns:
+            Dicionário com startup_seconds, messages, commands, chats,
+            refused e as médias route_avg_seconds, command_avg_seconds
+            e chat_avg_seconds (None sem dados)
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        for name, count in (("route", "messages"), ("command", "commands"), ("chat", "chats")):
+            stats[f"{name}_avg_seconds"] = (
+                stats[f"{name}_seconds"] / stats[count] if stats[count] else None
+            )
+        return stats
+
+    def startup_lines(self) -> List[str]:
+        """Linhas sobre o prompt e a conversa retomada, para exibir depois de start()."""
+        lines = [f"[Prompt] {format_prompt_stats()}"]
+        if self.resumed:
+            lines.append(f"[Histórico] {self.resumed} mensagens da última conversa retomadas")
+        return lines
+
+    def stats_lines(self) -> List[str]:
+        """Resumos de todas as peças (motor, classificador, IA e roteador), para exibir ao encerrar."""
+        summaries = [format_engine_stats(self), format_local_stats(),
+                     format_llm_stats(), format_router_stats()]
+        return [f"[Stats] {summary}" for summary in summaries]
+
+    def _turn(self, stage: str) -> Optional[TurnTrace]:
+        """Pedido ativo, ou um novo se o ativo já passou por esta etapa."""
+        trace = self.telemetry.active()
+        if trace is None or stage in trace.stages:
+            trace = self.begin_turn()
+        return trace
+
+    def _execute(self, cmd_type: str, arg: Optional[str]) -> Optional[str]:
+        """Executa um comando (ver run_command)."""
+        if cmd_type == "youtube_search":
+            if AUTOMATION_AVAILABLE:
+                term = _search_term(arg)
+                automation.search_youtube(term)
+                return f"Abrindo YouTube e pesquisando por '{term}'..."
+            return execute_command("search_youtube", arg)
+
+        if cmd_type == "google_search":
+            if AUTOMATION_AVAILABLE:
+                term = _search_term(arg)
+                automation.search_google(term)
+                return f"Abrindo Google e pesquisando por '{term}'..."
+            return execute_command("search_google", arg)
+
+        if cmd_type in ("open", "search_google", "search_youtube"):
+            return execute_command(cmd_type, arg)
+        if cmd_type == "time":
+            return execute_command("get_time", None)
+        if cmd_type == "date":
+            return execute_command("get_date", None)
+        if cmd_type == "system_info":
+            return execute_command("get_system_info", None)
+        if cmd_type == "volume":
+            return execute_command("set_volume", arg)
+        return None
+
+
+_engine: Optional[AssistantEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine(channel: str = CHANNEL) -> AssistantEngine:
+    """
+    Retorna o motor compartilhado do processo, criando-o na primeira chamada.
+
+    Args:
+        channel: Canal da conversa salva (só vale na chamada que cria o motor)
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AssistantEngine(channel=channel)
+    return _engine
+
+
+def format_engine_stats(engine: Optional[AssistantEngine] = None) -> str:
+    """Resumo legível de get_stats() (padrão: motor compartilhado), para exibir ao encerrar."""
+    stats = (engine or get_engine()).get_stats()
+    parts = []
+    if stats["startup_seconds"] is not None:
+        parts.append(f"inicialização em {stats['startup_seconds'] * 1000:.0f} ms")
+    if stats["messages"]:
+        parts.append(f"{stats['messages']} pedidos, decisão em "
+                     f"{stats['route_avg_seconds'] * 1000:.2f} ms (média)")
+    if stats["commands"]:
+        parts.append(f"{stats['commands']} comandos em {stats['command_avg_seconds'] * 1000:.0f} ms")
+    if stats["chats"]:
+        parts.append(f"{stats['chats']} conversas com a IA em {stats['chat_avg_seconds'] * 1000:.0f} ms")
+    if stats["refused"]:
+        parts.append(f"{stats['refused']} pedidos perigosos recusados")
+    if not parts:
+        return "motor sem pedidos nesta sessão"
+    return "motor: " + ", ".join(parts)
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+O Nerd - Servidor Falso do Gemini
+=================================
+
+Servidor HTTP local que imita a API REST do Gemini (v1beta), para rodar
+testes e benchmarks sem chave nem rede. O cliente google.generativeai
+fala com ele pelo transporte REST:
+
+    python fake_gemini.py --port 8765
+    ONERD_GEMINI_ENDPOINT=http://127.0.0.1:8765 python o_nerd.py
+
+Atende generateContent, streamGenerateContent e countTokens. O texto
+vem das respostas gravadas (FAKE_GEMINI_FIXTURES) ou é montado a partir
+de frases padrão. A latência até o primeiro pedaço segue uma
+distribuição log-normal; o ritmo do streaming e a taxa de erros 429/500
+são configuráveis pela linha de comando ou por config.py.
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from config import (
+    FAKE_GEMINI_PORT, FAKE_GEMINI_LATENCY_MS, FAKE_GEMINI_LATENCY_SIGMA,
+    FAKE_GEMINI_CHUNK_CHARS, FAKE_GEMINI_CHUNK_MS,
+    FAKE_GEMINI_ERROR_429, FAKE_GEMINI_ERROR_500, FAKE_GEMINI_FIXTURES,
+)
+from history import CHARS_PER_TOKEN, estimate_tokens
+from response_cache import normalize_prompt
+
+# /v1beta/models/gemini-2.5-flash:streamGenerateContent
+ROUTE = re.compile(
+    r"^/v1beta/models/(?P<model>[^/:]+):(?P<method>generateContent|streamGenerateContent|countTokens)$"
+)
+
+# Frases das respostas padrão; cada pergunta recebe sempre as mesmas
+CANNED_SENTENCES = [
+    "Boa pergunta, isso é bem nerd!",
+    "Resumindo: depende do contexto, mas dá para explicar em poucas palavras.",
+    "Um computador faz isso bilhões de vezes por segundo.",
+    "Se quiser, posso detalhar cada parte com exemplos.",
+    "A ideia central é dividir o problema em pedaços menores.",
+    "Curiosidade: o primeiro bug foi literalmente um inseto preso num relé.",
+    "Na prática, teste com calma e veja o que acontece.",
+    "Posso ajudar com mais alguma coisa?",
+]
+CANNED_REPLY_SENTENCES = 4
+
+ERRORS = {
+    429: ("RESOURCE_EXHAUSTED",
+          "Resource has been exhausted (e.g. check quota). Please retry in 1s."),
+    500: ("INTERNAL", "An internal error has occurred. Please retry or report."),
+}
+
+
+def load_fixtures(path: Path) -> Dict[str, str]:
+    """
+    Carrega respostas gravadas de um arquivo JSONL.
+
+    Cada linha tem {"prompt": ..., "response": ...}; linhas vazias ou
+    começando com # são ignoradas.
+
+    Args:
+        path: Arquivo de gravações
+
+    Returns:
+        Pergunta normalizada -> resposta
+    """
+    fixtures: Dict[str, str] = {}
+    if not path.exists():
+        return fixtures
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = json.loads(line)
+            fixtures[normalize_prompt(entry["prompt"])] = entry["response"]
+    return fixtures
+
+
+def _parts_text(content: Dict[str, Any]) -> str:
+    """Junta as partes de texto de um conteúdo da requisição."""
+    return " ".join(part.get("text", "") for part in content.get("parts", ()))
+
+
+def _prompt_text(body: Dict[str, Any]) -> str:
+    """Texto da última mensagem do usuário na requisição."""
+    for content in reversed(body.get("contents", [])):
+        if content.get("role", "user") == "user":
+            return _parts_text(content)
+    return ""
+
+
+def _request_tokens(body: Dict[str, Any]) -> int:
+    """Tokens estimados de toda a requisição (histórico e system prompt)."""
+    text = " ".join(_parts_text(content) for content in body.get("contents", []))
+    if body.get("systemInstruction"):
+        text += " " + _parts_text(body["systemInstruction"])
+    return estimate_tokens(text)
+
+
+class FakeGemini:
+    """
+    Servidor falso do Gemini, em uma thread ou em primeiro plano.
+
+    Seguro entre threads: cada requisição é atendida em uma thread
+    própria, como a API real atende conexões paralelas.
+    """
+
+    def __init__(self, port: int = FAKE_GEMINI_PORT,
+                 latency_ms: float = FAKE_GEMINI_LATENCY_MS,
+                 latency_sigma: float = FAKE_GEMINI_LATENCY_SIGMA,
+                 chunk_chars: int = FAKE_GEMINI_CHUNK_CHARS,
+                 chunk_ms: float = FAKE_GEMINI_CHUNK_MS,
+                 error_429: float = FAKE_GEMINI_ERROR_429,
+                 error_500: float = FAKE_GEMINI_ERROR_500,
+                 fixtures: Optional[Path] = FAKE_GEMINI_FIXTURES,
+                 seed: Optional[int] = None, host: str = "127.0.0.1",
+                 verbose: bool = False):
+        """
+        Args:
+            port: Porta local (0 escolhe uma livre)
+            latency_ms: Mediana do tempo até o primeiro pedaço
+            latency_sigma: Desvio do logaritmo da latência (0 = fixa)
+            chunk_chars: Caracteres por pedaço no streaming
+            chunk_ms: Intervalo entre pedaços
+            error_429: Probabilidade de responder 429
+            error_500: Probabilidade de responder 500
+            fixtures: Arquivo de respostas gravadas (None para não usar)
+            seed: Semente do sorteio de latências e erros
+            host: Endereço de escuta
+            verbose: Mostra cada requisição no console
+        """
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.chunk_chars = max(1, chunk_chars)
+        self.chunk_ms = chunk_ms
+        self.error_429 = error_429
+        self.error_500 = error_500
+        self.fixtures = load_fixtures(Path(fixtures)) if fixtures else {}
+        self.verbose = verbose
+        self.stats = {"requests": 0, "streams": 0, "count_tokens": 0,
+                      "fixtures": 0, "errors_429": 0, "errors_500": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._server = _Server((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+
+    @property
+    def url(self) -> str:
+        """Endpoint para ONERD_GEMINI_ENDPOINT."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGemini":
+        """Atende em uma thread daemon e retorna o próprio servidor."""
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="fake-gemini", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Para de atender e fecha a porta."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def serve_forever(self) -> None:
+        """Atende na thread atual até Ctrl+C."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def reply_text(self, prompt: str) -> str:
+        """
+        Resposta de uma pergunta: a gravada ou uma montada com frases padrão.
+
+        Args:
+            prompt: Última mensagem do usuário
+
+        Returns:
+            Texto da resposta
+        """
+        recorded = self.fixtures.get(normalize_prompt(prompt))
+        if recorded is not None:
+            with self._lock:
+                self.stats["fixtures"] += 1
+            return recorded
+
+        # A mesma pergunta recebe sempre a mesma resposta
+        picker = random.Random(normalize_prompt(prompt))
+        return " ".join(picker.sample(CANNED_SENTENCES, CANNED_REPLY_SENTENCES))
+
+    def first_latency(self) -> float:
+        """Sorteia o tempo até o primeiro pedaço (segundos)."""
+        with self._lock:
+            noise = self._random.gauss(0.0, 1.0)
+        return self.latency_ms * math.exp(self.latency_sigma * noise) / 1000
+
+    def injected_error(self) -> Optional[int]:
+        """Sorteia um erro para a requisição (429, 500 ou None)."""
+        with self._lock:
+            draw = self._random.random()
+            if draw < self.error_429:
+                self.stats["errors_429"] += 1
+                return 429
+            if draw < self.error_429 + self.error_500:
+                self.stats["errors_500"] += 1
+                return 500
+        return None
+
+    def split(self, text: str) -> List[str]:
+        """Divide a resposta nos pedaços do streaming."""
+        size = self.chunk_chars
+        return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+    def count(self, key: str) -> None:
+        """Soma uma requisição às estatísticas."""
+        with self._lock:
+            self.stats[key] += 1
+
+    def format_stats(self) -> str:
+        """Resumo das requisições atendidas."""
+        stats = self.stats
+        return (f"{stats['requests']} respostas ({stats['streams']} em streaming, "
+                f"{stats['fixtures']} gravadas), {stats['count_tokens']} countTokens, "
+                f"{stats['errors_429']} erros 429, {stats['errors_500']} erros 500")
+
+
+class _Server(ThreadingHTTPServer):
+    """Servidor HTTP que não reclama de clientes que desistem da resposta."""
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Um pedido cancelado fecha a conexão no meio do streaming
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Atende as rotas da API; o servidor falso fica em self.server.fake."""
+
+    # HTTP/1.1 mantém a conexão aberta entre as perguntas, como a API real
+    protocol_version = "HTTP/1.1"
+    # Sem o algoritmo de Nagle, cada pedaço sai na hora (senão espera ~40 ms)
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:
+        fake: FakeGemini = self.server.fake
+        match = ROUTE.match(urlsplit(self.path).path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if match is None:
+            self._send_error(404, "NOT_FOUND", f"Rota desconhecida: {self.path}")
+            return
+
+        method = match.group("method")
+        if method == "countTokens":
+            fake.count("count_tokens")
+            request = body.get("generateContentRequest", body)
+            self._send_json({"totalTokens": _request_tokens(request)})
+            return
+
+        error = fake.injected_error()
+        if error is not None:
+            status, message = ERRORS[error]
+            self._send_error(error, status, message)
+            return
+
+        fake.count("requests")
+        text = fake.reply_text(_prompt_text(body))
+        finish_reason = "STOP"
+        max_tokens = body.get("generationConfig", {}).get("maxOutputTokens")
+        if max_tokens and estimate_tokens(text) > max_tokens:
+            text = text[:max_tokens * CHARS_PER_TOKEN]
+            finish_reason = "MAX_TOKENS"
+        usage = {
+            "promptTokenCount": _request_tokens(body),
+            "candidatesTokenCount": estimate_tokens(text),
+        }
+        usage["totalTokenCount"] = usage["promptTokenCount"] + usage["candidatesTokenCount"]
+        model = match.group("model")
+        chunks = fake.split(text)
+
+        time.sleep(fake.first_latency())
+        if method == "generateContent":
+            # Sem streaming, a resposta sai quando o último pedaço ficaria pronto
+            time.sleep((len(chunks) - 1) * fake.chunk_ms / 1000)
+            self._send_json(_response(text, finish_reason, usage, model))
+            return
+
+        fake.count("streams")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        # A API envia um array JSON, um objeto por pedaço
+        for index, chunk in enumerate(chunks):
+            last = index == len(chunks) - 1
+            if index:
+                time.sleep(fake.chunk_ms / 1000)
+            piece = _response(chunk, finish_reason if last else None, usage if last else None, model)
+            prefix = "[" if index == 0 else ",\r\n"
+            self._write_chunk((prefix + json.dumps(piece) + ("]" if last else "")).encode("utf-8"))
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _write_chunk(self, data: bytes) -> None:
+        """Envia um pedaço no formato chunked do HTTP/1.1."""
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, code: int, status: str, message: str) -> None:
+        self._send_json({"error": {"code": code, "message": message, "status": status}}, code)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.fake.verbose:
+            sys.stderr.write(f"[fake-gemini] {format % args}\n")
+
+
+def _response(text: str, finish_reason: Optional[str],
+              usage: Optional[Dict[str, int]], model: str) -> Dict[str, Any]:
+    """Monta um GenerateContentResponse no formato JSON da API."""
+    candidate: Dict[str, Any] = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+    if finish_reason:
+        candidate["finishReason"] = finish_reason
+    response: Dict[str, Any] = {"candidates": [candidate], "modelVersion": model}
+    if usage:
+        response["usageMetadata"] = usage
+    return response
+
+
+def main() -> None:
+    """Função principal."""
+    parser = argparse.ArgumentParser(description="O Nerd - Servidor falso do Gemini")
+    parser.add_argument("--port", type=int, default=FAKE_GEMINI_PORT, help="Porta local")
+    parser.add_argument("--latency", type=float, default=FAKE_GEMINI_LATENCY_MS,
+                        help="Mediana do tempo até o primeiro pedaço (ms)")
+    parser.add_argument("--sigma", type=float, default=FAKE_GEMINI_LATENCY_SIGMA,
+                        help="Desvio log-normal da latência (0 = fixa)")
+    parser.add_argument("--chunk-chars", type=int, default=FAKE_GEMINI_CHUNK_CHARS,
+                        help="Caracteres por pedaço no streaming")
+    parser.add_argument("--chunk-ms", type=float, default=FAKE_GEMINI_CHUNK_MS,
+                        help="Intervalo entre pedaços (ms)")
+    parser.add_argument("--error-429", type=float, default=FAKE_GEMINI_ERROR_429,
+                        help="Probabilidade de responder 429")
+    parser.add_argument("--error-500", type=float, default=FAKE_GEMINI_ERROR_500,
+                        help="Probabilidade de responder 500")
+    parser.add_argument("--fixtures", type=Path, default=FAKE_GEMINI_FIXTURES,
+                        help="Respostas gravadas (JSONL)")
+    parser.add_argument("--seed", type=int, default=None, help="Semente dos sorteios")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Mostra cada requisição")
+    args = parser.parse_args()
+
+    fake = FakeGemini(args.port, args.latency, args.sigma, args.chunk_chars, args.chunk_ms,
+                      args.error_429, args.error_500, args.fixtures, args.seed,
+                      verbose=args.verbose)
+    print(f"Servidor falso do Gemini em {fake.url} ({len(fake.fixtures)} respostas gravadas)")
+    print(f"Use: ONERD_GEMINI_ENDPOINT={fake.url} python o_nerd.py")
+    fake.serve_forever()
+    print(f"\n[Stats] {fake.format_stats()}")
+
+
+if __name__ == "__main__":
+    main()
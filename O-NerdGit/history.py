@@ -0,0 +1,203 @@
+"""
+O Nerd - Histórico da Conversa
+==============================
+
+Histórico limitado por tokens, compartilhado por todas as interfaces.
+
+Em vez de guardar um número fixo de mensagens, o histórico guarda tantas
+quanto couberem no orçamento de tokens: respostas longas ocupam mais
+espaço e perguntas curtas, menos. As mensagens ficam em um deque e as
+mais antigas saem em pares (pergunta + resposta) em tempo constante.
+
+Opcionalmente, as perguntas que saem viram um resumo curto no início da
+conversa, para a IA não perder totalmente o assunto anterior.
+
+Com um canal (o nome da interface), cada mensagem também é salva em
+disco (conversation_store.py) e resume() retoma a última conversa
+depois de reiniciar.
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from config import (
+    HISTORY_TOKEN_BUDGET, HISTORY_SUMMARY, HISTORY_SUMMARY_TOKENS,
+    CONVERSATION_RESUME, CONVERSATION_RESUME_MESSAGES,
+)
+from conversation_store import ConversationStore, get_conversation_store
+
+# Em português, o Gemini usa cerca de 4 caracteres por token
+CHARS_PER_TOKEN = 4
+
+# Tamanho máximo de cada pergunta dentro do resumo
+SUMMARY_ITEM_CHARS = 80
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estima o número de tokens de um texto, sem chamar a API.
+
+    Args:
+        text: Texto da mensagem
+
+    Returns:
+        Estimativa (no mínimo 1)
+    """
+    return max(1, -(-len(text) // CHARS_PER_TOKEN))
+
+
+class ConversationHistory:
+    """
+    Histórico de mensagens com orçamento de tokens.
+
+    As mensagens seguem o formato da API: {"role": ..., "parts": [...]}.
+    """
+
+    def __init__(self, token_budget: int = HISTORY_TOKEN_BUDGET,
+                 summarize: bool = HISTORY_SUMMARY,
+                 summary_tokens: int = HISTORY_SUMMARY_TOKENS,
+                 channel: Optional[str] = None,
+                 store: Optional[ConversationStore] = None):
+        """
+        Args:
+            token_budget: Máximo de tokens estimados no histórico
+            summarize: Guarda um resumo das perguntas que saírem
+            summary_tokens: Máximo de tokens do resumo
+            channel: Nome da interface; com ele, as mensagens são salvas em disco
+            store: Onde salvar (padrão: get_conversation_store())
+        """
+        self.token_budget = token_budget
+        self.summarize = summarize
+        self.summary_tokens = summary_tokens
+        self.channel = channel
+        if channel is not None and store is None:
+            store = get_conversation_store()
+        self.store = store
+        # A sessão em disco só é aberta na primeira mensagem
+        self.session: Optional[str] = None
+        # Pares (mensagem, tokens estimados)
+        self._messages: Deque[Tuple[Dict[str, Any], int]] = deque()
+        self._tokens = 0
+        # Pares (pergunta resumida, tokens estimados)
+        self._summary: Deque[Tuple[str, int]] = deque()
+        self._summary_size = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    @property
+    def tokens(self) -> int:
+        """Tokens estimados das mensagens guardadas (sem o resumo)."""
+        return self._tokens
+
+    def add(self, role: str, text: str) -> None:
+        """
+        Acrescenta uma mensagem e remove as mais antigas se passar do orçamento.
+
+        Args:
+            role: "user" ou "model"
+            text: Conteúdo da mensagem
+        """
+        self._append(role, text)
+        if self.store is not None:
+            if self.session is None:
+                self.session = self.store.new_session(self.channel)
+            # Só entra na fila de gravação; o disco fica com outra thread
+            self.store.append(self.session, role, text)
+
+    def resume(self, limit: int = CONVERSATION_RESUME_MESSAGES) -> int:
+        """
+        Continua a última conversa recente do canal, se houver.
+
+        Só as últimas mensagens são lidas; as novas seguem na mesma sessão.
+        Aproveita para agendar a compactação do armazenamento.
+
+        Args:
+            limit: Número máximo de mensagens carregadas
+
+        Returns:
+            Número de mensagens retomadas
+        """
+        if self.store is None or self.session is not None:
+            return 0
+        self.store.compact()
+        if not CONVERSATION_RESUME:
+            return 0
+        session = self.store.recent_session(self.channel)
+        if session is None:
+            return 0
+        messages = self.store.load_messages(session, limit)
+        for role, text in messages:
+            self._append(role, text)
+        self.session = session
+        return len(messages)
+
+    def _append(self, role: str, text: str) -> None:
+        """Acrescenta uma mensagem na memória, respeitando o orçamento."""
+        tokens = estimate_tokens(text)
+        self._messages.append(({"role": role, "parts": [text]}, tokens))
+        self._tokens += tokens
+
+        # A última mensagem sempre fica, mesmo sozinha acima do orçamento
+        while self._tokens > self.token_budget and len(self._messages) > 1:
+            self._evict_oldest()
+
+    def messages(self) -> List[Dict[str, Any]]:
+        """
+        Retorna as mensagens para enviar à IA, com o resumo na frente.
+
+        Returns:
+            Lista no formato da API, terminando na mensagem mais recente
+        """
+        contents = []
+        if self._summary:
+            topics = "; ".join(topic for topic, _ in self._summary)
+            contents.append({
+                "role": "user",
+                "parts": [f"[Resumo da conversa anterior - o usuário perguntou: {topics}]"],
+            })
+            contents.append({"role": "model", "parts": ["Entendido."]})
+        contents.extend(message for message, _ in self._messages)
+        return contents
+
+    def clear(self) -> None:
+        """Apaga o histórico e o resumo (a próxima mensagem abre outra sessão)."""
+        self.session = None
+        self._messages.clear()
+        self._summary.clear()
+        self._tokens = 0
+        self._summary_size = 0
+
+    def _evict_oldest(self) -> None:
+        """Remove a pergunta mais antiga junto com a resposta dela."""
+        message, tokens = self._messages.popleft()
+        self._tokens -= tokens
+        self.evicted += 1
+        if message["role"] == "user":
+            self._remember(message["parts"][0])
+
+            # A resposta sai junto, para o histórico começar por uma pergunta
+            if len(self._messages) > 1 and self._messages[0][0]["role"] == "model":
+                _, tokens = self._messages.popleft()
+                self._tokens -= tokens
+                self.evicted += 1
+
+    def _remember(self, text: str) -> None:
+        """Acrescenta uma pergunta removida ao resumo."""
+        if not self.summarize:
+            return
+        topic = " ".join(text.split())
+        if len(topic) > SUMMARY_ITEM_CHARS:
+            topic = topic[:SUMMARY_ITEM_CHARS].rsplit(" ", 1)[0] + "..."
+        tokens = estimate_tokens(topic)
+        self._summary.append((topic, tokens))
+        self._summary_size += tokens
+
+        # Resumo com orçamento próprio: os assuntos mais antigos saem
+        while self._summary_size > self.summary_tokens and len(self._summary) > 1:
+            _, tokens = self._summary.popleft()
+            self._summary_size -= tokens
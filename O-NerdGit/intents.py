@@ -0,0 +1,328 @@
+"""
+O Nerd - Módulo de Intenções
+=============================
+
+Detecta comandos (intenções) no texto digitado ou falado pelo usuário.
+
+O motor é montado uma única vez, na importação: as palavras-gatilho de
+todas as regras formam uma única alternação pré-compilada, e uma só
+varredura do texto decide quais regras ainda precisam ser testadas. O texto é normalizado sem acentos antes
+da busca, então "são"/"sao" e "informação"/"informacoes" caem na mesma
+regra, mas os argumentos devolvidos preservam o texto original.
+
+Também roda como ferramenta de avaliação em lote, sem executar nada:
+    python intents.py frases.txt --output resultado.jsonl --workers 4
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from multiprocessing import Pool
+from typing import Dict, Iterable, List, NamedTuple, Optional, TextIO, Tuple
+
+from config import EXIT_KEYWORDS, SAFE_APPS, WINDOWS_APPS
+from keywords import fold_accents, is_exit_command
+from classifier import classify_local
+
+HELP_WORDS: List[str] = ["ajuda", "help", "comandos"]
+STATS_WORDS: List[str] = ["stats", "estatisticas"]
+
+# Regras em ordem de prioridade: (tipo do comando, padrão sem acentos,
+# palavras-gatilho). Uma regra só é testada se alguma de suas palavras-
+# gatilho aparecer no texto. O primeiro grupo de captura de cada padrão,
+# se existir, é o argumento. O marcador {apps} é substituído pela lista
+# de apps e sites conhecidos. Padrão None indica que a regra é confirmada
+# pelo autômato de palavras-chave (limites de palavra).
+INTENT_RULES: List[Tuple[str, Optional[str], Tuple[str, ...]]] = [
+    ("exit", None, tuple(EXIT_KEYWORDS)),
+    ("help", r"^(?:" + "|".join(HELP_WORDS) + r")\Z", tuple(HELP_WORDS)),
+    ("voice_mode", r"modo voz", ("modo voz",)),
+    ("text_mode", r"modo texto", ("modo texto",)),
+    ("stats", r"^(?:" + "|".join(STATS_WORDS) + r")\Z", tuple(STATS_WORDS)),
+
+    # "abrir [app]" com app conhecido tem prioridade sobre a automação
+    ("open", r"^(?:abrir|abre|abra)\s+({apps})\Z", ("abr",)),
+
+    # Automação: abrir e fazer ação
+    ("youtube_search", r"abr(?:ir|a)\s+(?:o\s+)?youtube\s+e\s+(?:pesquis|busc)([ae]r?\s+.+)", ("abr",)),
+    ("google_search", r"abr(?:ir|a)\s+(?:o\s+)?google\s+e\s+(?:pesquis|busc)([ae]r?\s+.+)", ("abr",)),
+
+    ("open", r"(?:abrir|abre|abra|open)\s+(?:o\s+)?(?:aplicativo\s+)?(.+)", ("abr", "open")),
+    ("search_youtube", r"pesquisar?\s+(.+?)\s+(?:no\s+)?youtube", ("pesquisa",)),
+    ("search_google", r"pesquisar?\s+(.+?)\s+(?:no\s+)?google", ("pesquisa",)),
+    ("search_google", r"pesquisar?\s+(.+)", ("pesquisa",)),
+    ("search_youtube", r"(?:buscar?|procurar?)\s+(.+?)\s+(?:no\s+)?youtube", ("busca", "procura")),
+    ("search_google", r"(?:buscar?|procurar?)\s+(.+)", ("busca", "procura")),
+    # Sem acentos, "é" vira "e": só vale no fim da frase ("que horas é?"),
+    # para "quantas horas e minutos..." continuar indo para a IA
+    ("time", r"(?:que\s+)?hora[s]?\s+(?:sao|e\b(?=\s*\??$))", ("hora",)),
+    ("date", r"(?:que\s+)?dia\s+e\s+hoje", ("hoje",)),
+    ("date", r"(?:data|hoje)", ("data", "hoje")),
+    ("system_info", r"(?:info|informac(?:ao|oes)|sistema)", ("info", "sistema")),
+    ("volume", r"volume\s+(\d+)", ("volume",)),
+]
+
+
+class IntentEngine:
+    """
+    Classificador de intenções pré-compilado.
+
+    Todas as palavras-gatilho das regras formam uma única alternação,
+    varrida uma vez sobre o texto. Só as regras cujos gatilhos
+    apareceram são testadas, em ordem de prioridade; o resultado é o
+    mesmo de testar todas as regras uma a uma.
+    """
+
+    def __init__(self, app_names: Iterable[str],
+                 rules: List[Tuple[str, Optional[str], Tuple[str, ...]]] = INTENT_RULES):
+        """
+        Monta e compila as regras e a alternação de gatilhos.
+
+        Args:
+            app_names: Nomes de apps e sites aceitos por "abrir [app]"
+            rules: Regras em ordem de prioridade
+        """
+        folded_names = {fold_accents(name.lower()) for name in app_names}
+        apps_alternation = "|".join(
+            re.escape(name) for name in sorted(folded_names, key=len, reverse=True)
+        )
+
+        self._rules: List[Tuple[str, Optional["re.Pattern[str]"]]] = []
+        # Gatilho -> máscara de bits com as regras que ele habilita
+        self._trigger_masks: Dict[str, int] = {}
+
+        for index, (cmd_type, pattern, triggers) in enumerate(rules):
+            if pattern is None:
+                self._rules.append((cmd_type, None))
+            else:
+                body = pattern.replace("{apps}", apps_alternation)
+                self._rules.append((cmd_type, re.compile(body)))
+            for trigger in triggers:
+                self._trigger_masks[trigger] = self._trigger_masks.get(trigger, 0) | (1 << index)
+
+        # Gatilhos que são prefixo de outro também estão presentes quando
+        # o maior casa na mesma posição
+        for trigger in self._trigger_masks:
+            for other, mask in list(self._trigger_masks.items()):
+                if other != trigger and trigger.startswith(other):
+                    self._trigger_masks[trigger] |= mask
+
+        alternation = "|".join(
+            re.escape(trigger)
+            for trigger in sorted(self._trigger_masks, key=len, reverse=True)
+        )
+        # Lookahead para encontrar gatilhos sobrepostos em uma só varredura.
+        # O texto já chega em minúsculas, então dispensamos re.IGNORECASE,
+        # que desliga as otimizações de literais do módulo re.
+        self._triggers = re.compile(f"(?=({alternation}))")
+
+    def detect(self, user_input: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Detecta o comando contido no texto.
+
+        Args:
+            user_input: Texto do usuário
+
+        Returns:
+            Tupla (tipo do comando, argumento) ou (None, None)
+        """
+        text = user_input.lower().strip()
+        folded = fold_accents(text)
+
+        candidates = 0
+        for trigger in self._triggers.findall(folded):
+            candidates |= self._trigger_masks[trigger]
+
+        index = 0
+        while candidates:
+            if candidates & 1:
+                cmd_type, regex = self._rules[index]
+                if regex is None:
+                    if is_exit_command(text):
+                        return (cmd_type, None)
+                else:
+                    match = regex.search(folded)
+                    if match:
+                        if not match.lastindex:
+                            return (cmd_type, None)
+                        start, end = match.span(1)
+                        return (cmd_type, text[start:end])
+            candidates >>= 1
+            index += 1
+
+        return (None, None)
+
+
+_engine = IntentEngine(list(WINDOWS_APPS) + list(SAFE_APPS))
+
+
+def detect_command(user_input: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Detecta comandos específicos no texto.
+
+    Args:
+        user_input: Texto do usuário
+
+    Returns:
+        Tupla (tipo do comando, argumento) ou (None, None)
+    """
+    return _engine.detect(user_input)
+
+
+# ============================================================================
+# AVALIAÇÃO EM LOTE
+# ============================================================================
+
+class IntentResult(NamedTuple):
+    """Resultado da classificação de uma frase em lote."""
+    utterance: str
+    intent: Optional[str]
+    arg: Optional[str]
+    source: Optional[str]    # "rules", "local" ou None (iria para a IA)
+    latency_ms: float
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    """Percentil por posição em uma lista já ordenada."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def _classify_one(utterance: str, use_local: bool) -> IntentResult:
+    """Classifica uma frase pelas regras e, se preciso, pelo modelo local."""
+    start = time.perf_counter()
+    cmd_type, arg = detect_command(utterance)
+    source = "rules" if cmd_type else None
+
+    if not cmd_type and use_local:
+        cmd_type, arg = classify_local(utterance)
+        source = "local" if cmd_type else None
+
+    latency_ms = (time.perf_counter() - start) * 1000
+    return IntentResult(utterance, cmd_type, arg, source, latency_ms)
+
+
+def _classify_chunk(job: Tuple[List[str], bool]) -> List[IntentResult]:
+    """Classifica um bloco de frases (executado nos processos filhos)."""
+    utterances, use_local = job
+    return [_classify_one(utterance, use_local) for utterance in utterances]
+
+
+def detect_command_batch(utterances: Iterable[str], workers: int = 0,
+                         use_local: bool = True,
+                         chunk_size: int = 500) -> List[IntentResult]:
+    """
+    Classifica muitas frases de uma vez, sem executar os comandos.
+
+    Args:
+        utterances: Frases a classificar
+        workers: Número de processos (0 = no processo atual)
+        use_local: Usa o classificador local quando as regras não pegam
+        chunk_size: Frases por bloco enviado a cada processo
+
+    Returns:
+        Resultados na mesma ordem das frases
+    """
+    utterances = list(utterances)
+    if workers <= 0:
+        return _classify_chunk((utterances, use_local))
+
+    jobs = [
+        (utterances[i:i + chunk_size], use_local)
+        for i in range(0, len(utterances), chunk_size)
+    ]
+    with Pool(workers) as pool:
+        chunks = pool.map(_classify_chunk, jobs)
+    return [result for chunk in chunks for result in chunk]
+
+
+def read_utterances(source: TextIO) -> Tuple[List[str], List[Optional[str]]]:
+    """
+    Lê frases de um arquivo de log ou de um corpus rotulado.
+
+    Aceita uma frase por linha ou linhas "intenção<TAB>frase" (o formato
+    de intent_corpus.tsv). Linhas vazias e iniciadas por # são ignoradas.
+
+    Returns:
+        Tupla (frases, intenções esperadas ou None por frase)
+    """
+    utterances, expected = [], []
+    for line in source:
+        line = line.rstrip("\r\n")
+        if not line.strip() or line.startswith("#"):
+            continue
+        if "\t" in line:
+            label, text = line.split("\t", 1)
+            utterances.append(text)
+            expected.append(label)
+        else:
+            utterances.append(line)
+            expected.append(None)
+    return utterances, expected
+
+
+def main() -> None:
+    """Linha de comando da avaliação em lote."""
+    parser = argparse.ArgumentParser(
+        description="Classifica frases em lote e gera JSONL, sem executar comandos")
+    parser.add_argument("input", help="Arquivo de frases ('-' para entrada padrão)")
+    parser.add_argument("--output", "-o", help="Arquivo JSONL de saída (padrão: saída padrão)")
+    parser.add_argument("--workers", "-w", type=int, default=0,
+                        help="Processos em paralelo (padrão: 0, no processo atual)")
+    parser.add_argument("--rules-only", action="store_true",
+                        help="Não usa o classificador local")
+    args = parser.parse_args()
+
+    if args.input == "-":
+        utterances, expected = read_utterances(sys.stdin)
+    else:
+        with open(args.input, encoding="utf-8") as source:
+            utterances, expected = read_utterances(source)
+
+    start = time.perf_counter()
+    results = detect_command_batch(utterances, args.workers, not args.rules_only)
+    elapsed = time.perf_counter() - start
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for result, label in zip(results, expected):
+            record = result._asdict()
+            record["latency_ms"] = round(result.latency_ms, 4)
+            if label is not None:
+                record["expected"] = label
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    latencies = sorted(result.latency_ms for result in results)
+    by_source = {
+        source: sum(1 for result in results if result.source == source)
+        for source in ("rules", "local", None)
+    }
+    print(f"{len(results)} frases em {elapsed:.3f} s "
+          f"({len(results) / max(elapsed, 1e-9):.0f} frases/s)", file=sys.stderr)
+    print(f"latência p50 {_percentile(latencies, 0.50):.4f} ms, "
+          f"p95 {_percentile(latencies, 0.95):.4f} ms", file=sys.stderr)
+    print(f"regras: {by_source['rules']}, local: {by_source['local']}, "
+          f"para a IA: {by_source[None]}", file=sys.stderr)
+
+    labeled = [(result, label) for result, label in zip(results, expected) if label is not None]
+    if labeled:
+        # Frases rotuladas "chat" estão corretas quando seguem para a IA
+        correct = sum(
+            1 for result, label in labeled
+            if (result.intent or "chat") == label
+        )
+        print(f"acurácia: {correct}/{len(labeled)} ({correct / len(labeled):.1%})",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+O Nerd - Módulo de Palavras-Chave
+==================================
+
+Busca de várias palavras-chave de uma vez com um autômato Aho-Corasick.
+
+Um único autômato reúne as palavras perigosas e as palavras de saída e
+encontra todas as ocorrências em uma só passada pelo texto, em tempo
+proporcional ao tamanho do texto (e não ao número de palavras-chave).
+A busca ignora acentos e maiúsculas e respeita limites de palavra, então
+"kill" não casa com "skill".
+
+Com a lista de config.py (algumas dezenas de palavras), a passada do
+autômato em Python perde para um laço de str.find por palavra, que é o
+que roda abaixo de LOOP_MAX_KEYWORDS, com as mesmas regras de limite.
+O autômato fica para listas grandes.
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+from collections import deque
+from typing import Dict, Iterator, List, NamedTuple, Set, Tuple
+
+from config import DANGEROUS_KEYWORDS, EXIT_KEYWORDS
+
+# Cada caractere acentuado vira sua letra base (1 para 1), de modo que as
+# posições no texto normalizado continuem válidas no texto original
+ACCENT_PAIRS: List[Tuple[str, str]] = list(zip(
+    "áàâãäéèêëíìîïóòôõöúùûüçñ",
+    "aaaaaeeeeiiiiooooouuuucn",
+))
+
+# Modos de limite de palavra
+BOUNDARY_NONE = "none"      # casa em qualquer lugar (substring)
+BOUNDARY_PREFIX = "prefix"  # precisa começar uma palavra ("hack" casa "hacker")
+BOUNDARY_WORD = "word"      # precisa ser a palavra inteira
+
+CATEGORY_DANGEROUS = "dangerous"
+CATEGORY_EXIT = "exit"
+
+# Com poucas palavras, um laço de buscas (str.find, em C) ganha da
+# passada do autômato em Python; o autômato só compensa acima disto
+# (python benchmark.py keywords mede os dois)
+LOOP_MAX_KEYWORDS = 100
+
+
+def fold_accents(text: str) -> str:
+    """
+    Remove acentos de um texto sem alterar seu tamanho.
+
+    Args:
+        text: Texto a normalizar
+
+    Returns:
+        Texto sem acentos, com as mesmas posições do original
+    """
+    if text.isascii():
+        return text
+    # str.replace em sequência é bem mais rápido que str.translate com
+    # tabela de dicionário, que processa caractere a caractere
+    for accented, plain in ACCENT_PAIRS:
+        if accented in text:
+            text = text.replace(accented, plain)
+    return text
+
+
+def _is_word_char(char: str) -> bool:
+    """Verifica se o caractere faz parte de uma palavra."""
+    return char.isalnum() or char == "_"
+
+
+class KeywordHit(NamedTuple):
+    """Ocorrência de uma palavra-chave no texto."""
+    start: int
+    end: int
+    keyword: str
+    category: str
+
+
+class KeywordAutomaton:
+    """
+    Autômato Aho-Corasick para busca simultânea de palavras-chave.
+
+    As transições de falha são pré-computadas em build(), então a busca
+    faz exatamente uma consulta de dicionário por caractere do texto.
+    Com até loop_max palavras, a busca é um laço de str.find por palavra,
+    com os mesmos limites de palavra e o mesmo resultado.
+    """
+
+    def __init__(self, loop_max: int = LOOP_MAX_KEYWORDS):
+        """
+        Cria um autômato vazio. Use add() e depois build().
+
+        Args:
+            loop_max: Até quantas palavras a busca usa o laço (0 = sempre o autômato)
+        """
+        self.loop_max = loop_max
+        self._transitions: List[Dict[str, int]] = [{}]
+        self._outputs: List[Tuple[int, ...]] = [()]
+        # Por id: (palavra, categoria, modo de limite)
+        self._keywords: List[Tuple[str, str, str]] = []
+        # Categoria -> (palavra, id), para o laço de contains()
+        self._by_category: Dict[str, List[Tuple[str, int]]] = {}
+        self._built = False
+
+    def add(self, keyword: str, category: str, boundary: str = BOUNDARY_WORD) -> None:
+        """
+        Adiciona uma palavra-chave ao autômato.
+
+        Args:
+            keyword: Palavra ou expressão a buscar
+            category: Categoria devolvida nas ocorrências
+            boundary: Modo de limite de palavra (BOUNDARY_*)
+
+        Raises:
+            RuntimeError: Se o autômato já foi montado
+        """
+        if self._built:
+            raise RuntimeError("Autômato já montado; crie um novo para adicionar palavras")
+
+        keyword = fold_accents(keyword.lower())
+        keyword_id = len(self._keywords)
+        self._keywords.append((keyword, category, boundary))
+        self._by_category.setdefault(category, []).append((keyword, keyword_id))
+
+        state = 0
+        for char in keyword:
+            next_state = self._transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self._transitions)
+                self._transitions.append({})
+                self._outputs.append(())
+                self._transitions[state][char] = next_state
+            state = next_state
+
+        self._outputs[state] += (keyword_id,)
+
+    def build(self) -> None:
+        """Calcula as ligações de falha e completa a tabela de transições."""
+        fail = [0] * len(self._transitions)
+        queue = deque(self._transitions[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._transitions[state].items():
+                queue.append(next_state)
+
+                fallback = fail[state]
+                while fallback and char not in self._transitions[fallback]:
+                    fallback = fail[fallback]
+                target = self._transitions[fallback].get(char, 0)
+                fail[next_state] = target if target != next_state else 0
+                self._outputs[next_state] += self._outputs[fail[next_state]]
+
+        # Transforma em autômato determinístico: cada estado herda as
+        # transições do estado de falha, processado antes dele (BFS)
+        queue = deque(self._transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            queue.extend(self._transitions[state].values())
+            for char, next_state in self._transitions[fail[state]].items():
+                self._transitions[state].setdefault(char, next_state)
+
+        self._built = True
+
+    def find_all(self, text: str) -> List[KeywordHit]:
+        """
+        Encontra todas as ocorrências das palavras-chave no texto.
+
+        Args:
+            text: Texto a analisar
+
+        Returns:
+            Lista de ocorrências, na ordem em que terminam no texto
+        """
+        if not self._built:
+            self.build()
+
+        folded = fold_accents(text.lower())
+        if len(self._keywords) <= self.loop_max:
+            return self._find_by_loop(folded)
+
+        transitions = self._transitions
+        outputs = self._outputs
+        hits = []
+
+        state = 0
+        for index, char in enumerate(folded):
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                for keyword_id in outputs[state]:
+                    hit = self._check_boundaries(folded, index + 1, keyword_id)
+                    if hit:
+                        hits.append(hit)
+
+        return hits
+
+    def contains(self, text: str, category: str) -> bool:
+        """
+        Verifica se o texto tem alguma palavra da categoria.
+
+        Com o laço, para na primeira ocorrência, como a busca antiga.
+
+        Args:
+            text: Texto a analisar
+            category: Categoria procurada
+
+        Returns:
+            True se alguma palavra da categoria aparece no texto
+        """
+        if len(self._keywords) > self.loop_max:
+            return any(hit.category == category for hit in self.find_all(text))
+        folded = fold_accents(text.lower())
+        for keyword, keyword_id in self._by_category.get(category, ()):
+            if keyword in folded and next(self._occurrences(folded, keyword_id), None):
+                return True
+        return False
+
+    def _find_by_loop(self, folded: str) -> List[KeywordHit]:
+        """Busca cada palavra com str.find (mesmo resultado de find_all)."""
+        hits = []
+        for keyword_id, (keyword, _, _) in enumerate(self._keywords):
+            if keyword in folded:
+                hits.extend(self._occurrences(folded, keyword_id))
+        # Na ordem do autômato: pelo fim da ocorrência, a mais longa antes
+        hits.sort(key=lambda hit: (hit.end, hit.start))
+        return hits
+
+    def _occurrences(self, folded: str, keyword_id: int) -> Iterator[KeywordHit]:
+        """Ocorrências de uma palavra que respeitam os limites de palavra."""
+        keyword = self._keywords[keyword_id][0]
+        start = folded.find(keyword)
+        while start != -1:
+            hit = self._check_boundaries(folded, start + len(keyword), keyword_id)
+            if hit:
+                yield hit
+            start = folded.find(keyword, start + 1)
+
+    def categories(self, text: str) -> Set[str]:
+        """
+        Retorna as categorias com pelo menos uma ocorrência no texto.
+
+        Args:
+            text: Texto a analisar
+        """
+        return {hit.category for hit in self.find_all(text)}
+
+    def _check_boundaries(self, text: str, end: int, keyword_id: int):
+        """Valida os limites de palavra de uma ocorrência candidata."""
+        keyword, category, boundary = self._keywords[keyword_id]
+        start = end - len(keyword)
+
+        if boundary != BOUNDARY_NONE:
+            if start > 0 and _is_word_char(keyword[0]) and _is_word_char(text[start - 1]):
+                return None
+
+        if boundary == BOUNDARY_WORD:
+            if end < len(text) and _is_word_char(keyword[-1]) and _is_word_char(text[end]):
+                return None
+
+        return KeywordHit(start, end, keyword, category)
+
+
+def build_default_automaton() -> KeywordAutomaton:
+    """
+    Monta o autômato com as palavras perigosas e as palavras de saída.
+
+    Palavras perigosas casam como prefixo de palavra ("hack" pega
+    "hackear"), palavras de saída só como palavra inteira.
+    """
+    automaton = KeywordAutomaton()
+    for keyword in DANGEROUS_KEYWORDS:
+        automaton.add(keyword, CATEGORY_DANGEROUS, BOUNDARY_PREFIX)
+    for keyword in EXIT_KEYWORDS:
+        automaton.add(keyword, CATEGORY_EXIT, BOUNDARY_WORD)
+    automaton.build()
+    return automaton
+
+
+_automaton = build_default_automaton()
+
+
+def scan_keywords(text: str) -> List[KeywordHit]:
+    """
+    Encontra palavras perigosas e de saída em uma única passada.
+
+    Args:
+        text: Texto a analisar
+
+    Returns:
+        Lista de ocorrências encontradas
+    """
+    return _automaton.find_all(text)
+
+
+def contains_keyword(text: str, category: str) -> bool:
+    """
+    Verifica se o texto tem uma palavra perigosa ou de saída.
+
+    Args:
+        text: Texto a analisar
+        category: CATEGORY_DANGEROUS ou CATEGORY_EXIT
+
+    Returns:
+        True se alguma palavra da categoria aparece no texto
+    """
+    return _automaton.contains(text, category)
+
+
+def is_exit_command(text: str) -> bool:
+    """
+    Verifica se o texto contém uma palavra de saída.
+
+    Args:
+        text: Texto do usuário
+
+    Returns:
+        True se o usuário quer encerrar
+    """
+    return contains_keyword(text, CATEGORY_EXIT)
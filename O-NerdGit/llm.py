@@ -0,0 +1,658 @@
+"""
+O Nerd - Cliente da IA
+======================
+
+Acesso compartilhado ao Gemini para todas as interfaces.
+
+O modelo é montado uma vez por combinação de (modelo, system prompt,
+configuração de geração) e reutilizado em todas as mensagens, mantendo
+a conexão com a API aberta entre as perguntas. Um aquecimento opcional
+no início abre a conexão antes da primeira pergunta do usuário.
+
+Com streaming, a resposta chega em pedaços que as interfaces mostram
+assim que chegam; o tempo até o primeiro pedaço fica registrado.
+
+Perguntas repetidas são respondidas pelo cache em disco
+(response_cache.py), sem nova chamada à API. A mesma pergunta, com o mesmo
+histórico, feita de novo enquanto a primeira ainda está sendo respondida
+(ex.: a fala interrompida e repetida) acompanha a chamada em andamento
+em vez de abrir outra. As chamadas respeitam os
+limites da chave e repetem erros temporários (rate_limit.py). Se a API
+continuar falhando, o disjuntor (circuit_breaker.py) passa a responder
+na hora com uma resposta local até ela voltar.
+
+O prompt de sistema de cada modo vem de prompts.py e segue em cada
+pedido. Os tokens de entrada de cada pedido, informados pela API, ficam
+nas estatísticas.
+
+Com ONERD_GEMINI_ENDPOINT definido, as chamadas vão para outro endpoint,
+como o servidor falso local (fake_gemini.py), sem chave nem rede.
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import hashlib
+import json
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import google.generativeai as genai
+
+from config import (
+    GOOGLE_API_KEY,
+    GEMINI_MODEL, GEMINI_API_ENDPOINT, GENERATION_CONFIG, LLM_WARMUP, LLM_REQUEST_TIMEOUT,
+    LLM_COALESCE,
+)
+from circuit_breaker import STATE_CLOSED, CircuitBreaker
+from history import estimate_tokens
+from prompts import get_system_prompt
+from rate_limit import RateLimiter, call_with_retry, get_rate_limiter
+from response_cache import ResponseCache, format_cache_stats, get_response_cache, normalize_prompt
+import telemetry
+
+# Texto curto usado no aquecimento (count_tokens não gera resposta)
+WARMUP_TEXT = "oi"
+
+# A sonda do disjuntor gera de verdade, mas só um token
+PROBE_CONFIG = {"max_output_tokens": 1}
+
+# Resposta local quando a IA está fora do ar e a pergunta não está no cache
+OFFLINE_REPLY = (
+    "Estou sem acesso à IA agora, então não consigo responder isso. "
+    "Mas ainda posso abrir apps e sites, pesquisar, dizer a hora e a data. "
+    "Diga 'ajuda' para ver os comandos."
+)
+
+
+class GenerationCancelled(Exception):
+    """A resposta foi abandonada porque o usuário fez outro pedido."""
+
+
+# Intervalo com que quem acompanha uma chamada confere o próprio cancelamento
+FOLLOW_POLL_SECONDS = 0.1
+
+
+class _Flight:
+    """
+    Chamada à API em andamento, compartilhada pelos pedidos idênticos.
+
+    Quem abriu a chamada publica os pedaços e o resultado; os demais
+    recebem tudo desde o início, cada um na sua thread. A chamada só é
+    abandonada quando todos desistiram, por isso o próprio _Flight serve
+    de evento de cancelamento para ela.
+    """
+
+    def __init__(self, cancel: Optional[threading.Event]):
+        self.chunks: List[str] = []
+        self.done = False
+        self.text: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self.condition = threading.Condition()
+        self._cancels = [cancel]
+
+    def attach(self, cancel: Optional[threading.Event]) -> None:
+        """Registra mais um pedido esperando esta chamada."""
+        with self.condition:
+            self._cancels.append(cancel)
+
+    def is_set(self) -> bool:
+        """Verifica se todos os pedidos desistiram da resposta."""
+        with self.condition:
+            return all(cancel is not None and cancel.is_set() for cancel in self._cancels)
+
+    def publish(self, chunk: str) -> None:
+        """Entrega um pedaço da resposta a quem acompanha."""
+        with self.condition:
+            self.chunks.append(chunk)
+            self.condition.notify_all()
+
+    def finish(self, text: Optional[str], error: Optional[BaseException]) -> None:
+        """Entrega o resultado (ou o erro) a quem acompanha."""
+        with self.condition:
+            self.text, self.error, self.done = text, error, True
+            self.condition.notify_all()
+
+    def follow(self, on_chunk: Optional[Callable[[str], None]],
+               cancel: Optional[threading.Event]) -> str:
+        """
+        Espera o resultado, repassando os pedaços já publicados e os novos.
+
+        Raises:
+            GenerationCancelled: cancel foi sinalizado
+            Exception: Erro da chamada compartilhada
+        """
+        delivered = 0
+        while True:
+            with self.condition:
+                while (delivered == len(self.chunks) and not self.done
+                       and not (cancel is not None and cancel.is_set())):
+                    self.condition.wait(FOLLOW_POLL_SECONDS)
+                chunks = self.chunks[delivered:]
+                done = self.done
+            if cancel is not None and cancel.is_set():
+                raise GenerationCancelled()
+            if on_chunk:
+                for chunk in chunks:
+                    on_chunk(chunk)
+            delivered += len(chunks)
+            if done:
+                break
+
+        if self.error is not None:
+            raise self.error
+        if on_chunk and not delivered and self.text:
+            # A chamada foi feita sem streaming: a resposta vem inteira
+            on_chunk(self.text)
+        return self.text
+
+
+# As novas tentativas ficam com call_with_retry, que respeita os pedidos
+# de espera da API; as da biblioteca insistiam por minutos sem rede
+REQUEST_OPTIONS = {
+    "timeout": LLM_REQUEST_TIMEOUT,
+    "retry": None,
+}
+
+
+class LLMClient:
+    """
+    Modelo Gemini pronto para uso, reaproveitado entre mensagens.
+
+    Guarda também o tempo da primeira chamada e das seguintes, para
+    comparar o custo da conexão fria com o estado estável, e o tempo até
+    o primeiro pedaço das respostas em streaming.
+    """
+
+    def __init__(self, model_name: str, system_prompt: str,
+                 generation_config: Dict[str, Any],
+                 cache: Optional[ResponseCache] = None,
+                 limiter: Optional[RateLimiter] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 coalesce: bool = LLM_COALESCE):
+        """
+        Monta o modelo.
+
+        Args:
+            model_name: Nome do modelo Gemini
+            system_prompt: Instruções de sistema
+            generation_config: Parâmetros de geração (GenerationConfig)
+            cache: Cache de respostas (None para não usar)
+            limiter: Limites de requisições/tokens (None para não limitar)
+            breaker: Disjuntor para falhas seguidas (None para não usar)
+            coalesce: Pedidos idênticos simultâneos dividem uma só chamada
+        """
+        configure_api()
+        self.model_name = model_name
+        self.coalesce = coalesce
+        self._flights: Dict[str, _Flight] = {}
+        self._flights_lock = threading.Lock()
+        self.cache = cache
+        self.limiter = limiter
+        self.breaker = breaker
+        self._system_tokens = estimate_tokens(system_prompt)
+        # Respostas só são reaproveitadas entre clientes idênticos
+        self.cache_namespace = json.dumps(
+            [model_name, system_prompt, sorted(generation_config.items())],
+            ensure_ascii=False,
+        )
+        self.model = genai.GenerativeModel(
+            model_name=model_name,
+            system_instruction=system_prompt,
+            generation_config=genai.types.GenerationConfig(**generation_config),
+        )
+        self.warmed_up = False
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "errors": 0,
+            "first_seconds": None,
+            "total_seconds": 0.0,
+            "warmup_seconds": None,
+            "streams": 0,
+            "first_chunk_total_seconds": 0.0,
+            "last_first_chunk_seconds": None,
+            "offline": 0,
+            "cancelled": 0,
+            "usage_responses": 0,
+            "input_tokens": 0,
+            "coalesced": 0,
+        }
+
+    def generate(self, contents: List[Dict[str, Any]],
+                 on_chunk: Optional[Callable[[str], None]] = None,
+                 cancel: Optional[threading.Event] = None) -> str:
+        """
+        Gera uma resposta para o histórico da conversa.
+
+        Args:
+            contents: Mensagens no formato {"role": ..., "parts": [...]}
+            on_chunk: Se informado, a resposta vem em streaming e cada
+                pedaço é passado para esta função assim que chega
+            cancel: Se for sinalizado, a resposta é abandonada no próximo
+                pedaço (ou ao fim da chamada, sem streaming)
+
+        Returns:
+            Texto completo da resposta, sem espaços nas pontas
+
+        Raises:
+            GenerationCancelled: cancel foi sinalizado
+            Exception: Erros da API são repassados para a interface tratar
+        """
+        key = self.flight_key(contents) if self.coalesce else None
+        if key is None:
+            return self._generate(contents, on_chunk, cancel)
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight(cancel)
+            else:
+                flight.attach(cancel)
+        if not leader:
+            with self._stats_lock:
+                self._stats["coalesced"] += 1
+            telemetry.count("coalesced")
+            return flight.follow(on_chunk, cancel)
+
+        def forward(chunk: str) -> None:
+            flight.publish(chunk)
+            if cancel is None or not cancel.is_set():
+                on_chunk(chunk)
+
+        text, error = None, None
+        try:
+            # Quem abriu a chamada segue com ela enquanto alguém ainda espera
+            text = self._generate(contents, forward if on_chunk else None, flight)
+        except BaseException as failure:
+            error = failure
+            raise
+        finally:
+            with self._flights_lock:
+                del self._flights[key]
+            flight.finish(text, error)
+        if cancel is not None and cancel.is_set():
+            with self._stats_lock:
+                self._stats["cancelled"] += 1
+            raise GenerationCancelled()
+        return text
+
+    def flight_key(self, contents: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        Identifica pedidos idênticos: mesma pergunta, contexto e cliente.
+
+        A chave cobre o histórico inteiro enviado, mensagem a mensagem, para
+        que duas perguntas iguais feitas em conversas diferentes nunca
+        dividam uma resposta. Um pedido interrompido não fica no histórico
+        (engine.py), então refazê-lo envia exatamente o mesmo histórico.
+
+        Args:
+            contents: Histórico terminando na pergunta do usuário
+
+        Returns:
+            Chave (hash) ou None se não há pergunta
+        """
+        if not contents:
+            return None
+        messages: List[Tuple[Any, str]] = [
+            (message.get("role"), normalize_prompt(
+                " ".join(str(part) for part in message.get("parts", ()))))
+            for message in contents
+        ]
+        material = json.dumps([self.cache_namespace, messages], ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _generate(self, contents: List[Dict[str, Any]],
+                  on_chunk: Optional[Callable[[str], None]],
+                  cancel: Optional[Any]) -> str:
+        """Gera a resposta pelo cache, pela resposta local ou pela API (ver generate)."""
+        if self.cache:
+            cached = self.cache.get(contents, self.cache_namespace)
+            if cached is not None:
+                telemetry.count("cache_hits")
+                if on_chunk:
+                    on_chunk(cached)
+                return cached
+
+        if self.breaker and not self.breaker.allow():
+            return self._offline_reply(contents, on_chunk)
+
+        start = time.perf_counter()
+        first_chunk = None
+        usage = None
+        pieces: List[str] = []
+
+        def call() -> str:
+            nonlocal first_chunk, usage
+            if on_chunk is None:
+                response = self.model.generate_content(
+                    contents=contents, request_options=REQUEST_OPTIONS,
+                )
+                usage = response.usage_metadata
+                return response.text
+
+            response = self.model.generate_content(
+                contents=contents, stream=True, request_options=REQUEST_OPTIONS,
+            )
+            for chunk in response:
+                if cancel is not None and cancel.is_set():
+                    # Parar de ler encerra o streaming da resposta
+                    raise GenerationCancelled()
+                try:
+                    piece = chunk.text
+                except ValueError:
+                    # Pedaço sem texto (ex.: só o motivo de parada)
+                    continue
+                if first_chunk is None:
+                    first_chunk = time.perf_counter() - start
+                pieces.append(piece)
+                on_chunk(piece)
+            # Chega no último pedaço
+            usage = response.usage_metadata
+            return "".join(pieces)
+
+        try:
+            # Depois que parte da resposta foi exibida, repetir duplicaria o texto
+            text = call_with_retry(
+                call, self.limiter, self.estimate_request_tokens(contents),
+                can_retry=lambda: not pieces,
+            )
+        except GenerationCancelled:
+            with self._stats_lock:
+                self._stats["cancelled"] += 1
+            raise
+        except Exception as error:
+            self._record(time.perf_counter() - start, failed=True)
+            # Resposta bloqueada ou vazia (ValueError) não indica API fora do ar
+            if self.breaker and not isinstance(error, ValueError):
+                self.breaker.record_failure(error)
+            raise
+        self._record(time.perf_counter() - start, first_chunk)
+        self._record_usage(usage)
+        if first_chunk is not None:
+            telemetry.record("llm_ttft", first_chunk)
+        if self.breaker:
+            self.breaker.record_success()
+        if cancel is not None and cancel.is_set():
+            with self._stats_lock:
+                self._stats["cancelled"] += 1
+            raise GenerationCancelled()
+
+        text = text.strip()
+        if self.cache:
+            self.cache.put(contents, self.cache_namespace, text)
+        return text
+
+    def _offline_reply(self, contents: List[Dict[str, Any]],
+                       on_chunk: Optional[Callable[[str], None]]) -> str:
+        """Responde sem a API: a mesma pergunta no cache ou a resposta padrão."""
+        with self._stats_lock:
+            self._stats["offline"] += 1
+        telemetry.count("offline")
+
+        text = None
+        if self.cache and contents:
+            # A pergunta pode ter sido respondida antes, no início de outra conversa
+            text = self.cache.get(contents[-1:], self.cache_namespace)
+        if text is None:
+            text = OFFLINE_REPLY
+        if on_chunk:
+            on_chunk(text)
+        return text
+
+    def _record_usage(self, usage: Any) -> None:
+        """Soma os tokens informados pela API (usage_metadata)."""
+        if usage is None or not usage.prompt_token_count:
+            return
+        telemetry.count("input_tokens", usage.prompt_token_count)
+        telemetry.count("output_tokens", usage.candidates_token_count)
+        with self._stats_lock:
+            self._stats["usage_responses"] += 1
+            self._stats["input_tokens"] += usage.prompt_token_count
+
+    def estimate_request_tokens(self, contents: List[Dict[str, Any]]) -> int:
+        """Estima os tokens de entrada de uma requisição (histórico + sistema)."""
+        return self._system_tokens + sum(
+            estimate_tokens(str(part))
+            for message in contents
+            for part in message.get("parts", ())
+        )
+
+    def warm_up(self) -> Optional[float]:
+        """
+        Abre a conexão com a API com uma chamada leve.
+
+        Returns:
+            Duração do aquecimento em segundos, ou None se falhou
+        """
+        start = time.perf_counter()
+        try:
+            counted = self.model.count_tokens(WARMUP_TEXT, request_options=REQUEST_OPTIONS)
+        except Exception:
+            # Sem rede ou chave inválida: a primeira pergunta mostra o erro
+            return None
+
+        elapsed = time.perf_counter() - start
+        # A contagem inclui o prompt de sistema: troca a estimativa pelo valor real
+        self._system_tokens = max(1, counted.total_tokens - estimate_tokens(WARMUP_TEXT))
+        with self._stats_lock:
+            self._stats["warmup_seconds"] = elapsed
+        self.warmed_up = True
+        return elapsed
+
+    def probe(self) -> bool:
+        """
+        Testa se o modelo gera respostas, com um pedido de um token.
+
+        Ao contrário do aquecimento (count_tokens), passa pela mesma cota
+        e pelo mesmo modelo das perguntas: cota esgotada (429) ou modelo
+        recusado fazem a sonda falhar.
+
+        Returns:
+            True se o modelo respondeu
+
+        Raises:
+            Exception: Erro da API (o disjuntor continua aberto)
+        """
+        if self.limiter:
+            self.limiter.acquire(self._system_tokens + estimate_tokens(WARMUP_TEXT))
+        self.model.generate_content(
+            WARMUP_TEXT, generation_config=PROBE_CONFIG, request_options=REQUEST_OPTIONS,
+        )
+        return True
+
+    def warm_up_in_background(self) -> threading.Thread:
+        """Aquece a conexão em uma thread, sem atrasar a inicialização."""
+        thread = threading.Thread(target=self.warm_up, name="llm-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna as estatísticas de uso do cliente.
+
+        Returns:
+            Dicionário com requisições, erros, tempo da primeira chamada,
+            tempo médio das seguintes, duração do aquecimento, tempo
+            médio até o primeiro pedaço em streaming (segundos), tokens
+            do prompt de sistema e tokens de entrada por pedido
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["system_tokens"] = self._system_tokens
+        stats["input_tokens_avg"] = (
+            stats["input_tokens"] / stats["usage_responses"]
+            if stats["usage_responses"] else None
+        )
+        steady = stats["requests"] - 1
+        stats["steady_avg_seconds"] = (
+            (stats["total_seconds"] - stats["first_seconds"]) / steady
+            if steady > 0 else None
+        )
+        stats["first_chunk_avg_seconds"] = (
+            stats["first_chunk_total_seconds"] / stats["streams"]
+            if stats["streams"] else None
+        )
+        return stats
+
+    def _record(self, elapsed: float, first_chunk: Optional[float] = None,
+                failed: bool = False) -> None:
+        """Registra a duração de uma chamada."""
+        with self._stats_lock:
+            if failed:
+                self._stats["errors"] += 1
+                return
+            if self._stats["first_seconds"] is None:
+                self._stats["first_seconds"] = elapsed
+            self._stats["requests"] += 1
+            self._stats["total_seconds"] += elapsed
+            if first_chunk is not None:
+                self._stats["streams"] += 1
+                self._stats["first_chunk_total_seconds"] += first_chunk
+                self._stats["last_first_chunk_seconds"] = first_chunk
+
+
+class TerminalPrinter:
+    """
+    Mostra uma resposta em streaming no terminal, pedaço por pedaço.
+
+    Use a instância como on_chunk de LLMClient.generate() e chame
+    finish() ao final para fechar a linha.
+    """
+
+    def __init__(self, prefix: str):
+        """
+        Args:
+            prefix: Texto exibido antes do primeiro pedaço (ex.: o nome)
+        """
+        self.prefix = prefix
+        self.text = ""
+
+    def __call__(self, chunk: str) -> None:
+        """Escreve um pedaço assim que ele chega."""
+        if not self.text:
+            sys.stdout.write(self.prefix)
+            chunk = chunk.lstrip()
+        self.text += chunk
+        sys.stdout.write(chunk)
+        sys.stdout.flush()
+
+    def finish(self) -> None:
+        """Termina a linha da resposta, se algo foi escrito."""
+        if self.text:
+            sys.stdout.write("\n\n")
+            sys.stdout.flush()
+
+    def shown(self, response: str) -> bool:
+        """Verifica se a resposta final já apareceu inteira no terminal."""
+        return bool(self.text) and self.text.strip() == response
+
+
+_configured = False
+# A sonda pede uma resposta de um token ao cliente padrão: count_tokens
+# responde mesmo com a cota de geração esgotada
+_breaker = CircuitBreaker(probe=lambda: get_llm_client().probe())
+_clients: Dict[Tuple[str, str, Tuple[Tuple[str, Any], ...]], LLMClient] = {}
+_clients_lock = threading.Lock()
+
+
+def api_options() -> Dict[str, Any]:
+    """
+    Argumentos de genai.configure: a chave e, se houver, o endpoint alternativo.
+
+    Returns:
+        Dicionário para genai.configure(**api_options())
+    """
+    options: Dict[str, Any] = {"api_key": GOOGLE_API_KEY}
+    if GEMINI_API_ENDPOINT:
+        # O servidor local fala REST puro, sem gRPC nem TLS
+        options["transport"] = "rest"
+        options["client_options"] = {"api_endpoint": GEMINI_API_ENDPOINT}
+    return options
+
+
+def configure_api() -> None:
+    """Configura a chave da API uma única vez por processo."""
+    global _configured
+    if not _configured and GOOGLE_API_KEY:
+        genai.configure(**api_options())
+        _configured = True
+
+
+def get_llm_client(model_name: str = GEMINI_MODEL,
+                   system_prompt: Optional[str] = None,
+                   generation_config: Optional[Dict[str, Any]] = None) -> LLMClient:
+    """
+    Retorna o cliente compartilhado para a combinação pedida.
+
+    Args:
+        model_name: Nome do modelo Gemini
+        system_prompt: Instruções de sistema (padrão: prompt do modo texto)
+        generation_config: Parâmetros de geração (padrão: GENERATION_CONFIG)
+
+    Returns:
+        O mesmo LLMClient para chamadas com os mesmos argumentos
+    """
+    if system_prompt is None:
+        system_prompt = get_system_prompt()
+    if generation_config is None:
+        generation_config = GENERATION_CONFIG
+    key = (model_name, system_prompt, tuple(sorted(generation_config.items())))
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = LLMClient(model_name, system_prompt, generation_config,
+                               get_response_cache(), get_rate_limiter(), _breaker)
+            _clients[key] = client
+    return client
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Retorna o disjuntor compartilhado por todos os clientes."""
+    return _breaker
+
+
+def warm_up(background: bool = True, mode: str = "text") -> None:
+    """
+    Aquece o cliente padrão de um modo, se LLM_WARMUP estiver ativado.
+
+    Args:
+        background: Aquece em uma thread em vez de esperar a resposta
+        mode: "text" ou "voice" (escolhe o prompt de sistema)
+    """
+    if not LLM_WARMUP:
+        return
+    client = get_llm_client(system_prompt=get_system_prompt(mode))
+    if background:
+        client.warm_up_in_background()
+    else:
+        client.warm_up()
+
+
+def format_llm_stats(client: Optional[LLMClient] = None) -> str:
+    """Resumo legível de get_stats() (padrão: cliente padrão), para exibir ao encerrar."""
+    stats = (client or get_llm_client()).get_stats()
+    breaker = _breaker.get_stats()
+    breaker_summary = ""
+    if breaker["trips"] or breaker["state"] != STATE_CLOSED:
+        breaker_summary = (f"; disjuntor {breaker['state']}, aberto {breaker['trips']} vez(es), "
+                           f"{stats['offline']} respostas locais")
+    if not stats["requests"]:
+        return f"nenhuma chamada à IA nesta sessão; {format_cache_stats()}{breaker_summary}"
+
+    summary = f"{stats['requests']} respostas da IA"
+    if stats["first_chunk_avg_seconds"] is not None:
+        summary += f", primeiro pedaço em {stats['first_chunk_avg_seconds'] * 1000:.0f} ms"
+    if stats["cancelled"]:
+        summary += f", {stats['cancelled']} interrompidas"
+    if stats["coalesced"]:
+        summary += f", {stats['coalesced']} chamadas poupadas por pedidos repetidos"
+    if stats["input_tokens_avg"] is not None:
+        summary += f", {stats['input_tokens_avg']:.0f} tokens de entrada por pedido"
+    average = stats["total_seconds"] / stats["requests"]
+    return (summary + f", resposta completa em {average * 1000:.0f} ms (média); "
+            + format_cache_stats() + breaker_summary)
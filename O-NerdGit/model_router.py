@@ -0,0 +1,346 @@
+"""
+O Nerd - Roteamento de Modelos
+==============================
+
+Escolhe o modelo Gemini e o limite de tokens de cada pedido a partir de
+características baratas, calculadas localmente: tamanho do pedido,
+palavras-chave (código, explicações, contas) e modo (texto ou voz).
+Conversa curta vai para o modelo rápido; perguntas longas ou técnicas,
+para um modelo maior. O modo também escolhe o prompt de sistema
+(prompts.py): a voz usa a versão compacta.
+
+Se o nível escolhido falhar ou recusar a resposta, o pedido sobe para o
+nível seguinte. Tempo e tokens de cada nível ficam nas estatísticas e,
+opcionalmente, em um registro JSONL para ajustar a política. O registro
+é gravado por uma thread própria: a resposta só coloca a linha em uma
+fila, sem acesso a disco nem espera por outros pedidos.
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import atexit
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from config import (
+    DATA_DIR, GENERATION_CONFIG,
+    MODEL_ROUTER_ENABLED, MODEL_TIERS, MODEL_ROUTING_POLICY,
+    MODEL_ROUTER_MAX_ESCALATIONS, MODEL_ROUTER_LOG,
+)
+from history import estimate_tokens
+from keywords import fold_accents
+from llm import GenerationCancelled, LLMClient, get_llm_client
+from prompts import get_system_prompt
+from response_cache import TIME_CONTEXT_MARKER
+
+LOG_FILE = DATA_DIR / "model_router.jsonl"
+
+# Acima disso o registro é renomeado para .1 e recomeça
+LOG_MAX_BYTES = 1024 * 1024
+
+# Tempo máximo de espera pela gravação do que falta ao encerrar (segundos)
+LOG_CLOSE_TIMEOUT = 2.0
+
+# Nível usado com o roteamento desligado
+DEFAULT_TIER = "padrao"
+
+
+class Route(NamedTuple):
+    """Nível escolhido para um pedido."""
+    tier: str
+    model: str
+    max_output_tokens: int
+
+
+class ModelRouter:
+    """
+    Roteador de pedidos entre níveis de modelo, seguro entre threads.
+
+    As regras da política são avaliadas em ordem e a primeira que casa
+    escolhe o nível; sem nenhuma, vale o último nível da tabela.
+    """
+
+    def __init__(self, tiers: Dict[str, Dict[str, Any]] = MODEL_TIERS,
+                 policy: List[Dict[str, Any]] = MODEL_ROUTING_POLICY,
+                 max_escalations: int = MODEL_ROUTER_MAX_ESCALATIONS,
+                 enabled: bool = MODEL_ROUTER_ENABLED,
+                 log: bool = MODEL_ROUTER_LOG,
+                 log_path: Path = LOG_FILE,
+                 client_factory: Optional[Callable[[str, Dict[str, Any], str], LLMClient]] = None):
+        """
+        Args:
+            tiers: Nome do nível -> {"model", "max_output_tokens"}, do mais
+                rápido ao mais capaz
+            policy: Regras de escolha (ver MODEL_ROUTING_POLICY)
+            max_escalations: Subidas de nível permitidas por pedido
+            enabled: False usa sempre DEFAULT_TIER
+            log: Registra cada pedido em log_path
+            log_path: Arquivo JSONL do registro
+            client_factory: Cria o cliente de um modelo, configuração e
+                prompt de sistema (padrão: get_llm_client)
+        """
+        self.tiers = tiers
+        self.order = list(tiers)
+        self.max_escalations = max_escalations
+        self.enabled = enabled
+        self.log = log
+        self.log_path = Path(log_path)
+        self.client_factory = client_factory or (
+            lambda model, config, prompt: get_llm_client(
+                model_name=model, system_prompt=prompt, generation_config=config)
+        )
+        # Palavras-chave sem acentos, comparadas com o pedido normalizado
+        self.policy = [
+            {**rule, "keywords": [fold_accents(word.lower()) for word in rule["keywords"]]}
+            if "keywords" in rule else rule
+            for rule in policy
+        ]
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {
+            tier: {"requests": 0, "errors": 0, "refusals": 0, "escalations": 0,
+                   "seconds": 0.0, "input_tokens": 0, "output_tokens": 0}
+            for tier in self.order
+        }
+        self._log_queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+    def route(self, text: str, mode: str = "text") -> Route:
+        """
+        Escolhe o nível de um pedido.
+
+        Args:
+            text: Pedido do usuário
+            mode: "text" ou "voice"
+
+        Returns:
+            Nível, modelo e limite de tokens da resposta
+        """
+        if not self.enabled:
+            return self._make_route(DEFAULT_TIER)
+
+        folded = fold_accents(text.lower())
+        words = len(folded.split())
+        for rule in self.policy:
+            if self._matches(rule, folded, words, mode):
+                return self._make_route(rule["tier"], rule.get("max_output_tokens"))
+        return self._make_route(self.order[-1])
+
+    def generate(self, contents: List[Dict[str, Any]],
+                 on_chunk: Optional[Callable[[str], None]] = None,
+                 cancel: Optional[threading.Event] = None,
+                 mode: str = "text") -> str:
+        """
+        Gera a resposta no nível escolhido, subindo de nível se preciso.
+
+        Args:
+            contents: Histórico terminando na pergunta do usuário
+            on_chunk: Recebe os pedaços da resposta em streaming
+            cancel: Abandona a resposta quando sinalizado
+            mode: "text" ou "voice"
+
+        Returns:
+            Texto da resposta
+
+        Raises:
+            GenerationCancelled: cancel foi sinalizado
+            Exception: Erro do último nível tentado
+        """
+        text = " ".join(str(part) for part in contents[-1].get("parts", ()))
+        # O contexto de hora acrescentado por chat_with_ai não conta
+        prompt = text.split(TIME_CONTEXT_MARKER)[0]
+        route = self.route(prompt, mode)
+        words = len(prompt.split())
+        system_prompt = get_system_prompt(mode)
+
+        shown = []
+
+        def forward(chunk: str) -> None:
+            shown.append(chunk)
+            on_chunk(chunk)
+
+        escalations = 0
+        while True:
+            client = self.client_factory(route.model, {
+                **GENERATION_CONFIG, "max_output_tokens": route.max_output_tokens,
+            }, system_prompt)
+            input_tokens = client.estimate_request_tokens(contents)
+            failure = None
+            start = time.perf_counter()
+            try:
+                response = client.generate(contents, forward if on_chunk else None, cancel)
+                outcome = "ok" if response else "refusal"
+            except GenerationCancelled:
+                raise
+            except Exception as error:
+                # Resposta bloqueada sem streaming chega como ValueError
+                response, failure = "", error
+                outcome = "refusal" if isinstance(error, ValueError) else "error"
+            elapsed = time.perf_counter() - start
+            self._record(route, mode, words, outcome, elapsed, input_tokens, response)
+
+            if outcome == "ok":
+                return response
+
+            # Depois que parte da resposta apareceu, outro modelo duplicaria o texto
+            bigger = self._next_tier(route.tier)
+            if shown or bigger is None or escalations >= self.max_escalations:
+                if failure is not None:
+                    raise failure
+                return response
+            with self._lock:
+                self._stats[route.tier]["escalations"] += 1
+            route = self._make_route(bigger)
+            escalations += 1
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Retorna as estatísticas de cada nível.
+
+        Returns:
+            Nível -> requests, errors, refusals, escalations, seconds,
+            input_tokens e output_tokens (tokens estimados)
+        """
+        with self._lock:
+            return {tier: dict(stats) for tier, stats in self._stats.items()}
+
+    def _make_route(self, tier: str, max_output_tokens: Optional[int] = None) -> Route:
+        """Monta a rota de um nível da tabela."""
+        settings = self.tiers[tier]
+        return Route(tier, settings["model"], max_output_tokens or settings["max_output_tokens"])
+
+    def _next_tier(self, tier: str) -> Optional[str]:
+        """Nível seguinte da tabela, ou None no último."""
+        position = self.order.index(tier) + 1
+        return self.order[position] if position < len(self.order) else None
+
+    @staticmethod
+    def _matches(rule: Dict[str, Any], folded: str, words: int, mode: str) -> bool:
+        """Verifica se um pedido atende a todos os critérios de uma regra."""
+        if "modes" in rule and mode not in rule["modes"]:
+            return False
+        if "min_words" in rule and words < rule["min_words"]:
+            return False
+        if "max_words" in rule and words > rule["max_words"]:
+            return False
+        if "keywords" in rule and not any(word in folded for word in rule["keywords"]):
+            return False
+        return True
+
+    def flush_log(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a gravação das linhas já enfileiradas no registro.
+
+        Args:
+            timeout: Espera máxima em segundos (None: sem limite)
+
+        Returns:
+            True se a fila esvaziou a tempo
+        """
+        if self._writer is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._log_queue.all_tasks_done:
+            while self._log_queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._log_queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self) -> None:
+        """Grava o que falta no registro e encerra a thread de gravação."""
+        if self._writer is None:
+            return
+        self._log_queue.put(None)
+        self._writer.join(LOG_CLOSE_TIMEOUT)
+
+    def _record(self, route: Route, mode: str, words: int, outcome: str,
+                elapsed: float, input_tokens: int, response: str) -> None:
+        """Atualiza as estatísticas do nível e enfileira a linha do registro."""
+        output_tokens = estimate_tokens(response) if response else 0
+        with self._lock:
+            stats = self._stats[route.tier]
+            stats["requests"] += 1
+            stats["seconds"] += elapsed
+            stats["input_tokens"] += input_tokens
+            stats["output_tokens"] += output_tokens
+            if outcome == "error":
+                stats["errors"] += 1
+            elif outcome == "refusal":
+                stats["refusals"] += 1
+            if not self.log:
+                return
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop,
+                                                name="onerd-router-log", daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+
+        self._log_queue.put({
+            "time": round(time.time(), 3), "tier": route.tier, "model": route.model,
+            "max_output_tokens": route.max_output_tokens, "mode": mode, "words": words,
+            "outcome": outcome, "seconds": round(elapsed, 3),
+            "input_tokens": input_tokens, "output_tokens": output_tokens,
+        })
+
+    def _write_loop(self) -> None:
+        """Thread de gravação: acrescenta ao arquivo o que chegou na fila, em lotes."""
+        running = True
+        while running:
+            batch = [self._log_queue.get()]
+            # Junta o que mais chegou enquanto o último lote gravava
+            while True:
+                try:
+                    batch.append(self._log_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            entries = [entry for entry in batch if entry is not None]
+            running = len(entries) == len(batch)
+            if entries and self.log:
+                self._write(entries)
+            for _ in batch:
+                self._log_queue.task_done()
+
+    def _write(self, entries: List[Dict[str, Any]]) -> None:
+        """Acrescenta linhas ao registro, girando o arquivo se preciso."""
+        try:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            if self.log_path.exists() and self.log_path.stat().st_size > LOG_MAX_BYTES:
+                self.log_path.replace(self.log_path.with_suffix(".jsonl.1"))
+            with open(self.log_path, "a", encoding="utf-8") as handle:
+                handle.writelines(json.dumps(entry) + "\n" for entry in entries)
+        except OSError:
+            # O registro é só para ajuste da política; não derruba a conversa
+            self.log = False
+
+_router = ModelRouter()
+
+
+def get_model_router() -> ModelRouter:
+    """Retorna o roteador compartilhado do processo."""
+    return _router
+
+
+def format_router_stats() -> str:
+    """Resumo legível de get_stats(), para exibir ao encerrar."""
+    parts = []
+    for tier, stats in get_model_router().get_stats().items():
+        if not stats["requests"]:
+            continue
+        requests = stats["requests"]
+        part = (f"{tier} {requests}x em {stats['seconds'] / requests * 1000:.0f} ms, "
+                f"~{stats['input_tokens'] // requests} tokens de entrada e "
+                f"~{stats['output_tokens'] // requests} de saída")
+        failures = stats["errors"] + stats["refusals"]
+        if failures:
+            part += f", {failures} falhas ({stats['escalations']} subiram de nível)"
+        parts.append(part)
+    if not parts:
+        return "nenhum pedido roteado nesta sessão"
+    return "modelos: " + "; ".join(parts)
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import os
 import sys
-import re
+import time
 
 try:
     from colorama import init, Fore, Style
@@ -14,27 +14,18 @@ except ImportError:
     class Style:
         BRIGHT = RESET_ALL = ""
 
-import google.generativeai as genai
-
 from config import (
-    ASSISTANT_NAME, VERSION, DESCRIPTION, WAKE_WORD, GOOGLE_API_KEY, 
-    SYSTEM_PROMPT, DANGEROUS_KEYWORDS
+    ASSISTANT_NAME, VERSION, DESCRIPTION, WAKE_WORD, GOOGLE_API_KEY,
+    LLM_STREAMING, SPEECH_STREAMING
 )
-from commands import execute_command, is_dangerous_command
-from voice import get_voice_assistant
+from engine import AUTOMATION_AVAILABLE, get_engine
+from voice import PRIORITY_CONFIRMATION, get_voice_assistant
+from llm import TerminalPrinter
 
-try:
-    from automation import execute_action
-    AUTOMATION_AVAILABLE = True
-except ImportError:
-    AUTOMATION_AVAILABLE = False
+if not AUTOMATION_AVAILABLE:
     print("[AVISO] Modulo de automação nao disponivel")
 
-# Configure Google Generative AI (Gemini)
-if GOOGLE_API_KEY:
-    genai.configure(api_key=GOOGLE_API_KEY)
-
-conversation_history = []
+engine = get_engine()
 
 def print_banner():
     banner = f"""
@@ -77,180 +68,13 @@ def print_help():
   
 {Fore.GREEN}[Outros]{Style.RESET_ALL}
   - "ajuda" - mostrar esta mensagem
+  - "estatisticas" - tempo de cada etapa dos pedidos (p50/p95/p99)
   - "sair" / "exit" / "quit" - encerrar o assistente
   
 {Fore.CYAN}Voce tambem pode conversar normalmente comigo!{Style.RESET_ALL}
 """
     print(help_text)
 
-def detect_command(user_input):
-    text = user_input.lower().strip()
-    
-    if any(word in text for word in ["sair", "exit", "quit", "tchau", "adeus", "fechar"]):
-        return ("exit", None)
-    
-    if text in ["ajuda", "help", "comandos"]:
-        return ("help", None)
-    
-    if "modo voz" in text:
-        return ("voice_mode", None)
-    
-    if "modo texto" in text:
-        return ("text_mode", None)
-    
-    # Detecta "abrir [app]" e checa se está na lista de apps
-    from commands import SAFE_APPS, WINDOWS_APPS
-    abrir_match = re.match(r"(?:abrir|abre|abra)\s+(.+)", text)
-    if abrir_match:
-        app_name = abrir_match.group(1).strip()
-        # Verifica se é um app conhecido
-        if app_name.lower() in WINDOWS_APPS or app_name.lower() in SAFE_APPS:
-            return ("open", app_name)
-    
-    patterns = [
-        # Automação: abrir e fazer ação
-        (r"abr(?:ir|a)\s+(?:o\s+)?youtube\s+e\s+(?:pesquis|busc)([ae]r?\s+.+)", "youtube_search"),
-        (r"abr(?:ir|a)\s+(?:o\s+)?google\s+e\s+(?:pesquis|busc)([ae]r?\s+.+)", "google_search"),
-        
-        # Detecta "abrir [app]" - prioridade para apps
-        (r"(?:abrir|abre|abra|open)\s+(?:o\s+)?(?:aplicativo\s+)?(.+)", "open"),
-        (r"pesquisar?\s+(.+?)\s+(?:no\s+)?youtube", "search_youtube"),
-        (r"pesquisar?\s+(.+?)\s+(?:no\s+)?google", "search_google"),
-        (r"pesquisar?\s+(.+)", "search_google"),
-        (r"(?:buscar?|procurar?)\s+(.+?)\s+(?:no\s+)?youtube", "search_youtube"),
-        (r"(?:buscar?|procurar?)\s+(.+)", "search_google"),
-        (r"(?:que\s+)?hora[s]?\s+(?:são|é|sao)", "time"),
-        (r"(?:que\s+)?dia\s+(?:é|e)\s+hoje", "date"),
-        (r"(?:data|hoje)", "date"),
-        (r"(?:info|informaç(?:ão|ões)|sistema)", "system_info"),
-        (r"volume\s+(\d+)", "volume"),
-    ]
-    
-    for pattern, cmd_type in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            arg = match.group(1) if match.lastindex else None
-            return (cmd_type, arg)
-    
-    return (None, None)
-
-def handle_command(cmd_type, arg):
-    if cmd_type == "youtube_search":
-        # Automação: abre YouTube e pesquisa
-        if AUTOMATION_AVAILABLE:
-            import automation
-            # Extrai o termo de busca
-            search_term = arg.replace("pesquisar ", "").replace("pesquisa ", "").replace("buscar ", "").replace("busca ", "").strip()
-            automation.search_youtube(search_term)
-            return f"Abrindo YouTube e pesquisando por '{search_term}'..."
-        else:
-            return execute_command("search_youtube", arg)
-    
-    elif cmd_type == "google_search":
-        # Automação: abre Google e pesquisa
-        if AUTOMATION_AVAILABLE:
-            import automation
-            search_term = arg.replace("pesquisar ", "").replace("pesquisa ", "").replace("buscar ", "").replace("busca ", "").strip()
-            automation.search_google(search_term)
-            return f"Abrindo Google e pesquisando por '{search_term}'..."
-        else:
-            return execute_command("search_google", arg)
-    
-    elif cmd_type == "open":
-        from commands import SAFE_APPS, WINDOWS_APPS
-        arg_lower = arg.lower() if arg else ""
-        
-        # Prioriza apps do Windows
-        if arg_lower in WINDOWS_APPS:
-            return execute_command("open_app", arg)
-        # Depois tenta sites conhecidos
-        elif arg_lower in SAFE_APPS:
-            return execute_command("open_website", arg)
-        # Tenta como app genérico
-        else:
-            result = execute_command("open_app", arg)
-            # Se falhar como app, tenta como site
-            if "Não encontrei" in result or "Erro" in result:
-                result = execute_command("open_website", arg)
-            return result
-    
-    elif cmd_type == "search_google":
-        return execute_command("search_google", arg)
-    
-    elif cmd_type == "search_youtube":
-        return execute_command("search_youtube", arg)
-    
-    elif cmd_type == "time":
-        return execute_command("get_time", None)
-    
-    elif cmd_type == "date":
-        return execute_command("get_date", None)
-    
-    elif cmd_type == "system_info":
-        return execute_command("get_system_info", None)
-    
-    elif cmd_type == "volume":
-        return execute_command("set_volume", arg)
-    
-    return None
-
-def chat_with_ai(user_message):
-    """Envia mensagem para a IA e recebe resposta inteligente"""
-    if is_dangerous_command(user_message):
-        return "Desculpe, nao posso ajudar com esse tipo de solicitacao por questoes de seguranca. Posso ajudar com outra coisa?"
-    
-    # Adiciona contexto de hora/dia se a pergunta é sobre isso
-    context_msg = user_message
-    if any(word in user_message.lower() for word in ["hora", "hoje", "data", "dia"]):
-        from commands import get_time, get_date
-        context_msg = f"{user_message} [Agora: {get_time()} - {get_date()}]"
-    
-    conversation_history.append({
-        "role": "user",
-        "parts": [context_msg]
-    })
-    
-    # Mantém histórico limitado para não ficar muito grande
-    if len(conversation_history) > 20:
-        conversation_history.pop(0)
-        conversation_history.pop(0)
-    
-    try:
-        model = genai.GenerativeModel(
-            model_name="gemini-1.5-flash",
-            system_instruction=SYSTEM_PROMPT
-        )
-        
-        response = model.generate_content(
-            contents=conversation_history,
-            generation_config=genai.types.GenerationConfig(
-                max_output_tokens=1000,
-                temperature=0.9,
-                top_p=0.95,
-                top_k=64
-            )
-        )
-        
-        assistant_message = response.text.strip()
-        
-        conversation_history.append({
-            "role": "model",
-            "parts": [assistant_message]
-        })
-        
-        return assistant_message
-        
-    except Exception as e:
-        error_msg = str(e)
-        if "api_key" in error_msg.lower() or "authentication" in error_msg.lower():
-            return "[Erro] Erro de autenticacao com a API. Verifique sua chave GOOGLE_API_KEY."
-        elif "quota" in error_msg.lower() or "429" in error_msg:
-            return "[Erro] Limite de uso da API Gemini excedido. Aguarde alguns minutos ou verifique seu plano de uso em https://ai.google.dev/dashboard"
-        elif "rate" in error_msg.lower():
-            return "[Erro] Muitas requisicoes. Aguarde um pouco antes de fazer outra pergunta."
-        print(f"[DEBUG] Erro na IA: {error_msg}")
-        return f"Ops, tive um problema para processar sua mensagem. Tente novamente!"
-
 def main():
     print_banner()
     
@@ -262,11 +86,16 @@ def main():
         print(f"\nOu adicione permanentemente nas variaveis de ambiente do sistema.")
         sys.exit(1)
     
+    engine.start()
+    for line in engine.startup_lines():
+        print(f"{Fore.CYAN}{line}{Style.RESET_ALL}")
+    
     voice_assistant = get_voice_assistant()
     voice_mode = False
     
-    if voice_assistant.is_voice_available():
-        print(f"\n{Fore.GREEN}[OK] Microfone detectado! Use 'modo voz' para ativar entrada por voz.{Style.RESET_ALL}")
+    # O microfone só é aberto ao ativar o modo voz
+    if voice_assistant.is_voice_installed():
+        print(f"\n{Fore.GREEN}[OK] Reconhecimento de voz disponivel! Use 'modo voz' para ativar entrada por voz.{Style.RESET_ALL}")
     else:
         print(f"\n{Fore.YELLOW}[Aviso] Microfone nao disponivel. Usando apenas modo texto.{Style.RESET_ALL}")
     
@@ -278,7 +107,10 @@ def main():
     while True:
         try:
             if voice_mode and voice_assistant.is_voice_available():
-                user_input = voice_assistant.listen()
+                # Não ouve a própria voz: espera a fala pendente terminar e
+                # descarta o que o microfone captou enquanto isso
+                voice_assistant.wait_idle()
+                user_input = voice_assistant.listen(flush=True)
                 if not user_input:
                     continue
                 
@@ -288,51 +120,81 @@ def main():
                 
                 user_input = text_lower.replace("o nerd", "").replace(WAKE_WORD, "").strip()
                 if not user_input:
-                    voice_assistant.speak("Sim? Como posso ajudar?")
+                    voice_assistant.speak("Sim? Como posso ajudar?", priority=PRIORITY_CONFIRMATION)
                     continue
+                engine.begin_turn("voice", **voice_assistant.last_listen)
             else:
                 user_input = input(f"{Fore.GREEN}Voce: {Style.RESET_ALL}").strip()
             
             if not user_input:
                 continue
             
-            cmd_type, arg = detect_command(user_input)
+            started = time.perf_counter()
+            cmd_type, arg = engine.route(user_input)
             
             if cmd_type == "exit":
-                voice_assistant.speak("Ate mais! Foi um prazer ajudar voce.")
+                voice_assistant.speak("Ate mais! Foi um prazer ajudar voce.", priority=PRIORITY_CONFIRMATION)
+                for line in engine.stats_lines():
+                    print(f"{Fore.CYAN}{line}{Style.RESET_ALL}")
+                print(f"{Fore.CYAN}[Stats] {voice_assistant.format_speech_stats()}{Style.RESET_ALL}")
+                voice_assistant.wait_idle()
                 break
             
             elif cmd_type == "help":
                 print_help()
                 continue
             
+            elif cmd_type == "stats":
+                print(f"{Fore.CYAN}{engine.telemetry.format_summary()}{Style.RESET_ALL}\n")
+                continue
+            
             elif cmd_type == "voice_mode":
                 if voice_assistant.is_voice_available():
+                    # Calibra enquanto fala a confirmação
+                    voice_assistant.calibrate_in_background()
                     voice_mode = True
-                    voice_assistant.speak("Modo de voz ativado! Agora estou ouvindo voce.")
+                    voice_assistant.speak("Modo de voz ativado! Agora estou ouvindo voce.",
+                                          priority=PRIORITY_CONFIRMATION)
                 else:
                     print(f"{Fore.YELLOW}[Aviso] Microfone nao disponivel.{Style.RESET_ALL}")
                 continue
             
             elif cmd_type == "text_mode":
                 voice_mode = False
-                voice_assistant.speak("Modo texto ativado.")
+                voice_assistant.speak("Modo texto ativado.", priority=PRIORITY_CONFIRMATION)
                 continue
             
             elif cmd_type:
-                result = handle_command(cmd_type, arg)
+                result = engine.run_command(cmd_type, arg)
                 if result:
-                    voice_assistant.speak(result)
+                    voice_assistant.speak(result, priority=PRIORITY_CONFIRMATION)
                     print(f"{Fore.CYAN}{ASSISTANT_NAME}: {Style.RESET_ALL}{result}\n")
+                    # O pedido fecha quando a fala terminar, sem travar o loop
+                    engine.end_turn(after=voice_assistant.when_idle())
                     continue
             
             # Se nao foi comando especifico, responde como IA
-            response = chat_with_ai(user_input)
-            voice_assistant.speak(response)
-            print(f"{Fore.CYAN}{ASSISTANT_NAME}: {Style.RESET_ALL}{response}\n")
+            printer = TerminalPrinter(f"{Fore.CYAN}{ASSISTANT_NAME}: {Style.RESET_ALL}") if LLM_STREAMING else None
+            mode = "voice" if voice_mode else "text"
+            if printer and SPEECH_STREAMING and voice_assistant.is_tts_available():
+                # Fala cada frase assim que ela fica pronta
+                response = voice_assistant.speak_stream(
+                    lambda on_chunk: engine.chat(user_input, on_chunk=on_chunk, mode=mode),
+                    on_chunk=printer, started=started,
+                )
+                printer.finish()
+            else:
+                response = engine.chat(user_input, on_chunk=printer, mode=mode)
+                if printer:
+                    printer.finish()
+                voice_assistant.speak(response)
+            if not (printer and printer.shown(response)):
+                print(f"{Fore.CYAN}{ASSISTANT_NAME}: {Style.RESET_ALL}{response}\n")
+            engine.end_turn(after=voice_assistant.when_idle())
             
         except KeyboardInterrupt:
             print(f"\n\n{Fore.CYAN}Interrompido pelo usuario. Ate mais!{Style.RESET_ALL}")
+            voice_assistant.stop()
             break
         except Exception as e:
             print(f"\n{Fore.RED}[Erro] {e}{Style.RESET_ALL}")
@@ -0,0 +1,261 @@
+"""
+O Nerd - Cache de Frases Faladas
+================================
+
+Boa parte do que o O Nerd fala são frases fixas ou quase fixas ("Sim?
+Como posso ajudar?", "Abrindo Discord...", "Modo texto ativado.").
+Em vez de sintetizar cada uma de novo, o TTS grava a frase em WAV uma
+vez (pyttsx3 save_to_file) e as próximas falas só tocam o arquivo.
+
+A chave junta o texto, a voz, a velocidade e o volume: mudar a voz em
+config.py gera arquivos novos. Acima dos limites, os arquivos tocados
+há mais tempo saem primeiro (LRU pela data de modificação, atualizada
+a cada uso).
+
+Tocar o WAV usa o winsound (Windows); sem ele o cache fica desligado e
+tudo é sintetizado como antes.
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import winsound
+    PLAYBACK_AVAILABLE = True
+except ImportError:
+    PLAYBACK_AVAILABLE = False
+
+from config import (
+    DATA_DIR,
+    VOICE_RATE, VOICE_VOLUME,
+    PHRASE_CACHE_ENABLED, PHRASE_CACHE_MAX_FILES, PHRASE_CACHE_MAX_BYTES,
+    PHRASE_CACHE_MAX_CHARS,
+)
+
+PHRASE_DIR = DATA_DIR / "phrases"
+
+# Números (horas, datas, volume) mudam a cada vez: não vale gravar
+_NUMBER = re.compile(r"\d")
+
+
+def is_cacheable_phrase(text: str, max_chars: int = PHRASE_CACHE_MAX_CHARS) -> bool:
+    """Verifica se vale gravar a frase: curta e sem números."""
+    text = text.strip()
+    return bool(text) and len(text) <= max_chars and not _NUMBER.search(text)
+
+
+class PhraseCache:
+    """
+    Frases gravadas em WAV em uma pasta, com limite de arquivos e bytes.
+
+    A gravação usa o motor do pyttsx3 e precisa rodar na thread da fala;
+    consultas e estatísticas podem vir de qualquer thread.
+    """
+
+    def __init__(self, folder: Path = PHRASE_DIR,
+                 max_files: int = PHRASE_CACHE_MAX_FILES,
+                 max_bytes: int = PHRASE_CACHE_MAX_BYTES,
+                 rate: int = VOICE_RATE, volume: float = VOICE_VOLUME,
+                 enabled: bool = PHRASE_CACHE_ENABLED and PLAYBACK_AVAILABLE):
+        """
+        Args:
+            folder: Pasta dos arquivos WAV
+            max_files: Número máximo de frases gravadas
+            max_bytes: Tamanho máximo somado dos arquivos
+            rate: Velocidade da voz (entra na chave)
+            volume: Volume da voz (entra na chave)
+            enabled: False desativa consulta e gravação
+        """
+        self.folder = Path(folder)
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.rate = rate
+        self.volume = volume
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.rendered = 0
+        self._lock = threading.Lock()
+        # Nome do arquivo -> (último uso, bytes); lido da pasta no primeiro uso
+        self._index: Optional[Dict[str, Tuple[float, int]]] = None
+
+    def make_key(self, text: str, voice: str) -> str:
+        """
+        Calcula a chave de uma frase.
+
+        Args:
+            text: Frase falada
+            voice: Id da voz do TTS ("" = voz padrão)
+
+        Returns:
+            Chave (hash), usada como nome do arquivo
+        """
+        material = json.dumps([" ".join(text.split()), voice, self.rate, self.volume],
+                              ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()[:32]
+
+    def path_for(self, text: str, voice: str) -> Path:
+        """Arquivo WAV de uma frase (exista ou não)."""
+        return self.folder / f"{self.make_key(text, voice)}.wav"
+
+    def contains(self, text: str, voice: str) -> bool:
+        """Verifica se a frase já está gravada, sem contar acerto nem falta."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            return self.path_for(text, voice).name in self._load_index()
+
+    def lookup(self, text: str, voice: str) -> Optional[Path]:
+        """
+        Procura a gravação de uma frase e marca o uso.
+
+        Args:
+            text: Frase falada
+            voice: Id da voz do TTS
+
+        Returns:
+            Arquivo WAV, ou None (não gravada ou cache desligado)
+        """
+        if not self.enabled:
+            return None
+        path = self.path_for(text, voice)
+        with self._lock:
+            index = self._load_index()
+            if path.name not in index:
+                self.misses += 1
+                return None
+            try:
+                os.utime(path)
+                index[path.name] = (path.stat().st_mtime, index[path.name][1])
+            except OSError:
+                # Apagado por fora: grava de novo na próxima vez
+                del index[path.name]
+                self.misses += 1
+                return None
+            self.hits += 1
+            return path
+
+    def render(self, engine: Any, text: str, voice: str) -> Optional[Path]:
+        """
+        Grava uma frase em WAV com o motor do pyttsx3 (na thread da fala).
+
+        Args:
+            engine: Motor do pyttsx3 já configurado com a voz
+            text: Frase a gravar
+            voice: Id da voz configurada no motor
+
+        Returns:
+            Arquivo WAV gravado, ou None se o motor não gerou o arquivo
+        """
+        if not self.enabled:
+            return None
+        path = self.path_for(text, voice)
+        partial = path.with_suffix(".part.wav")
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+        engine.save_to_file(text, str(partial))
+        engine.runAndWait()
+        try:
+            size = partial.stat().st_size
+            if not size:
+                partial.unlink()
+                return None
+            # Troca atômica: quem toca nunca vê um arquivo pela metade
+            os.replace(partial, path)
+        except OSError:
+            return None
+
+        with self._lock:
+            index = self._load_index()
+            index[path.name] = (path.stat().st_mtime, size)
+            self.rendered += 1
+            self._evict(index)
+        return path
+
+    def play(self, path: Path) -> bool:
+        """
+        Toca um WAV gravado e espera terminar.
+
+        Returns:
+            True se tocou; False para sintetizar a frase como antes
+        """
+        if not PLAYBACK_AVAILABLE:
+            return False
+        try:
+            winsound.PlaySound(str(path), winsound.SND_FILENAME | winsound.SND_NODEFAULT)
+        except RuntimeError:
+            return False
+        return True
+
+    def stop(self) -> None:
+        """Para o WAV que está tocando (chamado de outra thread)."""
+        if PLAYBACK_AVAILABLE:
+            try:
+                winsound.PlaySound(None, 0)
+            except RuntimeError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna acertos, faltas e gravações.
+
+        Returns:
+            Dicionário com hits, misses, rendered e hit_ratio
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "rendered": self.rendered,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _load_index(self) -> Dict[str, Tuple[float, int]]:
+        """Lê a pasta no primeiro uso (chamar com o lock)."""
+        if self._index is None:
+            self._index = {}
+            try:
+                entries = list(os.scandir(self.folder))
+            except OSError:
+                entries = []
+            for entry in entries:
+                if entry.name.endswith(".wav") and not entry.name.endswith(".part.wav"):
+                    stat = entry.stat()
+                    self._index[entry.name] = (stat.st_mtime, stat.st_size)
+        return self._index
+
+    def _evict(self, index: Dict[str, Tuple[float, int]]) -> None:
+        """Acima dos limites, apaga os arquivos tocados há mais tempo (chamar com o lock)."""
+        count = len(index)
+        total = sum(size for _, size in index.values())
+        if count <= self.max_files and total <= self.max_bytes:
+            return
+
+        for name, (_, size) in sorted(index.items(), key=lambda item: item[1][0]):
+            if count <= self.max_files and total <= self.max_bytes:
+                break
+            try:
+                (self.folder / name).unlink()
+            except OSError:
+                pass
+            del index[name]
+            count -= 1
+            total -= size
+
+
+# A pasta só é lida na primeira consulta
+_cache = PhraseCache()
+
+
+def get_phrase_cache() -> PhraseCache:
+    """Retorna o cache de frases compartilhado do processo."""
+    return _cache
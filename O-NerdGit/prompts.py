@@ -0,0 +1,89 @@
+"""
+O Nerd - Prompts de Sistema
+===========================
+
+Escolhe o prompt de sistema de cada modo e mede o seu custo em tokens.
+
+O prompt vai junto com todos os pedidos à IA, então cada token dele se
+repete em toda pergunta. No modo de voz vale a versão curta
+(SYSTEM_PROMPT_VOICE), já que a resposta é falada. No modo texto, o
+prompt completo perde as linhas e os símbolos decorativos, que custam
+vários tokens cada e não mudam o comportamento do modelo.
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import re
+from typing import Dict
+
+from config import SYSTEM_PROMPT, SYSTEM_PROMPT_VOICE, PROMPT_COMPACT
+from history import estimate_tokens
+
+# Emojis, setas, símbolos e linhas de caixa (═══)
+DECORATION = re.compile(
+    "[\U0001F000-\U0001FAFF\u2190-\u21FF\u2500-\u27BF\u2B00-\u2BFF\uFE0F\u200D]+"
+)
+
+# Marcas de lista que viram "- "
+BULLET = re.compile(r"^\s*[•✓✗✔✘]\s*")
+
+MODES = ("text", "voice")
+
+
+def compact_prompt(text: str) -> str:
+    """
+    Remove a decoração de um prompt, mantendo o texto.
+
+    Args:
+        text: Prompt original
+
+    Returns:
+        Prompt sem símbolos decorativos, linhas vazias repetidas ou
+        espaços sobrando
+    """
+    lines = []
+    for line in text.splitlines():
+        compact = " ".join(DECORATION.sub("", BULLET.sub("- ", line)).split())
+        if compact or (line.strip() == "" and lines and lines[-1]):
+            # Linhas só de decoração somem; as vazias separam as seções
+            lines.append(compact)
+    return "\n".join(lines).strip()
+
+
+_prompts: Dict[str, str] = {
+    "text": compact_prompt(SYSTEM_PROMPT) if PROMPT_COMPACT else SYSTEM_PROMPT,
+    "voice": SYSTEM_PROMPT_VOICE,
+}
+
+
+def get_system_prompt(mode: str = "text") -> str:
+    """
+    Retorna o prompt de sistema de um modo.
+
+    Args:
+        mode: "text" ou "voice"
+
+    Returns:
+        Prompt usado nos pedidos desse modo
+    """
+    return _prompts.get(mode, _prompts["text"])
+
+
+def measure_prompts() -> Dict[str, int]:
+    """
+    Estima os tokens de cada prompt, sem chamar a API.
+
+    Returns:
+        "original" (SYSTEM_PROMPT sem alterações) e cada modo -> tokens
+    """
+    sizes = {"original": estimate_tokens(SYSTEM_PROMPT)}
+    sizes.update((mode, estimate_tokens(get_system_prompt(mode))) for mode in MODES)
+    return sizes
+
+
+def format_prompt_stats() -> str:
+    """Resumo legível de measure_prompts(), para exibir na inicialização."""
+    sizes = measure_prompts()
+    return (f"prompt de sistema: texto ~{sizes['text']} tokens, voz ~{sizes['voice']} "
+            f"(original ~{sizes['original']})")
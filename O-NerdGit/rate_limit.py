@@ -0,0 +1,233 @@
+"""
+O Nerd - Limite de Requisições e Novas Tentativas
+=================================================
+
+Mantém as chamadas à IA dentro dos limites da chave (requisições e
+tokens por minuto) e repete, com espera crescente, as que falharem por
+excesso de uso ou instabilidade do serviço.
+
+Os limites usam baldes de fichas (token bucket) compartilhados por todas
+as threads do processo. Quando a API responde 429, o pedido de espera
+dela ("retry in 12s") vale para todos: ninguém volta a chamar antes, o
+que evita a avalanche de requisições quando a janela de cota reabre.
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import random
+import re
+import threading
+import time
+from typing import Callable, Optional, TypeVar
+
+from google.api_core import exceptions as api_exceptions
+
+from config import (
+    GEMINI_RPM, GEMINI_TPM,
+    LLM_MAX_RETRIES, LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY,
+)
+
+T = TypeVar("T")
+
+# Erros que valem nova tentativa: cota/limite (429) e falhas do servidor
+RETRYABLE_ERRORS = (
+    api_exceptions.TooManyRequests,
+    api_exceptions.InternalServerError,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.DeadlineExceeded,
+)
+
+# "Please retry in 12.5s" / "retry_delay { seconds: 12 }"
+RETRY_HINT_PATTERNS = (
+    re.compile(r"retry in (\d+(?:\.\d+)?)\s*s", re.IGNORECASE),
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)"),
+    re.compile(r"retry-after:?\s*(\d+(?:\.\d+)?)", re.IGNORECASE),
+)
+
+
+class TokenBucket:
+    """
+    Balde de fichas: enche a uma taxa constante até a capacidade.
+
+    Cada requisição retira fichas; sem fichas suficientes, espera o
+    tempo exato até o balde encher o bastante.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        """
+        Args:
+            per_minute: Fichas repostas por minuto
+            capacity: Máximo acumulado (padrão: um minuto de fichas)
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """
+        Retira fichas, mesmo que o saldo fique negativo.
+
+        Args:
+            amount: Fichas a retirar (limitado à capacidade)
+            now: Instante atual (time.monotonic)
+
+        Returns:
+            Segundos a esperar até as fichas retiradas existirem
+        """
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= min(amount, self.capacity)
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+
+class RateLimiter:
+    """
+    Limites de requisições e tokens por minuto, seguros entre threads.
+
+    Reservas são feitas em ordem de chegada: cada chamada sai do lock já
+    sabendo quanto esperar, e as esperas não se sobrepõem.
+    """
+
+    def __init__(self, requests_per_minute: float = GEMINI_RPM,
+                 tokens_per_minute: float = GEMINI_TPM):
+        """
+        Args:
+            requests_per_minute: Limite de requisições da chave
+            tokens_per_minute: Limite de tokens (entrada) da chave
+        """
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self.waits = 0
+        self.waited_seconds = 0.0
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Espera até a requisição caber nos limites.
+
+        Args:
+            tokens: Tokens estimados da requisição
+
+        Returns:
+            Segundos esperados
+        """
+        with self._lock:
+            now = time.monotonic()
+            delay = max(
+                self._requests.reserve(1, now),
+                self._tokens.reserve(tokens, now),
+                self._paused_until - now,
+            )
+            if delay > 0:
+                self.waits += 1
+                self.waited_seconds += delay
+
+        if delay > 0:
+            time.sleep(delay)
+        return max(delay, 0.0)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Suspende todas as chamadas por um tempo (pedido de espera da API).
+
+        Args:
+            seconds: Duração da pausa
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def retry_hint(error: Exception) -> Optional[float]:
+    """
+    Lê o tempo de espera sugerido pela API em um erro, se houver.
+
+    Args:
+        error: Exceção da chamada
+
+    Returns:
+        Segundos sugeridos ou None
+    """
+    for detail in getattr(error, "details", None) or ():
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None and hasattr(delay, "seconds"):
+            return delay.seconds + getattr(delay, "nanos", 0) / 1e9
+
+    text = str(error)
+    for pattern in RETRY_HINT_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def backoff_delay(attempt: int, base: float = LLM_RETRY_BASE_DELAY,
+                  maximum: float = LLM_RETRY_MAX_DELAY) -> float:
+    """
+    Espera exponencial com jitter completo ("full jitter").
+
+    Args:
+        attempt: Número da nova tentativa (0 = primeira)
+        base: Espera base em segundos
+        maximum: Teto da espera
+
+    Returns:
+        Segundos a esperar, sorteados entre 0 e base * 2^attempt
+    """
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+
+def call_with_retry(func: Callable[[], T], limiter: Optional[RateLimiter] = None,
+                    tokens: int = 0, retries: int = LLM_MAX_RETRIES,
+                    can_retry: Callable[[], bool] = lambda: True) -> T:
+    """
+    Chama func respeitando os limites e repetindo erros temporários.
+
+    Args:
+        func: Chamada à API
+        limiter: Limites compartilhados (None para não limitar)
+        tokens: Tokens estimados da requisição
+        retries: Máximo de novas tentativas
+        can_retry: Retorna False quando repetir não é mais seguro
+            (ex.: parte de uma resposta em streaming já foi exibida)
+
+    Returns:
+        O resultado de func
+
+    Raises:
+        Exception: O último erro, se não for temporário ou acabarem as tentativas
+    """
+    attempt = 0
+    while True:
+        if limiter:
+            limiter.acquire(tokens)
+        try:
+            return func()
+        except RETRYABLE_ERRORS as error:
+            hint = retry_hint(error)
+            # Espera maior que o teto (ex.: cota diária esgotada): desiste
+            if attempt >= retries or not can_retry() or (hint or 0) > LLM_RETRY_MAX_DELAY:
+                if hint and limiter:
+                    limiter.pause(min(hint, LLM_RETRY_MAX_DELAY))
+                raise
+
+            delay = backoff_delay(attempt)
+            if hint is not None:
+                delay = max(delay, hint)
+                if limiter:
+                    # Vale para todas as threads, não só para esta
+                    limiter.pause(hint)
+            time.sleep(delay)
+            attempt += 1
+
+
+_limiter = RateLimiter()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Retorna o limitador compartilhado do processo."""
+    return _limiter
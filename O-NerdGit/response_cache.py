@@ -0,0 +1,265 @@
+"""
+O Nerd - Cache de Respostas da IA
+=================================
+
+Guarda em disco (SQLite) as respostas da IA para perguntas repetidas
+("o que você pode fazer", "conta uma piada nerd"), evitando uma nova
+chamada e o gasto de cota.
+
+A chave junta a pergunta normalizada, uma impressão digital das últimas
+mensagens da conversa e o modelo/configuração usados. Entradas vencem
+após um tempo (TTL) e, acima do limite de tamanho, as menos usadas
+recentemente saem primeiro (LRU). Perguntas com contexto de hora
+("[Agora: ...]") nunca passam pelo cache.
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import (
+    DATA_DIR,
+    RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_HISTORY_MESSAGES,
+)
+from keywords import fold_accents
+
+CACHE_FILE = DATA_DIR / "response_cache.db"
+
+# Marcador que chat_with_ai acrescenta a perguntas sobre hora e data
+TIME_CONTEXT_MARKER = "[Agora:"
+
+# Desativa o cache só nesta sessão: ONERD_NO_CACHE=1 python o_nerd.py
+DISABLE_ENV_VAR = "ONERD_NO_CACHE"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    prompt TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    size INTEGER NOT NULL
+)
+"""
+
+
+def normalize_prompt(text: str) -> str:
+    """Minúsculas, sem acentos, espaços simples e sem pontuação final."""
+    return " ".join(fold_accents(text.lower()).split()).rstrip(" ?!.")
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    """Junta as partes de texto de uma mensagem do histórico."""
+    return " ".join(str(part) for part in message.get("parts", ()))
+
+
+class ResponseCache:
+    """
+    Cache persistente de respostas, com TTL e limite de tamanho.
+
+    Seguro para uso entre threads (a fala em streaming gera a resposta
+    fora da thread principal).
+    """
+
+    def __init__(self, path: Path = CACHE_FILE, ttl: float = RESPONSE_CACHE_TTL,
+                 max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+                 max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+                 history_messages: int = RESPONSE_CACHE_HISTORY_MESSAGES,
+                 enabled: bool = RESPONSE_CACHE_ENABLED):
+        """
+        Args:
+            path: Arquivo SQLite
+            ttl: Validade de uma resposta, em segundos
+            max_entries: Número máximo de respostas guardadas
+            max_bytes: Tamanho máximo somado das respostas
+            history_messages: Mensagens anteriores que entram na chave
+            enabled: False desativa leitura e escrita
+        """
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.history_messages = history_messages
+        self.enabled = enabled and not os.environ.get(DISABLE_ENV_VAR)
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def make_key(self, contents: List[Dict[str, Any]], namespace: str) -> Optional[str]:
+        """
+        Calcula a chave de uma conversa, ou None se ela não pode ir ao cache.
+
+        Args:
+            contents: Histórico terminando na pergunta do usuário
+            namespace: Modelo, system prompt e configuração de geração
+
+        Returns:
+            Chave (hash) ou None para perguntas sensíveis ao horário
+        """
+        if not contents or contents[-1].get("role") != "user":
+            return None
+        prompt = _message_text(contents[-1])
+        if TIME_CONTEXT_MARKER in prompt:
+            return None
+
+        start = max(0, len(contents) - 1 - self.history_messages)
+        history = [
+            (message.get("role"), normalize_prompt(_message_text(message)))
+            for message in contents[start:-1]
+        ]
+        material = json.dumps(
+            [namespace, history, normalize_prompt(prompt)], ensure_ascii=False,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, contents: List[Dict[str, Any]], namespace: str) -> Optional[str]:
+        """
+        Procura a resposta de uma conversa.
+
+        Args:
+            contents: Histórico terminando na pergunta do usuário
+            namespace: Modelo, system prompt e configuração de geração
+
+        Returns:
+            Resposta guardada ou None (ausente, vencida ou cache desligado)
+        """
+        if not self.enabled:
+            return None
+        key = self.make_key(contents, namespace)
+        if key is None:
+            with self._lock:
+                self.bypassed += 1
+            return None
+
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,),
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    connection.commit()
+                self.misses += 1
+                return None
+
+            connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            connection.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, contents: List[Dict[str, Any]], namespace: str, response: str) -> None:
+        """
+        Guarda a resposta de uma conversa e aplica os limites.
+
+        Args:
+            contents: Histórico terminando na pergunta do usuário
+            namespace: Modelo, system prompt e configuração de geração
+            response: Resposta da IA
+        """
+        if not self.enabled or not response:
+            return
+        key = self.make_key(contents, namespace)
+        if key is None:
+            return
+
+        now = time.time()
+        prompt = _message_text(contents[-1])
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, prompt, response, now, now, len(response.encode("utf-8"))),
+            )
+            self._evict(connection, now)
+            connection.commit()
+
+    def clear(self) -> None:
+        """Apaga todas as respostas guardadas."""
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM responses")
+            connection.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna acertos, faltas, desvios e a taxa de acerto.
+
+        Returns:
+            Dicionário com hits, misses, bypassed e hit_ratio
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre o banco na primeira utilização (chamar com o lock)."""
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+            # WAL sem fsync a cada commit: perder as últimas entradas numa
+            # queda de energia não faz mal a um cache
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(SCHEMA)
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)"
+            )
+        return self._connection
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> None:
+        """Remove entradas vencidas e, acima dos limites, as menos usadas."""
+        connection.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+
+        count, total = connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        removed_count = removed_bytes = 0
+        rows = connection.execute("SELECT key, size FROM responses ORDER BY last_used")
+        stale = []
+        for key, size in rows:
+            if count - removed_count <= self.max_entries and total - removed_bytes <= self.max_bytes:
+                break
+            stale.append((key,))
+            removed_count += 1
+            removed_bytes += size
+        connection.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+
+# O banco só é aberto na primeira consulta
+_cache = ResponseCache()
+
+
+def get_response_cache() -> ResponseCache:
+    """Retorna o cache compartilhado do processo."""
+    return _cache
+
+
+def format_cache_stats() -> str:
+    """Resumo legível de get_stats(), para exibir ao encerrar."""
+    cache = get_response_cache()
+    if not cache.enabled:
+        return "cache de respostas desativado nesta sessão"
+    stats = cache.get_stats()
+    return (f"cache de respostas: {stats['hits']} acertos, {stats['misses']} faltas "
+            f"({stats['hit_ratio']:.0%}), {stats['bypassed']} perguntas com horário fora do cache")
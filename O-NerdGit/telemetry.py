@@ -0,0 +1,444 @@
+"""
+O Nerd - Telemetria dos Pedidos
+===============================
+
+Mede para onde vai o tempo de cada pedido: ouvir, achar a palavra de
+ativação, reconhecer a fala, decidir o comando, esperar a IA (primeiro
+pedaço e total), executar o comando e falar a resposta. Cada pedido
+vira uma linha em DATA_DIR/telemetry.jsonl, com as etapas em
+milissegundos, os tokens informados pela API, os acertos de cache e os
+erros.
+
+O arquivo é rotativo: acima de TELEMETRY_MAX_BYTES ele é renomeado e
+recomeça, guardando só os últimos TELEMETRY_BACKUPS arquivos. Com
+TELEMETRY_PROMETHEUS, o resumo também fica em DATA_DIR/telemetry.prom,
+no formato texto do Prometheus.
+
+O assistente atende um pedido por vez, então as peças (llm.py, voice.py)
+registram no pedido ativo pelas funções record(), count() e error(),
+sem precisar recebê-lo como argumento.
+
+Resumo com p50/p95/p99 de cada etapa: comando "stats" nas interfaces ou
+python telemetry.py
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+from config import (
+    DATA_DIR,
+    TELEMETRY_ENABLED, TELEMETRY_MAX_BYTES, TELEMETRY_BACKUPS, TELEMETRY_PROMETHEUS,
+)
+
+TELEMETRY_FILE = DATA_DIR / "telemetry.jsonl"
+PROMETHEUS_FILE = DATA_DIR / "telemetry.prom"
+
+# Etapas de um pedido, na ordem em que acontecem
+STAGES = ("listen", "wake_word", "recognize", "detect", "command", "llm_ttft", "llm_total",
+          "speak", "total")
+
+# Contadores de um pedido
+COUNTERS = ("input_tokens", "output_tokens", "cache_hits", "coalesced", "offline")
+
+QUANTILES = (0.50, 0.95, 0.99)
+
+# Amostras recentes de cada etapa usadas no arquivo do Prometheus
+PROMETHEUS_WINDOW = 1000
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Percentil por posição em uma lista já ordenada."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class TurnTrace:
+    """
+    Medições de um pedido, do início até a resposta entregue.
+
+    Etapas repetidas (ex.: várias frases faladas) são somadas.
+    """
+
+    def __init__(self, channel: str, mode: str = "text"):
+        """
+        Args:
+            channel: Interface que atendeu o pedido
+            mode: "text" ou "voice"
+        """
+        self.channel = channel
+        self.mode = mode
+        self.kind: Optional[str] = None
+        self.command: Optional[str] = None
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.errors: List[str] = []
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Soma a duração de uma etapa (segundos)."""
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Soma a um contador (tokens, acertos de cache...)."""
+        if amount:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def error(self, name: str) -> None:
+        """Registra um erro (nome da exceção)."""
+        self.errors.append(name)
+
+    def to_record(self, cancelled: bool = False) -> Dict[str, Any]:
+        """
+        Linha do arquivo de telemetria.
+
+        Args:
+            cancelled: O pedido foi interrompido por outro
+
+        Returns:
+            Dicionário serializável, com as etapas em milissegundos
+        """
+        record: Dict[str, Any] = {
+            "time": round(self.started, 3), "channel": self.channel, "mode": self.mode,
+            "kind": self.kind, "stages": {
+                stage: round(self.stages[stage] * 1000, 2)
+                for stage in STAGES if stage in self.stages
+            },
+        }
+        if self.command:
+            record["command"] = self.command
+        record.update(self.counters)
+        if self.errors:
+            record["errors"] = self.errors
+        if cancelled:
+            record["cancelled"] = True
+        return record
+
+
+class Telemetry:
+    """
+    Registro dos pedidos em um arquivo JSONL rotativo.
+
+    Seguro entre threads: o pedido ativo e a gravação ficam sob um lock.
+    """
+
+    def __init__(self, path: Path = TELEMETRY_FILE, enabled: bool = TELEMETRY_ENABLED,
+                 max_bytes: int = TELEMETRY_MAX_BYTES, backups: int = TELEMETRY_BACKUPS,
+                 prometheus_path: Optional[Path] = PROMETHEUS_FILE if TELEMETRY_PROMETHEUS else None):
+        """
+        Args:
+            path: Arquivo JSONL
+            enabled: False não mede nem grava nada
+            max_bytes: Tamanho que dispara a rotação
+            backups: Arquivos antigos guardados (path.1, path.2, ...)
+            prometheus_path: Arquivo do Prometheus (None para não gerar)
+        """
+        self.path = Path(path)
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.prometheus_path = prometheus_path
+        self.turns = 0
+        self._active: Optional[TurnTrace] = None
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {
+            stage: deque(maxlen=PROMETHEUS_WINDOW) for stage in STAGES
+        }
+        self._totals: Dict[str, int] = {name: 0 for name in COUNTERS}
+        self._totals.update(turns=0, errors=0, cancelled=0)
+
+    # ------------------------------------------------------------------
+    # Pedido ativo
+    # ------------------------------------------------------------------
+
+    def begin(self, channel: str, mode: str = "text", **stages: float) -> Optional[TurnTrace]:
+        """
+        Começa um pedido; o anterior, se não terminou, é descartado.
+
+        Args:
+            channel: Interface que atende o pedido
+            mode: "text" ou "voice"
+            **stages: Etapas já medidas antes do pedido (ex.: listen=1.2)
+
+        Returns:
+            O pedido ativo, ou None com a telemetria desligada
+        """
+        if not self.enabled:
+            return None
+        trace = TurnTrace(channel, mode)
+        for stage, seconds in stages.items():
+            trace.record(stage, seconds)
+        with self._lock:
+            self._active = trace
+        return trace
+
+    def active(self) -> Optional[TurnTrace]:
+        """Pedido em andamento, ou None."""
+        return self._active
+
+    def record(self, stage: str, seconds: float, trace: Optional[TurnTrace] = None) -> None:
+        """
+        Soma a duração de uma etapa a um pedido (sem pedido, não faz nada).
+
+        Args:
+            stage: Nome da etapa
+            seconds: Duração em segundos
+            trace: Pedido que recebe a etapa (padrão: o ativo); usado por
+                quem termina depois que outro pedido começou (ex.: a fala)
+        """
+        with self._lock:
+            if trace is None:
+                trace = self._active
+            if trace is not None:
+                trace.record(stage, seconds)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Soma a um contador do pedido ativo."""
+        with self._lock:
+            if self._active is not None:
+                self._active.count(name, amount)
+
+    def error(self, name: str) -> None:
+        """Registra um erro no pedido ativo."""
+        with self._lock:
+            if self._active is not None:
+                self._active.error(name)
+
+    def end(self, trace: Optional[TurnTrace] = None, cancelled: bool = False) -> None:
+        """
+        Termina um pedido e grava a sua linha.
+
+        Args:
+            trace: Pedido a terminar (padrão: o ativo)
+            cancelled: O pedido foi interrompido por outro
+        """
+        with self._lock:
+            if trace is None:
+                trace = self._active
+            if trace is None:
+                return
+            if self._active is trace:
+                self._active = None
+            trace.record("total", time.perf_counter() - trace.start)
+            record = trace.to_record(cancelled)
+            self.turns += 1
+            self._add_totals(trace, cancelled)
+            self._write(record)
+            if self.prometheus_path is not None:
+                self._write_prometheus()
+
+    # ------------------------------------------------------------------
+    # Leitura e resumo
+    # ------------------------------------------------------------------
+
+    def files(self) -> List[Path]:
+        """Arquivos de telemetria existentes, do mais antigo ao atual."""
+        candidates = [self._backup(number) for number in range(self.backups, 0, -1)]
+        candidates.append(self.path)
+        return [path for path in candidates if path.exists()]
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Lê todas as linhas guardadas (linhas corrompidas são ignoradas)."""
+        records = []
+        for path in self.files():
+            try:
+                with open(path, encoding="utf-8") as source:
+                    for line in source:
+                        try:
+                            records.append(json.loads(line))
+                        except ValueError:
+                            continue
+            except OSError:
+                continue
+        return records
+
+    def summarize(self, records: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Calcula p50/p95/p99 de cada etapa e os totais.
+
+        Args:
+            records: Linhas a resumir (padrão: todas as guardadas)
+
+        Returns:
+            {"turns", "cancelled", "errors", "stages": {etapa: {"count",
+            "p50", "p95", "p99"}} em ms, "counters": {nome: total}}
+        """
+        if records is None:
+            records = self.load()
+        timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        counters = {name: 0 for name in COUNTERS}
+        errors = cancelled = 0
+        for record in records:
+            for stage, ms in record.get("stages", {}).items():
+                timings.setdefault(stage, []).append(ms)
+            for name in COUNTERS:
+                counters[name] += record.get(name, 0)
+            errors += len(record.get("errors", ()))
+            cancelled += bool(record.get("cancelled"))
+
+        stages = {}
+        for stage, values in timings.items():
+            if not values:
+                continue
+            values.sort()
+            stages[stage] = {"count": len(values)}
+            stages[stage].update(
+                (f"p{int(q * 100)}", percentile(values, q)) for q in QUANTILES
+            )
+        return {"turns": len(records), "cancelled": cancelled, "errors": errors,
+                "stages": stages, "counters": counters}
+
+    def format_summary(self, records: Optional[List[Dict[str, Any]]] = None) -> str:
+        """Tabela legível de summarize(), para o comando "stats"."""
+        summary = self.summarize(records)
+        if not summary["turns"]:
+            return "Nenhum pedido registrado ainda."
+        lines = [f"{summary['turns']} pedidos ({summary['cancelled']} interrompidos, "
+                 f"{summary['errors']} erros)",
+                 f"  {'etapa':<10} {'pedidos':>8} {'p50':>10} {'p95':>10} {'p99':>10}"]
+        for stage, values in summary["stages"].items():
+            lines.append(f"  {stage:<10} {values['count']:>8} {values['p50']:>8.1f}ms "
+                         f"{values['p95']:>8.1f}ms {values['p99']:>8.1f}ms")
+        counters = summary["counters"]
+        lines.append(f"  tokens: {counters['input_tokens']} de entrada, "
+                     f"{counters['output_tokens']} de saída; "
+                     f"{counters['cache_hits']} respostas do cache, "
+                     f"{counters['coalesced']} chamadas agrupadas")
+        return "\n".join(lines)
+
+    def format_prometheus(self) -> str:
+        """
+        Resumo no formato texto do Prometheus, com os pedidos desta sessão.
+
+        Returns:
+            Um summary por etapa (quantis das últimas PROMETHEUS_WINDOW
+            amostras, em segundos) e um counter por contador
+        """
+        lines = ["# HELP onerd_stage_seconds Duração de cada etapa dos pedidos.",
+                 "# TYPE onerd_stage_seconds summary"]
+        for stage in STAGES:
+            values = sorted(self._samples[stage])
+            if not values:
+                continue
+            for q in QUANTILES:
+                lines.append(f'onerd_stage_seconds{{stage="{stage}",quantile="{q}"}} '
+                             f"{percentile(values, q):.6f}")
+            lines.append(f'onerd_stage_seconds_sum{{stage="{stage}"}} {sum(values):.6f}')
+            lines.append(f'onerd_stage_seconds_count{{stage="{stage}"}} {len(values)}')
+        for name, total in self._totals.items():
+            lines.append(f"# TYPE onerd_{name}_total counter")
+            lines.append(f"onerd_{name}_total {total}")
+        return "\n".join(lines) + "\n"
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _backup(self, number: int) -> Path:
+        """Caminho do arquivo antigo número number (path.1, path.2, ...)."""
+        return self.path.with_name(f"{self.path.name}.{number}")
+
+    def _add_totals(self, trace: TurnTrace, cancelled: bool) -> None:
+        """Acumula o pedido nas amostras e totais do Prometheus."""
+        for stage, seconds in trace.stages.items():
+            if stage in self._samples:
+                self._samples[stage].append(seconds)
+        for name, amount in trace.counters.items():
+            if name in self._totals:
+                self._totals[name] += amount
+        self._totals["turns"] += 1
+        self._totals["errors"] += len(trace.errors)
+        self._totals["cancelled"] += cancelled
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        """Acrescenta uma linha ao arquivo, girando os arquivos se preciso."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.path.exists() and self.path.stat().st_size > self.max_bytes:
+                for number in range(self.backups - 1, 0, -1):
+                    if self._backup(number).exists():
+                        self._backup(number).replace(self._backup(number + 1))
+                if self.backups:
+                    self.path.replace(self._backup(1))
+                else:
+                    self.path.unlink()
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError:
+            # A telemetria não derruba a conversa
+            self.enabled = False
+
+    def _write_prometheus(self) -> None:
+        """Regrava o arquivo do Prometheus de uma vez (o coletor nunca lê pela metade)."""
+        temporary = self.prometheus_path.with_name(self.prometheus_path.name + ".tmp")
+        try:
+            temporary.write_text(self.format_prometheus(), encoding="utf-8")
+            os.replace(temporary, self.prometheus_path)
+        except OSError:
+            self.prometheus_path = None
+
+
+_telemetry = Telemetry()
+
+
+def get_telemetry() -> Telemetry:
+    """Retorna a telemetria compartilhada do processo."""
+    return _telemetry
+
+
+def record(stage: str, seconds: float, trace: Optional[TurnTrace] = None) -> None:
+    """Soma a duração de uma etapa ao pedido ativo (ou ao pedido dado)."""
+    _telemetry.record(stage, seconds, trace)
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Soma a um contador do pedido ativo."""
+    _telemetry.count(name, amount)
+
+
+def error(name: str) -> None:
+    """Registra um erro no pedido ativo."""
+    _telemetry.error(name)
+
+
+def main() -> None:
+    """Linha de comando: resumo dos pedidos guardados ou exportação para o Prometheus."""
+    parser = argparse.ArgumentParser(description="Resumo da telemetria dos pedidos do O Nerd")
+    parser.add_argument("--since", type=float, default=None,
+                        help="Só os pedidos das últimas N horas")
+    parser.add_argument("--prometheus", "-p", metavar="ARQUIVO",
+                        help="Grava os pedidos guardados no formato do Prometheus")
+    args = parser.parse_args()
+
+    telemetry = get_telemetry()
+    records = telemetry.load()
+    if args.since is not None:
+        cutoff = time.time() - args.since * 3600
+        records = [entry for entry in records if entry.get("time", 0) >= cutoff]
+
+    if args.prometheus:
+        # Os pedidos guardados passam pelo mesmo acumulador de uma sessão
+        for entry in records:
+            trace = TurnTrace(entry.get("channel", ""), entry.get("mode", "text"))
+            trace.stages = {stage: ms / 1000 for stage, ms in entry.get("stages", {}).items()}
+            trace.counters = {name: entry[name] for name in COUNTERS if name in entry}
+            trace.errors = list(entry.get("errors", ()))
+            telemetry._add_totals(trace, bool(entry.get("cancelled")))
+        Path(args.prometheus).write_text(telemetry.format_prometheus(), encoding="utf-8")
+        print(f"{len(records)} pedidos exportados para {args.prometheus}")
+        return
+    print(telemetry.format_summary(records))
+
+
+if __name__ == "__main__":
+    main()
@@ -87,18 +87,19 @@ def test_gemini():
     print("=" * 60)
     
     try:
-        from config import GOOGLE_API_KEY
+        from config import GOOGLE_API_KEY, GEMINI_MODEL
         import google.generativeai as genai
         
         if not GOOGLE_API_KEY:
             print(f"❌ API Key não configurada!")
             return False
         
-        genai.configure(api_key=GOOGLE_API_KEY)
-        model = genai.GenerativeModel("gemini-2.0-flash")
+        from llm import api_options
+        genai.configure(**api_options())
+        model = genai.GenerativeModel(GEMINI_MODEL)
         
         print(f"✅ API Key válida")
-        print(f"✅ Modelo Gemini 2.0-Flash carregado")
+        print(f"✅ Modelo {GEMINI_MODEL} carregado")
         print(f"⚠️  Teste de resposta skippado (limite diário da API atingido)")
         print(f"   Dica: Use sua própria chave em: https://ai.google.dev/")
         
@@ -141,7 +142,7 @@ def test_commands():
     print("=" * 60)
     
     try:
-        from o_nerd import detect_command
+        from intents import detect_command
         
         test_cases = [
             ("abra o discord", "open", "discord"),
@@ -5,7 +5,7 @@ Script de teste para validar se a IA está respondendo corretamente
 
 import os
 import sys
-from config import GOOGLE_API_KEY, ASSISTANT_NAME, SYSTEM_PROMPT
+from config import GOOGLE_API_KEY, ASSISTANT_NAME, SYSTEM_PROMPT, GEMINI_MODEL
 import google.generativeai as genai
 
 print(f"🤖 Testando {ASSISTANT_NAME}...\n")
@@ -20,11 +20,13 @@ print(f"✅ Chave da API configurada")
 
 # Tenta conectar com a API
 try:
-    genai.configure(api_key=GOOGLE_API_KEY)
+    # Com ONERD_GEMINI_ENDPOINT, usa o servidor falso (fake_gemini.py)
+    from llm import api_options
+    genai.configure(**api_options())
     
     # Teste simples
     model = genai.GenerativeModel(
-        model_name="gemini-2.0-flash",
+        model_name=GEMINI_MODEL,
         system_instruction=SYSTEM_PROMPT
     )
     
@@ -0,0 +1,149 @@
+"""
+Testes do disjuntor da IA (circuit_breaker.py) e da sonda do cliente.
+
+Execute: python -m pytest test_circuit_breaker.py
+"""
+
+import time
+
+import pytest
+
+from circuit_breaker import STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, CircuitBreaker
+from config import GEMINI_MODEL
+from llm import LLMClient, get_circuit_breaker
+from rate_limit import RateLimiter
+
+
+def _wait_state(breaker, state, timeout=2.0):
+    """Espera a sonda em segundo plano levar o disjuntor ao estado pedido."""
+    deadline = time.monotonic() + timeout
+    while breaker.state != state and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return breaker.state
+
+
+def _open(breaker):
+    """Registra falhas até abrir o disjuntor."""
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure(RuntimeError("429 Resource has been exhausted"))
+
+
+def test_opens_after_consecutive_failures():
+    """Testa se o disjuntor só abre depois das falhas seguidas configuradas."""
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow()
+    breaker.record_failure(RuntimeError("429 Resource has been exhausted\ndetalhes"))
+    assert breaker.state == STATE_OPEN
+    assert breaker.get_stats()["last_error"] == "429 Resource has been exhausted"
+
+
+def test_success_resets_failure_count():
+    """Testa se um sucesso no meio zera a contagem de falhas."""
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+
+
+def test_open_rejects_until_cooldown():
+    """Testa se, aberto, as chamadas são recusadas na hora e contadas."""
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+    _open(breaker)
+    assert not breaker.allow()
+    assert not breaker.allow()
+    stats = breaker.get_stats()
+    assert stats["rejected"] == 2
+    assert stats["trips"] == 1
+
+
+def test_half_open_without_probe_uses_next_call():
+    """Testa se, sem sonda, a próxima chamada após a espera serve de teste."""
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+    _open(breaker)
+    assert breaker.allow()
+    assert breaker.state == STATE_HALF_OPEN
+    # Outras chamadas esperam o resultado do teste
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+
+
+def test_half_open_failure_reopens_immediately():
+    """Testa se uma falha no meio aberto reabre o disjuntor sem esperar o limite."""
+    breaker = CircuitBreaker(failure_threshold=5, cooldown=0)
+    _open(breaker)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert breaker.get_stats()["trips"] == 2
+
+
+@pytest.mark.parametrize("healthy, expected", [(True, STATE_CLOSED), (False, STATE_OPEN)])
+def test_probe_decides_state(healthy, expected):
+    """Testa se a sonda em segundo plano fecha ou reabre o disjuntor."""
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0, probe=lambda: healthy)
+    _open(breaker)
+    # A pergunta não espera a sonda
+    assert not breaker.allow()
+    assert _wait_state(breaker, expected) == expected
+
+
+def test_probe_exception_keeps_open():
+    """Testa se um erro na sonda mantém o disjuntor aberto e fica registrado."""
+    def probe():
+        raise RuntimeError("404 models/inexistente is not found")
+
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0, probe=probe)
+    _open(breaker)
+    breaker.allow()
+    assert _wait_state(breaker, STATE_OPEN) == STATE_OPEN
+    assert breaker.get_stats()["last_error"] == "404 models/inexistente is not found"
+
+
+def _client():
+    """Cliente sem cache e sem limite de cota, apontado para o servidor falso."""
+    return LLMClient(GEMINI_MODEL, "Você é um assistente.", {"max_output_tokens": 100},
+                     limiter=RateLimiter(6000, 10**9))
+
+
+def test_client_probe_generates(fake_gemini):
+    """Testa se a sonda do cliente faz uma geração de um token."""
+    requests = fake_gemini.stats["requests"]
+    assert _client().probe()
+    assert fake_gemini.stats["requests"] == requests + 1
+
+
+def test_client_probe_fails_on_quota_while_count_tokens_works(fake_gemini):
+    """Testa se a sonda falha com 429 na geração, mesmo com count_tokens respondendo."""
+    client = _client()
+    fake_gemini.error_429 = 1.0
+    # O aquecimento (count_tokens) não passa pela cota de geração
+    assert client.warm_up() is not None
+    with pytest.raises(Exception):
+        client.probe()
+
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0, probe=client.probe)
+    _open(breaker)
+    breaker.allow()
+    deadline = time.monotonic() + 2.0
+    while breaker.get_stats()["trips"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert breaker.state == STATE_OPEN
+
+    fake_gemini.error_429 = 0.0
+    breaker.allow()
+    assert _wait_state(breaker, STATE_CLOSED) == STATE_CLOSED
+
+
+def test_shared_breaker_probe_generates(fake_gemini):
+    """Testa se o disjuntor compartilhado sonda com uma geração, não com count_tokens."""
+    probe = get_circuit_breaker().probe
+    fake_gemini.error_429 = 1.0
+    with pytest.raises(Exception):
+        probe()
+    fake_gemini.error_429 = 0.0
+    assert probe()
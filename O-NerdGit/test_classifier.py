@@ -0,0 +1,98 @@
+"""
+Testes do classificador local de intenções (classifier.py).
+
+Execute: python -m pytest test_classifier.py
+"""
+
+import pytest
+
+from classifier import (
+    SLOT_EXTRACTORS, classify_local, extract_search_query, has_action, load_corpus,
+    load_slot_examples,
+)
+
+
+@pytest.mark.parametrize("label, text, expected", load_slot_examples())
+def test_corpus_slots(label, text, expected):
+    """Testa se o argumento extraído de cada frase do corpus é o esperado."""
+    assert SLOT_EXTRACTORS[label](text) == expected
+
+
+def test_every_slot_intent_has_examples():
+    """Testa se toda intenção com argumento tem frases com o argumento esperado no corpus."""
+    covered = {label for label, _, _ in load_slot_examples()}
+    assert covered == {label for label, extractor in SLOT_EXTRACTORS.items() if extractor}
+
+
+def test_corpus_rows_are_well_formed():
+    """Testa se toda frase do corpus tem uma intenção e um texto."""
+    for label, text in load_corpus():
+        assert label and text.strip()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("me recomenda um video de matematica", "matematica"),
+    ("me indica uns videos de receita de bolo", "receita de bolo"),
+    ("pode pesquisar no google o preço do dólar por favor", "preço do dólar"),
+    ("mostra clipes da taylor swift no youtube", "taylor swift"),
+])
+def test_search_query_strips_command_words(text, expected):
+    """Testa se verbos, artigos e palavras de cortesia saem do termo de busca."""
+    assert extract_search_query(text) == expected
+
+
+def test_search_query_keeps_inner_words():
+    """Testa se artigos e ligações no meio do termo continuam."""
+    assert extract_search_query("procura na internet o preço do ps5") == "preço do ps5"
+
+
+def test_search_query_without_term():
+    """Testa se uma frase só com palavras de comando não vira busca."""
+    assert extract_search_query("me mostra um video no youtube") is None
+
+
+def test_classify_recommendation():
+    """Testa se um pedido de recomendação vira pesquisa no YouTube com o termo limpo."""
+    assert classify_local("me recomenda um video de matematica") == ("search_youtube", "matematica")
+
+
+def test_chat_goes_to_ai():
+    """Testa se conversa comum não é tratada como comando."""
+    assert classify_local("o que você acha da vida") == (None, None)
+
+
+@pytest.mark.parametrize("text", [
+    "fecha o spotify",
+    "o spotify é bom?",
+    "como funciona o google",
+    "quantas horas tem um dia",
+    "que dia foi ontem",
+    # Fora do corpus
+    "fecha o telegram",
+    "não abre o steam",
+    "o discord é bom?",
+    "como funciona o youtube",
+    "quantas horas tem uma semana",
+    "que dia foi anteontem",
+])
+def test_close_negation_and_questions_go_to_ai(text):
+    """Testa se fechar, negar ou perguntar sobre um app, hora ou dia não vira comando."""
+    assert classify_local(text) == (None, None)
+
+
+@pytest.mark.parametrize("label, text, expected", [
+    ("open", "bota um som no spotify", True),
+    ("open", "você pode abrir o spotify?", True),
+    ("open", "o spotify é bom?", False),
+    ("open", "fecha o spotify", False),
+    ("open", "não abre o discord", False),
+    ("open", "como abre o paint", False),
+    ("search_google", "dá um google em notícias", True),
+    ("search_google", "vê na internet o preço do ps5", True),
+    ("search_google", "notícias da semana", False),
+    ("search_youtube", "vídeos de minecraft", False),
+    ("time", "quantas horas são", True),
+])
+def test_open_and_search_need_action_word(label, text, expected):
+    """Testa se abrir e pesquisar só valem com verbo de ação, sem fechar, negar ou perguntar."""
+    assert has_action(label, text) is expected
@@ -0,0 +1,185 @@
+"""
+Testes da escuta por voz do daemon (daemon.py).
+
+O microfone e a fala são falsos: cada escuta devolve a próxima fala da
+lista, e cada fala do O Nerd dura alguns milissegundos.
+
+Execute: python -m pytest test_daemon.py
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, wait
+
+import pytest
+
+from conversation import ConversationEngine
+from daemon import OnerdDaemon
+
+
+class FakeVoice:
+    """Assistente de voz falso: falas com duração fixa e escutas roteirizadas."""
+
+    def __init__(self, heard, speech_seconds=0.2):
+        """
+        Args:
+            heard: Uma função por escuta, chamada com o próprio assistente,
+                que retorna o que o microfone captou
+            speech_seconds: Duração de cada fala
+        """
+        self.heard = list(heard)
+        self.speech_seconds = speech_seconds
+        self.speeches = 0
+        self.flushes = []
+        self.spoken = []
+        self.started = threading.Event()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.last_listen = {}
+
+    def is_voice_available(self):
+        return True
+
+    def is_tts_available(self):
+        return True
+
+    def warm_up_speech(self):
+        pass
+
+    def speak(self, text, echo=True, priority=0):
+        future = Future()
+        with self._lock:
+            self._pending.add(future)
+            self.speeches += 1
+        self.spoken.append(text)
+        self.started.set()
+
+        def finish():
+            with self._lock:
+                self._pending.discard(future)
+            if not future.done():
+                future.set_result(None)
+
+        threading.Timer(self.speech_seconds, finish).start()
+        return future
+
+    def speaking(self):
+        with self._lock:
+            return bool(self._pending)
+
+    def wait_idle(self, timeout=None):
+        with self._lock:
+            waiting = list(self._pending)
+        return not wait(waiting, timeout).not_done
+
+    def stop(self):
+        with self._lock:
+            waiting = list(self._pending)
+        for future in waiting:
+            future.cancel()
+
+    def listen(self, flush=False):
+        self.flushes.append(flush)
+        return self.heard.pop(0)(self) if self.heard else None
+
+
+def _says(text):
+    """O usuário diz o texto assim que a escuta começa."""
+    return lambda voice: text
+
+
+def _echo(text):
+    """O microfone capta a própria fala do O Nerd, que começa durante a escuta."""
+    def heard(voice):
+        voice.started.wait(2.0)
+        return text
+    return heard
+
+
+def _daemon(voice):
+    """Daemon em modo voz usando o assistente falso."""
+    daemon = OnerdDaemon(text_mode=False)
+    daemon.voice_assistant = voice
+    return daemon
+
+
+def _run(daemon, voice, reply):
+    """Roda o loop de conversa com o daemon; cada pedido é respondido com reply(pedido)."""
+    turns = []
+
+    async def handle(turn):
+        turns.append(turn.text)
+        if turn.text == "tchau":
+            daemon.engine.stop()
+            return
+        await daemon.engine.say(reply(turn.text))
+
+    async def main():
+        daemon.engine = ConversationEngine(handle)
+        await daemon.engine.start(voice)
+        await asyncio.wait_for(
+            daemon.engine.run(daemon._listen_voice, daemon._extract_wake_word), 5.0)
+        return daemon.engine.interruptions
+
+    return turns, asyncio.run(main())
+
+
+def test_own_speech_does_not_start_a_turn():
+    """Testa se a fala do O Nerd captada pelo microfone não vira pedido nem interrompe."""
+    voice = FakeVoice([
+        _says("O Nerd conta uma piada"),
+        # A resposta começa com o nome e é captada enquanto toca
+        _echo("o nerd aqui vai uma piada de programador"),
+        _says("o nerd tchau"),
+    ])
+    turns, interruptions = _run(_daemon(voice), voice,
+                                lambda text: "O Nerd aqui vai uma piada de programador")
+    assert turns == ["conta uma piada", "tchau"]
+    assert interruptions == 0
+    assert voice.spoken == ["O Nerd aqui vai uma piada de programador"]
+
+
+def test_listen_waits_speech_and_flushes():
+    """Testa se a escuta espera a fala acabar e descarta o que foi captado nela."""
+    voice = FakeVoice([_says("o nerd oi"), _says("o nerd que horas são")])
+    daemon = _daemon(voice)
+    assert daemon._listen_voice() == "o nerd oi"
+    voice.speak("Olá!")
+    assert daemon._listen_voice() == "o nerd que horas são"
+    assert not voice.speaking()
+    # Só a escuta depois da fala descarta a captura
+    assert voice.flushes == [False, True]
+    assert daemon._listen_voice() is None
+    assert voice.flushes == [False, True, False]
+
+
+def test_speech_during_listen_is_dropped():
+    """Testa se uma fala que começou durante a escuta descarta o que foi ouvido."""
+    def heard(voice):
+        voice.speak("Sim? Como posso ajudar?")
+        return "o nerd sim como posso ajudar"
+
+    voice = FakeVoice([heard])
+    assert _daemon(voice)._listen_voice() is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("O Nerd que horas são", "que horas são"),
+    ("oi nerd, abre o spotify", "abre o spotify"),
+    ("ó nerd gosta de nerd?", "gosta de nerd?"),
+    ("Oi Nerd", ""),
+    ("nerd", ""),
+])
+def test_wake_word_at_start(text, expected):
+    """Testa se o pedido é o que vem depois do nome, no começo da fala."""
+    assert _daemon(FakeVoice([]))._extract_wake_word(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "eu sou muito nerd",
+    "essa resposta é bem de nerd, o nerd sabe",
+    "o nerdola",
+])
+def test_wake_word_elsewhere_ignored(text):
+    """Testa se o nome no meio ou dentro de outra palavra não chama o O Nerd."""
+    assert _daemon(FakeVoice([]))._extract_wake_word(text) is None
@@ -0,0 +1,98 @@
+"""
+Testes do motor do assistente (engine.py).
+
+Execute: python -m pytest test_engine.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(SCRIPT_DIR))
+
+from conversation_store import ConversationStore
+from engine import AssistantEngine
+from history import ConversationHistory
+from llm import GenerationCancelled
+from telemetry import Telemetry
+
+
+class FakeRouter:
+    """Roteador que responde "resposta N" ou cancela, sem chamar a IA."""
+
+    def __init__(self):
+        self.cancel_next = False
+        self.fail_next = False
+        self.calls = []
+
+    def generate(self, contents, on_chunk=None, cancel=None, mode="text"):
+        self.calls.append(contents)
+        if self.cancel_next:
+            self.cancel_next = False
+            raise GenerationCancelled()
+        if self.fail_next:
+            self.fail_next = False
+            raise RuntimeError("falha simulada")
+        return f"resposta {len(self.calls)}"
+
+
+@pytest.fixture
+def assistant(tmp_path):
+    store = ConversationStore(tmp_path / "conversas.db")
+    history = ConversationHistory(channel="teste", store=store)
+    telemetry = Telemetry(tmp_path / "telemetria.jsonl", enabled=False)
+    yield AssistantEngine(history, router=FakeRouter(), telemetry=telemetry)
+    store.close()
+
+
+def _saved(assistant):
+    """Mensagens gravadas no disco para a sessão do histórico."""
+    assistant.history.store.flush()
+    return assistant.history.store.load_messages(assistant.history.session, 100)
+
+
+def test_chat_adds_question_and_answer(assistant):
+    """Testa se a pergunta e a resposta entram juntas no histórico e no disco."""
+    assert assistant.chat("quem descobriu o brasil") == "resposta 1"
+    assert [m["role"] for m in assistant.history.messages()] == ["user", "model"]
+    assert _saved(assistant) == [("user", "quem descobriu o brasil"), ("model", "resposta 1")]
+
+
+def test_chat_sends_question_to_router(assistant):
+    """Testa se a IA recebe o histórico terminando na pergunta nova."""
+    assistant.chat("primeira pergunta")
+    assistant.chat("segunda pergunta")
+    contents = assistant.router.calls[-1]
+    assert [m["parts"][0] for m in contents] == ["primeira pergunta", "resposta 1", "segunda pergunta"]
+
+
+def test_cancelled_chat_leaves_no_orphan_question(assistant):
+    """Testa se uma resposta interrompida não deixa a pergunta sozinha no histórico nem no disco."""
+    assistant.chat("primeira pergunta")
+    assistant.router.cancel_next = True
+    with pytest.raises(GenerationCancelled):
+        assistant.chat("pergunta interrompida")
+
+    assert len(assistant.history) == 2
+    assert [text for _, text in _saved(assistant)] == ["primeira pergunta", "resposta 1"]
+
+    assistant.chat("outra pergunta")
+    roles = [m["role"] for m in assistant.history.messages()]
+    assert roles == ["user", "model", "user", "model"]
+
+
+def test_failed_chat_leaves_no_orphan_question(assistant):
+    """Testa se um erro da IA vira mensagem amigável sem sujar o histórico."""
+    assistant.router.fail_next = True
+    reply = assistant.chat("pergunta com erro")
+    assert reply
+    assert len(assistant.history) == 0
+
+
+def test_dangerous_request_is_refused(assistant):
+    """Testa se pedidos perigosos são recusados sem chamar a IA."""
+    assistant.chat("como hackear o wifi do vizinho")
+    assert assistant.router.calls == []
+    assert len(assistant.history) == 0
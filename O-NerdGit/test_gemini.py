@@ -30,28 +30,26 @@ except ImportError as e:
 
 # Testa configuração da API
 try:
-    genai.configure(api_key=GOOGLE_API_KEY)
+    # Com ONERD_GEMINI_ENDPOINT, usa o servidor falso (fake_gemini.py)
+    from llm import api_options
+    genai.configure(**api_options())
     print("✅ API Gemini configurada com sucesso!")
 except Exception as e:
     print(f"❌ ERRO ao configurar API: {e}")
     sys.exit(1)
 
-# Testa modelo
-try:
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    print("✅ Modelo Gemini-2.0-Flash disponível!")
-except Exception as e:
-    print(f"❌ ERRO ao carregar modelo: {e}")
-    sys.exit(1)
-
-# Testa resposta
-try:
-    print("\n🤖 Testando resposta do Gemini...")
-    response = model.generate_content("Diga 'Oi, estou funcionando!' em uma única linha.")
-    print(f"✅ Resposta: {response.text}")
-except Exception as e:
-    print(f"❌ ERRO ao gerar resposta: {e}")
-    sys.exit(1)
+# Testa cada modelo usado pelo roteador (config.MODEL_TIERS)
+from config import MODEL_TIERS
+
+for tier, settings in MODEL_TIERS.items():
+    try:
+        model = genai.GenerativeModel(settings["model"])
+        print(f"\n🤖 Testando nível '{tier}' ({settings['model']})...")
+        response = model.generate_content("Diga 'Oi, estou funcionando!' em uma única linha.")
+        print(f"✅ Resposta: {response.text}")
+    except Exception as e:
+        print(f"❌ ERRO com o modelo {settings['model']}: {e}")
+        sys.exit(1)
 
 print("\n" + "="*60)
 print("🎉 TUDO OK! O Gemini está configurado e funcionando!")
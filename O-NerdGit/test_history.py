@@ -0,0 +1,139 @@
+"""
+Testes do histórico limitado por tokens (history.py).
+
+Execute: python -m pytest test_history.py
+"""
+
+from conversation_store import ConversationStore
+from history import SUMMARY_ITEM_CHARS, ConversationHistory, estimate_tokens
+
+
+def _history(token_budget, summarize=False, summary_tokens=200):
+    """Histórico só em memória, sem salvar em disco."""
+    return ConversationHistory(token_budget=token_budget, summarize=summarize,
+                               summary_tokens=summary_tokens)
+
+
+def _texts(history):
+    """Textos das mensagens enviadas à IA, em ordem."""
+    return [message["parts"][0] for message in history.messages()]
+
+
+def test_estimate_tokens():
+    """Testa se a estimativa é de 4 caracteres por token, arredondando para cima."""
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+    assert estimate_tokens("a" * 400) == 100
+
+
+def test_keeps_everything_within_budget():
+    """Testa se nada sai enquanto o orçamento não é ultrapassado."""
+    history = _history(token_budget=100)
+    for text in ("p1" * 10, "r1" * 10, "p2" * 10, "r2" * 10):
+        history.add("user" if text.startswith("p") else "model", text)
+    assert len(history) == 4
+    assert history.tokens == 20
+    assert history.evicted == 0
+
+
+def test_evicts_question_with_its_answer():
+    """Testa se a pergunta mais antiga sai junto com a resposta dela."""
+    history = _history(token_budget=30)
+    history.add("user", "a" * 40)
+    history.add("model", "b" * 40)
+    history.add("user", "c" * 40)
+    assert _texts(history) == ["a" * 40, "b" * 40, "c" * 40]
+
+    history.add("model", "d" * 40)
+    # Estourou (40 tokens): sai o par inteiro, e o histórico começa por uma pergunta
+    assert _texts(history) == ["c" * 40, "d" * 40]
+    assert history.tokens == 20
+    assert history.evicted == 2
+    assert history.messages()[0]["role"] == "user"
+
+
+def test_tokens_stay_within_budget():
+    """Testa se o total nunca passa do orçamento com várias mensagens."""
+    history = _history(token_budget=50)
+    for index in range(40):
+        history.add("user" if index % 2 == 0 else "model", "x" * (8 * (index % 5 + 1)))
+        assert history.tokens <= 50
+        assert history.tokens == sum(estimate_tokens(text) for text in _texts(history))
+
+
+def test_last_message_always_kept():
+    """Testa se a última mensagem fica, mesmo sozinha acima do orçamento."""
+    history = _history(token_budget=10)
+    history.add("user", "curta")
+    history.add("model", "z" * 400)
+    assert _texts(history) == ["z" * 400]
+    assert history.tokens == 100
+
+
+def test_summary_keeps_evicted_topics():
+    """Testa se as perguntas que saem viram um resumo no início da conversa."""
+    history = _history(token_budget=10, summarize=True)
+    history.add("user", "o que é   fotossíntese")
+    history.add("model", "r" * 40)
+    history.add("user", "p" * 40)
+
+    contents = history.messages()
+    assert contents[0]["role"] == "user"
+    assert "o que é fotossíntese" in contents[0]["parts"][0]
+    assert contents[1] == {"role": "model", "parts": ["Entendido."]}
+    assert _texts(history)[2:] == ["p" * 40]
+    # O resumo não conta no orçamento das mensagens
+    assert history.tokens == 10
+
+
+def test_summary_truncates_long_questions():
+    """Testa se perguntas longas entram cortadas no resumo, sem partir palavras."""
+    history = _history(token_budget=1, summarize=True)
+    history.add("user", "palavra " * 30)
+    history.add("user", "fim")
+    summary = history.messages()[0]["parts"][0]
+    topic = summary.split(": ", 1)[1].rstrip("]")
+    assert topic.endswith("palavra...")
+    assert len(topic) <= SUMMARY_ITEM_CHARS + 3
+
+
+def test_summary_has_own_budget():
+    """Testa se os assuntos mais antigos saem do resumo quando ele passa do limite."""
+    history = _history(token_budget=1, summarize=True, summary_tokens=4)
+    for topic in ("assunto1", "assunto2", "assunto3", "fim"):
+        history.add("user", topic)
+    summary = history.messages()[0]["parts"][0]
+    assert "assunto1" not in summary
+    assert "assunto2; assunto3" in summary
+
+
+def test_without_summary():
+    """Testa se, sem resumo, as perguntas que saem somem de vez."""
+    history = _history(token_budget=1)
+    history.add("user", "primeira")
+    history.add("user", "segunda")
+    assert _texts(history) == ["segunda"]
+
+
+def test_clear():
+    """Testa se clear() apaga mensagens, resumo e a sessão em disco."""
+    history = _history(token_budget=1, summarize=True)
+    history.add("user", "primeira")
+    history.add("user", "segunda")
+    history.session = "sessao"
+    history.clear()
+    assert history.messages() == []
+    assert history.tokens == 0
+    assert history.session is None
+
+
+def test_channel_saves_to_store(tmp_path):
+    """Testa se, com canal, as mensagens vão para o armazenamento em disco."""
+    store = ConversationStore(tmp_path / "conversas.db")
+    history = ConversationHistory(token_budget=100, channel="teste", store=store)
+    history.add("user", "oi")
+    history.add("model", "olá")
+    store.flush()
+    assert store.load_messages(history.session, 10) == [("user", "oi"), ("model", "olá")]
+    store.close()
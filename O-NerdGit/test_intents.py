@@ -0,0 +1,112 @@
+"""
+Testes da detecção de comandos (intents.py).
+
+Execute: python -m pytest test_intents.py
+"""
+
+import itertools
+import re
+
+import pytest
+
+from benchmark import APPS, COMMAND_TEMPLATES, QUERIES, _legacy_detect_command
+from config import SAFE_APPS, WINDOWS_APPS
+from intents import INTENT_RULES, IntentEngine, detect_command
+from keywords import fold_accents, is_exit_command
+
+
+def _all_commands():
+    """Cada modelo de comando com cada app, busca e alguns volumes."""
+    commands = set()
+    for template, app, query, number in itertools.product(
+            COMMAND_TEMPLATES, APPS, QUERIES, (0, 7, 50, 100)):
+        commands.add(template.format(app=app, query=query, number=number))
+    return sorted(commands)
+
+
+def _detect_rule_by_rule(user_input):
+    """Testa todas as regras uma a uma, sem a varredura de gatilhos."""
+    apps = "|".join(re.escape(fold_accents(name.lower()))
+                    for name in sorted(list(WINDOWS_APPS) + list(SAFE_APPS), key=len, reverse=True))
+    text = user_input.lower().strip()
+    folded = fold_accents(text)
+    for cmd_type, pattern, _ in INTENT_RULES:
+        if pattern is None:
+            if is_exit_command(text):
+                return (cmd_type, None)
+            continue
+        match = re.search(pattern.replace("{apps}", apps), folded)
+        if match:
+            if not match.lastindex:
+                return (cmd_type, None)
+            start, end = match.span(1)
+            return (cmd_type, text[start:end])
+    return (None, None)
+
+
+# Frases em que tirar os acentos poderia mudar a regra escolhida
+AMBIGUOUS_COMMANDS = [
+    "quantas horas e minutos tem um dia",
+    "que horas é",
+    "que horas é?",
+    "que horas sao?",
+    "que dia é hoje?",
+]
+
+
+@pytest.mark.parametrize("text", _all_commands() + AMBIGUOUS_COMMANDS)
+def test_same_result_as_legacy_detector(text):
+    """Testa se o motor pré-compilado devolve o mesmo que o laço de regex antigo."""
+    assert detect_command(text) == _legacy_detect_command(text)
+
+
+@pytest.mark.parametrize("text", _all_commands() + AMBIGUOUS_COMMANDS + [
+    "sair agora", "saira amanhã", "volume 30 e sair", "pesquisar sair no google",
+    "Abrir O Spotify", "que dia é hoje", "hoje tem jogo",
+])
+def test_triggers_do_not_change_result(text):
+    """Testa se pular regras pelos gatilhos dá o mesmo que testar todas em ordem."""
+    assert detect_command(text) == _detect_rule_by_rule(text)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("que horas são", ("time", None)),
+    ("que horas sao", ("time", None)),
+    ("Que Horas São", ("time", None)),
+    ("informações do sistema", ("system_info", None)),
+    ("informacoes do sistema", ("system_info", None)),
+])
+def test_accents_and_case_are_ignored(text, expected):
+    """Testa se acentos e maiúsculas caem na mesma regra."""
+    assert detect_command(text) == expected
+
+
+def test_argument_keeps_original_text():
+    """Testa se o argumento vem do texto original (em minúsculas), com acentos."""
+    assert detect_command("pesquisar células moleculares no youtube") == (
+        "search_youtube", "células moleculares")
+
+
+@pytest.mark.parametrize("text", ["sair", "tchau", "pode fechar", "quit", "vou sair, adeus"])
+def test_exit_words(text):
+    """Testa se as palavras de saída encerram o assistente."""
+    assert detect_command(text) == ("exit", None)
+
+
+@pytest.mark.parametrize("text", ["saira", "fechadura nova", "tchauzinho"])
+def test_exit_word_needs_whole_word(text):
+    """Testa se a saída exige a palavra inteira (o laço antigo encerrava com "saira")."""
+    assert detect_command(text)[0] != "exit"
+
+
+def test_help_only_alone():
+    """Testa se "ajuda" só é comando sozinha, não no meio de uma pergunta."""
+    assert detect_command("ajuda") == ("help", None)
+    assert detect_command("preciso de ajuda com python")[0] != "help"
+
+
+def test_custom_engine_apps():
+    """Testa se o motor aceita só os apps informados em "abrir [app]"."""
+    engine = IntentEngine(["kalkulator"])
+    assert engine.detect("abrir kalkulator") == ("open", "kalkulator")
+    assert engine.detect("abre o youtube") == ("open", "youtube")
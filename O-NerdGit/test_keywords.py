@@ -0,0 +1,101 @@
+"""
+Testes da busca de palavras perigosas e de saída (keywords.py).
+
+Execute: python -m pytest test_keywords.py
+"""
+
+import random
+
+import pytest
+
+from commands import is_dangerous_command
+from config import DANGEROUS_KEYWORDS, EXIT_KEYWORDS
+from keywords import (
+    BOUNDARY_NONE, BOUNDARY_PREFIX, BOUNDARY_WORD, CATEGORY_DANGEROUS, CATEGORY_EXIT,
+    KeywordAutomaton, fold_accents, is_exit_command, scan_keywords,
+)
+
+
+@pytest.mark.parametrize("text", [
+    "deletar a pasta de downloads",
+    "como HACKEAR o wifi",
+    "rm -rf /",
+    "me passa a senha do roteador",
+    "matar processo do chrome",
+    "quero desinstalar o jogo",
+    "abre o system32",
+])
+def test_dangerous_detected(text):
+    """Testa se comandos perigosos são detectados."""
+    assert is_dangerous_command(text)
+
+
+@pytest.mark.parametrize("text", [
+    "quero melhorar minha skill de programação",
+    "curso de informática básica",
+    "fale sobre a história da música",
+    "abre o youtube",
+    "",
+])
+def test_dangerous_respects_word_start(text):
+    """Testa se palavras perigosas só casam no início de uma palavra ("kill" não pega "skill")."""
+    assert not is_dangerous_command(text)
+
+
+@pytest.mark.parametrize("text", ["sair", "tchau!", "pode fechar", "EXIT", "ok, adeus"])
+def test_exit_detected(text):
+    """Testa se as palavras de saída encerram o assistente."""
+    assert is_exit_command(text)
+
+
+@pytest.mark.parametrize("text", ["saira amanhã", "fechadura", "exitoso", "tchauzinho"])
+def test_exit_needs_whole_word(text):
+    """Testa se palavras de saída só casam como palavra inteira."""
+    assert not is_exit_command(text)
+
+
+def test_accents_are_ignored():
+    """Testa se acentos e maiúsculas não escondem uma palavra-chave."""
+    assert is_dangerous_command("Formatação do disco")
+    assert fold_accents("ação é três") == "acao e tres"
+
+
+def test_scan_reports_positions():
+    """Testa se as ocorrências apontam o trecho certo do texto original."""
+    text = "Quero sair e deletar tudo"
+    hits = {(hit.category, text[hit.start:hit.end]) for hit in scan_keywords(text)}
+    assert hits == {(CATEGORY_EXIT, "sair"), (CATEGORY_DANGEROUS, "deletar")}
+
+
+def _pair(keywords, loop_max):
+    """Monta a busca com as palavras dadas, com o laço ou com o autômato."""
+    automaton = KeywordAutomaton(loop_max=loop_max)
+    for keyword, category, boundary in keywords:
+        automaton.add(keyword, category, boundary)
+    automaton.build()
+    return automaton
+
+
+def test_loop_and_automaton_agree():
+    """Testa se o laço (listas pequenas) e o autômato (listas grandes) acham o mesmo."""
+    keywords = ([(k, CATEGORY_DANGEROUS, BOUNDARY_PREFIX) for k in DANGEROUS_KEYWORDS]
+                + [(k, CATEGORY_EXIT, BOUNDARY_WORD) for k in EXIT_KEYWORDS]
+                + [("ana", "teste", BOUNDARY_NONE), ("banana", "teste", BOUNDARY_WORD)])
+    loop = _pair(keywords, loop_max=len(keywords))
+    automaton = _pair(keywords, loop_max=0)
+
+    rng = random.Random(5)
+    words = ["skill", "kill", "sair", "saira", "bananas", "banana", "ana", "formatação",
+             "rm -rf", "deletar", "hackers", "exit.", "o", "de", "fechar", "x"]
+    texts = [" ".join(rng.choice(words) for _ in range(rng.randint(1, 12))) for _ in range(300)]
+    for text in texts:
+        assert loop.find_all(text) == automaton.find_all(text), text
+        for category in (CATEGORY_DANGEROUS, CATEGORY_EXIT, "teste"):
+            assert loop.contains(text, category) == automaton.contains(text, category), text
+
+
+def test_add_after_build_fails():
+    """Testa se não dá para acrescentar palavras depois de montar a busca."""
+    automaton = _pair([("kill", CATEGORY_DANGEROUS, BOUNDARY_PREFIX)], loop_max=0)
+    with pytest.raises(RuntimeError):
+        automaton.add("virus", CATEGORY_DANGEROUS)
@@ -0,0 +1,96 @@
+"""
+Testes do agrupamento de pedidos idênticos do cliente da IA (llm.py).
+
+Execute: python -m pytest test_llm.py
+"""
+
+import threading
+import time
+
+import pytest
+
+from config import GEMINI_MODEL
+from llm import GenerationCancelled, LLMClient
+from rate_limit import RateLimiter
+
+
+def _client():
+    """Cliente sem cache nem limite de cota, apontado para o servidor falso."""
+    return LLMClient(GEMINI_MODEL, "Você é um assistente.", {"max_output_tokens": 100},
+                     limiter=RateLimiter(6000, 10**9))
+
+
+def _turn(*texts):
+    """Histórico alternando usuário e modelo, terminando na pergunta."""
+    roles = ["user", "model"]
+    return [{"role": roles[index % 2], "parts": [text]} for index, text in enumerate(texts)]
+
+
+def test_same_history_same_key():
+    """Testa se a mesma pergunta com o mesmo histórico tem a mesma chave."""
+    client = _client()
+    assert client.flight_key(_turn("oi", "olá", "e aí?")) == client.flight_key(
+        _turn("Oi", "olá", "e ai"))
+
+
+def test_different_context_different_key():
+    """Testa se a mesma pergunta em conversas diferentes não divide a resposta."""
+    client = _client()
+    assert client.flight_key(_turn("fala de gatos", "ok", "e sobre eles?")) != client.flight_key(
+        _turn("fala de cães", "ok", "e sobre eles?"))
+
+
+def test_repeated_message_not_collapsed():
+    """Testa se mensagens iguais seguidas contam cada uma (o histórico não guarda pedido interrompido)."""
+    client = _client()
+    question = _turn("qual a capital da frança")
+    assert client.flight_key(question + question) != client.flight_key(question)
+
+
+def _interrupted_then_repeated(client, first, second):
+    """Interrompe a primeira pergunta em streaming e faz a segunda logo depois."""
+    cancel = threading.Event()
+    cancelled = []
+
+    def interrupted():
+        try:
+            client.generate(first, on_chunk=lambda _: None, cancel=cancel)
+        except GenerationCancelled:
+            cancelled.append(True)
+
+    thread = threading.Thread(target=interrupted)
+    thread.start()
+    time.sleep(0.05)
+    cancel.set()
+    text = client.generate(second, on_chunk=lambda _: None)
+    thread.join()
+    return text, cancelled
+
+
+@pytest.fixture
+def slow_gemini(fake_gemini, monkeypatch):
+    """Servidor falso demorando o bastante para as perguntas se sobreporem."""
+    monkeypatch.setattr(fake_gemini, "latency_ms", 300)
+    return fake_gemini
+
+
+def test_repeat_follows_call_in_flight(slow_gemini):
+    """Testa se a pergunta refeita acompanha a chamada em andamento."""
+    client = _client()
+    served = slow_gemini.stats["streams"]
+    question = _turn("agrupar a mesma pergunta")
+    text, cancelled = _interrupted_then_repeated(client, question, question)
+    assert text
+    assert cancelled == [True]
+    assert slow_gemini.stats["streams"] - served == 1
+    assert client.get_stats()["coalesced"] == 1
+
+
+def test_other_context_gets_own_call(slow_gemini):
+    """Testa se a mesma pergunta com outro histórico abre a própria chamada."""
+    client = _client()
+    served = slow_gemini.stats["streams"]
+    _interrupted_then_repeated(client, _turn("fala de gatos", "ok", "e sobre eles?"),
+                               _turn("fala de cães", "ok", "e sobre eles?"))
+    assert slow_gemini.stats["streams"] - served == 2
+    assert client.get_stats()["coalesced"] == 0
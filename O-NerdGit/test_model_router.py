@@ -0,0 +1,111 @@
+"""
+Testes do roteamento de modelos (model_router.py).
+
+Execute: python -m pytest test_model_router.py
+"""
+
+import json
+import threading
+
+from model_router import ModelRouter
+
+TIERS = {
+    "rapido": {"model": "modelo-rapido", "max_output_tokens": 300},
+    "padrao": {"model": "modelo-padrao", "max_output_tokens": 1000},
+}
+
+POLICY = [
+    {"tier": "padrao", "keywords": ["código", "explica"]},
+    {"tier": "rapido", "max_words": 5},
+    {"tier": "padrao", "modes": ["voice"], "max_output_tokens": 400},
+]
+
+
+class FakeTierClient:
+    """Cliente falso de um nível: responde na hora ou recusa."""
+
+    def __init__(self, model, refuse=False):
+        self.model = model
+        self.refuse = refuse
+
+    def estimate_request_tokens(self, contents):
+        return 10
+
+    def generate(self, contents, on_chunk=None, cancel=None):
+        return "" if self.refuse else f"resposta do {self.model}"
+
+
+def _router(tmp_path, refuse=(), log=True):
+    """Roteador com os níveis de teste, registrando em uma pasta temporária."""
+    return ModelRouter(TIERS, POLICY, max_escalations=1, enabled=True, log=log,
+                       log_path=tmp_path / "model_router.jsonl",
+                       client_factory=lambda model, config, prompt: FakeTierClient(
+                           model, refuse=model in refuse))
+
+
+def _ask(router, text, mode="text"):
+    """Pergunta de uma mensagem só."""
+    return router.generate([{"role": "user", "parts": [text]}], mode=mode)
+
+
+def test_route_by_policy(tmp_path):
+    """Testa se a primeira regra que casa escolhe o nível e o limite de tokens."""
+    router = _router(tmp_path)
+    assert router.route("bom dia").tier == "rapido"
+    assert router.route("me explica o que é um ponteiro").tier == "padrao"
+    assert router.route("Codigo em python, por favor").tier == "padrao"
+    assert router.route("conta uma história bem longa sobre dragões", "voice") == (
+        "padrao", "modelo-padrao", 400)
+    # Sem regra, vale o último nível
+    assert router.route("conta uma história bem longa sobre dragões").tier == "padrao"
+
+
+def test_refusal_escalates(tmp_path):
+    """Testa se uma recusa no nível rápido sobe o pedido para o seguinte."""
+    router = _router(tmp_path, refuse={"modelo-rapido"}, log=False)
+    assert _ask(router, "bom dia") == "resposta do modelo-padrao"
+    stats = router.get_stats()
+    assert stats["rapido"]["refusals"] == 1
+    assert stats["rapido"]["escalations"] == 1
+    assert stats["padrao"]["requests"] == 1
+
+
+def test_log_written_in_background(tmp_path):
+    """Testa se cada pedido vira uma linha no registro, gravada pela thread própria."""
+    router = _router(tmp_path)
+    _ask(router, "bom dia")
+    _ask(router, "me explica recursão")
+    assert router.flush_log(timeout=2.0)
+    lines = [json.loads(line) for line in router.log_path.read_text().splitlines()]
+    assert [line["tier"] for line in lines] == ["rapido", "padrao"]
+    assert lines[0]["outcome"] == "ok"
+    router.close()
+
+
+def test_slow_disk_does_not_block_replies(tmp_path):
+    """Testa se as respostas não esperam a gravação do registro."""
+    router = _router(tmp_path)
+    release = threading.Event()
+    write = router._write
+
+    def slow_write(entries):
+        release.wait(2.0)
+        write(entries)
+
+    router._write = slow_write
+    for _ in range(3):
+        assert _ask(router, "bom dia") == "resposta do modelo-rapido"
+    assert not router.log_path.exists()
+
+    release.set()
+    assert router.flush_log(timeout=2.0)
+    assert len(router.log_path.read_text().splitlines()) == 3
+    router.close()
+
+
+def test_log_disabled(tmp_path):
+    """Testa se, sem registro, nenhum arquivo nem thread é criado."""
+    router = _router(tmp_path, log=False)
+    _ask(router, "bom dia")
+    assert router._writer is None
+    assert not router.log_path.exists()
@@ -0,0 +1,208 @@
+"""
+Testes dos limites de requisições e das novas tentativas (rate_limit.py).
+
+As esperas são registradas em vez de dormidas, para os testes não
+levarem os segundos reais do backoff.
+
+Execute: python -m pytest test_rate_limit.py
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+
+import rate_limit
+from config import GEMINI_MODEL, LLM_MAX_RETRIES, LLM_RETRY_MAX_DELAY
+from llm import LLMClient
+from rate_limit import (
+    RateLimiter, TokenBucket, backoff_delay, call_with_retry, retry_hint,
+)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Lista das esperas pedidas pelo módulo, sem dormir de verdade."""
+    recorded = []
+    clock = SimpleNamespace(monotonic=time.monotonic, sleep=recorded.append)
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return recorded
+
+
+def _failing(errors, result="ok"):
+    """Função que levanta os erros dados, um por chamada, e depois retorna result."""
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    func.calls = calls
+    return func
+
+
+def test_bucket_waits_exact_time():
+    """Testa se o balde vazio pede a espera exata até repor as fichas."""
+    bucket = TokenBucket(60, capacity=2)
+    now = bucket._updated
+    assert bucket.reserve(1, now) == 0
+    assert bucket.reserve(1, now) == 0
+    assert bucket.reserve(1, now) == pytest.approx(1.0)
+    # Um segundo depois, a ficha reposta já estava reservada
+    assert bucket.reserve(1, now + 1.0) == pytest.approx(1.0)
+
+
+def test_bucket_amount_limited_to_capacity():
+    """Testa se um pedido maior que o balde espera no máximo um balde cheio."""
+    bucket = TokenBucket(60, capacity=10)
+    now = bucket._updated
+    assert bucket.reserve(1000, now) == 0
+    assert bucket.reserve(1000, now) == pytest.approx(10.0)
+
+
+def test_limiter_requests_per_minute(sleeps):
+    """Testa se o limite de requisições por minuto faz a chamada seguinte esperar."""
+    limiter = RateLimiter(requests_per_minute=1, tokens_per_minute=10**9)
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == pytest.approx(60.0, abs=0.1)
+    assert sleeps == [pytest.approx(60.0, abs=0.1)]
+    assert limiter.waits == 1
+
+
+def test_limiter_tokens_per_minute(sleeps):
+    """Testa se o limite de tokens por minuto conta os tokens de cada chamada."""
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=600)
+    assert limiter.acquire(600) == 0
+    assert limiter.acquire(60) == pytest.approx(6.0, abs=0.1)
+
+
+def test_limiter_pause(sleeps):
+    """Testa se a pausa pedida pela API vale para a próxima chamada."""
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=10**9)
+    limiter.pause(5)
+    assert limiter.acquire() == pytest.approx(5.0, abs=0.1)
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("429 Resource has been exhausted. Please retry in 12.5s.", 12.5),
+    ("429 quota exceeded retry_delay { seconds: 7 }", 7.0),
+    ("503 Service Unavailable Retry-After: 3", 3.0),
+    ("500 An internal error has occurred.", None),
+])
+def test_retry_hint(message, expected):
+    """Testa se o tempo de espera sugerido é lido da mensagem de erro."""
+    assert retry_hint(RuntimeError(message)) == expected
+
+
+def test_backoff_grows_until_maximum():
+    """Testa se a espera sorteada fica entre zero e base * 2^tentativa, com teto."""
+    for attempt in range(8):
+        for _ in range(50):
+            delay = backoff_delay(attempt, base=1.0, maximum=10.0)
+            assert 0 <= delay <= min(10.0, 2 ** attempt)
+
+
+def test_retries_temporary_errors(sleeps):
+    """Testa se erros temporários são repetidos até dar certo."""
+    func = _failing([api_exceptions.InternalServerError("500"),
+                     api_exceptions.ServiceUnavailable("503")])
+    assert call_with_retry(func, retries=3) == "ok"
+    assert len(func.calls) == 3
+    assert len(sleeps) == 2
+
+
+def test_gives_up_after_retries(sleeps):
+    """Testa se o último erro é repassado quando acabam as tentativas."""
+    func = _failing([api_exceptions.InternalServerError("500")] * 10)
+    with pytest.raises(api_exceptions.InternalServerError):
+        call_with_retry(func, retries=2)
+    assert len(func.calls) == 3
+
+
+def test_permanent_error_not_retried(sleeps):
+    """Testa se erros que não são temporários saem na primeira tentativa."""
+    func = _failing([api_exceptions.InvalidArgument("400")])
+    with pytest.raises(api_exceptions.InvalidArgument):
+        call_with_retry(func, retries=3)
+    assert len(func.calls) == 1
+    assert sleeps == []
+
+
+def test_no_retry_when_unsafe(sleeps):
+    """Testa se can_retry=False impede a nova tentativa (resposta já exibida)."""
+    func = _failing([api_exceptions.InternalServerError("500")])
+    with pytest.raises(api_exceptions.InternalServerError):
+        call_with_retry(func, retries=3, can_retry=lambda: False)
+    assert len(func.calls) == 1
+
+
+def test_hint_pauses_every_caller(sleeps):
+    """Testa se o pedido de espera do 429 pausa o limitador compartilhado."""
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=10**9)
+    func = _failing([api_exceptions.TooManyRequests("Please retry in 4s.")])
+    assert call_with_retry(func, limiter, retries=3) == "ok"
+    assert sleeps[0] >= 4.0
+    # Outra thread chamando agora também esperaria a pausa
+    assert limiter._paused_until - time.monotonic() == pytest.approx(4.0, abs=0.5)
+
+
+def test_long_hint_gives_up(sleeps):
+    """Testa se uma espera maior que o teto (cota diária) desiste na hora."""
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=10**9)
+    hint = LLM_RETRY_MAX_DELAY * 10
+    func = _failing([api_exceptions.TooManyRequests(f"Please retry in {hint}s.")])
+    with pytest.raises(api_exceptions.TooManyRequests):
+        call_with_retry(func, limiter, retries=3)
+    assert len(func.calls) == 1
+    assert limiter._paused_until - time.monotonic() <= LLM_RETRY_MAX_DELAY
+
+
+def _client():
+    """Cliente sem cache nem disjuntor, apontado para o servidor falso."""
+    return LLMClient(GEMINI_MODEL, "Você é um assistente.", {"max_output_tokens": 100},
+                     limiter=RateLimiter(6000, 10**9))
+
+
+def _question(text):
+    """Histórico com uma pergunta só."""
+    return [{"role": "user", "parts": [text]}]
+
+
+def test_client_retries_server_errors(fake_gemini, sleeps):
+    """Testa se o cliente repete os 500 do servidor e desiste depois das tentativas."""
+    errors = fake_gemini.stats["errors_500"]
+    fake_gemini.error_500 = 1.0
+    with pytest.raises(api_exceptions.InternalServerError):
+        _client().generate(_question("retry 500 sempre"))
+    assert fake_gemini.stats["errors_500"] - errors == LLM_MAX_RETRIES + 1
+
+
+def test_client_recovers_after_error(fake_gemini, sleeps):
+    """Testa se a resposta chega quando o servidor volta antes de acabar as tentativas."""
+    fake_gemini.error_429 = 1.0
+
+    # O servidor volta durante a espera da nova tentativa
+    def recover(seconds):
+        sleeps.append(seconds)
+        fake_gemini.error_429 = 0.0
+
+    rate_limit.time.sleep = recover
+    assert _client().generate(_question("retry 429 uma vez"))
+    # O 429 do servidor pede "retry in 1s"
+    assert sleeps[0] >= 1.0
+
+
+def test_client_stream_retries_before_first_chunk(fake_gemini, sleeps):
+    """Testa se o streaming também repete erros que chegam antes do primeiro pedaço."""
+    fake_gemini.error_500 = 1.0
+
+    def recover(seconds):
+        fake_gemini.error_500 = 0.0
+
+    rate_limit.time.sleep = recover
+    chunks = []
+    text = _client().generate(_question("retry 500 em streaming"), on_chunk=chunks.append)
+    assert text == "".join(chunks).strip()
@@ -0,0 +1,87 @@
+"""
+Testes da telemetria dos pedidos (telemetry.py).
+
+Execute: python -m pytest test_telemetry.py
+"""
+
+import json
+
+import pytest
+
+import telemetry
+from config import GEMINI_MODEL
+from llm import LLMClient
+from rate_limit import RateLimiter
+from telemetry import COUNTERS, Telemetry
+
+
+@pytest.fixture
+def recorder(tmp_path, monkeypatch):
+    """Telemetria ligada, gravando em uma pasta temporária e usada pelo llm."""
+    instance = Telemetry(tmp_path / "telemetria.jsonl", enabled=True, prometheus_path=None)
+    monkeypatch.setattr(telemetry, "_telemetry", instance)
+    return instance
+
+
+def test_turn_written_as_json_line(recorder):
+    """Testa se um pedido vira uma linha com as etapas em ms e os contadores."""
+    trace = recorder.begin("teste", listen=0.5)
+    recorder.record("llm_total", 0.25)
+    recorder.count("input_tokens", 120)
+    recorder.count("cache_hits")
+    recorder.end(trace)
+
+    [line] = recorder.path.read_text(encoding="utf-8").splitlines()
+    record = json.loads(line)
+    assert record["channel"] == "teste"
+    assert record["stages"]["listen"] == 500.0
+    assert record["stages"]["llm_total"] == 250.0
+    assert record["input_tokens"] == 120
+    assert record["cache_hits"] == 1
+
+
+def test_disabled_records_nothing(tmp_path):
+    """Testa se, desligada, a telemetria não mede nem grava."""
+    instance = Telemetry(tmp_path / "telemetria.jsonl", enabled=False)
+    assert instance.begin("teste") is None
+    instance.count("input_tokens", 10)
+    instance.end()
+    assert not instance.path.exists()
+
+
+def test_summary_percentiles_and_counters():
+    """Testa se o resumo calcula os percentis de cada etapa e soma os contadores."""
+    records = [{"stages": {"total": float(ms)}, "input_tokens": 10, "output_tokens": 5}
+               for ms in range(1, 101)]
+    records[0]["cancelled"] = True
+    summary = Telemetry(enabled=False).summarize(records)
+    assert summary["turns"] == 100
+    assert summary["cancelled"] == 1
+    assert summary["stages"]["total"]["p50"] == 51.0
+    assert summary["stages"]["total"]["p99"] == 100.0
+    assert summary["counters"]["input_tokens"] == 1000
+    assert summary["counters"]["output_tokens"] == 500
+
+
+def test_format_summary_tokens():
+    """Testa se a tabela mostra os tokens e o cache de respostas (não há cache de contexto)."""
+    records = [{"stages": {"total": 10.0}, "input_tokens": 300, "output_tokens": 40,
+                "cache_hits": 2}]
+    text = Telemetry(enabled=False).format_summary(records)
+    assert "tokens: 300 de entrada, 40 de saída; 2 respostas do cache" in text
+    assert "contexto" not in text
+    assert set(Telemetry(enabled=False).summarize(records)["counters"]) == set(COUNTERS)
+
+
+def test_llm_counts_tokens(recorder, fake_gemini):
+    """Testa se a resposta da IA soma os tokens de entrada e saída ao pedido ativo."""
+    client = LLMClient(GEMINI_MODEL, "Você é um assistente.", {"max_output_tokens": 100},
+                       limiter=RateLimiter(6000, 10**9))
+    trace = recorder.begin("teste")
+    client.generate([{"role": "user", "parts": ["contar tokens da telemetria"]}])
+    recorder.end(trace)
+
+    record = json.loads(recorder.path.read_text(encoding="utf-8"))
+    assert record["input_tokens"] > 0
+    assert record["output_tokens"] > 0
+    assert set(record) & set(COUNTERS) == {"input_tokens", "output_tokens"}
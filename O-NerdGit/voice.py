@@ -5,12 +5,41 @@ O Nerd - Módulo de Voz
 Gerencia entrada de áudio por microfone e saída de áudio sintetizado.
 Responsável pelo reconhecimento de fala e síntese de voz.
 
+Respostas da IA em streaming são faladas frase por frase: o assistente
+começa a falar assim que a primeira frase fica pronta, sem esperar o
+fim da geração.
+
+O assistente de voz é um só por processo e não abre o áudio ao ser
+criado: o microfone é aberto e calibrado (em segundo plano) quando a
+voz vai ser usada, e o TTS na primeira fala, com a voz guardada em disco.
+Depois de aberto, o microfone fica aberto: uma thread grava sem parar
+(audio_capture.py) e listen() só pega a próxima fala separada por ela.
+Com WAKE_WORD_LOCAL ligado e gravações de referência, a palavra de
+ativação é procurada no próprio computador (wake_word.py) e só o pedido vai para a nuvem.
+
+A fala não trava quem pede: speak() põe o texto em uma fila com
+prioridade e retorna na hora; uma thread só do TTS fala a fila em
+ordem. Confirmações curtas passam à frente das respostas longas,
+stop() descarta a fila e corta a fala atual (barge-in), e quem precisa
+esperar usa o Future retornado.
+
+Confirmações curtas são gravadas em WAV na primeira vez e depois só
+tocadas (phrase_cache.py); as frases fixas de PHRASE_CACHE_WARMUP são
+gravadas em segundo plano quando a fala está livre.
+
 Autor: O Nerd Development Team
 Versão: 2.0
 """
 
+import itertools
+import json
+import queue
+import re
 import sys
-from typing import Optional
+import threading
+import time
+from concurrent.futures import Future, wait
+from typing import Callable, Dict, List, Optional, Set
 
 try:
     import speech_recognition as sr
@@ -26,7 +55,92 @@ except ImportError:
     TEXT_TO_SPEECH_AVAILABLE = False
     print("[AVISO] pyttsx3 não instalado. Síntese de voz desabilitada.")
 
-from config import LANGUAGE, VOICE_RATE, VOICE_VOLUME, ASSISTANT_NAME
+from config import (
+    DATA_DIR, CAPTURE_CONTINUOUS,
+    LANGUAGE, VOICE_RATE, VOICE_VOLUME, ASSISTANT_NAME,
+    SPEECH_MIN_CHARS, SPEECH_MAX_CHARS, PHRASE_CACHE_WARMUP,
+)
+from audio_capture import MicrophoneCapture
+from wake_word import MIN_REQUEST_SECONDS, WakeWordDetector
+from phrase_cache import PhraseCache, get_phrase_cache, is_cacheable_phrase
+import telemetry
+
+# Voz do TTS escolhida na primeira sessão (procurar entre todas as vozes
+# instaladas é lento)
+VOICE_CACHE_FILE = DATA_DIR / "voice.json"
+
+# Fim de frase: pontuação final (com aspas/parênteses) seguida de espaço,
+# ou quebra de linha. "3.5" e "www.site.com" não quebram
+SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+|\n+")
+CLAUSE_END = re.compile(r"[,;:]\s+")
+
+# Prioridade na fila da fala (menor fala antes; mesma prioridade, ordem
+# de chegada): confirmações curtas passam à frente das respostas longas,
+# e a gravação de frases no cache espera a fila esvaziar
+PRIORITY_CONFIRMATION = 0
+PRIORITY_ANSWER = 10
+PRIORITY_BACKGROUND = 100
+
+
+class SentenceSplitter:
+    """
+    Junta pedaços de texto em streaming e devolve frases completas.
+
+    Frases muito curtas esperam a seguinte ("Oi! Tudo bem?" vira um só
+    trecho) e frases muito longas são cortadas na última vírgula.
+    """
+
+    def __init__(self, min_chars: int = SPEECH_MIN_CHARS,
+                 max_chars: int = SPEECH_MAX_CHARS):
+        """
+        Args:
+            min_chars: Tamanho mínimo de um trecho
+            max_chars: Tamanho a partir do qual corta em vírgulas
+        """
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> List[str]:
+        """
+        Acrescenta um pedaço e retorna as frases que ficaram completas.
+
+        Args:
+            chunk: Pedaço de texto recebido
+
+        Returns:
+            Frases prontas para falar (pode ser vazia)
+        """
+        self._buffer += chunk
+        sentences = []
+        cut = self._find_cut()
+        while cut:
+            sentence = self._buffer[:cut].strip()
+            self._buffer = self._buffer[cut:]
+            if sentence:
+                sentences.append(sentence)
+            cut = self._find_cut()
+        return sentences
+
+    def flush(self) -> List[str]:
+        """Retorna o texto que sobrou, ao fim da resposta."""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return [rest] if rest else []
+
+    def _find_cut(self) -> Optional[int]:
+        """Posição onde cortar o próximo trecho, ou None se ainda não há."""
+        for match in SENTENCE_END.finditer(self._buffer):
+            if len(self._buffer[:match.start()].strip()) >= self.min_chars:
+                return match.end()
+
+        if len(self._buffer) > self.max_chars:
+            cut = None
+            for match in CLAUSE_END.finditer(self._buffer, 0, self.max_chars):
+                if match.start() >= self.min_chars:
+                    cut = match.end()
+            return cut
+        return None
 
 
 class VoiceAssistant:
@@ -35,45 +149,190 @@ class VoiceAssistant:
     
     Encapsula a funcionalidade de:
     - Reconhecimento de fala via microfone
-    - Síntese de texto em fala
+    - Síntese de texto em fala, em uma thread própria com fila de prioridade
     """
     
     AUDIO_TIMEOUT = 5
     AUDIO_PHRASE_LIMIT = 10
     
     def __init__(self):
-        """Inicializa o assistente de voz e tenta configurar microfone e TTS."""
+        """
+        Prepara o assistente de voz sem abrir o áudio.
+        
+        O microfone só é aberto (e calibrado) na primeira vez que a voz é
+        usada, e o TTS na primeira fala; sessões só de texto não pagam nada.
+        """
         self.recognizer: Optional[sr.Recognizer] = None
         self.microphone: Optional[sr.Microphone] = None
+        self.capture: Optional[MicrophoneCapture] = None
+        self.wake_word = WakeWordDetector()
         self.engine: Optional[pyttsx3.engine.Engine] = None
+        self.first_audio_times: List[float] = []
+        # Duração (segundos) de captar e de reconhecer a última fala ouvida
+        self.last_listen: Dict[str, float] = {}
+        self.init_times: Dict[str, float] = {}
+        self.voice_from_cache = False
+        self.voice_id = ""
+        self.phrases: PhraseCache = get_phrase_cache()
         
-        self._initialize_speech_recognition()
-        self._initialize_text_to_speech()
+        self._microphone_checked = False
+        self._calibration: Optional[threading.Thread] = None
+        self._microphone_lock = threading.Lock()
+        self._tts_checked = False
+        self._tts_lock = threading.Lock()
+        
+        # Fila da fala: (prioridade, ordem, texto, pedido da telemetria,
+        # on_start, Future), consumida pela thread do TTS. Sem Future, o
+        # texto só é gravado no cache de frases
+        self._speech_queue: "queue.PriorityQueue[tuple]" = queue.PriorityQueue()
+        self._speech_order = itertools.count()
+        self._speech_worker: Optional[threading.Thread] = None
+        self._pending: Set[Future] = set()
+        self._pending_lock = threading.Lock()
+        # Falas pedidas até agora; quem ouve compara antes e depois para
+        # saber se o microfone pode ter captado a própria voz
+        self.speeches = 0
     
-    def _initialize_speech_recognition(self) -> None:
-        """Inicializa o reconhecedor de fala e microfone."""
-        if not SPEECH_RECOGNITION_AVAILABLE:
-            return
+    # ------------------------------------------------------------------
+    # Microfone (sob demanda, calibrado em segundo plano)
+    # ------------------------------------------------------------------
+    
+    def _initialize_speech_recognition(self) -> bool:
+        """
+        Cria o reconhecedor e o microfone na primeira chamada.
         
-        try:
-            self.recognizer = sr.Recognizer()
-            self.microphone = sr.Microphone()
+        Returns:
+            True se há microfone
+        """
+        with self._microphone_lock:
+            if self._microphone_checked:
+                return self.microphone is not None
+            self._microphone_checked = True
+            if not SPEECH_RECOGNITION_AVAILABLE:
+                return False
             
-            # Calibra o microfone para ruído ambiente
+            try:
+                self.recognizer = sr.Recognizer()
+                self.microphone = sr.Microphone()
+            except Exception as error:
+                print(f"[AVISO] Erro ao configurar microfone: {error}")
+                self.microphone = None
+            return self.microphone is not None
+    
+    def calibrate_in_background(self) -> None:
+        """
+        Calibra o microfone para o ruído ambiente em uma thread.
+        
+        Chamado quando a voz vai ser usada (modo voz); listen() espera a
+        calibração terminar antes de ouvir. Com CAPTURE_CONTINUOUS, a
+        thread é a da captura contínua, que calibra no começo da gravação.
+        """
+        if not self._initialize_speech_recognition():
+            return
+        with self._microphone_lock:
+            if self._calibration is not None or self.capture is not None:
+                return
+            if CAPTURE_CONTINUOUS:
+                self.capture = MicrophoneCapture(self.microphone, phrase_limit=self.AUDIO_PHRASE_LIMIT)
+                self.capture.start()
+                return
+            self._calibration = threading.Thread(target=self._calibrate,
+                                                 name="voice-calibration", daemon=True)
+            self._calibration.start()
+    
+    def _calibrate(self) -> None:
+        """Mede o ruído ambiente (roda na thread de calibração)."""
+        start = time.perf_counter()
+        try:
             with self.microphone as source:
                 self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            
-            print("[✓] Microfone configurado com sucesso")
+        except Exception as error:
+            print(f"[AVISO] Erro ao calibrar microfone: {error}")
+        self.init_times["calibration"] = time.perf_counter() - start
+    
+    # ------------------------------------------------------------------
+    # Síntese de voz (thread própria, alimentada por uma fila)
+    # ------------------------------------------------------------------
+    
+    def warm_up_speech(self) -> None:
+        """
+        Liga a thread da fala, que inicializa o TTS em segundo plano.
         
+        O pyttsx3 é criado e usado só nessa thread. A primeira fala liga
+        a thread sozinha; chamar antes adianta a inicialização.
+        """
+        if not self.is_tts_available():
+            return
+        with self._tts_lock:
+            if self._speech_worker is None:
+                self._speech_worker = threading.Thread(target=self._speech_loop,
+                                                       name="onerd-tts", daemon=True)
+                self._speech_worker.start()
+    
+    def _speech_loop(self) -> None:
+        """Fala os textos da fila em ordem de prioridade (roda na thread da fala)."""
+        self._initialize_text_to_speech()
+        self._tts_checked = True
+        if self.engine:
+            for phrase in PHRASE_CACHE_WARMUP:
+                self._queue_render(phrase)
+        
+        while True:
+            priority, _, text, trace, on_start, future = self._speech_queue.get()
+            if future is None:
+                self._render_phrase(text)
+                continue
+            # Falas descartadas por stop() já estão canceladas
+            if not future.set_running_or_notify_cancel():
+                continue
+            
+            if self.engine:
+                if on_start:
+                    on_start()
+                start = time.perf_counter()
+                cacheable = priority <= PRIORITY_CONFIRMATION and is_cacheable_phrase(text)
+                try:
+                    if not (cacheable and self._play_phrase(text)):
+                        self._say_now(text)
+                        if cacheable:
+                            self._queue_render(text)
+                except Exception as error:
+                    print(f"[AVISO] Erro ao falar: {error}")
+                if trace is not None:
+                    telemetry.record("speak", time.perf_counter() - start, trace)
+            future.set_result(None)
+    
+    def _say_now(self, text: str) -> None:
+        """Fala um texto e espera terminar (só na thread da fala)."""
+        self.engine.say(text)
+        self.engine.runAndWait()
+    
+    def _play_phrase(self, text: str) -> bool:
+        """Toca a gravação da frase, se houver (só na thread da fala)."""
+        path = self.phrases.lookup(text, self.voice_id)
+        return path is not None and self.phrases.play(path)
+    
+    def _queue_render(self, text: str) -> None:
+        """Agenda a gravação de uma frase para quando a fala estiver livre."""
+        if self.phrases.enabled and not self.phrases.contains(text, self.voice_id):
+            self._speech_queue.put((PRIORITY_BACKGROUND, next(self._speech_order),
+                                    text, None, None, None))
+    
+    def _render_phrase(self, text: str) -> None:
+        """Grava uma frase no cache (só na thread da fala)."""
+        if not self.engine or self.phrases.contains(text, self.voice_id):
+            return
+        try:
+            self.phrases.render(self.engine, text, self.voice_id)
         except Exception as error:
-            print(f"[AVISO] Erro ao configurar microfone: {error}")
-            self.microphone = None
+            print(f"[AVISO] Erro ao gravar frase: {error}")
     
     def _initialize_text_to_speech(self) -> None:
-        """Inicializa o motor de síntese de voz."""
+        """Inicializa o motor de síntese de voz, com a voz guardada em disco."""
         if not TEXT_TO_SPEECH_AVAILABLE:
             return
         
+        start = time.perf_counter()
         try:
             self.engine = pyttsx3.init()
             
@@ -81,58 +340,267 @@ class VoiceAssistant:
             self.engine.setProperty('rate', VOICE_RATE)
             self.engine.setProperty('volume', VOICE_VOLUME)
             
-            # Tenta encontrar voz em português
-            voices = self.engine.getProperty('voices')
-            portuguese_voice_found = False
-            
-            for voice in voices:
-                voice_name = voice.name.lower()
-                if 'brazil' in voice_name or 'português' in voice_name or 'portuguese' in voice_name:
-                    self.engine.setProperty('voice', voice.id)
-                    portuguese_voice_found = True
-                    break
-            
-            if portuguese_voice_found:
-                print("[✓] Voz em português configurada")
-            else:
-                print("[AVISO] Voz em português não encontrada. Usando voz padrão.")
+            # A voz escolhida antes evita percorrer todas as vozes instaladas
+            voice_id = _load_voice_id()
+            if voice_id is not None:
+                try:
+                    if voice_id:
+                        self.engine.setProperty('voice', voice_id)
+                    self.voice_from_cache = True
+                except Exception:
+                    voice_id = None
+            if voice_id is None:
+                voice_id = self._find_portuguese_voice()
+                _save_voice_id(voice_id)
+                if voice_id:
+                    print("[✓] Voz em português configurada")
+                else:
+                    print("[AVISO] Voz em português não encontrada. Usando voz padrão.")
+            self.voice_id = voice_id
         
         except Exception as error:
             print(f"[AVISO] Erro ao configurar TTS: {error}")
             self.engine = None
+        self.init_times["tts"] = time.perf_counter() - start
     
-    def speak(self, text: str) -> None:
+    def _find_portuguese_voice(self) -> str:
         """
-        Fala um texto em voz alta.
+        Procura uma voz em português entre as instaladas e a seleciona.
+        
+        Returns:
+            Id da voz, ou "" se não há (fica a voz padrão)
+        """
+        for voice in self.engine.getProperty('voices'):
+            voice_name = voice.name.lower()
+            if 'brazil' in voice_name or 'português' in voice_name or 'portuguese' in voice_name:
+                self.engine.setProperty('voice', voice.id)
+                return voice.id
+        return ""
+    
+    def speak(self, text: str, echo: bool = True, priority: int = PRIORITY_ANSWER,
+              on_start: Optional[Callable[[], None]] = None) -> Future:
+        """
+        Põe um texto na fila da fala e retorna na hora.
         
         Args:
             text: Texto a ser falado
+            echo: Exibe o texto no console antes de falar
+            priority: PRIORITY_CONFIRMATION passa à frente das respostas
+                que ainda estão na fila
+            on_start: Chamada (na thread da fala) quando o texto começa a
+                ser falado
+            
+        Returns:
+            Future resolvido quando a fala termina; cancelado se ela for
+            descartada por stop(). Sem TTS, já vem resolvido
         """
         # Exibe o texto no console
-        print(f"\n{ASSISTANT_NAME}: {text}")
+        if echo:
+            print(f"\n{ASSISTANT_NAME}: {text}")
+        
+        future: Future = Future()
+        if not self.is_tts_available():
+            future.set_result(None)
+            return future
+        
+        # A primeira fala liga a thread do TTS
+        self.warm_up_speech()
+        with self._pending_lock:
+            self._pending.add(future)
+            self.speeches += 1
+        future.add_done_callback(self._speech_done)
+        # O tempo de fala vai para o pedido que a pediu, mesmo que termine depois
+        trace = telemetry.get_telemetry().active()
+        self._speech_queue.put((priority, next(self._speech_order), text, trace, on_start, future))
+        return future
+    
+    def _speech_done(self, future: Future) -> None:
+        """Tira uma fala terminada (ou descartada) das pendentes."""
+        with self._pending_lock:
+            self._pending.discard(future)
+    
+    def flush(self) -> int:
+        """
+        Descarta as falas que ainda estão na fila (a fala atual continua).
         
-        # Tenta sintetizar a voz
+        Returns:
+            Quantas falas foram descartadas
+        """
+        dropped = 0
+        while True:
+            try:
+                item = self._speech_queue.get_nowait()
+            except queue.Empty:
+                return dropped
+            # Gravações pendentes (sem Future) são refeitas quando a frase voltar
+            if item[-1] is not None and item[-1].cancel():
+                dropped += 1
+    
+    def stop(self) -> None:
+        """Descarta a fila e interrompe a fala atual (barge-in; de qualquer thread)."""
+        self.flush()
         if not self.engine:
             return
         
         try:
-            self.engine.say(text)
-            self.engine.runAndWait()
-        except Exception as error:
-            print(f"[AVISO] Erro ao falar: {error}")
+            self._stop_now()
+        except Exception:
+            pass
+    
+    def _stop_now(self) -> None:
+        """Corta a fala em andamento no motor de voz (ou a frase gravada)."""
+        self.phrases.stop()
+        self.engine.stop()
+    
+    def when_idle(self) -> Future:
+        """
+        Future resolvido quando as falas já pedidas terminarem.
+        
+        Ex.: fechar o pedido na telemetria só depois da resposta falada,
+        sem travar o loop.
+        """
+        idle: Future = Future()
+        with self._pending_lock:
+            remaining = [len(self._pending)]
+            waiting = list(self._pending)
+        if not waiting:
+            idle.set_result(None)
+            return idle
+        
+        lock = threading.Lock()
+        
+        def done(_future: Future) -> None:
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                idle.set_result(None)
+        
+        for future in waiting:
+            future.add_done_callback(done)
+        return idle
+    
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera as falas já pedidas terminarem (ex.: antes de ouvir ou de sair).
+        
+        Args:
+            timeout: Limite de espera em segundos (padrão: sem limite)
+            
+        Returns:
+            True se não sobrou fala pendente
+        """
+        with self._pending_lock:
+            waiting = list(self._pending)
+        return not wait(waiting, timeout).not_done
     
-    def listen(self) -> Optional[str]:
+    def speak_stream(self, produce: Callable[[Callable[[str], None]], str],
+                     on_chunk: Optional[Callable[[str], None]] = None,
+                     started: Optional[float] = None) -> str:
+        """
+        Fala uma resposta em streaming, frase por frase.
+        
+        A geração roda nesta thread e cada frase pronta vai para a fila
+        da fala, que começa a falar enquanto o resto é gerado. Retorna ao
+        fim da geração, sem esperar a fala (use wait_idle para isso).
+        
+        Args:
+            produce: Recebe a função de pedaços, gera a resposta e
+                retorna o texto final (ex.: chat_with_ai com on_chunk)
+            on_chunk: Também recebe cada pedaço (ex.: TerminalPrinter)
+            started: Instante (time.perf_counter) em que o pedido começou,
+                para medir o tempo até a primeira fala
+            
+        Returns:
+            Texto final retornado por produce
+        """
+        if started is None:
+            started = time.perf_counter()
+        
+        splitter = SentenceSplitter()
+        streamed = []
+        first_audio = []
+        
+        def mark_first_audio() -> None:
+            # Roda na thread da fala
+            if not first_audio:
+                first_audio.append(time.perf_counter() - started)
+                self.first_audio_times.append(first_audio[0])
+        
+        def say(sentence: str) -> None:
+            self.speak(sentence, echo=False, on_start=mark_first_audio)
+        
+        def feed(chunk: str) -> None:
+            streamed.append(chunk)
+            if on_chunk:
+                on_chunk(chunk)
+            for sentence in splitter.feed(chunk):
+                say(sentence)
+        
+        try:
+            text = produce(feed)
+        finally:
+            for sentence in splitter.flush():
+                say(sentence)
+        
+        # Respostas que não vieram em pedaços (erro, recusa) são faladas inteiras
+        if "".join(streamed).strip() != text:
+            say(text)
+        return text
+    
+    def format_speech_stats(self) -> str:
+        """Resumo do tempo até a primeira fala, para exibir ao encerrar."""
+        times = self.first_audio_times
+        if not times:
+            summary = "nenhuma resposta falada em streaming nesta sessão"
+        else:
+            average = sum(times) / len(times)
+            summary = (f"{len(times)} respostas faladas, primeira fala em "
+                       f"{average * 1000:.0f} ms (média), {max(times) * 1000:.0f} ms (pior)")
+        if "tts" in self.init_times:
+            summary += (f"; TTS iniciado em {self.init_times['tts'] * 1000:.0f} ms"
+                        f"{' (voz guardada)' if self.voice_from_cache else ''}")
+        if "calibration" in self.init_times:
+            summary += f"; microfone calibrado em {self.init_times['calibration'] * 1000:.0f} ms"
+        wake_word = self.wake_word.get_stats()
+        if wake_word["checks"]:
+            summary += (f"; palavra de ativação: {wake_word['detections']} de "
+                        f"{wake_word['checks']} falas enviadas à nuvem, "
+                        f"{wake_word['cpu_ms_per_second']:.1f} ms de CPU por segundo de áudio")
+        if self.capture is not None:
+            capture = self.capture.get_stats()
+            summary += (f"; microfone contínuo: {capture['utterances']} falas, "
+                        f"{capture['chunk_us']:.0f} µs por bloco")
+        phrases = self.phrases.get_stats()
+        if phrases["hits"] or phrases["rendered"]:
+            summary += (f"; frases gravadas: {phrases['hits']} tocadas, "
+                        f"{phrases['rendered']} gravadas")
+        return summary
+    
+    def listen(self, flush: bool = False) -> Optional[str]:
         """
         Ouve áudio do microfone e converte para texto.
         
+        Args:
+            flush: Descarta o que foi captado antes da chamada (ex.: a
+                própria voz, com a captura contínua)
+        
         Returns:
             Texto reconhecido ou None se houver erro
         """
-        if not self.recognizer or not self.microphone:
+        if not self._initialize_speech_recognition():
             print("[ERRO] Microfone não disponível")
             return None
         
+        # A primeira escuta espera a calibração (ou a inicia, se ninguém iniciou)
+        self.calibrate_in_background()
+        if self.capture is not None:
+            return self._listen_captured(flush)
+        self._calibration.join()
+        
+        self.last_listen = {}
         try:
+            start = time.perf_counter()
             with self.microphone as source:
                 print("[🎤 Ouvindo...]")
                 
@@ -142,23 +610,8 @@ class VoiceAssistant:
                     timeout=self.AUDIO_TIMEOUT,
                     phrase_time_limit=self.AUDIO_PHRASE_LIMIT
                 )
-            
-            # Tenta reconhecer a fala
-            try:
-                text = self.recognizer.recognize_google(
-                    audio,
-                    language=LANGUAGE
-                )
-                print(f"✓ Você disse: {text}")
-                return text.lower()
-            
-            except sr.UnknownValueError:
-                print("[AVISO] Não consegui entender. Pode repetir?")
-                return None
-            
-            except sr.RequestError as error:
-                print(f"[ERRO] Problema com serviço de reconhecimento: {error}")
-                return None
+            self.last_listen["listen"] = time.perf_counter() - start
+            return self._recognize(audio)
         
         except sr.WaitTimeoutError:
             print("[AVISO] Tempo limite excedido. Nenhuma fala detectada.")
@@ -168,21 +621,128 @@ class VoiceAssistant:
             print(f"[ERRO] Problema ao ouvir: {error}")
             return None
     
+    def _listen_captured(self, flush: bool) -> Optional[str]:
+        """Pega a próxima fala da captura contínua e a reconhece."""
+        capture = self.capture
+        capture.calibrated.wait()
+        if capture.calibration_seconds is not None:
+            self.init_times["calibration"] = capture.calibration_seconds
+        if not capture.running:
+            print(f"[ERRO] Problema ao ouvir: {capture.error or 'captura encerrada'}")
+            return None
+        if flush:
+            capture.flush()
+        
+        self.last_listen = {}
+        start = time.perf_counter()
+        print("[🎤 Ouvindo...]")
+        utterance = capture.next_utterance(timeout=self.AUDIO_TIMEOUT)
+        if utterance is None:
+            if capture.running:
+                print("[AVISO] Tempo limite excedido. Nenhuma fala detectada.")
+            else:
+                print(f"[ERRO] Problema ao ouvir: {capture.error or 'captura encerrada'}")
+            return None
+        # A fala pode ter terminado antes da chamada (captada enquanto o O Nerd falava)
+        self.last_listen["listen"] = max(0.0, utterance.ended - start)
+        
+        audio = sr.AudioData(utterance.data, utterance.sample_rate, utterance.sample_width)
+        try:
+            return self._recognize(audio)
+        except Exception as error:
+            print(f"[ERRO] Problema ao ouvir: {error}")
+            return None
+    
+    def _recognize(self, audio: "sr.AudioData") -> Optional[str]:
+        """
+        Converte uma fala gravada em texto (serviço do Google).
+        
+        Com a detecção local, falas sem a palavra de ativação nem saem do
+        computador, e das outras só vai o pedido; o texto volta com
+        "o nerd" na frente, como se tivesse sido reconhecido.
+        """
+        prefix = ""
+        if self.wake_word.available:
+            start = time.perf_counter()
+            offset = self.wake_word.detect(audio.frame_data, audio.sample_rate, audio.sample_width)
+            self.last_listen["wake_word"] = time.perf_counter() - start
+            if offset is None:
+                return None
+            print("✓ Palavra de ativação detectada")
+            prefix = "o nerd "
+            audio = sr.AudioData(audio.frame_data[offset:], audio.sample_rate, audio.sample_width)
+            # Só "O Nerd": o resto é a pausa que encerrou a fala
+            if len(audio.frame_data) < audio.sample_rate * audio.sample_width * MIN_REQUEST_SECONDS:
+                return prefix.strip()
+        
+        try:
+            start = time.perf_counter()
+            text = self.recognizer.recognize_google(
+                audio,
+                language=LANGUAGE
+            )
+            self.last_listen["recognize"] = time.perf_counter() - start
+            print(f"✓ Você disse: {text}")
+            return prefix + text.lower()
+        
+        except sr.UnknownValueError:
+            if prefix:
+                # Chamou o O Nerd e não disse mais nada que se entendesse
+                return prefix.strip()
+            print("[AVISO] Não consegui entender. Pode repetir?")
+            return None
+        
+        except sr.RequestError as error:
+            print(f"[ERRO] Problema com serviço de reconhecimento: {error}")
+            return None
+    
+    def is_voice_installed(self) -> bool:
+        """Verifica se o reconhecimento de voz está instalado, sem abrir o microfone."""
+        return SPEECH_RECOGNITION_AVAILABLE
+    
     def is_voice_available(self) -> bool:
-        """Verifica se reconhecimento de voz está disponível."""
-        return SPEECH_RECOGNITION_AVAILABLE and self.microphone is not None
+        """Verifica se reconhecimento de voz está disponível (abre o microfone na primeira vez)."""
+        return SPEECH_RECOGNITION_AVAILABLE and self._initialize_speech_recognition()
     
     def is_tts_available(self) -> bool:
-        """Verifica se síntese de voz está disponível."""
-        return TEXT_TO_SPEECH_AVAILABLE and self.engine is not None
+        """Verifica se síntese de voz está disponível (ou ainda não foi inicializada)."""
+        return TEXT_TO_SPEECH_AVAILABLE and (self.engine is not None or not self._tts_checked)
+
+
+def _load_voice_id() -> Optional[str]:
+    """Voz escolhida em uma sessão anterior ("" = voz padrão), ou None."""
+    try:
+        return json.loads(VOICE_CACHE_FILE.read_text(encoding="utf-8"))["voice_id"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _save_voice_id(voice_id: str) -> None:
+    """Guarda a voz escolhida para as próximas sessões."""
+    try:
+        VOICE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        VOICE_CACHE_FILE.write_text(json.dumps({"voice_id": voice_id}), encoding="utf-8")
+    except OSError:
+        pass
+
+
+_voice_assistant: Optional[VoiceAssistant] = None
+_voice_lock = threading.Lock()
 
 
 def get_voice_assistant() -> VoiceAssistant:
     """
-    Cria e retorna uma instância do assistente de voz.
+    Retorna o assistente de voz compartilhado do processo.
+    
+    A criação não abre o áudio: o microfone e o TTS são inicializados
+    na primeira vez que forem usados.
     
     Returns:
-        Instância de VoiceAssistant pronta para uso
+        Instância de VoiceAssistant compartilhada
     """
-    return VoiceAssistant()
+    global _voice_assistant
+    with _voice_lock:
+        if _voice_assistant is None:
+            _voice_assistant = VoiceAssistant()
+    return _voice_assistant
 
@@ -0,0 +1,463 @@
+"""
+O Nerd - Palavra de Ativação Local
+==================================
+
+Procura "O Nerd"/"Oi Nerd" no começo de cada fala antes de mandá-la
+para o reconhecimento na nuvem. Conversas em volta são descartadas no
+próprio computador (sem rede, sem espera e sem gastar cota), e de uma
+fala com a palavra de ativação só o que vem depois dela é enviado.
+
+Como funciona (tudo em NumPy, sem modelo treinado):
+- cada trecho de áudio vira uma sequência de MFCC (25 ms a cada 10 ms);
+- as gravações de referência do usuário (WAKE_WORD_DIR) são comparadas
+  com o começo da fala por DTW de subsequência, com distância cosseno;
+- a menor distância abaixo de WAKE_WORD_THRESHOLD aceita a fala, e o
+  fim do melhor alinhamento marca onde começa o pedido.
+
+Experimental e desligado por padrão (WAKE_WORD_LOCAL): o projeto não
+traz gravações, então as taxas de erro e o limiar padrão não foram
+medidos com fala real. Cada usuário grava as próprias referências e o
+próprio corpus (wake_word_corpus/LEIA_ME.md) antes de ligar.
+
+Uso:
+    python wake_word.py gravar          # grava as referências pelo microfone
+    python wake_word.py avaliar         # falsos aceites/rejeições no corpus
+
+Autor: O Nerd Development Team
+Versão: 2.0
+"""
+
+import argparse
+import threading
+import time
+import wave
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from config import (
+    WAKE_WORD_LOCAL, WAKE_WORD_DIR, WAKE_WORD_THRESHOLD, WAKE_WORD_WINDOW,
+)
+
+# Corpus de avaliação: positive/ (começam com a palavra de ativação),
+# negative/ (não têm) e templates/ (só a palavra de ativação)
+CORPUS_DIR = Path(__file__).parent / "wake_word_corpus"
+
+FRAME_SECONDS = 0.025
+HOP_SECONDS = 0.010
+PRE_EMPHASIS = 0.97
+MEL_FILTERS = 26
+MFCC_COEFFS = 13
+
+# Quadros de uma referência abaixo disso (dB do mais forte) são silêncio
+TRIM_DB = 30.0
+
+# Depois da palavra de ativação, menos áudio que isso é só a pausa final
+MIN_REQUEST_SECONDS = 0.3
+
+
+def pcm_to_samples(data: bytes, sample_width: int) -> "np.ndarray":
+    """
+    Converte PCM (como no AudioData e no WAV) em amostras de -1 a 1.
+
+    Args:
+        data: Áudio PCM mono
+        sample_width: Bytes por amostra (1, 2 ou 4)
+
+    Returns:
+        Amostras em float32
+    """
+    if sample_width == 1:
+        return (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    if sample_width == 2:
+        return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    if sample_width == 4:
+        return np.frombuffer(data, dtype="<i4").astype(np.float32) / 2147483648.0
+    raise ValueError(f"Largura de amostra não suportada: {sample_width}")
+
+
+def read_wav(path: Path) -> Tuple["np.ndarray", int]:
+    """
+    Lê um WAV PCM (estéreo vira mono).
+
+    Returns:
+        (amostras de -1 a 1, taxa de amostragem)
+    """
+    with wave.open(str(path), "rb") as source:
+        channels = source.getnchannels()
+        samples = pcm_to_samples(source.readframes(source.getnframes()), source.getsampwidth())
+        rate = source.getframerate()
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def write_wav(path: Path, data: bytes, sample_rate: int, sample_width: int) -> None:
+    """Grava PCM mono em um WAV."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with wave.open(str(path), "wb") as output:
+        output.setnchannels(1)
+        output.setsampwidth(sample_width)
+        output.setframerate(sample_rate)
+        output.writeframes(data)
+
+
+@lru_cache(maxsize=8)
+def _mel_filterbank(sample_rate: int, nfft: int) -> "np.ndarray":
+    """Filtros triangulares na escala mel (MEL_FILTERS x nfft/2+1)."""
+    def to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def to_hz(mel):
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+    edges = to_hz(np.linspace(to_mel(0.0), to_mel(sample_rate / 2.0), MEL_FILTERS + 2))
+    bins = np.floor((nfft + 1) * edges / sample_rate).astype(int)
+    bank = np.zeros((MEL_FILTERS, nfft // 2 + 1), dtype=np.float32)
+    for index in range(MEL_FILTERS):
+        left, center, right = bins[index], bins[index + 1], bins[index + 2]
+        if center > left:
+            bank[index, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            bank[index, center:right] = (right - np.arange(center, right)) / (right - center)
+    return bank
+
+
+@lru_cache(maxsize=1)
+def _dct_matrix() -> "np.ndarray":
+    """DCT-II ortonormal que leva as energias mel aos coeficientes MFCC."""
+    n = np.arange(MEL_FILTERS)
+    k = np.arange(MFCC_COEFFS)[:, None]
+    matrix = np.cos(np.pi * k * (2 * n + 1) / (2 * MEL_FILTERS)) * np.sqrt(2.0 / MEL_FILTERS)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+def mfcc(samples: "np.ndarray", sample_rate: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Calcula os MFCC de um trecho de áudio.
+
+    Args:
+        samples: Amostras mono de -1 a 1
+        sample_rate: Taxa de amostragem
+
+    Returns:
+        (MFCC de cada quadro, quadros x MFCC_COEFFS; energia log de cada quadro)
+    """
+    frame = int(round(FRAME_SECONDS * sample_rate))
+    hop = int(round(HOP_SECONDS * sample_rate))
+    if len(samples) < frame:
+        return np.zeros((0, MFCC_COEFFS), dtype=np.float32), np.zeros(0, dtype=np.float32)
+
+    emphasized = np.append(samples[0], samples[1:] - PRE_EMPHASIS * samples[:-1])
+    count = 1 + (len(emphasized) - frame) // hop
+    indexes = np.arange(frame)[None, :] + hop * np.arange(count)[:, None]
+    frames = emphasized[indexes] * np.hamming(frame).astype(np.float32)
+
+    nfft = 1 << (frame - 1).bit_length()
+    power = np.abs(np.fft.rfft(frames, nfft)) ** 2 / nfft
+    energies = np.log(power @ _mel_filterbank(sample_rate, nfft).T + 1e-10)
+    return energies @ _dct_matrix().T, np.log(power.sum(axis=1) + 1e-10)
+
+
+def normalize(features: "np.ndarray") -> "np.ndarray":
+    """
+    Prepara os MFCC para a distância cosseno.
+
+    Tira a média de cada coeficiente (canal e microfone), descarta o c0
+    (volume) e deixa cada quadro com norma 1.
+    """
+    if not len(features):
+        return features[:, 1:]
+    centered = features[:, 1:] - features[:, 1:].mean(axis=0)
+    norms = np.linalg.norm(centered, axis=1, keepdims=True)
+    return centered / np.maximum(norms, 1e-8)
+
+
+def trim_silence(features: "np.ndarray", log_energy: "np.ndarray") -> "np.ndarray":
+    """Corta o silêncio do começo e do fim de uma referência."""
+    if not len(features):
+        return features
+    loud = np.nonzero(log_energy > log_energy.max() - TRIM_DB / 10.0 * np.log(10.0))[0]
+    return features[loud[0]:loud[-1] + 1]
+
+
+def subsequence_dtw(template: "np.ndarray", sequence: "np.ndarray") -> Tuple[float, int]:
+    """
+    Melhor alinhamento da referência em qualquer ponto da sequência.
+
+    O começo e o fim na sequência são livres; cada linha da matriz de
+    custo acumulado é calculada de uma vez (soma acumulada + mínimo
+    acumulado), sem laço sobre os quadros da sequência.
+
+    Args:
+        template: Referência normalizada (n x d)
+        sequence: Começo da fala normalizado (m x d)
+
+    Returns:
+        (distância média por quadro da referência, quadro onde o
+        alinhamento termina na sequência)
+    """
+    cost = np.clip(1.0 - template @ sequence.T, 0.0, None)
+    previous = np.zeros(sequence.shape[0], dtype=cost.dtype)
+    shifted = np.empty_like(previous)
+    for row in cost:
+        # Chegando de cima ou da diagonal...
+        shifted[0] = np.inf
+        shifted[1:] = previous[:-1]
+        arrival = np.minimum(previous, shifted)
+        # ...e andando na horizontal: D[j] = S[j] + min(arrival[k] - S[k-1]), k <= j
+        running = np.cumsum(row)
+        previous = running + np.minimum.accumulate(arrival - (running - row))
+    end = int(np.argmin(previous))
+    return float(previous[end] / len(template)), end
+
+
+class WakeWordDetector:
+    """
+    Detector da palavra de ativação por comparação com referências.
+
+    As referências são lidas de WAKE_WORD_DIR no primeiro uso. Sem numpy
+    ou sem referências, available é False e as falas seguem para a nuvem
+    como antes.
+    """
+
+    def __init__(self, folder: Path = WAKE_WORD_DIR, threshold: float = WAKE_WORD_THRESHOLD,
+                 window: float = WAKE_WORD_WINDOW, enabled: bool = WAKE_WORD_LOCAL):
+        """
+        Args:
+            folder: Pasta com as gravações de referência (WAV)
+            threshold: Distância máxima para aceitar
+            window: Segundos do começo da fala onde procurar
+            enabled: False desativa a detecção local
+        """
+        self.folder = Path(folder)
+        self.threshold = threshold
+        self.window = window
+        self.enabled = enabled and NUMPY_AVAILABLE
+        self.checks = 0
+        self.detections = 0
+        self.audio_seconds = 0.0
+        self.process_time = 0.0
+        self._templates: Optional[List["np.ndarray"]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def templates(self) -> List["np.ndarray"]:
+        """Referências normalizadas (lidas da pasta no primeiro uso)."""
+        with self._lock:
+            if self._templates is None:
+                self._templates = []
+                if self.enabled:
+                    for path in sorted(self.folder.glob("*.wav")):
+                        try:
+                            self._templates.append(template_from_samples(*read_wav(path)))
+                        except (OSError, EOFError, ValueError, wave.Error) as error:
+                            print(f"[AVISO] Referência ignorada ({path.name}): {error}")
+            return self._templates
+
+    @property
+    def available(self) -> bool:
+        """Verifica se a detecção local está ligada e tem referências."""
+        return self.enabled and bool(self.templates)
+
+    def add_template(self, samples: "np.ndarray", sample_rate: int) -> None:
+        """Acrescenta uma referência (ex.: recém-gravada ou do corpus)."""
+        template = template_from_samples(samples, sample_rate)
+        self.templates.append(template)
+
+    def score(self, samples: "np.ndarray", sample_rate: int,
+              templates: Optional[List["np.ndarray"]] = None) -> Tuple[float, int]:
+        """
+        Compara o começo de uma fala com as referências.
+
+        Args:
+            samples: Fala mono de -1 a 1
+            sample_rate: Taxa de amostragem
+            templates: Referências a usar (padrão: as da pasta)
+
+        Returns:
+            (menor distância, amostra onde a palavra de ativação termina);
+            distância infinita se não há referências ou áudio suficiente
+        """
+        start = time.perf_counter()
+        window = samples[:int(self.window * sample_rate)]
+        features, _ = mfcc(window, sample_rate)
+        sequence = normalize(features)
+        best, end_frame = float("inf"), 0
+        if len(sequence):
+            for template in (self.templates if templates is None else templates):
+                distance, end = subsequence_dtw(template, sequence)
+                if distance < best:
+                    best, end_frame = distance, end
+
+        hop = int(round(HOP_SECONDS * sample_rate))
+        frame = int(round(FRAME_SECONDS * sample_rate))
+        with self._lock:
+            self.checks += 1
+            self.audio_seconds += len(window) / sample_rate
+            self.process_time += time.perf_counter() - start
+        return best, min(len(samples), end_frame * hop + frame)
+
+    def detect(self, data: bytes, sample_rate: int, sample_width: int) -> Optional[int]:
+        """
+        Procura a palavra de ativação no começo de uma fala gravada.
+
+        Args:
+            data: Fala em PCM mono (ex.: AudioData.frame_data)
+            sample_rate: Taxa de amostragem
+            sample_width: Bytes por amostra
+
+        Returns:
+            Posição (bytes) onde começa o pedido, depois da palavra de
+            ativação, ou None se ela não foi dita
+        """
+        distance, end = self.score(pcm_to_samples(data, sample_width), sample_rate)
+        if distance > self.threshold:
+            return None
+        with self._lock:
+            self.detections += 1
+        return end * sample_width
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna falas verificadas, aceitas e o custo de CPU.
+
+        Returns:
+            Dicionário com checks, detections e cpu_ms_per_second (tempo
+            de processamento por segundo de áudio analisado)
+        """
+        with self._lock:
+            return {
+                "checks": self.checks,
+                "detections": self.detections,
+                "cpu_ms_per_second": (self.process_time / self.audio_seconds * 1000
+                                      if self.audio_seconds else 0.0),
+            }
+
+
+def template_from_samples(samples: "np.ndarray", sample_rate: int) -> "np.ndarray":
+    """Referência normalizada de uma gravação (sem o silêncio das pontas)."""
+    features, log_energy = mfcc(samples, sample_rate)
+    return normalize(trim_silence(features, log_energy))
+
+
+def evaluate(corpus: Path = CORPUS_DIR, threshold: float = WAKE_WORD_THRESHOLD) -> Dict[str, Any]:
+    """
+    Mede falsos aceites e falsas rejeições em um corpus de WAV.
+
+    As referências vêm de corpus/templates; sem elas, valem as gravadas
+    pelo usuário (WAKE_WORD_DIR), como no uso normal.
+
+    Args:
+        corpus: Pasta com positive/, negative/ e templates/
+        threshold: Distância máxima para aceitar
+
+    Returns:
+        Dicionário com far, frr, contagens, cpu_ms_per_second e o limiar
+        em que as duas taxas de erro se igualam (eer_threshold)
+    """
+    detector = WakeWordDetector(folder=corpus / "templates", threshold=threshold, enabled=True)
+    source = "corpus"
+    if not detector.templates:
+        detector = WakeWordDetector(threshold=threshold, enabled=True)
+        source = "gravadas pelo usuário"
+    positives = [read_wav(path) for path in sorted((corpus / "positive").glob("*.wav"))]
+    negatives = [read_wav(path) for path in sorted((corpus / "negative").glob("*.wav"))]
+    positive_scores = [detector.score(samples, rate)[0] for samples, rate in positives]
+    negative_scores = [detector.score(samples, rate)[0] for samples, rate in negatives]
+
+    def rates(limit: float) -> Tuple[float, float]:
+        far = sum(score <= limit for score in negative_scores) / max(len(negative_scores), 1)
+        frr = sum(score > limit for score in positive_scores) / max(len(positive_scores), 1)
+        return far, frr
+
+    far, frr = rates(threshold)
+    candidates = sorted(set(positive_scores + negative_scores) - {float("inf")})
+    eer_threshold = min(candidates, key=lambda limit: abs(rates(limit)[0] - rates(limit)[1]),
+                        default=None)
+    return {
+        "positives": len(positives),
+        "negatives": len(negatives),
+        "templates": len(detector.templates),
+        "templates_source": source,
+        "far": far,
+        "frr": frr,
+        "threshold": threshold,
+        "eer_threshold": eer_threshold,
+        "cpu_ms_per_second": detector.get_stats()["cpu_ms_per_second"],
+    }
+
+
+def record_templates(count: int, folder: Path = WAKE_WORD_DIR) -> None:
+    """Grava referências da palavra de ativação pelo microfone."""
+    try:
+        import speech_recognition as sr
+    except ImportError:
+        print("[ERRO] speech_recognition não instalado: não há como gravar pelo microfone.")
+        return
+    from audio_capture import MicrophoneCapture
+
+    capture = MicrophoneCapture(sr.Microphone(), phrase_limit=3.0)
+    capture.start()
+    capture.calibrated.wait()
+    saved = 0
+    try:
+        while saved < count and capture.running:
+            print(f"Diga \"O Nerd\" ou \"Oi Nerd\" e pare ({saved + 1}/{count})...")
+            utterance = capture.next_utterance(timeout=10)
+            if utterance is None:
+                continue
+            path = folder / f"referencia_{int(time.time())}_{saved + 1}.wav"
+            write_wav(path, utterance.data, utterance.sample_rate, utterance.sample_width)
+            print(f"[✓] Gravado em {path} ({utterance.duration:.1f} s)")
+            saved += 1
+    finally:
+        capture.stop()
+    if saved and not WAKE_WORD_LOCAL:
+        print("[i] A detecção local está desligada: depois de avaliar o corpus, "
+              "ative WAKE_WORD_LOCAL em config.py")
+
+
+def main() -> None:
+    """Linha de comando: gravar referências ou avaliar o detector no corpus."""
+    parser = argparse.ArgumentParser(description="O Nerd - Palavra de ativação local")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("gravar", help="Grava referências pelo microfone")
+    record.add_argument("-n", type=int, default=5, help="Quantas gravações (padrão: 5)")
+    check = commands.add_parser("avaliar", help="Falsos aceites e rejeições no corpus")
+    check.add_argument("--corpus", type=Path, default=CORPUS_DIR, help="Pasta do corpus")
+    check.add_argument("--limiar", type=float, default=WAKE_WORD_THRESHOLD,
+                       help="Distância máxima para aceitar")
+    args = parser.parse_args()
+
+    if not NUMPY_AVAILABLE:
+        print("[ERRO] numpy não instalado: pip install numpy")
+        return
+
+    if args.command == "gravar":
+        record_templates(args.n)
+        return
+
+    result = evaluate(args.corpus, args.limiar)
+    if not result["positives"] or not result["negatives"] or not result["templates"]:
+        print(f"[AVISO] Corpus incompleto em {args.corpus}: são precisos WAVs em positive/, "
+              "negative/ e templates/ (ou referências gravadas) - veja o LEIA_ME.md da pasta")
+        return
+    print(f"Palavra de ativação ({result['positives']} positivas, {result['negatives']} negativas, "
+          f"{result['templates']} referências {result['templates_source']})")
+    print(f"  falsos aceites (FAR)   : {result['far'] * 100:6.1f}% com limiar {result['threshold']:.3f}")
+    print(f"  falsas rejeições (FRR) : {result['frr'] * 100:6.1f}%")
+    if result["eer_threshold"] is not None:
+        print(f"  limiar com FAR = FRR   : {result['eer_threshold']:.3f}")
+    print(f"  CPU                    : {result['cpu_ms_per_second']:6.1f} ms por segundo de áudio")
+
+
+if __name__ == "__main__":
+    main()